@@ -0,0 +1,101 @@
+"""
+Benchmark of grid preprocessing methods used for upwinding and mesh size
+control: Grid.cell_face_as_dense() and Grid.cell_diameters().
+
+The current implementations are compared with the previous ones (kept in this
+file for reference), on a structured tetrahedral grid. Both wall clock time
+and peak memory (as measured by tracemalloc) are reported.
+
+Usage:
+    python grid_preprocessing.py [num_cells]
+
+The default grid has roughly 1e6 cells. Note that the legacy version of
+cell_diameters loops over all cells in Python, and takes several minutes for
+the default grid size.
+
+"""
+import itertools
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import scipy.sparse as sps
+
+import porepy as pp
+from porepy.utils import matrix_compression
+
+
+def legacy_cell_face_as_dense(g):
+    n = g.cell_faces.tocsr()
+    d = np.diff(n.indptr)
+    rows = matrix_compression.rldecode(np.arange(d.size), d)
+    data = n.indices + 1
+    cols = ((n.data + 1) / 2).astype("i")
+    neighs = sps.coo_matrix((data, (rows, cols))).todense()
+    neighs -= 1
+    neighs = neighs.transpose().A.astype("int")
+    return neighs[::-1]
+
+
+def legacy_cell_diameters(g):
+    def comb(n):
+        return np.fromiter(
+            itertools.chain.from_iterable(itertools.combinations(n, 2)), n.dtype
+        ).reshape((2, -1), order="F")
+
+    def diam(n):
+        return np.amax(
+            np.linalg.norm(g.nodes[:, n[0, :]] - g.nodes[:, n[1, :]], axis=0)
+        )
+
+    cn = g.cell_nodes()
+    return np.array(
+        [
+            diam(comb(cn.indices[cn.indptr[c] : cn.indptr[c + 1]]))
+            for c in np.arange(g.num_cells)
+        ]
+    )
+
+
+def measure(fct, g):
+    """ Run a function, return result, wall clock time and peak memory (MB)."""
+    tracemalloc.start()
+    tic = time.time()
+    result = fct(g)
+    elapsed = time.time() - tic
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def run(num_cells):
+    # A structured tetrahedral grid has 6 cells per Cartesian block
+    n = int(np.ceil((num_cells / 6) ** (1 / 3)))
+    g = pp.StructuredTetrahedralGrid([n, n, n], [1, 1, 1])
+    g.compute_geometry()
+    # Compute the cached cell-node map up front, so that it is not included
+    # in the measurements
+    g.cell_nodes()
+    print("Grid with " + str(g.num_cells) + " cells")
+
+    cases = [
+        (
+            "cell_face_as_dense",
+            legacy_cell_face_as_dense,
+            lambda g: g.cell_face_as_dense(),
+        ),
+        ("cell_diameters", legacy_cell_diameters, lambda g: g.cell_diameters()),
+    ]
+    for name, legacy, current in cases:
+        old, t_old, m_old = measure(legacy, g)
+        new, t_new, m_new = measure(current, g)
+        assert np.allclose(old, new)
+        print(name)
+        print("  legacy:  {:8.2f} s, peak memory {:8.1f} MB".format(t_old, m_old))
+        print("  current: {:8.2f} s, peak memory {:8.1f} MB".format(t_new, m_new))
+
+
+if __name__ == "__main__":
+    num_cells = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    run(num_cells)
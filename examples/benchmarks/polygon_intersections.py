@@ -0,0 +1,85 @@
+"""
+Benchmark of the computation of intersections between fracture polygons in 3d,
+pp.intersections.polygons_3d(), which is the main cost of
+FractureNetwork3d.find_intersections() for large stochastic networks.
+
+The fractures are regular polygons with uniformly distributed centers in the
+unit cube (a Poisson process), uniformly distributed orientations, and radii
+drawn from a power law distribution. The current implementation is compared
+with a version where the vectorized analysis of candidate pairs is switched
+off, so that all pairs with overlapping bounding boxes are analyzed one by
+one, as was previously done.
+
+Usage:
+    python polygon_intersections.py [num_fractures]
+
+"""
+import sys
+import time
+
+import numpy as np
+
+import porepy as pp
+from porepy.geometry import intersections
+
+
+def poisson_dfn(num_fractures, num_vertexes=8, r_min=0.02, r_max=0.3, seed=0):
+    """ Random fracture network in the unit cube."""
+    rng = np.random.RandomState(seed)
+    polys = []
+    for _ in range(num_fractures):
+        center = rng.rand(3)
+        normal = rng.randn(3)
+        normal /= np.linalg.norm(normal)
+        t_1 = np.cross(normal, rng.randn(3))
+        t_1 /= np.linalg.norm(t_1)
+        t_2 = np.cross(normal, t_1)
+        # Power law with exponent -2.5 between r_min and r_max
+        u = rng.rand()
+        radius = (r_min ** -1.5 + u * (r_max ** -1.5 - r_min ** -1.5)) ** (-1 / 1.5)
+        angles = np.linspace(0, 2 * np.pi, num_vertexes, endpoint=False) + rng.rand()
+        polys.append(
+            center.reshape((-1, 1))
+            + radius * (np.outer(t_1, np.cos(angles)) + np.outer(t_2, np.sin(angles)))
+        )
+    return polys
+
+
+def no_classification(polys, centers, normals, pairs, *args, **kwargs):
+    num_pairs = pairs.shape[1]
+    return (
+        np.ones(num_pairs, dtype=np.bool),
+        np.zeros(num_pairs, dtype=np.bool),
+        np.zeros((3, num_pairs, 2)),
+        -np.ones((num_pairs, 2), dtype=np.int),
+        -np.ones((num_pairs, 2), dtype=np.int),
+    )
+
+
+def run(num_fractures):
+    polys = poisson_dfn(num_fractures)
+    print("Network with " + str(num_fractures) + " fractures")
+
+    tic = time.time()
+    current = pp.intersections.polygons_3d(polys)
+    t_current = time.time() - tic
+
+    classify = intersections._classify_polygon_pairs
+    intersections._classify_polygon_pairs = no_classification
+    try:
+        tic = time.time()
+        pairwise = pp.intersections.polygons_3d(polys)
+        t_pairwise = time.time() - tic
+    finally:
+        intersections._classify_polygon_pairs = classify
+
+    assert current[3] == pairwise[3]
+    assert np.allclose(current[0], pairwise[0])
+    print("Intersecting pairs: " + str(len(current[3])))
+    print("  pair by pair: {:8.2f} s".format(t_pairwise))
+    print("  vectorized:   {:8.2f} s".format(t_current))
+
+
+if __name__ == "__main__":
+    num_fractures = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    run(num_fractures)
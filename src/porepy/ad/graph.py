@@ -0,0 +1,560 @@
+""" Compilation of Ad expressions into reusable expression graphs.
+
+Residuals written in terms of Ad_array are evaluated eagerly: every
+arithmetic operation computes a new value and a new sparse Jacobian. In a
+Newton loop, the same sequence of operations is repeated in every iteration,
+and the sparsity pattern of all intermediate Jacobians is the same each time.
+
+This module provides a tracing mode for such residuals. The residual function
+is called once with symbolic Expression objects in place of the Ad variables,
+and the recorded operations form a directed acyclic graph. The graph is then
+compiled: The sparsity pattern of every intermediate Jacobian is computed once,
+together with index maps that express each Jacobian operation as arithmetic on
+the data arrays of fixed-pattern csr matrices. Subsequent evaluations only
+update preallocated value and data buffers. Subexpressions that do not depend
+on quantities that have changed since the previous evaluation (e.g. terms that
+depend only on the previous time step) are not recomputed.
+
+Example:
+    >>> def f(p, p0):
+    ...     return (ad.exp(p) - ad.exp(p0)) / dt + div * (flux * p)
+    >>> residual = ad.trace(f, [p_init], parameters=[p_init])
+    >>> eq = residual.evaluate([p], [p0])   # eq is an Ad_array
+
+Supported operations on Expressions are those of Ad_array: +, -, * and / with
+scalars, numpy arrays and other Expressions, ** with scalar or Expression
+exponents, left multiplication with scipy sparse matrices, and the functions
+exp, log, abs and sign from porepy.ad.functions, as well as
+porepy.ad.utils.concatenate. Mixing Expressions and Ad_arrays in the same
+operation is not supported.
+
+"""
+import numpy as np
+import scipy.sparse as sps
+
+from porepy.ad.forward_mode import Ad_array
+from porepy.utils.mcolon import mcolon
+
+
+class Expression(object):
+    """ Node in a traced Ad expression graph.
+
+    Expressions are created by trace(), and by arithmetic operations on other
+    Expressions inside the traced function. They should not be constructed
+    directly by the user.
+
+    Attributes:
+        op (str): Name of the operation represented by the node.
+        children (list of Expression): Operands of the operation.
+        data: Operation specific data, e.g. the matrix in a matrix-vector
+            product, or the index of a variable or parameter.
+        size (int): Number of elements in the value of the node.
+        has_jac (boolean): Whether the node has a non-zero derivative with
+            respect to the variables.
+
+    """
+
+    # Make numpy defer to the reflected operators of the Expression when an
+    # expression is combined with an np.ndarray (e.g. array * expression).
+    __array_ufunc__ = None
+
+    def __init__(self, op, children=None, data=None, size=None, has_jac=None):
+        self.op = op
+        self.children = [] if children is None else children
+        self.data = data
+
+        if size is None:
+            size = _broadcast_size([c.size for c in self.children])
+        self.size = size
+
+        if has_jac is None:
+            has_jac = any(c.has_jac for c in self.children)
+        self.has_jac = has_jac
+
+        # Numerical state, set by CompiledExpression
+        self.val = None
+        self.jac = None
+
+    def __add__(self, other):
+        return Expression("add", [self, _wrap(other)])
+
+    def __radd__(self, other):
+        return Expression("add", [_wrap(other), self])
+
+    def __sub__(self, other):
+        return self + (-_wrap(other))
+
+    def __rsub__(self, other):
+        return _wrap(other) + (-self)
+
+    def __neg__(self):
+        return Expression("neg", [self])
+
+    def __mul__(self, other):
+        if sps.issparse(other):
+            raise ValueError("Only left multiplication with matrices is supported")
+        return Expression("mul", [self, _wrap(other)])
+
+    def __rmul__(self, other):
+        if sps.issparse(other):
+            if other.shape[1] != self.size:
+                raise ValueError("Dimension mismatch in matrix-vector product")
+            return Expression(
+                "matmul",
+                [self],
+                data=sps.csr_matrix(other, dtype=np.float),
+                size=other.shape[0],
+            )
+        return Expression("mul", [_wrap(other), self])
+
+    def __pow__(self, other):
+        return Expression("pow", [self, _wrap(other)])
+
+    def __rpow__(self, other):
+        return Expression("pow", [_wrap(other), self])
+
+    def __truediv__(self, other):
+        return self * _wrap(other) ** -1
+
+    def __rtruediv__(self, other):
+        return _wrap(other) * self ** -1
+
+    def exp(self):
+        return Expression("exp", [self])
+
+    def log(self):
+        return Expression("log", [self])
+
+    def abs(self):
+        return Expression("abs", [self])
+
+    def sign(self):
+        return Expression("sign", [self], has_jac=False)
+
+
+def concatenate(expressions):
+    """ Concatenate a sequence of Expressions (and arrays) into a single one.
+
+    Parameters:
+        expressions (list): Expressions, or objects that can be cast to
+            np.ndarray.
+
+    Returns:
+        Expression: The stacked expression.
+
+    """
+    children = [_wrap(e) for e in expressions]
+    return Expression("concat", children, size=sum(c.size for c in children))
+
+
+def trace(fun, variables, parameters=None):
+    """ Record an Ad residual function as a compiled expression graph.
+
+    The function is called once, with Expressions in place of the variables
+    and parameters. The result can be evaluated repeatedly for new values
+    through CompiledExpression.evaluate().
+
+    Parameters:
+        fun (callable): Function of the form fun(*variables, *parameters),
+            which returns an Ad_array-like expression, or a list of such
+            expressions that will be concatenated.
+        variables (np.ndarray or list of np.ndarray): Values of the variables
+            the Jacobian is computed with respect to. Only the sizes are used
+            during tracing. The ordering of the Jacobian columns is the same
+            as for initAdArrays(variables).
+        parameters (np.ndarray or list of np.ndarray, optional): Values of
+            quantities that enter the residual, but are not differentiated
+            with respect to, e.g. the solution at the previous time step.
+            Only the sizes are used during tracing.
+
+    Returns:
+        CompiledExpression: The compiled residual.
+
+    """
+    variables = _as_list(variables)
+    parameters = _as_list(parameters)
+
+    num_dofs = sum(np.asarray(v).size for v in variables)
+
+    offset = 0
+    var_expr = []
+    for i, v in enumerate(variables):
+        size = np.asarray(v).size
+        var_expr.append(
+            Expression("variable", data=(i, offset), size=size, has_jac=True)
+        )
+        offset += size
+
+    par_expr = []
+    for i, v in enumerate(parameters):
+        par_expr.append(
+            Expression("parameter", data=i, size=np.asarray(v).size, has_jac=False)
+        )
+
+    result = fun(*(var_expr + par_expr))
+    if isinstance(result, (list, tuple)):
+        result = concatenate(result)
+    else:
+        result = _wrap(result)
+
+    return CompiledExpression(result, var_expr, par_expr, num_dofs)
+
+
+class CompiledExpression(object):
+    """ A traced Ad expression, prepared for repeated evaluation.
+
+    The sparsity pattern of all intermediate Jacobians, and the buffers holding
+    their values, are computed when the object is constructed. An evaluation
+    only updates these buffers, for the nodes that depend on variables or
+    parameters whose values have changed since the previous evaluation.
+
+    Attributes:
+        root (Expression): The output node of the graph.
+        num_dofs (int): Number of columns in the Jacobian.
+        nodes (list of Expression): All nodes in the graph, in topological
+            order.
+
+    """
+
+    def __init__(self, root, variables, parameters, num_dofs):
+        """ Compile an expression graph.
+
+        Usually invoked through trace().
+
+        Parameters:
+            root (Expression): Output node.
+            variables (list of Expression): Variable nodes of the graph.
+            parameters (list of Expression): Parameter nodes of the graph.
+            num_dofs (int): Total size of the variables.
+
+        """
+        self.root = root
+        self.variables = variables
+        self.parameters = parameters
+        self.num_dofs = num_dofs
+
+        self.nodes = _topological_sort(root)
+        # Leaves not reachable from the root are still needed for bookkeeping
+        self._leaves = variables + parameters
+
+        self._plans = {}
+        for node in self._leaves + self.nodes:
+            if id(node) in self._plans:
+                continue
+            self._plans[id(node)] = self._compile_node(node)
+
+        self._evaluated = False
+
+    def evaluate(self, variables, parameters=None, copy=True):
+        """ Evaluate the expression for new values of variables and parameters.
+
+        Parameters:
+            variables (np.ndarray or list of np.ndarray): Values of the
+                variables, in the same order as when traced.
+            parameters (np.ndarray or list of np.ndarray, optional): Values of
+                the parameters, in the same order as when traced.
+            copy (boolean, optional): If False, the returned Ad_array shares
+                memory with the internal buffers, and will be overwritten by
+                the next call to evaluate(). Defaults to True.
+
+        Returns:
+            Ad_array: Value and Jacobian of the expression.
+
+        """
+        variables = _as_list(variables)
+        parameters = _as_list(parameters)
+        if len(variables) != len(self.variables) or len(parameters) != len(
+            self.parameters
+        ):
+            raise ValueError("Number of arguments differ from the traced ones")
+
+        dirty = set()
+        for node, value in zip(
+            self.variables + self.parameters, variables + parameters
+        ):
+            value = np.asarray(value, dtype=np.float).ravel()
+            if value.size != node.size:
+                raise ValueError("Size of argument differs from the traced one")
+            if not self._evaluated or not np.array_equal(value, node.val):
+                node.val[:] = value
+                dirty.add(id(node))
+
+        for node in self.nodes:
+            if node.op in ("variable", "parameter", "constant"):
+                continue
+            if self._evaluated and not any(id(c) in dirty for c in node.children):
+                continue
+            self._evaluate_node(node)
+            dirty.add(id(node))
+
+        self._evaluated = True
+
+        root = self.root
+        if root.has_jac:
+            jac = root.jac
+        else:
+            jac = sps.csr_matrix((root.size, self.num_dofs))
+        if copy:
+            return Ad_array(root.val.copy(), jac.copy())
+        return Ad_array(root.val, jac)
+
+    # ---------- Compilation
+
+    def _compile_node(self, node):
+        """ Allocate buffers, and compute the Jacobian pattern and index maps
+        for a node. Children are compiled before their parents.
+        """
+        op = node.op
+        if op == "constant":
+            node.val = node.data
+            return None
+
+        node.val = np.zeros(node.size)
+
+        if op == "variable":
+            _, offset = node.data
+            n = node.size
+            node.jac = sps.csr_matrix(
+                (np.ones(n), np.arange(offset, offset + n), np.arange(n + 1)),
+                shape=(n, self.num_dofs),
+            )
+            return None
+        if op == "parameter" or not node.has_jac:
+            return None
+
+        if op == "matmul":
+            child = node.children[0]
+            node.jac, mapping = _product_pattern(node.data, child.jac)
+            return mapping
+        if op == "concat":
+            node.jac = _stack_pattern(
+                [c.jac if c.has_jac else None for c in node.children],
+                [c.size for c in node.children],
+                self.num_dofs,
+            )
+            return None
+
+        # All other operations are sums of row-scaled Jacobians of the children
+        jac_children = [c for c in node.children if c.has_jac]
+        if any(c.size != node.size for c in jac_children):
+            raise ValueError("Broadcasting of Ad variables is not supported")
+        node.jac, plan = _scaled_sum_pattern(
+            [c.jac for c in jac_children], node.size, self.num_dofs
+        )
+        return plan
+
+    # ---------- Evaluation
+
+    def _evaluate_node(self, node):
+        op = node.op
+        ch = node.children
+        val = node.val
+
+        if op == "add":
+            np.add(ch[0].val, ch[1].val, out=val)
+            scales = [1, 1]
+        elif op == "neg":
+            np.negative(ch[0].val, out=val)
+            scales = [-1]
+        elif op == "mul":
+            np.multiply(ch[0].val, ch[1].val, out=val)
+            scales = [ch[1].val, ch[0].val]
+        elif op == "pow":
+            a, b = ch[0].val, ch[1].val
+            np.power(a, b, out=val)
+            scales = [None, None]
+            if ch[0].has_jac:
+                scales[0] = b * a ** (b - 1)
+            if ch[1].has_jac:
+                scales[1] = val * np.log(a)
+        elif op == "exp":
+            np.exp(ch[0].val, out=val)
+            scales = [val]
+        elif op == "log":
+            np.log(ch[0].val, out=val)
+            scales = [1 / ch[0].val]
+        elif op == "abs":
+            np.abs(ch[0].val, out=val)
+            scales = [np.sign(ch[0].val)]
+        elif op == "sign":
+            np.sign(ch[0].val, out=val)
+            return
+        elif op == "matmul":
+            val[:] = node.data * ch[0].val
+            if node.has_jac:
+                node.jac.data[:] = self._plans[id(node)] * ch[0].jac.data
+            return
+        elif op == "concat":
+            offset = 0
+            for c in ch:
+                val[offset : offset + c.size] = c.val
+                offset += c.size
+            if node.has_jac:
+                offset = 0
+                for c in ch:
+                    if c.has_jac:
+                        nnz = c.jac.data.size
+                        node.jac.data[offset : offset + nnz] = c.jac.data
+                        offset += nnz
+            return
+        else:
+            raise ValueError("Unknown operation " + op)
+
+        if not node.has_jac:
+            return
+        jac_scales = [s for c, s in zip(ch, scales) if c.has_jac]
+        jac_data = [c.jac.data for c in ch if c.has_jac]
+        self._plans[id(node)].apply(jac_data, jac_scales, node.jac.data)
+
+
+class _ScaledSumPlan(object):
+    """ Evaluation plan for a Jacobian of the form sum_i diag(s_i) * J_i,
+    where all J_i have fixed sparsity patterns.
+    """
+
+    def __init__(self, rows, maps, nnz):
+        # Row index of each nonzero in the child Jacobians
+        self.rows = rows
+        # Position of the child nonzeros in the data of the result. None
+        # signifies that the pattern of the result equals that of the child.
+        self.maps = maps
+        self.buffers = [np.empty(r.size) for r in rows]
+        self.nnz = nnz
+
+    def apply(self, data, scales, out):
+        if len(data) > 1:
+            out.fill(0)
+        for d, s, rows, ind, buf in zip(
+            data, scales, self.rows, self.maps, self.buffers
+        ):
+            if np.asarray(s).size == 1:
+                np.multiply(d, s, out=buf)
+            else:
+                np.take(s, rows, out=buf)
+                buf *= d
+            if ind is None:
+                out[:] = buf
+            else:
+                out[ind] += buf
+
+
+def _scaled_sum_pattern(jacs, size, num_dofs):
+    """ Pattern of sum_i diag(s_i) * J_i, and the plan to evaluate it."""
+    rows = [np.repeat(np.arange(j.shape[0]), np.diff(j.indptr)) for j in jacs]
+    if len(jacs) == 1:
+        j = jacs[0]
+        jac = sps.csr_matrix(
+            (np.zeros(j.indices.size), j.indices.copy(), j.indptr.copy()),
+            shape=(size, num_dofs),
+        )
+        return jac, _ScaledSumPlan(rows, [None], j.indices.size)
+
+    lin = [r * num_dofs + j.indices for r, j in zip(rows, jacs)]
+    union = np.unique(np.hstack(lin))
+    maps = [np.searchsorted(union, l) for l in lin]
+    jac = _csr_from_linear_index(union, size, num_dofs)
+    return jac, _ScaledSumPlan(rows, maps, union.size)
+
+
+def _product_pattern(A, J):
+    """ Pattern of the product A * J, with A a constant matrix.
+
+    Since A is constant, the data of the product is a linear function of the
+    data of J. The function returns the (empty) product matrix, together with
+    the sparse matrix M so that (A * J).data = M * J.data.
+    """
+    A = A.tocsr()
+    A.sort_indices()
+    num_dofs = J.shape[1]
+
+    a_rows = np.repeat(np.arange(A.shape[0]), np.diff(A.indptr))
+    a_cols = A.indices
+    counts = J.indptr[a_cols + 1] - J.indptr[a_cols]
+    # Position in J.data of all contributions
+    j_pos = mcolon(J.indptr[a_cols], J.indptr[a_cols + 1])
+    rows = np.repeat(a_rows, counts)
+    weights = np.repeat(A.data, counts)
+
+    lin = rows * num_dofs + J.indices[j_pos]
+    union, out_pos = np.unique(lin, return_inverse=True)
+    jac = _csr_from_linear_index(union, A.shape[0], num_dofs)
+    mapping = sps.csr_matrix(
+        (weights, (out_pos, j_pos)), shape=(union.size, J.indices.size)
+    )
+    return jac, mapping
+
+
+def _stack_pattern(jacs, sizes, num_dofs):
+    """ Pattern of the vertical concatenation of Jacobians. None signifies a
+    block with no Jacobian.
+    """
+    indptr = [np.zeros(1, dtype=np.int)]
+    indices = []
+    offset = 0
+    for j, n in zip(jacs, sizes):
+        if j is None:
+            indptr.append(np.full(n, offset, dtype=np.int))
+        else:
+            indptr.append(j.indptr[1:] + offset)
+            indices.append(j.indices)
+            offset += j.indices.size
+    indices = np.hstack(indices) if len(indices) > 0 else np.zeros(0, dtype=np.int)
+    return sps.csr_matrix(
+        (np.zeros(indices.size), indices, np.hstack(indptr)),
+        shape=(sum(sizes), num_dofs),
+    )
+
+
+def _csr_from_linear_index(lin, num_rows, num_cols):
+    """ Empty csr matrix with nonzeros in the (sorted) linear indices lin."""
+    rows = lin // num_cols
+    cols = lin % num_cols
+    indptr = np.hstack((0, np.cumsum(np.bincount(rows, minlength=num_rows))))
+    return sps.csr_matrix(
+        (np.zeros(lin.size), cols, indptr), shape=(num_rows, num_cols)
+    )
+
+
+def _topological_sort(root):
+    """ Post-order traversal of the graph, each node listed once."""
+    order = []
+    visited = set()
+    stack = [(root, False)]
+    while len(stack) > 0:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if id(node) in visited:
+            continue
+        visited.add(id(node))
+        stack.append((node, True))
+        for c in reversed(node.children):
+            if id(c) not in visited:
+                stack.append((c, False))
+    return order
+
+
+def _wrap(other):
+    if isinstance(other, Expression):
+        return other
+    if isinstance(other, Ad_array):
+        raise ValueError("Ad_arrays can not be combined with traced expressions")
+    val = np.atleast_1d(np.asarray(other, dtype=np.float)).ravel()
+    return Expression("constant", data=val, size=val.size, has_jac=False)
+
+
+def _broadcast_size(sizes):
+    sizes = set(sizes)
+    sizes.discard(1)
+    if len(sizes) > 1:
+        raise ValueError("Incompatible sizes in Ad expression: " + str(sizes))
+    return sizes.pop() if len(sizes) > 0 else 1
+
+
+def _as_list(values):
+    if values is None:
+        return []
+    if isinstance(values, (list, tuple)):
+        return list(values)
+    return [values]
@@ -2,9 +2,13 @@ import numpy as np
 import scipy.sparse as sps
 
 from porepy.ad.forward_mode import Ad_array, initAdArrays
+from porepy.ad import graph
 
 
 def concatenate(variables, axis=0):
+    if any(isinstance(var, graph.Expression) for var in variables):
+        return graph.concatenate(variables)
+
     vals = [var.val for var in variables]
     jacs = np.array([var.jac for var in variables])
 
@@ -1,13 +1,70 @@
+import itertools
 import numpy as np
-import csv
 
 import porepy as pp
 
 from porepy.grids.gmsh import gmsh_interface
 from porepy.fracs import meshing, simplex
-from porepy.fracs.fractures import Fracture, EllipticFracture
+from porepy.fracs.fractures import create_fractures, create_elliptic_fractures
+from porepy.utils.mcolon import mcolon
 from porepy.utils.setmembership import unique_columns_tol
 
+# Number of lines read and parsed at a time
+CHUNK_SIZE = 2 ** 18
+
+
+def _read_rows(f, delimiter=",", chunk_size=CHUNK_SIZE):
+    """ Read rows of numbers from a text file, in chunks of lines.
+
+    Blank lines, and text after a '#', are ignored.
+
+    Parameters:
+        f (file): File opened for reading.
+        delimiter (str, optional): Separator of the values. None means any
+            whitespace. Defaults to ','.
+        chunk_size (int, optional): Number of lines read at a time.
+
+    Yields:
+        np.ndarray (double): The values of the rows in a chunk, one row after
+            the other.
+        np.ndarray (int): The number of values in each row of the chunk.
+
+    Raises:
+        ValueError if the rows contain something else than numbers.
+
+    """
+    while True:
+        lines = list(itertools.islice(f, chunk_size))
+        if len(lines) == 0:
+            return
+        lines = [l.split("#", 1)[0].strip() for l in lines]
+        lines = [l for l in lines if l]
+        if len(lines) == 0:
+            continue
+
+        if delimiter is None or delimiter.isspace():
+            counts = np.array([len(l.split()) for l in lines], dtype=np.int)
+            values = np.fromstring(" ".join(lines), sep=" ")
+        else:
+            counts = np.array([l.count(delimiter) + 1 for l in lines], dtype=np.int)
+            values = np.fromstring(delimiter.join(lines), sep=delimiter)
+        if values.size != counts.sum():
+            raise ValueError("Could not read rows of numbers")
+        yield values, counts
+
+
+def _read_domain(f):
+    # Read a domain given as a row X_MIN, Y_MIN, Z_MIN, X_MAX, Y_MAX, Z_MAX
+    domain = np.fromstring(f.readline(), sep=",")
+    return {
+        "xmin": domain[0],
+        "xmax": domain[3],
+        "ymin": domain[1],
+        "ymax": domain[4],
+        "zmin": domain[2],
+        "zmax": domain[5],
+    }
+
 
 def network_3d_from_csv(file_name, has_domain=True, tol=1e-4):
     """
@@ -33,37 +90,17 @@ def network_3d_from_csv(file_name, has_domain=True, tol=1e-4):
     # The first line of the csv file defines the bounding box for the domain
 
     frac_list = []
-    # Extract the data from the csv file
+    # Extract the data from the csv file, and create the fractures of a chunk
+    # of rows together
     with open(file_name, "r") as csv_file:
-        spam_reader = csv.reader(csv_file, delimiter=",")
-
         # Read the domain first
         if has_domain:
-            domain = np.asarray(next(spam_reader), dtype=np.float)
-            domain = {
-                "xmin": domain[0],
-                "xmax": domain[3],
-                "ymin": domain[1],
-                "ymax": domain[4],
-                "zmin": domain[2],
-                "zmax": domain[5],
-            }
-
-        for row in spam_reader:
-            # If the line starts with a '#', we consider this a comment
-            if row[0][0] == "#":
-                continue
-
-            # Read the points
-            pts = np.asarray(row, dtype=np.float)
-            if not pts.size % 3 == 0:
-                raise ValueError("Points are always 3d")
-
-            # Skip empty lines. Useful if the file ends with a blank line.
-            if pts.size == 0:
-                continue
+            domain = _read_domain(csv_file)
 
-            frac_list.append(Fracture(pts.reshape((3, -1), order="F")))
+        for data, counts in _read_rows(csv_file):
+            if np.any(counts % 3 != 0):
+                raise ValueError("Points are always 3d")
+            frac_list += create_fractures(data.reshape((-1, 3)).T, counts // 3)
 
     # Create the network
     if has_domain:
@@ -99,47 +136,20 @@ def elliptic_network_3d_from_csv(file_name, has_domain=True, tol=1e-4, degrees=F
     # The first line of the csv file defines the bounding box for the domain
 
     frac_list = []
-    # Extract the data from the csv file
+    # Extract the data from the csv file, and create the fractures of a chunk
+    # of rows together
     with open(file_name, "r") as csv_file:
-        spam_reader = csv.reader(csv_file, delimiter=",")
-
         # Read the domain first
         if has_domain:
-            domain = np.asarray(next(spam_reader), dtype=np.float)
-            domain = {
-                "xmin": domain[0],
-                "xmax": domain[3],
-                "ymin": domain[1],
-                "ymax": domain[4],
-                "zmin": domain[2],
-                "zmax": domain[5],
-            }
-
-        for row in spam_reader:
-            # If the line starts with a '#', we consider this a comment
-            if row[0][0] == "#":
-                continue
-
-            # Read the data
-            data = np.asarray(row, dtype=np.float)
-            if not data.size % 9 == 0:
-                raise ValueError("Data has to have size 9")
+            domain = _read_domain(csv_file)
 
-            # Skip empty lines. Useful if the file ends with a blank line.
-            if data.size == 0:
-                continue
-            centers = data[0:3]
-            maj_ax = data[3]
-            min_ax = data[4]
-            maj_ax_ang = data[5] * (1 - degrees + degrees * np.pi / 180)
-            strike_ang = data[6] * (1 - degrees + degrees * np.pi / 180)
-            dip_ang = data[7] * (1 - degrees + degrees * np.pi / 180)
-            num_points = data[8]
-
-            frac_list.append(
-                EllipticFracture(
-                    centers, maj_ax, min_ax, maj_ax_ang, strike_ang, dip_ang, num_points
-                )
+        for data, counts in _read_rows(csv_file):
+            if np.any(counts != 9):
+                raise ValueError("Data has to have size 9")
+            data = data.reshape((-1, 9)).T
+            angles = data[5:8] * (1 - degrees + degrees * np.pi / 180)
+            frac_list += create_elliptic_fractures(
+                data[0:3], data[3], data[4], *angles, num_points=data[8]
             )
     # Create the network
     if has_domain:
@@ -175,8 +185,8 @@ def network_2d_from_csv(
     represents a separate points, points with the same FID will be assigned to
     the same fracture *in the order specified in the file*.
 
-    To change the delimiter from the default comma, use kwargs passed to
-    np.genfromtxt.
+    To change the delimiter from the default comma, use kwargs delimiter. Text
+    after a '#' is ignored.
 
     The csv file is assumed to have a header of 1 line. To change this number,
     use kwargs skip_header.
@@ -190,7 +200,7 @@ def network_2d_from_csv(
         max_num_fracs (int, optional): Maximum number of fractures included,
             counting from the start of the file. Defaults to inclusion of all
             fractures.
-        **kwargs: keyword arguments passed on to np.genfromtxt.
+        **kwargs: keyword arguments delimiter and skip_header, see above.
 
     Returns:
         FractureNetwork2d: Network representation of the fractures
@@ -199,18 +209,27 @@ def network_2d_from_csv(
         ValueError: If a fracture of a single point is specified.
 
     """
-    npargs = {}
     # EK: Should these really be explicit keyword arguments?
-    npargs["delimiter"] = kwargs.get("delimiter", ",")
-    npargs["skip_header"] = kwargs.get("skip_header", 1)
+    delimiter = kwargs.get("delimiter", ",")
+    skip_header = kwargs.get("skip_header", 1)
 
     # Extract the data from the csv file
-    data = np.genfromtxt(f_name, **npargs)
+    with open(f_name, "r") as csv_file:
+        for _ in range(skip_header):
+            csv_file.readline()
+        data, counts = [], []
+        for d, c in _read_rows(csv_file, delimiter=delimiter):
+            data.append(d)
+            counts.append(c)
     # Shortcut if no data is loaded
-    if data.size == 0:
+    if len(data) == 0:
         # we still consider the possibility that a domain is given
         return pp.FractureNetwork2d(domain=domain, tol=tol)
-    data = np.atleast_2d(data)
+    counts = np.hstack(counts)
+    if np.any(counts != counts[0]):
+        raise ValueError("All rows should have the same number of columns")
+    # A single column is interpreted as a single row, as by np.genfromtxt
+    data = np.atleast_2d(np.squeeze(np.hstack(data).reshape((-1, counts[0]))))
 
     # Consider subset of fractures if asked for
     if max_num_fracs is not None:
@@ -230,28 +249,16 @@ def network_2d_from_csv(
 
     if polyline:
         frac_id = data[:, 0]
-        fracs = np.unique(frac_id)
-
-        edges = np.empty((2, 0))
-        edges_frac_id = np.empty(0)
-        pt_ind = np.arange(frac_id.size)
+        _, num_pts = np.unique(frac_id, return_counts=True)
+        if np.any(num_pts < 2):
+            raise ValueError("A fracture should consist of more than one line")
 
-        for fi in fracs:
-            ind = np.argwhere(frac_id == fi).ravel()
-            if ind.size < 2:
-                raise ValueError("A fracture should consist of more than one line")
-            if ind.size == 2:
-                edges_loc = np.array([[pt_ind[ind[0]]], [pt_ind[ind[1]]]])
-            else:
-                start = pt_ind[ind[0] : ind[-1]]
-                end = pt_ind[ind[1] : ind[-1] + 1]
-                edges_loc = np.vstack((start, end))
-
-            edges = np.hstack((edges, edges_loc))
-            edges_frac_id = np.hstack((edges_frac_id, [fi] * edges_loc.shape[1]))
-
-        edges = edges.astype(np.int)
-        edges_frac_id = edges_frac_id.astype(np.int)
+        # Sort the points by fracture, keeping the order within fractures.
+        # Subsequent points of the same fracture form the edges.
+        pt_ind = np.argsort(frac_id, kind="mergesort")
+        same_frac = frac_id[pt_ind[:-1]] == frac_id[pt_ind[1:]]
+        edges = np.vstack((pt_ind[:-1][same_frac], pt_ind[1:][same_frac]))
+        edges_frac_id = frac_id[edges[0]].astype(np.int)
 
     else:
         # Let the edges correspond to the ordering of the fractures
@@ -413,39 +420,61 @@ def network_3d_from_fab(f_name, return_all=False, tol=None):
             d[k] = v
 
     def read_fractures(f, is_tess=False):
-        # Read the fracture
-        fracs = []
-        fracture_ids = []
-        trans = []
-        nd = 3
+        # Read the fractures. The lines of the section are parsed in chunks,
+        # and the vertexes of all fractures in a chunk are extracted together.
+        end = "END TESSFRACTURE" if is_tess else "END FRACTURE"
+        pts, num_vert, trans = [], [], []
+        lines = []
         for line in f:
-            if not is_tess and line.strip() == "END FRACTURE":
-                return fracs, np.asarray(fracture_ids), np.asarray(trans)
-            elif is_tess and line.strip() == "END TESSFRACTURE":
-                return fracs, np.asarray(fracture_ids), np.asarray(trans)
-            if is_tess:
-                ids, num_vert = line.split()
-            else:
-                ids, num_vert, t = line.split()[:3]
-
-                trans.append(float(t))
-
-            ids = int(ids)
-            num_vert = int(num_vert)
-            vert = np.zeros((num_vert, nd))
-            for i in range(num_vert):
-                data = f.readline().split()
-                vert[i] = np.asarray(data[1:])
-
-            # Transpose to nd x n_pt format
-            vert = vert.T
-
-            # Read line containing normal vector, but disregard result
-            data = f.readline().split()
-            if is_tess:
-                trans.append(int(data[1]))
-            fracs.append(vert)
-            fracture_ids.append(ids)
+            is_end = line.strip() == end
+            if not is_end:
+                lines.append(line)
+            if is_end or len(lines) >= CHUNK_SIZE:
+                lines = parse_fractures(lines, is_tess, pts, num_vert, trans)
+            if is_end:
+                if len(lines) > 0:
+                    raise ValueError("Incomplete fracture in section " + end)
+                break
+
+        pts = np.hstack([np.zeros((3, 0))] + pts)
+        num_vert = np.hstack([np.zeros(0, dtype=np.int)] + num_vert)
+        trans = np.hstack([np.zeros(0, dtype=np.int if is_tess else np.float)] + trans)
+        return pts, num_vert, trans
+
+    def parse_fractures(lines, is_tess, pts, num_vert, trans):
+        # Parse the complete fractures in lines, and add their vertexes,
+        # number of vertexes and transmissivities (or for tess fractures, the
+        # sign of the boundary) to the lists. Return the remaining lines.
+        # A fracture consists of a header line with the fracture id and the
+        # number of vertexes, one line per vertex, and a line with the normal
+        # vector.
+        counts = np.array([len(l.split()) for l in lines], dtype=np.int)
+        values = np.fromstring(" ".join(lines), sep=" ")
+        if values.size != counts.sum():
+            raise ValueError("Could not read fractures")
+        first = np.hstack((0, np.cumsum(counts)))
+
+        # Find the headers, one fracture after the other
+        headers = []
+        header = 0
+        while header < len(lines):
+            nv = int(values[first[header] + 1])
+            if header + nv + 2 > len(lines):
+                break
+            headers.append(header)
+            header += nv + 2
+        headers = np.array(headers, dtype=np.int)
+
+        nv = values[first[headers] + 1].astype(np.int)
+        vert_lines = mcolon(headers + 1, headers + 1 + nv)
+        ind = first[vert_lines].reshape((-1, 1)) + np.arange(1, 4)
+        pts.append(values[ind].T)
+        num_vert.append(nv)
+        if is_tess:
+            trans.append(values[first[headers + nv + 1] + 1].astype(np.int))
+        else:
+            trans.append(values[first[headers] + 2])
+        return lines[header:]
 
     with open(f_name, "r") as f:
         for line in f:
@@ -461,10 +490,10 @@ def network_3d_from_fab(f_name, return_all=False, tol=None):
                 _ = read_section(f, "SETS")
             elif line.strip() == "BEGIN FRACTURE":
                 # Read fractures
-                fracs, _, _ = read_fractures(f, is_tess=False)
+                pts, num_vert, _ = read_fractures(f, is_tess=False)
             elif line.strip() == "BEGIN TESSFRACTURE":
                 # Read tess_fractures
-                tess_fracs, _, tess_sgn = read_fractures(f, is_tess=True)
+                tess_pts, tess_num_vert, tess_sgn = read_fractures(f, is_tess=True)
             elif line.strip() == "BEGIN ROCKBLOCK":
                 # Not considered block
                 pass
@@ -472,13 +501,16 @@ def network_3d_from_fab(f_name, return_all=False, tol=None):
                 # Check for keywords not yet implemented.
                 raise ValueError("Unknown section type " + line)
 
-    fractures = [Fracture(f) for f in fracs]
+    fractures = create_fractures(pts, num_vert)
     if tol is not None:
         network = pp.FractureNetwork3d(fractures, tol=tol)
     else:
         network = pp.FractureNetwork3d(fractures)
 
     if return_all:
+        tess_fracs = np.split(tess_pts, np.cumsum(tess_num_vert)[:-1], axis=1)
+        if tess_num_vert.size == 0:
+            tess_fracs = []
         return network, tess_fracs, tess_sgn
     else:
         return network
@@ -11,6 +11,7 @@ see FractureNetwork.on_domain_boundary.
 # Import of 'standard' external packages
 import warnings
 import time
+import itertools
 import logging
 import numpy as np
 import sympy
@@ -33,7 +34,6 @@ import porepy as pp
 from porepy.utils import setmembership, sort_points
 from porepy.grids.gmsh.gmsh_interface import GmshWriter
 from porepy.grids.constants import GmshConstants
-from porepy.grids.gmsh import gmsh_interface
 
 # Module-wide logger
 logger = logging.getLogger(__name__)
@@ -118,6 +118,19 @@ class Fracture(object):
         p = np.copy(self.p)
         return Fracture(p)
 
+    @classmethod
+    def _from_points(cls, p, center, normal):
+        # Create a fracture from known vertexes, center and normal, without
+        # the computations of __init__. Used by create_fractures()
+        # and create_elliptic_fractures().
+        frac = cls.__new__(cls)
+        frac.p = p
+        frac.orig_p = p.copy()
+        frac.center = center
+        frac.normal = normal
+        frac.index = None
+        return frac
+
     def points(self):
         """
         Iterator over the vexrtexes of the bounding polygon
@@ -452,6 +465,276 @@ class EllipticFracture(Fracture):
         assert pp.geometry_property_checks.points_are_planar(self.orig_p, self.normal)
 
 
+def create_fractures(pts, num_points, check_convexity=True):
+    """
+    Create a population of fractures from their vertexes in one go.
+
+    The fractures are the same as those given by Fracture for the individual
+    vertexes, with the same sorting of the vertexes, centers and normal
+    vectors. The computations are however done with array operations for all
+    fractures with the same number of vertexes, which is much faster when
+    many fractures are read or generated.
+
+    Parameters:
+        pts (np.ndarray, 3 x n): Vertexes of all fractures, one fracture after
+            the other.
+        num_points (int or np.ndarray): Number of vertexes of each fracture.
+            If an int is given, all fractures have this number of vertexes.
+        check_convexity (boolean, optional): If True, check if the fractures
+            are convex. Defaults to True. Contrary to Fracture, the check is
+            not done with sympy, but by the turns between subsequent edges,
+            with a relative tolerance.
+
+    Returns:
+        list of Fracture: The fractures, in the order of the input.
+
+    Raises:
+        ValueError if some fractures are not planar, by the checks and
+            tolerances of Fracture, or if check_convexity is True and some
+            fractures are not convex. Fracture raises an AssertionError in
+            these cases.
+
+    """
+    pts = np.asarray(pts, dtype=np.float).reshape((3, -1))
+    num_points = np.asarray(num_points, dtype=np.int).ravel()
+    if num_points.size == 1 and num_points[0] > 0:
+        num_points = np.full(pts.shape[1] // num_points[0], num_points[0])
+    if num_points.sum() != pts.shape[1]:
+        raise ValueError("The number of points does not match the vertexes")
+    first = np.hstack((0, np.cumsum(num_points)[:-1]))
+
+    fracs = np.empty(num_points.size, dtype=np.object)
+    # Fractures with the same number of vertexes are treated together
+    for npt in np.unique(num_points):
+        ind = np.flatnonzero(num_points == npt)
+        p = pts[:, (first[ind, None] + np.arange(npt)).ravel()]
+        p = p.reshape((3, ind.size, npt)).transpose((1, 0, 2))
+
+        # Sort the points ccw, as in Fracture.points_2_ccw()
+        normal = _normals(p)
+        # The planarity checks of Fracture: points_are_planar() is called
+        # by points_2_ccw(), and is_planar() by __init__
+        not_planar = np.logical_not(
+            np.logical_and(_are_planar(p, normal), _within_plane(p, normal))
+        )
+        if np.any(not_planar):
+            raise ValueError("Non-planar fractures: " + str(ind[not_planar].tolist()))
+        p_2d = np.matmul(_plane_matrices(normal), p)[:, :2]
+        p_2d -= p_2d.mean(axis=2)[:, :, None]
+        sort_ind = np.argsort(np.arctan2(p_2d[:, 1], p_2d[:, 0]), axis=1)
+        rows = np.arange(ind.size)[:, None]
+        p = p.transpose((0, 2, 1))[rows, sort_ind].transpose((0, 2, 1))
+
+        if check_convexity:
+            # All turns between subsequent edges should be to the left
+            p_2d = p_2d.transpose((0, 2, 1))[rows, sort_ind].transpose((0, 2, 1))
+            edges = np.roll(p_2d, -1, axis=2) - p_2d
+            next_edges = np.roll(edges, -1, axis=2)
+            cross = edges[:, 0] * next_edges[:, 1] - edges[:, 1] * next_edges[:, 0]
+            scale = np.linalg.norm(edges, axis=1) * np.linalg.norm(next_edges, axis=1)
+            not_convex = np.any(cross < -1e-10 * scale, axis=1)
+            if np.any(not_convex):
+                raise ValueError(
+                    "Non-convex fractures: " + str(ind[not_convex].tolist())
+                )
+
+        # Centroids and normal vectors of the sorted points, computed as in
+        # Fracture.compute_centroid() and compute_normal()
+        normal = _normals(p)
+        rot = _plane_matrices(normal)
+        p_2d = np.matmul(rot, p)
+        z = p_2d[:, 2, 0]
+        p_2d = p_2d[:, :2]
+        v = p_2d[:, :, 1:] - p_2d[:, :, :1]
+        cc = (p_2d[:, :, :1] + p_2d[:, :, 1:-1] + p_2d[:, :, 2:]) / 3
+        area = 0.5 * np.abs(v[:, 0, :-1] * v[:, 1, 1:] - v[:, 1, :-1] * v[:, 0, 1:])
+        center = np.sum(cc * area[:, None], axis=2) / np.sum(area, axis=1)[:, None]
+        center = np.matmul(
+            rot.transpose((0, 2, 1)), np.hstack((center, z[:, None]))[:, :, None]
+        )
+
+        for i, fi in enumerate(ind):
+            fracs[fi] = Fracture._from_points(p[i], center[i], normal[i, :, None])
+
+    return fracs.tolist()
+
+
+def create_elliptic_fractures(
+    center,
+    major_axis,
+    minor_axis,
+    major_axis_angle,
+    strike_angle,
+    dip_angle,
+    num_points=16,
+    check_planarity=True,
+):
+    """
+    Create a population of elliptic fractures in one go.
+
+    The fractures are the same as those given by EllipticFracture for the
+    individual parameters, but the vertexes of all fractures are computed with
+    array operations. This is much faster when many fractures are generated,
+    say for a stochastic network. The normal vectors may point in the
+    opposite direction of those of EllipticFracture.
+
+    All parameters except center are either scalars, which are used for all
+    fractures, or arrays with one value per fracture. See EllipticFracture for
+    the meaning of the parameters.
+
+    Parameters:
+        center (np.ndarray, 3 x num_frac): Center coordinates of fractures.
+        major_axis (double or np.ndarray): Length of major axes.
+        minor_axis (double or np.ndarray): Length of minor axes.
+        major_axis_angle (double or np.ndarray, radians): Rotation of the major
+            axes from the x-axis.
+        strike_angle (double or np.ndarray, radians): Line of rotation for the
+            dip, given as angle from the x-direction.
+        dip_angle (double or np.ndarray, radians): Dip angles.
+        num_points (int or np.ndarray, optional): Number of points used to
+            approximate the ellipses. Defaults to 16.
+        check_planarity (boolean, optional): If True, verify that the vertexes
+            of each fracture are planar. Defaults to True.
+
+    Returns:
+        list of EllipticFracture: The fractures, in the order of the input.
+
+    Raises:
+        ValueError if check_planarity is True and some fractures are not
+            planar.
+
+    Example:
+        A network of 1000 fractures with random centers and orientations.
+        >>> rand = np.random.RandomState(0)
+        >>> fracs = create_elliptic_fractures(rand.rand(3, 1000), 0.1, 0.05,
+                rand.rand(1000) * np.pi, rand.rand(1000) * np.pi,
+                rand.rand(1000) * np.pi / 2)
+        >>> network = FractureNetwork3d(fracs)
+
+    """
+    center = np.asarray(center, dtype=np.float).reshape((3, -1))
+    num_frac = center.shape[1]
+
+    def expand(v):
+        return np.broadcast_to(np.asarray(v, dtype=np.float).ravel(), num_frac)
+
+    major_axis = expand(major_axis)
+    minor_axis = expand(minor_axis)
+    # The rotation of the major axis around the z-axis, followed by the dip
+    # around the strike direction
+    rot = _rotation_matrices(expand(major_axis_angle), np.array([[0], [0], [1]]))
+    strike_angle = expand(strike_angle)
+    strike_dir = np.vstack(
+        (np.cos(strike_angle), np.sin(strike_angle), np.zeros(num_frac))
+    )
+    rot = np.matmul(_rotation_matrices(expand(dip_angle), strike_dir), rot)
+
+    num_points = np.broadcast_to(np.asarray(num_points).ravel(), num_frac)
+    num_points = num_points.astype(np.int)
+
+    fracs = np.empty(num_frac, dtype=np.object)
+    # Fractures with the same number of vertexes are treated together
+    for npt in np.unique(num_points):
+        ind = np.flatnonzero(num_points == npt)
+        angs = np.linspace(0, 2 * np.pi, npt + 1, endpoint=True)[:-1]
+        ref_pts = np.zeros((ind.size, 3, npt))
+        ref_pts[:, 0] = major_axis[ind, None] * np.cos(angs)
+        ref_pts[:, 1] = minor_axis[ind, None] * np.sin(angs)
+
+        pts = center.T[ind, :, None] + np.matmul(rot[ind], ref_pts)
+
+        normal = _normals(pts)
+
+        if check_planarity:
+            not_planar = np.logical_not(_are_planar(pts, normal))
+            if np.any(not_planar):
+                raise ValueError(
+                    "Non-planar fractures: " + str(ind[not_planar].tolist())
+                )
+
+        for i, fi in enumerate(ind):
+            fracs[fi] = EllipticFracture._from_points(
+                pts[i], center[:, fi : fi + 1].copy(), normal[i, :, None]
+            )
+
+    return fracs.tolist()
+
+
+def _normals(pts):
+    # Normal vectors of polygons, given as num_poly x 3 x num_pts, computed as
+    # in pp.map_geometry.compute_normal. If the first two points are aligned
+    # with the tangent, the first point is dropped and we try again.
+    normal = np.zeros(pts.shape[:2])
+    todo = np.arange(pts.shape[0])
+    first = 0
+    while todo.size > 0:
+        if pts.shape[2] - first < 3:
+            raise ValueError("Cannot compute normal of aligned points")
+        p = pts[todo, :, first:]
+        tangent = p - p.mean(axis=2)[:, :, None]
+        max_ind = np.argmax(np.sum(tangent ** 2, axis=1), axis=1)
+        tangent = tangent[np.arange(todo.size), :, max_ind]
+        tangent /= np.linalg.norm(tangent, axis=1)[:, None]
+        n = np.cross(p[:, :, 0] - p[:, :, 1], tangent)
+        found = np.any(np.abs(n) > 1e-8, axis=1)
+        normal[todo[found]] = n[found] / np.linalg.norm(n[found], axis=1)[:, None]
+        todo = todo[np.logical_not(found)]
+        first += 1
+    return normal
+
+
+def _are_planar(pts, normal, tol=1e-5):
+    # Check if polygons, given as num_poly x 3 x num_pts, are planar, as in
+    # pp.geometry_property_checks.points_are_planar
+    vec = pts[:, :, :1] - pts[:, :, 1:]
+    den = np.linalg.norm(vec, axis=1)
+    den[den == 0] = 1
+    dot = np.einsum("ij,ijk->ik", normal, vec) / den
+    return np.all(np.abs(dot) <= tol, axis=1)
+
+
+def _within_plane(pts, normal, tol=1e-4):
+    # Check if polygons, given as num_poly x 3 x num_pts, are planar, as in
+    # Fracture.is_planar: The distance of the points from the plane through
+    # their mean is compared to an absolute tolerance.
+    p = pts - pts.mean(axis=2)[:, :, None]
+    dist = np.einsum("ij,ijk->ik", normal, p)
+    return np.max(np.abs(dist), axis=1) < tol
+
+
+def _plane_matrices(normal):
+    # Rotation of polygons with the given normal vectors to the xy-plane, as in
+    # pp.map_geometry.project_plane_matrix
+    angle = np.arccos(normal[:, 2])
+    vect = np.vstack((normal[:, 1], -normal[:, 0], np.zeros(normal.shape[0])))
+    return _rotation_matrices(angle, vect)
+
+
+def _rotation_matrices(a, vect):
+    # Rotation matrices around the columns of vect by the angles a, computed by
+    # the Rodrigues formula as in pp.map_geometry.rotation_matrix. The vectors
+    # are broadcast to the number of angles.
+    a = np.asarray(a, dtype=np.float).ravel()
+    vect = np.broadcast_to(vect, (3, a.size)).astype(np.float)
+    # Rotation around a zero vector is the identity
+    norm = np.linalg.norm(vect, axis=0)
+    zero = np.all(np.abs(vect) <= 1e-8, axis=0)
+    vect[:, zero] = 0
+    vect[:, ~zero] /= norm[~zero]
+    W = np.zeros((a.size, 3, 3))
+    W[:, 0, 1] = -vect[2]
+    W[:, 0, 2] = vect[1]
+    W[:, 1, 0] = vect[2]
+    W[:, 1, 2] = -vect[0]
+    W[:, 2, 0] = -vect[1]
+    W[:, 2, 1] = vect[0]
+    return (
+        np.identity(3)
+        + np.sin(a)[:, None, None] * W
+        + (1.0 - np.cos(a))[:, None, None] * np.matmul(W, W)
+    )
+
+
 # -------------------------------------------------------------------------
 
 
@@ -638,6 +921,17 @@ class FractureNetwork3d(object):
         self.tol = tol
         self.verbose = verbose
 
+        # Fractures as seen by the last call to find_intersections(), and their
+        # bounding boxes, and fractures, intersections and tolerance as seen by
+        # the last call to split_intersections(). Used to treat only fractures
+        # added since then, see _num_unchanged_fractures().
+        self._isect_fractures = []
+        self._isect_box_min = np.zeros((3, 0))
+        self._isect_box_max = np.zeros((3, 0))
+        self._split_fractures = []
+        self._split_intersections = []
+        self._split_tol = None
+
         # Initialize with an empty domain. Can be modified later by a call to
         # 'impose_external_boundary()'
         self.domain = domain
@@ -672,7 +966,15 @@ class FractureNetwork3d(object):
             f.set_index(0)
         self._fractures.append(f)
 
-    def mesh(self, mesh_args, subdomains=None, dfn=False, file_name=None, **kwargs):
+    def mesh(
+        self,
+        mesh_args,
+        subdomains=None,
+        dfn=False,
+        file_name=None,
+        cache=None,
+        **kwargs
+    ):
         """ Mesh the fracture network, and generate a mixed-dimensional grid.
 
         The mesh itself is generated by Gmsh.
@@ -687,22 +989,46 @@ class FractureNetwork3d(object):
                 the surrounding matrix) is created.
             file_name (str, optional): Name of file used to communicate with gmsh.
                 defaults to gmsh_frac_file. The gmsh configuration file will be
-                file_name.geo, while the mesh is dumped to file_name.msh.
+                file_name.geo. If the gmsh Python API is not available, the
+                mesh is dumped to file_name.msh.
+            cache (pp.MeshCache, optional): If provided, the mesh is looked up
+                in the cache, by the geometry of the network and the meshing
+                parameters, before meshing. New meshes are stored in the
+                cache. On a cache hit, the network itself is not processed.
 
         Returns:
             GridBucket: Mixed-dimensional mesh.
 
         """
+        if cache is not None:
+            key = cache.key(
+                "FractureNetwork3d",
+                [f.p for f in self._fractures],
+                self.domain,
+                self.tol,
+                self.tags,
+                [
+                    self.bounding_box_imposed,
+                    self.has_checked_intersections,
+                    self.auxiliary_points_added,
+                ],
+                mesh_args,
+                subdomains,
+                dfn,
+                kwargs,
+            )
+            gb = cache.get(key)
+            if gb is not None:
+                return gb
+
         # The implementation in this function is fairly straightforward, all
         # technical difficulties are hidden in other functions.
         if not dfn and not self.bounding_box_imposed:
             self.impose_external_boundary(self.domain)
 
-        # Find intersections between fractures
-        if not self.has_checked_intersections:
-            self.find_intersections()
-        else:
-            logger.info("Use existing intersections")
+        # Find intersections between fractures. Known intersections are
+        # reused, and only fractures added since the last call are treated.
+        self.find_intersections()
 
         mesh_size_frac = mesh_args.get("mesh_size_frac", None)
         mesh_size_min = mesh_args.get("mesh_size_min", None)
@@ -716,23 +1042,22 @@ class FractureNetwork3d(object):
         if file_name is None:
             file_name = "gmsh_frac_file"
         in_file = file_name + ".geo"
-        out_file = file_name + ".msh"
 
         # Dump the network description to gmsh .geo format, and run gmsh to
         # generate grid
         in_3d = not dfn
         self.to_gmsh(in_file, in_3d=in_3d)
-        gmsh_status = gmsh_interface.run_gmsh(in_file, out_file, dims=3)
-        logger.info("Gmsh completed with status " + str(gmsh_status))
 
         if dfn:
-            grid_list = pp.fracs.simplex.triangle_grid_embedded(self, out_file)
+            grid_list = pp.fracs.simplex.triangle_grid_embedded(self, file_name)
         else:
-            # Process the gmsh .msh output file, to make a list of grids
-            grid_list = pp.fracs.simplex.tetrahedral_grid_from_gmsh(self, out_file)
+            # Process the mesh from gmsh, to make a list of grids
+            grid_list = pp.fracs.simplex.tetrahedral_grid(self, file_name)
 
         # Merge the grids into a mixed-dimensional GridBucket
         gb = pp.meshing.grid_list_to_grid_bucket(grid_list, **kwargs)
+        if cache is not None:
+            cache.put(key, gb)
         return gb
 
     def __getitem__(self, position):
@@ -762,12 +1087,19 @@ class FractureNetwork3d(object):
                 frac_arr.append(i)
         return frac_arr
 
-    def find_intersections(self, use_orig_points=False):
+    def find_intersections(self, use_orig_points=False, recompute=False):
         """
         Find intersections between fractures in terms of coordinates.
 
         The intersections are stored in the attribute self.Intersections.
 
+        The intersections are updated incrementally: If the fractures known
+        from the previous call are unchanged, and new fractures have been
+        added (see add()), only the new fractures are intersected with the
+        fractures whose bounding boxes they overlap. If the known fractures
+        have been modified, say, by impose_external_boundary(), all
+        intersections are recomputed.
+
         Handling of the intersections (splitting into non-intersecting
         polygons, paving the way for gridding) is taken care of by the function
         split_intersections().
@@ -784,9 +1116,11 @@ class FractureNetwork3d(object):
                 fracture description in the search for intersections. Defaults
                 to False. If True, all fractures will have their attribute p
                 reset to their original value.
+            recompute (boolean, optional): If True, all intersections are
+                recomputed, also if they are known. Mainly for validation of
+                the incremental update. Defaults to False.
 
         """
-        self.has_checked_intersections = True
         logger.info("Find intersection between fratures")
         start_time = time.time()
 
@@ -797,14 +1131,51 @@ class FractureNetwork3d(object):
             for f in self._fractures:
                 f.p = f.orig_p
 
+        num_known = 0
+        if self.has_checked_intersections and not recompute:
+            num_known = self._num_unchanged_fractures(self._isect_fractures)
+        if num_known == 0:
+            self.intersections = []
+            self._isect_box_min = np.zeros((3, 0))
+            self._isect_box_max = np.zeros((3, 0))
+        elif num_known == len(self._fractures):
+            logger.info("Use existing intersections")
+            return
+
+        self.has_checked_intersections = True
+
         # Intersections are found using a method in the comp_geom module, which requires
         # the fractures to be represented as a list of polygons.
         polys = [f.p for f in self._fractures]
+
+        # Bounding boxes of the new fractures
+        box_min = np.array([p.min(axis=1) for p in polys[num_known:]]).reshape((-1, 3))
+        box_max = np.array([p.max(axis=1) for p in polys[num_known:]]).reshape((-1, 3))
+        box_min, box_max = box_min.T, box_max.T
+
+        if num_known == 0:
+            # All pairs of fractures are considered
+            pairs = None
+        else:
+            # Pairs of new fractures, and of known and new fractures, with
+            # overlapping bounding boxes
+            pairs_new = pp.bounding_box.overlapping_boxes(box_min, box_max)
+            pairs_known = pp.bounding_box.overlapping_query_boxes(
+                self._isect_box_min, self._isect_box_max, box_min, box_max
+            )
+            pairs_known[1] += num_known
+            pairs = np.hstack((pairs_known, pairs_new + num_known))
+            logger.info(
+                "Intersect %i new fractures, %i candidate pairs",
+                len(polys) - num_known,
+                pairs.shape[1],
+            )
+
         # Obtain intersection points, indexes of intersection points for each fracture
         # information on whether the fracture is on the boundary, and pairs of fractures
         # that intersect.
         isect, point_ind, bound_info, frac_pairs, _ = pp.intersections.polygons_3d(
-            polys
+            polys, pairs=pairs
         )
 
         # Loop over all pairs of intersection pairs, add the intersections to the
@@ -846,12 +1217,47 @@ class FractureNetwork3d(object):
                     bound_second=on_bound_1,
                 )
             )
+        self._isect_fractures = self._fracture_snapshot()
+        self._isect_box_min = np.hstack((self._isect_box_min, box_min))
+        self._isect_box_max = np.hstack((self._isect_box_max, box_max))
+
         logger.info(
             "Found %i intersections. Ellapsed time: %.5f",
             len(self.intersections),
             time.time() - start_time,
         )
 
+    def _fracture_snapshot(self):
+        # The fractures, their indices and copies of their vertexes, to detect
+        # later modifications of the network.
+        return [(f, f.index, f.p.copy()) for f in self._fractures]
+
+    def _num_unchanged_fractures(self, snapshot):
+        """ Check if the fractures in a snapshot of the network are unchanged.
+
+        Parameters:
+            snapshot (list): Fractures with their indices and vertexes, as
+                given by _fracture_snapshot().
+
+        Returns:
+            int: The number of fractures in the snapshot if these are still the
+                first fractures of the network, with the same indices and
+                vertexes, that is, if the network has only been modified by
+                adding fractures. Zero otherwise.
+
+        """
+        if len(snapshot) > len(self._fractures):
+            return 0
+        for (f, ind, p), f_now in zip(snapshot, self._fractures):
+            if (
+                f is not f_now
+                or f.index != ind
+                or f.p.shape != p.shape
+                or not np.array_equal(f.p, p)
+            ):
+                return 0
+        return len(snapshot)
+
     def intersection_info(self, frac_num=None):
         """ Obtain information on intersections of one or several fractures.
 
@@ -904,7 +1310,137 @@ class FractureNetwork3d(object):
         )
         return s
 
-    def split_intersections(self):
+    def cluster_analysis(self, sides=None):
+        """ Find the connected clusters of fractures, and the sides of the
+        domain they connect.
+
+        Two fractures are connected if they intersect. If find_intersections()
+        has been called, the known intersections are used, otherwise the
+        intersections are computed without modifying the network. A cluster
+        touches a side of the domain if one of its fractures reaches the side,
+        within the tolerance of the network.
+
+        Boundary and subdomain polygons (see impose_external_boundary() and
+        add_subdomain_boundaries()) are not part of any cluster.
+
+        Parameters:
+            sides (list of str, optional): Sides of the domain to consider,
+                among 'xmin', 'xmax', 'ymin', 'ymax', 'zmin' and 'zmax'.
+                Defaults to all sides.
+
+        Returns:
+            np.array (int, num_frac): Cluster of each fracture. The clusters
+                are numbered in the order of their first fracture. Boundary
+                and subdomain polygons are assigned -1.
+            dictionary: For each side, a boolean array with one element per
+                cluster, True if the cluster touches the side.
+            dictionary: For each pair of sides (a tuple in the order of sides),
+                True if a cluster connects the sides, that is, if the network
+                percolates between them.
+
+        Raises:
+            ValueError if the network has no box domain, or if a side is
+                unknown.
+
+        """
+        if sides is None:
+            sides = ["xmin", "xmax", "ymin", "ymax", "zmin", "zmax"]
+
+        is_frac = np.logical_not(self._constraint_fractures())
+        frac_ind = np.flatnonzero(is_frac)
+        # Map from network indices to indices among the fractures
+        loc_ind = -np.ones(is_frac.size, dtype=np.int)
+        loc_ind[frac_ind] = np.arange(frac_ind.size)
+
+        if self.has_checked_intersections:
+            pairs = [
+                (i.first.index, i.second.index)
+                for i in self.intersections
+                if i.coord.size > 0
+            ]
+            pairs = loc_ind[np.array(pairs, dtype=np.int).reshape((-1, 2)).T]
+            pairs = pairs[:, np.all(pairs >= 0, axis=0)]
+        elif frac_ind.size > 1:
+            polys = [self._fractures[fi].p for fi in frac_ind]
+            pairs = np.array(pp.intersections.polygons_3d(polys)[3], dtype=np.int)
+            pairs = pairs.reshape((-1, 2)).T
+        else:
+            pairs = np.zeros((2, 0), dtype=np.int)
+
+        box_min = np.zeros((3, frac_ind.size))
+        box_max = np.zeros((3, frac_ind.size))
+        for i, fi in enumerate(frac_ind):
+            box_min[:, i] = self._fractures[fi].p.min(axis=1)
+            box_max[:, i] = self._fractures[fi].p.max(axis=1)
+
+        loc_labels, touches, percolation = pp.frac_utils.fracture_clusters(
+            frac_ind.size, pairs, box_min, box_max, self.domain, sides, self.tol
+        )
+        labels = -np.ones(is_frac.size, dtype=np.int)
+        labels[frac_ind] = loc_labels
+        return labels, touches, percolation
+
+    def prune_clusters(self, sides=None, min_sides=2):
+        """ Remove clusters of fractures that are not connected to the
+        boundary of the domain, see cluster_analysis().
+
+        With the default arguments, isolated fractures and clusters that touch
+        at most one side of the domain are removed. To keep only the clusters
+        that connect two specific sides, give these as sides.
+
+        Parameters:
+            sides (list of str, optional): Sides of the domain to consider,
+                among 'xmin', 'xmax', 'ymin', 'ymax', 'zmin' and 'zmax'.
+                Defaults to all sides.
+            min_sides (int, optional): Minimum number of the sides a cluster
+                should touch to be kept. Defaults to 2.
+
+        Returns:
+            FractureNetwork3d: A new network with copies of the fractures of the
+                kept clusters, in their original order, and the same domain.
+                Subdomain boundaries are kept, while the boundary polygons
+                of the domain are not.
+
+        """
+        labels, touches, _ = self.cluster_analysis(sides)
+        # Number of sides touched by each cluster. If all polygons are
+        # boundary or subdomain polygons, there are no clusters.
+        num_sides = np.zeros(np.max(labels, initial=-1) + 1, dtype=np.int)
+        for t in touches.values():
+            num_sides += np.asarray(t, dtype=np.int)
+        keep = labels >= 0
+        keep[keep] = num_sides[labels[keep]] >= min_sides
+        logger.info(
+            "Keep %i of %i fractures in %i of %i clusters",
+            keep.sum(),
+            np.sum(labels >= 0),
+            np.sum(num_sides >= min_sides),
+            num_sides.size,
+        )
+
+        subdomain = self.tags.get("subdomain", [])
+        fractures = []
+        subdomain_tags = []
+        for fi, f in enumerate(self._fractures):
+            is_subdomain = fi < len(subdomain) and subdomain[fi]
+            if keep[fi] or is_subdomain:
+                fractures.append(f.copy())
+                subdomain_tags.append(is_subdomain)
+
+        network = FractureNetwork3d(fractures, self.domain, self.verbose, self.tol)
+        if any(subdomain_tags):
+            network.tags["subdomain"] = subdomain_tags
+        return network
+
+    def _constraint_fractures(self):
+        # Boundary and subdomain polygons, which are represented as fractures
+        is_constraint = np.zeros(len(self._fractures), dtype=np.bool)
+        for key in ("boundary", "subdomain"):
+            tag = np.asarray(self.tags.get(key, []), dtype=np.bool)
+            is_constraint[: tag.size] = np.logical_or(is_constraint[: tag.size], tag)
+        return is_constraint
+
+    def split_intersections(self, recompute=False):
         """
         Based on the fracture network, and their known intersections, decompose
         the fractures into non-intersecting sub-polygons. These can
@@ -912,27 +1448,101 @@ class FractureNetwork3d(object):
 
         The method will add an atribute decomposition to self.
 
+        The decomposition is updated incrementally: If the fractures and
+        intersections known from the previous call are unchanged, the points
+        and edges of fractures and intersections added since then are merged
+        into the existing decomposition, and only the fractures with new edges
+        are split anew. Otherwise, the decomposition is computed from scratch.
+
+        Parameters:
+            recompute (boolean, optional): If True, the decomposition is
+                computed from scratch, also if it is known. Mainly for
+                validation of the incremental update. Defaults to False.
+
         """
 
         logger.info("Split intersections")
         start_time = time.time()
 
-        # First, collate all points and edges used to describe fracture
-        # boundaries and intersections.
-        all_p, edges, edges_2_frac, is_boundary_edge = self._point_and_edge_lists()
+        num_frac = len(self._fractures)
+        num_known = 0
+        if not recompute and self._split_tol == self.tol:
+            num_known = self._num_unchanged_fractures(self._split_fractures)
+            num_isect = len(self._split_intersections)
+            if num_isect > len(self.intersections) or any(
+                i is not i_now
+                for i, i_now in zip(self._split_intersections, self.intersections)
+            ):
+                num_known = 0
+
+        if num_known == 0:
+            # First, collate all points and edges used to describe fracture
+            # boundaries and intersections.
+            (
+                all_p,
+                edges,
+                edges_2_frac,
+                is_boundary_edge,
+            ) = self._point_and_edge_lists()
+            frac_ind = np.arange(num_frac)
+        else:
+            new_intersections = [
+                i for i in self.intersections[num_isect:] if i.coord.size > 0
+            ]
+            if num_known == num_frac and len(new_intersections) == 0:
+                logger.info("Use existing decomposition")
+                return
+
+            # Add points and edges of the new fractures and intersections to
+            # the decomposition. The points and edges of the known fractures
+            # are already unique and non-intersecting.
+            decomp = self.decomposition
+            (
+                p_new,
+                edges_new,
+                edges_2_frac_new,
+                is_bound_new,
+            ) = self._new_points_and_edges(
+                np.arange(num_known, num_frac), new_intersections
+            )
+            all_p = np.hstack((decomp["points"], p_new))
+            edges = np.hstack((decomp["edges"], edges_new + decomp["points"].shape[1]))
+            edges_2_frac = decomp["edges_2_frac"] + edges_2_frac_new
+            is_boundary_edge = decomp["is_bound"] + is_bound_new
+
+            # Only fractures with new edges need to be split
+            frac_ind = np.unique(
+                np.hstack(
+                    [np.arange(num_known, num_frac)]
+                    + [[i.first.index, i.second.index] for i in new_intersections]
+                )
+            ).astype(np.int)
+            logger.info(
+                "Update decomposition for %i new fractures, %i new intersections",
+                num_frac - num_known,
+                len(new_intersections),
+            )
+            (
+                all_p,
+                edges,
+                edges_2_frac,
+                is_boundary_edge,
+            ) = self._uniquify_points_and_edges(
+                all_p, edges, edges_2_frac, is_boundary_edge, frac_ind
+            )
 
         if self.verbose > 1:
-            self._verify_fractures_in_plane(all_p, edges, edges_2_frac)
+            self._verify_fractures_in_plane(all_p, edges, edges_2_frac, frac_ind)
 
         # By now, all segments in the grid are defined by a unique set of
         # points and edges. The next task is to identify intersecting edges,
         # and split them.
         all_p, edges, edges_2_frac, is_boundary_edge = self._remove_edge_intersections(
-            all_p, edges, edges_2_frac, is_boundary_edge
+            all_p, edges, edges_2_frac, is_boundary_edge, frac_ind
         )
 
         if self.verbose > 1:
-            self._verify_fractures_in_plane(all_p, edges, edges_2_frac)
+            self._verify_fractures_in_plane(all_p, edges, edges_2_frac, frac_ind)
 
         # Store the full decomposition.
         self.decomposition = {
@@ -941,30 +1551,38 @@ class FractureNetwork3d(object):
             "is_bound": is_boundary_edge,
             "edges_2_frac": edges_2_frac,
         }
+
+        # Find the edges of each fracture, add to either internal or external
+        # fracture list
+        num_e_frac = np.array([e.size for e in edges_2_frac], dtype=np.int)
+        # Check that the boundary information matches the fractures
+        assert np.all(num_e_frac == [b.size for b in is_boundary_edge])
+        edge_ind = np.repeat(np.arange(num_e_frac.size), num_e_frac)
+        edge_frac = self._flatten(edges_2_frac, num_e_frac).astype(np.int)
+        edge_bound = self._flatten(is_boundary_edge, num_e_frac).astype(np.bool)
+
+        order = np.lexsort((edge_ind, edge_frac))
+        edge_ind, edge_frac, edge_bound = (
+            edge_ind[order],
+            edge_frac[order],
+            edge_bound[order],
+        )
+        if np.any(
+            np.logical_and(
+                edge_frac[1:] == edge_frac[:-1], edge_ind[1:] == edge_ind[:-1]
+            )
+        ):
+            raise ValueError("Non-unique fracture edge relation")
+        frac_start = np.searchsorted(edge_frac, np.arange(num_frac + 1))
+
         polygons = []
         line_in_frac = []
-        for fi, _ in enumerate(self._fractures):
-            ei = []
-            ei_bound = []
-            # Find the edges of this fracture, add to either internal or
-            # external fracture list
-            for i, e in enumerate(zip(edges_2_frac, is_boundary_edge)):
-                # Check that the boundary information matches the fractures
-                assert e[0].size == e[1].size
-                hit = np.where(e[0] == fi)[0]
-                if hit.size == 1:
-                    if e[1][hit]:
-                        ei_bound.append(i)
-                    else:
-                        ei.append(i)
-                elif hit.size > 1:
-                    raise ValueError("Non-unique fracture edge relation")
-                else:
-                    continue
-
-            poly = sort_points.sort_point_pairs(edges[:2, ei_bound])
+        for fi in range(num_frac):
+            ind = edge_ind[frac_start[fi] : frac_start[fi + 1]]
+            bound = edge_bound[frac_start[fi] : frac_start[fi + 1]]
+            poly = sort_points.sort_point_pairs(edges[:2, ind[bound]])
             polygons.append(poly)
-            line_in_frac.append(ei)
+            line_in_frac.append(ind[np.logical_not(bound)].tolist())
 
         self.decomposition["polygons"] = polygons
         self.decomposition["line_in_frac"] = line_in_frac
@@ -972,10 +1590,46 @@ class FractureNetwork3d(object):
         #                              'polygons': poly_segments,
         #                             'polygon_frac': poly_2_frac}
 
+        self._split_fractures = self._fracture_snapshot()
+        self._split_intersections = list(self.intersections)
+        self._split_tol = self.tol
+
         logger.info(
             "Finished fracture splitting after %.5f seconds", time.time() - start_time
         )
 
+    @staticmethod
+    def _flatten(arrays, num=None):
+        # Concatenate a list of arrays or lists into a float array.
+        if num is None:
+            num = np.array([len(a) for a in arrays], dtype=np.int)
+        return np.fromiter(
+            itertools.chain.from_iterable(arrays), dtype=np.float, count=num.sum()
+        )
+
+    def _edges_of_fractures(self, edges_2_frac, frac_ind):
+        """ Invert the mapping between edges and fractures for a set of
+        fractures.
+
+        Parameters:
+            edges_2_frac (list): For each edge, index of all fractures that
+                point to the edge.
+            frac_ind (np.array): Index of the fractures.
+
+        Returns:
+            list of np.array: For each of the fractures, sorted index of all
+                edges that point to it.
+
+        """
+        num = np.array([len(e) for e in edges_2_frac], dtype=np.int)
+        edge_frac = self._flatten(edges_2_frac, num)
+        edge_ind = np.repeat(np.arange(num.size), num)
+        order = np.argsort(edge_frac, kind="mergesort")
+        edge_frac, edge_ind = edge_frac[order], edge_ind[order]
+        start = np.searchsorted(edge_frac, frac_ind, side="left")
+        end = np.searchsorted(edge_frac, frac_ind, side="right")
+        return [np.unique(edge_ind[lo:hi]) for lo, hi in zip(start, end)]
+
     def _fracs_2_edges(self, edges_2_frac):
         """ Invert the mapping between edges and fractures.
 
@@ -1012,10 +1666,33 @@ class FractureNetwork3d(object):
         logger.info("Compile list of points and edges")
         start_time = time.time()
 
+        all_p, edges, edges_2_frac, is_boundary_edge = self._new_points_and_edges(
+            np.arange(len(self._fractures)), self.intersections
+        )
+
+        logger.info(
+            "Points and edges done. Elapsed time %.5f", time.time() - start_time
+        )
+
+        return self._uniquify_points_and_edges(
+            all_p, edges, edges_2_frac, is_boundary_edge
+        )
+
+    def _new_points_and_edges(self, frac_ind, intersections):
+        """
+        Points and edges of a set of fractures and intersections, before
+        uniquification. See _point_and_edge_lists() for the return values.
+
+        Parameters:
+            frac_ind (np.array): Index of the fractures.
+            intersections (list of Intersection): The intersections.
+
+        """
         # Field for all points in the fracture description
-        all_p = np.empty((3, 0))
-        # All edges, either as fracture boundary, or fracture intersection
-        edges = np.empty((2, 0))
+        all_p = [np.empty((3, 0))]
+        # All edges, either as fracture boundary, or fracture intersection.
+        # The edges are numbered according to the order of the points.
+        edges = [np.empty((2, 0), dtype=np.int)]
         # For each edge, a list of all fractures pointing to the edge.
         edges_2_frac = []
 
@@ -1025,54 +1702,44 @@ class FractureNetwork3d(object):
 
         # First loop over all fractures. All edges are assumed to be new; we
         # will deal with coinciding points later.
-        for fi, frac in enumerate(self._fractures):
-            num_p = all_p.shape[1]
+        num_p = 0
+        for fi in frac_ind:
+            frac = self._fractures[fi]
             num_p_loc = frac.p.shape[1]
-            all_p = np.hstack((all_p, frac.p))
+            all_p.append(frac.p)
 
             loc_e = num_p + np.vstack(
                 (np.arange(num_p_loc), (np.arange(num_p_loc) + 1) % num_p_loc)
             )
-            edges = np.hstack((edges, loc_e))
-            for i in range(num_p_loc):
-                edges_2_frac.append([fi])
-                is_boundary_edge.append([True])
+            edges.append(loc_e)
+            num_p += num_p_loc
+            edges_2_frac += [[fi] for _ in range(num_p_loc)]
+            is_boundary_edge += [[True] for _ in range(num_p_loc)]
 
         # Next, loop over all intersections, and define new points and edges
-        for i in self.intersections:
+        for i in intersections:
             # Only add information if the intersection exists, that is, it has
             # a coordinate.
             if i.coord.size > 0:
-                num_p = all_p.shape[1]
-                all_p = np.hstack((all_p, i.coord))
+                all_p.append(i.coord)
 
-                edges = np.hstack((edges, num_p + np.arange(2).reshape((-1, 1))))
+                edges.append(num_p + np.arange(2).reshape((-1, 1)))
+                num_p += i.coord.shape[1]
                 edges_2_frac.append([i.first.index, i.second.index])
                 # If the intersection points are on the boundary of both
                 # fractures, this is a boundary segment.
                 # This does not cover the case of a T-intersection, that will
                 # have to come later.
-                if i.bound_first and i.bound_second:
-                    is_boundary_edge.append([True, True])
-                elif i.bound_first and not i.bound_second:
-                    is_boundary_edge.append([True, False])
-                elif not i.bound_first and i.bound_second:
-                    is_boundary_edge.append([False, True])
-                else:
-                    is_boundary_edge.append([False, False])
+                is_boundary_edge.append([bool(i.bound_first), bool(i.bound_second)])
 
         # Ensure that edges are integers
-        edges = edges.astype("int")
+        edges = np.hstack(edges).astype("int")
 
-        logger.info(
-            "Points and edges done. Elapsed time %.5f", time.time() - start_time
-        )
-
-        return self._uniquify_points_and_edges(
-            all_p, edges, edges_2_frac, is_boundary_edge
-        )
+        return np.hstack(all_p), edges, edges_2_frac, is_boundary_edge
 
-    def _uniquify_points_and_edges(self, all_p, edges, edges_2_frac, is_boundary_edge):
+    def _uniquify_points_and_edges(
+        self, all_p, edges, edges_2_frac, is_boundary_edge, frac_ind=None
+    ):
         # Snap the points to an underlying Cartesian grid. This is the basis
         # for declearing two points equal
         # NOTE: We need to account for dimensions in the tolerance;
@@ -1101,20 +1768,23 @@ class FractureNetwork3d(object):
             np.sort(edges, axis=0)
         )
 
-        # Update the edges_2_frac map to refer to the new edges
-        edges_2_frac_new = e_unique.shape[1] * [np.empty(0)]
-        is_boundary_edge_new = e_unique.shape[1] * [np.empty(0)]
-
-        for old_i, new_i in enumerate(all_2_unique_e):
-            edges_2_frac_new[new_i], ind = np.unique(
-                np.hstack((edges_2_frac_new[new_i], edges_2_frac[old_i])),
-                return_index=True,
-            )
-            tmp = np.hstack((is_boundary_edge_new[new_i], is_boundary_edge[old_i]))
-            is_boundary_edge_new[new_i] = tmp[ind]
-
-        edges_2_frac = edges_2_frac_new
-        is_boundary_edge = is_boundary_edge_new
+        # Update the edges_2_frac map to refer to the new edges. A new edge
+        # points to the fractures of all the edges merged into it, each
+        # fracture once, with the boundary information of the first of the
+        # merged edges that points to the fracture.
+        num = np.array([len(e) for e in edges_2_frac], dtype=np.int)
+        frac = self._flatten(edges_2_frac, num)
+        bound = self._flatten(is_boundary_edge, num)
+        new_e = np.repeat(all_2_unique_e, num)
+        order = np.lexsort((np.arange(frac.size), frac, new_e))
+        frac, bound, new_e = frac[order], bound[order], new_e[order]
+        first = np.ones(frac.size, dtype=np.bool)
+        first[1:] = np.logical_or(frac[1:] != frac[:-1], new_e[1:] != new_e[:-1])
+        frac, bound, new_e = frac[first], bound[first], new_e[first]
+
+        split = np.cumsum(np.bincount(new_e, minlength=e_unique.shape[1]))[:-1]
+        edges_2_frac = np.split(frac, split)
+        is_boundary_edge = np.split(bound, split)
 
         # Represent edges by unique values
         edges = e_unique
@@ -1128,15 +1798,9 @@ class FractureNetwork3d(object):
             del edges_2_frac[ri]
             del is_boundary_edge[ri]
 
-        # Ensure that the edge to fracture map to a list of numpy arrays.
-        # Use unique so that the same edge only refers to an edge once.
-        edges_2_frac = [
-            np.unique(np.array(edges_2_frac[i])) for i in range(len(edges_2_frac))
-        ]
-
         # Sanity check, the fractures should still be defined by points in a
         # plane.
-        self._verify_fractures_in_plane(p_unique, edges, edges_2_frac)
+        self._verify_fractures_in_plane(p_unique, edges, edges_2_frac, frac_ind)
 
         logger.info(
             """Uniquify complete. %i points, %i edges. Ellapsed time
@@ -1148,7 +1812,9 @@ class FractureNetwork3d(object):
 
         return p_unique, edges, edges_2_frac, is_boundary_edge
 
-    def _remove_edge_intersections(self, all_p, edges, edges_2_frac, is_boundary_edge):
+    def _remove_edge_intersections(
+        self, all_p, edges, edges_2_frac, is_boundary_edge, frac_ind=None
+    ):
         """
         Remove crossings from the set of fracture intersections.
 
@@ -1165,6 +1831,9 @@ class FractureNetwork3d(object):
                 point to the edge.
             is_boundary_edge (np.ndarray of bool, size=num_edges): A flag
                 telling whether the edge is on the boundary of a fracture.
+            frac_ind (np.array, optional): Index of the fractures to be
+                treated. The edges of other fractures should already be
+                non-intersecting. Defaults to all fractures.
 
         Returns:
             The same fields, but updated so that all edges are
@@ -1179,7 +1848,15 @@ class FractureNetwork3d(object):
         # intersections there (direct search in 3D may also work, but this was
         # a simple option). When intersections are found, the global lists of
         # points and edges are updated.
-        for fi, frac in enumerate(self._fractures):
+        if frac_ind is None:
+            frac_ind = np.arange(len(self._fractures))
+
+        # The fractures of all edges as a flat array, with the number of
+        # fractures per edge. These are updated together with edges_2_frac.
+        num_e_frac = np.array([len(e) for e in edges_2_frac], dtype=np.int)
+        edge_frac = self._flatten(edges_2_frac, num_e_frac)
+
+        for fi in frac_ind:
 
             logger.debug("Remove intersections from fracture %i", fi)
 
@@ -1188,10 +1865,9 @@ class FractureNetwork3d(object):
             # relationship frac_2_edge here, but that would have made the
             # update for new edges (towards the end of this loop) more
             # cumbersome.
-            edges_loc_ind = []
-            for ei, e in enumerate(edges_2_frac):
-                if np.any(e == fi):
-                    edges_loc_ind.append(ei)
+            edges_loc_ind = np.unique(
+                np.repeat(np.arange(num_e_frac.size), num_e_frac)[edge_frac == fi]
+            )
 
             edges_loc = np.vstack((edges[:, edges_loc_ind], np.array(edges_loc_ind)))
             p_ind_loc = np.unique(edges_loc[:2])
@@ -1257,30 +1933,36 @@ class FractureNetwork3d(object):
             # Global indices of the local edges
             edges_loc_ind = np.unique(edges_loc_ind)
 
-            # Append fields for edge-fracture map and boundary tags
-            for ei in range(edges_new.shape[1]):
-                # Find the global edge index. For most edges, this will be
-                # correctly identified by edges_new[2], which tracks the
-                # original edges under splitting. However, in cases of
-                # overlapping segments, in which case the index of the one edge
-                # may completely override the index of the other (this is
-                # caused by the implementation of split_intersection_segments_2d.
-                # We therefore compare the new edge to the old ones (before
-                # splitting). If found, use the old information; if not, use
-                # index as tracked by splitting.
-                is_old, old_loc_ind = setmembership.ismember_rows(
-                    edges_new_glob[:, ei].reshape((-1, 1)), edges[:2, edges_loc_ind]
-                )
-                if is_old[0]:
-                    glob_ei = edges_loc_ind[old_loc_ind[0]]
-                else:
-                    glob_ei = edges_new[2, ei]
+            # Append fields for edge-fracture map and boundary tags.
+            # Find the global edge index. For most edges, this will be
+            # correctly identified by edges_new[2], which tracks the
+            # original edges under splitting. However, in cases of
+            # overlapping segments, in which case the index of the one edge
+            # may completely override the index of the other (this is
+            # caused by the implementation of split_intersection_segments_2d.
+            # We therefore compare the new edges to the old ones (before
+            # splitting). If found, use the old information; if not, use
+            # index as tracked by splitting.
+            is_old, old_loc_ind = setmembership.ismember_rows(
+                edges_new_glob, edges[:2, edges_loc_ind]
+            )
+            glob_ind = edges_new[2].copy()
+            glob_ind[is_old] = edges_loc_ind[old_loc_ind]
+            for glob_ei in glob_ind:
                 # Update edge_2_frac and boundary information.
                 edges_2_frac.append(edges_2_frac[glob_ei])
                 is_boundary_edge.append(is_boundary_edge[glob_ei])
+            num_e_frac = np.hstack((num_e_frac, num_e_frac[glob_ind]))
+            edge_frac = np.hstack(
+                (edge_frac, self._flatten([edges_2_frac[ei] for ei in glob_ind]))
+            )
 
             # Finally, purge the old edges
             edges = np.delete(edges, edges_loc_ind, axis=1)
+            keep = np.ones(num_e_frac.size, dtype=np.bool)
+            keep[edges_loc_ind] = False
+            edge_frac = edge_frac[np.repeat(keep, num_e_frac)]
+            num_e_frac = num_e_frac[keep]
 
             # We cannot delete more than one list element at a time. Delete by
             # index in decreasing order, so that we do not disturb the index
@@ -1295,10 +1977,10 @@ class FractureNetwork3d(object):
             "Done with intersection removal. Elapsed time %.5f",
             time.time() - start_time,
         )
-        self._verify_fractures_in_plane(all_p, edges, edges_2_frac)
+        self._verify_fractures_in_plane(all_p, edges, edges_2_frac, frac_ind)
 
         return self._uniquify_points_and_edges(
-            all_p, edges, edges_2_frac, is_boundary_edge
+            all_p, edges, edges_2_frac, is_boundary_edge, frac_ind
         )
 
         # To
@@ -1408,22 +2090,20 @@ class FractureNetwork3d(object):
 
         return c_points
 
-    def _verify_fractures_in_plane(self, p, edges, edges_2_frac):
+    def _verify_fractures_in_plane(self, p, edges, edges_2_frac, frac_ind=None):
         """
         Essentially a debugging method that verify that the given set of
         points, edges and edge connections indeed form planes.
 
         This has turned out to be a common symptom of trouble.
 
-        """
-        for fi, _ in enumerate(self._fractures):
+        Only the fractures in frac_ind are verified, if given.
 
-            # Identify the edges associated with this fracture
-            edges_loc_ind = []
-            for ei, e in enumerate(edges_2_frac):
-                if np.any(e == fi):
-                    edges_loc_ind.append(ei)
+        """
+        if frac_ind is None:
+            frac_ind = np.arange(len(self._fractures))
 
+        for edges_loc_ind in self._edges_of_fractures(edges_2_frac, frac_ind):
             edges_loc = edges[:, edges_loc_ind]
             p_ind_loc = np.unique(edges_loc)
             p_loc = p[:, p_ind_loc]
@@ -1454,9 +2134,7 @@ class FractureNetwork3d(object):
         # The edges must also be redefined to account for the (implicit)
         # local numbering of points
         edges_2d = np.empty_like(edges_loc)
-        for ei in range(edges_loc.shape[1]):
-            edges_2d[0, ei] = np.argwhere(p_ind_loc == edges_loc[0, ei])
-            edges_2d[1, ei] = np.argwhere(p_ind_loc == edges_loc[1, ei])
+        edges_2d[:2] = np.searchsorted(p_ind_loc, edges_loc[:2])
 
         assert edges_2d[:2].max() < p_loc.shape[1]
 
@@ -160,11 +160,31 @@ class FractureNetwork2d(object):
 
         return FractureNetwork2d(p, e, domain, self.tol)
 
-    def mesh(self, mesh_args, tol=None, do_snap=True, constraints=None, **kwargs):
+    def mesh(
+        self, mesh_args, tol=None, do_snap=True, constraints=None, cache=None, **kwargs
+    ):
 
         if tol is None:
             tol = self.tol
 
+        # Look up the mesh in the cache, see pp.MeshCache
+        if cache is not None:
+            key = cache.key(
+                "FractureNetwork2d",
+                self.pts,
+                self.edges,
+                self.domain,
+                tol,
+                do_snap,
+                constraints,
+                mesh_args,
+                kwargs,
+                gmsh_args=mesh_args,
+            )
+            gb = cache.get(key)
+            if gb is not None:
+                return gb
+
         p = self.pts
         e = self.edges
 
@@ -174,6 +194,8 @@ class FractureNetwork2d(object):
             p, e[:2], self.domain, tol=tol, subdomains=constraints, **mesh_args
         )
         gb = pp.meshing.grid_list_to_grid_bucket(grid_list, **kwargs)
+        if cache is not None:
+            cache.put(key, gb)
         return gb
 
     def _decompose_domain(self, domain, nx, ny=None):
@@ -301,6 +323,98 @@ class FractureNetwork2d(object):
         )
         return FractureNetwork2d(p, e, self.domain, self.tol)
 
+    def cluster_analysis(self, sides=None):
+        """ Find the connected clusters of fractures, and the sides of the
+        domain they connect.
+
+        Two fractures are connected if they intersect. A cluster touches a side
+        of the domain if one of its fractures reaches the side, within the
+        tolerance of the network.
+
+        Parameters:
+            sides (list of str, optional): Sides of the domain to consider,
+                among 'xmin', 'xmax', 'ymin' and 'ymax'. Defaults to all sides.
+
+        Returns:
+            np.array (int, num_frac): Cluster of each fracture. The clusters
+                are numbered in the order of their first fracture.
+            dictionary: For each side, a boolean array with one element per
+                cluster, True if the cluster touches the side.
+            dictionary: For each pair of sides (a tuple in the order of sides),
+                True if a cluster connects the sides, that is, if the network
+                percolates between them.
+
+        Raises:
+            ValueError if the network has no box domain, or if a side is
+                unknown.
+
+        """
+        if sides is None:
+            sides = ["xmin", "xmax", "ymin", "ymax"]
+
+        # Split the fractures into branches, tagged with the fracture index.
+        # Fractures that share a point of the split network intersect.
+        branches = np.vstack((self.edges[:2], np.arange(self.num_frac)))
+        if self.num_frac > 0:
+            _, branches = pp.intersections.split_intersecting_segments_2d(
+                self.pts, branches, tol=self.tol
+            )
+        frac = np.hstack((branches[2], branches[2]))
+        pt = np.hstack((branches[0], branches[1]))
+        order = np.argsort(pt, kind="mergesort")
+        pt, frac = pt[order], frac[order]
+        # Connect each fracture to the first fracture of each of its points
+        _, first = np.unique(pt, return_index=True)
+        first_of_pt = np.repeat(frac[first], np.diff(np.append(first, pt.size)))
+        pairs = np.vstack((first_of_pt, frac))
+
+        p = self.pts[:, self.edges[:2]]
+        return pp.frac_utils.fracture_clusters(
+            self.num_frac,
+            pairs,
+            p.min(axis=1),
+            p.max(axis=1),
+            self.domain,
+            sides,
+            self.tol,
+        )
+
+    def prune_clusters(self, sides=None, min_sides=2):
+        """ Remove clusters of fractures that are not connected to the
+        boundary of the domain, see cluster_analysis().
+
+        With the default arguments, isolated fractures and clusters that touch
+        at most one side of the domain are removed. To keep only the clusters
+        that connect two specific sides, give these as sides.
+
+        Parameters:
+            sides (list of str, optional): Sides of the domain to consider,
+                among 'xmin', 'xmax', 'ymin' and 'ymax'. Defaults to all sides.
+            min_sides (int, optional): Minimum number of the sides a cluster
+                should touch to be kept. Defaults to 2.
+
+        Returns:
+            FractureNetwork2d: A new network with the fractures of the kept
+                clusters, in their original order, and the same domain.
+
+        """
+        labels, touches, _ = self.cluster_analysis(sides)
+        num_sides = np.sum([t for t in touches.values()], axis=0)
+        keep = np.flatnonzero(num_sides[labels] >= min_sides)
+        logger.info(
+            "Keep %i of %i fractures in %i of %i clusters",
+            keep.size,
+            self.num_frac,
+            np.sum(num_sides >= min_sides),
+            num_sides.size,
+        )
+
+        # Only keep the points of the kept fractures
+        e = self.edges[:, keep]
+        pt_ind, pt_map = np.unique(e[:2], return_inverse=True)
+        e = np.vstack((pt_map.reshape((2, -1)), e[2:]))
+        return FractureNetwork2d(self.pts[:, pt_ind], e, self.domain, self.tol)
+
     # --------- Utility functions below here
 
     def start_points(self, fi=None):
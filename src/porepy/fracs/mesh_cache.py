@@ -0,0 +1,260 @@
+"""
+Cache of meshed fracture networks.
+
+Meshing a fracture network involves writing a gmsh configuration file, running
+gmsh, reading the mesh back and constructing the mixed-dimensional grid. For
+parameter studies where identical geometries are meshed many times, the final
+GridBucket can instead be stored in a cache, and loaded directly the next time
+the same geometry is meshed with the same parameters.
+
+The cache is a folder with one subfolder per mesh, named by a hash of the
+network geometry, the domain, the meshing parameters, and the versions of
+PorePy and of the gmsh backend that generates the mesh: The gmsh Python API
+if it is used, otherwise the gmsh executable. The buckets are stored in the
+binary format of pp.grid_bucket_io. The total size of the cache can be
+limited, in which case the least recently used meshes are removed.
+
+The cache is opt-in:
+    cache = pp.MeshCache("mesh_cache", max_size=10 ** 9)
+    gb = network.mesh(mesh_args, cache=cache)
+
+On a cache hit, the network is not processed (intersections are not computed
+etc.), thus attributes set during meshing will not be available.
+
+"""
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+
+import numpy as np
+
+import porepy as pp
+from porepy.grids import grid_bucket_io
+from porepy.grids.gmsh import gmsh_interface
+from porepy.utils import read_config
+
+logger = logging.getLogger(__name__)
+
+# Versions of the gmsh executables that have been found, indexed by path
+_GMSH_VERSIONS = {}
+
+
+class MeshCache(object):
+    """ Content-addressed storage of GridBuckets on disk, with a size limit
+    and least recently used eviction.
+
+    The recency of a mesh is represented by the modification time of its
+    folder, which is updated when the mesh is loaded. Several processes may
+    use the same cache: Meshes are written to a temporary folder that is
+    renamed when complete.
+
+    Attributes:
+        folder (str): Folder of the cache.
+        max_size (int): Maximum size of the cache in bytes. If None, the size
+            is not limited.
+
+    """
+
+    def __init__(self, folder, max_size=None):
+        """
+        Parameters:
+            folder (str): Folder of the cache. Created if it does not exist.
+            max_size (int, optional): Maximum size of the cache in bytes.
+                Defaults to None, which means no limit.
+
+        """
+        self.folder = folder
+        self.max_size = max_size
+        os.makedirs(folder, exist_ok=True)
+
+    def key(self, *args, gmsh_args=None):
+        """ Compute the key of a mesh from a description of its input.
+
+        The versions of PorePy and of the gmsh backend are added to the
+        description, see gmsh_version().
+
+        Parameters:
+            *args: Description of the mesh. Numpy arrays, numbers, strings,
+                None, and lists, tuples and dictionaries of these.
+            gmsh_args (dict, optional): Keyword arguments passed on to gmsh
+                when the mesh is generated. The items use_gmsh_api and
+                gmsh_opts decide the gmsh backend. Defaults to None, which
+                means the default backend.
+
+        Returns:
+            str: Hexadecimal hash of the description.
+
+        Raises:
+            ValueError if the description contains other types of values.
+
+        """
+        h = hashlib.sha256()
+        if gmsh_args is None:
+            gmsh_args = {}
+        version = gmsh_version(
+            gmsh_args.get("use_gmsh_api"), **gmsh_args.get("gmsh_opts", {})
+        )
+        _update_hash(h, [pp.__version__, version] + list(args))
+        return h.hexdigest()
+
+    def get(self, key, mmap_mode=None):
+        """ Load a mesh from the cache.
+
+        Parameters:
+            key (str): Key of the mesh, see key().
+            mmap_mode (str, optional): Memory mapping of the stored arrays, see
+                pp.grid_bucket_io.load(). Defaults to None, which reads all
+                arrays into memory.
+
+        Returns:
+            pp.GridBucket: The mesh, or None if it is not in the cache.
+
+        """
+        path = os.path.join(self.folder, key)
+        if not os.path.isfile(os.path.join(path, grid_bucket_io.MANIFEST)):
+            return None
+        try:
+            gb = grid_bucket_io.load(path, mmap_mode=mmap_mode)
+        except (OSError, ValueError, KeyError):
+            # The entry is damaged, or written by an incompatible version
+            logger.warning("Removing unreadable mesh cache entry " + key)
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        # Mark the mesh as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        logger.info("Mesh loaded from cache")
+        return gb
+
+    def put(self, key, gb):
+        """ Store a mesh in the cache, and remove the least recently used
+        meshes if the size limit is exceeded.
+
+        Parameters:
+            key (str): Key of the mesh, see key().
+            gb (pp.GridBucket): The mesh.
+
+        """
+        path = os.path.join(self.folder, key)
+        tmp_path = path + ".tmp" + str(os.getpid())
+        grid_bucket_io.save(gb, tmp_path)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # The mesh was stored by another process in the meantime
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """ Remove the least recently used meshes until the size of the
+        cache is within the limit.
+        """
+        if self.max_size is None:
+            return
+        entries = self._entries()
+        total = sum(size for _, _, size in entries)
+        for _, path, size in sorted(entries):
+            if total <= self.max_size:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def size(self):
+        """
+        Returns:
+            int: Total size of the stored meshes, in bytes.
+
+        """
+        return sum(size for _, _, size in self._entries())
+
+    def clear(self):
+        """ Remove all meshes from the cache."""
+        for _, path, _ in self._entries():
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _entries(self):
+        # Access time, path and size of the stored meshes. Temporary folders
+        # are not included.
+        entries = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if ".tmp" in name or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)
+                )
+                entries.append((os.path.getmtime(path), path, size))
+            except OSError:
+                # Removed by another process
+                continue
+        return entries
+
+
+def gmsh_version(use_api=None, **kwargs):
+    """ Version of the gmsh backend that generates the meshes.
+
+    If the gmsh Python API is used, see gmsh_interface.use_gmsh_api(), this is
+    the version of the gmsh Python package. Otherwise, it is the version of
+    the gmsh executable given in the PorePy configuration file, found by
+    running gmsh once for each executable.
+
+    Parameters:
+        use_api (boolean, optional): Whether to use the gmsh Python API.
+            Defaults to None, in which case the API is used if it is
+            available, and the options in kwargs can be translated.
+        **kwargs: Command line options passed on to gmsh.
+
+    Returns:
+        str: The version, or an empty string if gmsh could not be run.
+
+    """
+    if gmsh_interface.use_gmsh_api(use_api, **kwargs):
+        if gmsh_interface.gmsh is None:
+            return ""
+        # Distinguish the API from an executable of the same version
+        return "api " + str(getattr(gmsh_interface.gmsh, "__version__", ""))
+
+    try:
+        path = read_config.read()["gmsh_path"]
+    except (ImportError, KeyError):
+        return ""
+    if path not in _GMSH_VERSIONS:
+        try:
+            # gmsh prints the version to stderr
+            out = subprocess.run(
+                [path, "--version"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                timeout=60,
+            ).stdout
+            _GMSH_VERSIONS[path] = out.decode(errors="replace").strip()
+        except (OSError, subprocess.SubprocessError):
+            _GMSH_VERSIONS[path] = ""
+    return _GMSH_VERSIONS[path]
+
+
+def _update_hash(h, value):
+    """ Add a value to a hash, in a form that does not depend on the identity
+    of the objects.
+    """
+    if isinstance(value, np.ndarray):
+        h.update(("array" + value.dtype.str + str(value.shape)).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        h.update(("dict" + str(len(value))).encode())
+        for k in sorted(value.keys(), key=str):
+            _update_hash(h, k)
+            _update_hash(h, value[k])
+    elif isinstance(value, (list, tuple)):
+        h.update((type(value).__name__ + str(len(value))).encode())
+        for v in value:
+            _update_hash(h, v)
+    elif value is None or isinstance(value, (bool, int, float, str, np.generic)):
+        h.update((type(value).__name__ + ":" + repr(value) + ";").encode())
+    else:
+        raise ValueError("Cannot compute hash of value of type " + str(type(value)))
@@ -2,9 +2,7 @@
 Module for creating simplex grids with fractures.
 """
 import time
-import sys
 import numpy as np
-import meshio
 import logging
 
 import porepy as pp
@@ -39,7 +37,8 @@ def triangle_grid_embedded(network, f_name, **kwargs):
         f_name (str, optional): Filename for communication with gmsh.
             The config file for gmsh will be f_name.geo, with the grid output
             to f_name.msh. Defaults to dfn_network.
-        **kwargs: Arguments sent to gmsh etc.
+        **kwargs: Arguments sent to gmsh etc. The lower-dimensional grids are
+            constructed in a pool of num_workers processes if this is given.
 
     Returns:
         list (length 3): For each dimension (2 -> 0), a list of all grids in
@@ -47,22 +46,7 @@ def triangle_grid_embedded(network, f_name, **kwargs):
 
     """
 
-    out_file = _run_gmsh(f_name, in_3d=False, **kwargs)
-
-    # The interface of meshio changed between versions 1 and 2. We make no
-    # assumption on which version is installed here.
-    if int(meshio.__version__[0]) < 2:
-        pts, cells, _, cell_info, phys_names = meshio.gmsh_io.read(out_file)
-        # Invert phys_names dictionary to map from physical tags to corresponding
-        # physical names
-        phys_names = {v[0]: k for k, v in phys_names.items()}
-    else:
-        mesh = meshio.read(out_file)
-
-        pts = mesh.points
-        cells = mesh.cells
-        cell_info = mesh.cell_data
-        phys_names = {v[0]: k for k, v in mesh.field_data.items()}
+    pts, cells, cell_info, phys_names = _run_gmsh(f_name, **kwargs)
 
     g_2d = mesh_2_grid.create_2d_grids(
         pts,
@@ -71,8 +55,11 @@ def triangle_grid_embedded(network, f_name, **kwargs):
         phys_names=phys_names,
         cell_info=cell_info,
         network=network,
+        num_workers=kwargs.get("num_workers"),
+    )
+    g_1d, _ = mesh_2_grid.create_1d_grids(
+        pts, cells, phys_names, cell_info, num_workers=kwargs.get("num_workers")
     )
-    g_1d, _ = mesh_2_grid.create_1d_grids(pts, cells, phys_names, cell_info)
     g_0d = mesh_2_grid.create_0d_grids(pts, cells)
 
     grids = [g_2d, g_1d, g_0d]
@@ -98,7 +85,17 @@ def triangle_grid_embedded(network, f_name, **kwargs):
 
 
 def _run_gmsh(file_name, **kwargs):
+    """ Mesh the geometry in file_name.geo by gmsh, see
+    gmsh_interface.generate_mesh() for the format of the returned mesh.
+
+    The gmsh Python API is used if it is available, unless kwargs has the item
+    use_gmsh_api=False. The number of threads used by gmsh can be set by
+    num_threads.
 
+    Raises:
+        RuntimeError if gmsh fails.
+
+    """
     verbose = kwargs.get("verbose", 1)
     if file_name[-4:] == ".geo" or file_name[-4:] == ".msh":
         file_name = file_name[:-4]
@@ -109,15 +106,17 @@ def _run_gmsh(file_name, **kwargs):
     gmsh_opts = kwargs.get("gmsh_opts", {})
     gmsh_verbose = kwargs.get("gmsh_verbose", verbose)
     gmsh_opts["-v"] = gmsh_verbose
-    gmsh_status = gmsh_interface.run_gmsh(in_file, out_file, dims=3, **gmsh_opts)
-
+    mesh = gmsh_interface.generate_mesh(
+        in_file,
+        out_file,
+        dims=3,
+        num_threads=kwargs.get("num_threads"),
+        use_api=kwargs.get("use_gmsh_api"),
+        **gmsh_opts
+    )
     if verbose > 0:
-        if gmsh_status == 0:
-            logger.info("Gmsh processed file successfully")
-        else:
-            logger.error("Gmsh failed with status " + str(gmsh_status))
-            sys.exit()
-    return out_file
+        logger.info("Gmsh processed file successfully")
+    return mesh
 
 
 def triangle_grid(
@@ -270,8 +269,9 @@ def triangle_grid(
     )
     gw.write_geo(in_file)
 
-    _run_gmsh(file_name, **kwargs)
-    return triangle_grid_from_gmsh(file_name, **kwargs)
+    start_time = time.time()
+    mesh = _run_gmsh(file_name, **kwargs)
+    return _triangle_grids(mesh, start_time, **kwargs)
 
 
 def triangle_grid_from_gmsh(file_name, **kwargs):
@@ -282,20 +282,13 @@ def triangle_grid_from_gmsh(file_name, **kwargs):
         file_name = file_name[:-4]
     out_file = file_name + ".msh"
 
-    # The interface of meshio changed between versions 1 and 2. We make no
-    # assumption on which version is installed here.
-    if int(meshio.__version__[0]) < 2:
-        pts, cells, _, cell_info, phys_names = meshio.gmsh_io.read(out_file)
-        # Invert phys_names dictionary to map from physical tags to corresponding
-        # physical names
-        phys_names = {v[0]: k for k, v in phys_names.items()}
-    else:
-        mesh = meshio.read(out_file)
+    mesh = gmsh_interface.read_mesh_file(out_file)
+    return _triangle_grids(mesh, start_time, **kwargs)
 
-        pts = mesh.points
-        cells = mesh.cells
-        cell_info = mesh.cell_data
-        phys_names = {v[0]: k for k, v in mesh.field_data.items()}
+
+def _triangle_grids(mesh, start_time, **kwargs):
+    # Create grids from a 2d mesh, in the format returned by gmsh_interface
+    pts, cells, cell_info, phys_names = mesh
 
     # Constants used in the gmsh.geo-file
     const = constants.GmshConstants()
@@ -338,30 +331,46 @@ def triangle_grid_from_gmsh(file_name, **kwargs):
     return grids
 
 
+def tetrahedral_grid(network, file_name, **kwargs):
+    """ Create a tetrahedral (3D) grid of a fractured domain, by meshing the
+    gmsh configuration file written by the network.
+
+    Parameters:
+        network (FractureNetwork3d): To be meshed. The gmsh configuration
+            file should have been written by network.to_gmsh().
+        file_name (str): Name of the gmsh configuration file file_name.geo.
+            If the gmsh executable is used, the grid is written to
+            file_name.msh.
+        **kwargs: Arguments sent to gmsh etc. The lower-dimensional grids are
+            constructed in a pool of num_workers processes if this is given.
+
+    Returns:
+        list (length 4): For each dimension (3 -> 0), a list of all grids in
+            that dimension.
+
+    """
+    start_time = time.time()
+    mesh = _run_gmsh(file_name, **kwargs)
+    return _tetrahedral_grids(network, mesh, start_time, **kwargs)
+
+
 def tetrahedral_grid_from_gmsh(network, file_name, **kwargs):
 
     start_time = time.time()
-    # Verbosity level
-    verbose = kwargs.get("verbose", 1)
 
     if file_name.endswith(".msh"):
         file_name = file_name[:-4]
     file_name = file_name + ".msh"
 
-    # The interface of meshio changed between versions 1 and 2. We make no
-    # assumption on which version is installed here.
-    if int(meshio.__version__[0]) < 2:
-        pts, cells, _, cell_info, phys_names = meshio.gmsh_io.read(file_name)
-        # Invert phys_names dictionary to map from physical tags to corresponding
-        # physical names
-        phys_names = {v[0]: k for k, v in phys_names.items()}
-    else:
-        mesh = meshio.read(file_name)
+    mesh = gmsh_interface.read_mesh_file(file_name)
+    return _tetrahedral_grids(network, mesh, start_time, **kwargs)
 
-        pts = mesh.points
-        cells = mesh.cells
-        cell_info = mesh.cell_data
-        phys_names = {v[0]: k for k, v in mesh.field_data.items()}
+
+def _tetrahedral_grids(network, mesh, start_time, **kwargs):
+    # Create grids from a 3d mesh, in the format returned by gmsh_interface
+    pts, cells, cell_info, phys_names = mesh
+    # Verbosity level
+    verbose = kwargs.get("verbose", 1)
 
     # Call upon helper functions to create grids in various dimensions.
     # The constructors require somewhat different information, reflecting the
@@ -374,8 +383,11 @@ def tetrahedral_grid_from_gmsh(network, file_name, **kwargs):
         phys_names=phys_names,
         cell_info=cell_info,
         network=network,
+        num_workers=kwargs.get("num_workers"),
+    )
+    g_1d, _ = mesh_2_grid.create_1d_grids(
+        pts, cells, phys_names, cell_info, num_workers=kwargs.get("num_workers")
     )
-    g_1d, _ = mesh_2_grid.create_1d_grids(pts, cells, phys_names, cell_info)
     g_0d = mesh_2_grid.create_0d_grids(pts, cells)
 
     grids = [g_3d, g_2d, g_1d, g_0d]
@@ -4,10 +4,10 @@ Module for splitting a grid at the fractures.
 
 import numpy as np
 from scipy import sparse as sps
+from scipy.sparse import csgraph
 
 from porepy.utils.half_space import half_space_int
 from porepy.utils import sparse_mat, tags
-from porepy.utils.graph import Graph
 from porepy.utils.mcolon import mcolon
 
 
@@ -202,6 +202,8 @@ def duplicate_faces(gh, face_cells):
 
     frac_id = frac_id[~rem]
     if frac_id.size == 0:
+        # The tags are modified in place
+        gh.clear_cache()
         return frac_id
 
     node_start = gh.face_nodes.indptr[frac_id]
@@ -397,6 +399,13 @@ def duplicate_nodes(g, nodes, offset):
     added. If the node is on a X-intersection 4 duplicates will be added.
     Equivalently for other types of intersections.
 
+    The cells around all nodes are colored at once: The pairs of a node and a
+    cell of the node form a graph, where two pairs of the same node are
+    connected if the cells share a face of the node. The connected components
+    of this graph are the groups of cells attached to the same copy of the
+    node. The copies of a node are ordered by the smallest cell index of
+    their group.
+
     Parameters:
     ----------
     g         - The grid for which the nodes are duplicated
@@ -404,159 +413,113 @@ def duplicate_nodes(g, nodes, offset):
     offset    - How far from the original node the duplications should be
                 placed.
     """
-    node_count = 0
-
-    # We wish to convert the sparse csc matrix to a sparse
-    # csr matrix to easily add rows. However, the convertion sorts the
-    # indices, which will change the node order when we convert back. We
-    # therefore find the inverse sorting of the nodes of each face.
-    # After we have performed the row operations we will map the nodes
-    # back to their original position.
-
-    _, iv = sort_sub_list(g.face_nodes.indices, g.face_nodes.indptr)
-    g.face_nodes = g.face_nodes.tocsr()
-    # Iterate over each internal node and split it according to the graph.
-    # For each cell attached to the node, we check wich color the cell has.
-    # All cells with the same color is then attached to a new copy of the
-    # node.
-    cell_nodes = g.cell_nodes().tocsr()
-    for node in nodes:
-        # t_node takes into account the added nodes.
-        t_node = node + node_count
-        # Find cells connected to node
-
-        cells = sparse_mat.slice_indices(cell_nodes, node)
-        #        cell_nodes = g.cell_nodes().tocsr()
-        #        ind_ptr = cell_nodes.indptr
-        #        cells = cell_nodes.indices[
-        #            mcolon(ind_ptr[t_node], ind_ptr[t_node + 1])]
-        cells = np.unique(cells)
-        # Find the color of each cell. A group of cells is given the same color
-        # if they are connected by faces. This means that all cells on one side
-        # of a fracture will have the same color, but a different color than
-        # the cells on the other side of the fracture. Equivalently, the cells
-        # at a X-intersection will be given four different colors
-        colors = find_cell_color(g, cells)
-        # Find which cells share the same color
-        colors, ix = np.unique(colors, return_inverse=True)
-        # copy coordinate of old node
-        new_nodes = np.repeat(g.nodes[:, t_node, None], colors.size, axis=1)
-        faces = np.array([], dtype=int)
-        face_pos = np.array([g.face_nodes.indptr[t_node]])
-        assert g.cell_faces.getformat() == "csc"
-        assert g.face_nodes.getformat() == "csr"
-        faces_of_node_t = sparse_mat.slice_indices(g.face_nodes, t_node)
-        for j in range(colors.size):
-            # For each color we wish to add one node. First we find all faces that
-            # are connected to the fracture node, and have the correct cell
-            # color
-            colored_faces = sparse_mat.slice_indices(g.cell_faces, cells[ix == j])
-            colored_faces = np.unique(colored_faces)
-            is_colored = np.in1d(faces_of_node_t, colored_faces, assume_unique=True)
-
-            faces = np.append(faces, faces_of_node_t[is_colored])
-            # These faces are then attached to new node number j.
-            face_pos = np.append(face_pos, face_pos[-1] + np.sum(is_colored))
-            # If an offset is given, we will change the position of the nodes.
-            # We move the nodes a length of offset away from the fracture(s).
-            if offset > 0 and colors.size > 1:
-                new_nodes[:, j] -= avg_normal(g, faces_of_node_t[is_colored]) * offset
-        # The total number of faces should not have changed, only their
-        # connection to nodes. We can therefore just update the indices and
-        # indptr map.
-        g.face_nodes.indices[face_pos[0] : face_pos[-1]] = faces
-        node_count += colors.size - 1
-        g.face_nodes.indptr = np.insert(g.face_nodes.indptr, t_node + 1, face_pos[1:-1])
-        g.face_nodes._shape = (
-            g.face_nodes.shape[0] + colors.size - 1,
-            g.face_nodes._shape[1],
-        )
-        # We delete the old node because of the offset. If we do not
-        # have an offset we could keep it and add one less node.
-        g.nodes = np.delete(g.nodes, t_node, axis=1)
-        g.nodes = np.insert(g.nodes, [t_node] * new_nodes.shape[1], new_nodes, axis=1)
-
-    # Transform back to csc format and fix node ordering.
-    g.face_nodes = g.face_nodes.tocsc()
-    g.face_nodes.indices = g.face_nodes.indices[iv]  # For fast row operation
-
-    return node_count
-
-
-def sort_sub_list(indices, indptr):
-    ix = np.zeros(indices.size, dtype=int)
-    for i in range(indptr.size - 1):
-        sub_ind = slice(indptr[i], indptr[i + 1])
-        loc_ix = np.argsort(indices[sub_ind])
-        ix[sub_ind] = loc_ix + indptr[i]
-    indices = indices[ix]
-    iv = np.zeros(indices.size, dtype=int)
-    iv[ix] = np.arange(indices.size)
-    return indices, iv
-
-
-def find_cell_color(g, cells):
-    """
-    Color the cells depending on the cell connections. Each group of cells
-    that are connected (either directly by a shared face or through a series
-    of shared faces of many cells) is are given different colors.
-           c_1-c_3     c_4
-         /
-       c_7  |           |
-         \
-           c_2         c_5
-    In this case, cells c_1, c_2, c_3 and c_7 will be given color 0, while
-    cells c_4 and c_5 will be given color 1.
-
-    Parameters:
-    ----------
-    g        - Grid for which the cells belong
-    cells    - indecies of cells (=np.array([1,2,3,4,5,7]) for case above)
-    """
-    c = np.sort(cells)
-    # Local cell-face and face-node maps.
-    assert g.cell_faces.getformat() == "csc"
-    cell_faces = sparse_mat.slice_mat(g.cell_faces, c)
-    child_cell_ind = -np.ones(g.num_cells, dtype=np.int)
-    child_cell_ind[c] = np.arange(cell_faces.shape[1])
-
-    # Create a copy of the cell-face relation, so that we can modify it at
-    # will
-    # com Runar: I don't think this is neccessary as slice_mat creates a copy
-    #    cell_faces = cf_sub.copy()
-
-    # Direction of normal vector does not matter here, only 0s and 1s
-    cell_faces.data = np.abs(cell_faces.data)
-
-    # Find connection between cells via the cell-face map
-    c2c = cell_faces.transpose() * cell_faces
-    # Only care about absolute values
-    c2c.data = np.clip(c2c.data, 0, 1).astype("bool")
-
-    graph = Graph(c2c)
-    graph.color_nodes()
-    return graph.color[child_cell_ind[cells]]
+    nodes = np.unique(nodes)
+    if nodes.size == 0:
+        return 0
+    num_cells = g.num_cells
 
+    # Pairs of split nodes and their cells, sorted by node and cell.
+    cell_nodes = g.cell_nodes().tocsr()
+    cell_nodes.sort_indices()
+    indptr = cell_nodes.indptr
+    star_cells = cell_nodes.indices[mcolon(indptr[nodes], indptr[nodes + 1])]
+    star_nodes = np.repeat(nodes, indptr[nodes + 1] - indptr[nodes])
+    star_key = star_nodes * num_cells + star_cells
+
+    # Map from faces to their cells. The cell-face relation may contain
+    # explicit zeros for split faces, these are disregarded.
+    cell_faces = g.cell_faces.tocsr()
+    cell_faces.eliminate_zeros()
+    num_face_cells = np.diff(cell_faces.indptr)
+    first_cell = np.zeros(g.num_faces, dtype=np.int)
+    has_cell = num_face_cells > 0
+    first_cell[has_cell] = cell_faces.indices[cell_faces.indptr[:-1][has_cell]]
+
+    # Face-node pairs, in the order of the face-node relation
+    face_nodes = g.face_nodes.tocsc()
+    fn_faces = np.repeat(np.arange(g.num_faces), np.diff(face_nodes.indptr))
+    fn_nodes = face_nodes.indices
+    is_split = np.zeros(g.num_nodes, dtype=np.bool)
+    is_split[nodes] = True
+    fn_split = np.flatnonzero(is_split[fn_nodes])
+
+    # Two cells sharing a face are connected in the stars of all split nodes
+    # of the face.
+    shared = fn_split[num_face_cells[fn_faces[fn_split]] == 2]
+    shared_nodes = fn_nodes[shared]
+    shared_faces = fn_faces[shared]
+    second_cell = cell_faces.indices[cell_faces.indptr[shared_faces] + 1]
+    v_1 = np.searchsorted(star_key, shared_nodes * num_cells + first_cell[shared_faces])
+    v_2 = np.searchsorted(star_key, shared_nodes * num_cells + second_cell)
+
+    num_star = star_key.size
+    graph = sps.coo_matrix(
+        (np.ones(v_1.size, dtype=np.bool), (v_1, v_2)), shape=(num_star, num_star)
+    )
+    _, component = csgraph.connected_components(graph, directed=False)
+
+    # Order the components by their first star pair, which is the one with the
+    # smallest cell. Since components do not span several nodes, this gives
+    # the components of each node consecutively.
+    first_pair = np.full(component.max() + 1, num_star, dtype=np.int)
+    np.minimum.at(first_pair, component, np.arange(num_star))
+    comp_order = np.argsort(first_pair)
+    comp_node = star_nodes[first_pair[comp_order]]
+    # Index of the copy of the node that each component is attached to
+    copy_ind = np.empty(comp_order.size, dtype=np.int)
+    copy_ind[comp_order] = np.arange(comp_order.size) - np.searchsorted(
+        comp_node, comp_node
+    )
 
-def avg_normal(g, faces):
-    """
-    Calculates the average face normal of a set of faces. The average normal
-    is only constructed from the boundary faces, that is, a face thatbelongs
-    to exactly one cell. If a face is not a boundary face, it will be ignored.
-    The faces normals are fliped such that they point out of the cells.
+    # Number of copies of all nodes, and the index of the first copy in the
+    # new numbering.
+    num_copies = np.ones(g.num_nodes, dtype=np.int)
+    num_copies[nodes] = np.searchsorted(
+        comp_node, nodes, side="right"
+    ) - np.searchsorted(comp_node, nodes)
+    first_copy = np.cumsum(num_copies) - num_copies
+
+    # Renumber the nodes of the faces. The split nodes are assigned the copy
+    # of the component of a cell of the face.
+    new_indices = first_copy[fn_nodes]
+    v = np.searchsorted(
+        star_key, fn_nodes[fn_split] * num_cells + first_cell[fn_faces[fn_split]]
+    )
+    new_indices[fn_split] += copy_ind[component[v]]
+
+    new_nodes = np.repeat(g.nodes, num_copies, axis=1)
+
+    # If an offset is given, we will change the position of the nodes.
+    # We move the nodes a length of offset away from the fracture(s).
+    if offset > 0:
+        # Copies of nodes that are split are moved along the average normal
+        # of their faces that have a single cell. The normals are flipped to
+        # point out of the cells.
+        is_moved = np.repeat(num_copies > 1, num_copies)
+        fn_frac = fn_split[num_face_cells[fn_faces[fn_split]] == 1]
+        fn_frac = fn_frac[is_moved[new_indices[fn_frac]]]
+        faces = fn_faces[fn_frac]
+        sign = cell_faces.data[cell_faces.indptr[faces]]
+        normals = g.face_normals[:, faces] * sign
+        n = np.vstack(
+            [
+                np.bincount(new_indices[fn_frac], w, minlength=new_nodes.shape[1])
+                for w in normals
+            ]
+        )
+        count = np.bincount(new_indices[fn_frac], minlength=new_nodes.shape[1])
+        n = n[:, is_moved] / count[is_moved]
+        new_nodes[:, is_moved] -= n / np.linalg.norm(n, axis=0) * offset
+
+    # The total number of faces has not changed, only their connection to
+    # nodes. The ordering of the nodes of each face is kept.
+    g.face_nodes = sps.csc_matrix(
+        (face_nodes.data, new_indices, face_nodes.indptr),
+        shape=(new_nodes.shape[1], g.num_faces),
+    )
+    g.nodes = new_nodes
 
-    Parameters:
-    ----------
-    g         - Grid
-    faces     - Face indecies of face normals that should be averaged
-    """
-    frac_face = np.ravel(np.sum(np.abs(g.cell_faces[faces, :]), axis=1) == 1)
-    f, _, sign = sps.find(g.cell_faces[faces[frac_face], :])
-    n = g.face_normals[:, faces[frac_face]]
-    n = n[:, f] * sign
-    n = np.mean(n, axis=1)
-    n = n / np.linalg.norm(n)
-    return n
+    return new_nodes.shape[1] - num_copies.size
 
 
 def remove_nodes(g, rem):
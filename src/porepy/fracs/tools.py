@@ -6,7 +6,9 @@ This can be thought of as a module for backend utility functions, as opposed to
 the frontend functions found in utils.
 
 """
+import itertools
 import numpy as np
+import scipy.spatial
 import warnings
 
 import porepy as pp
@@ -53,66 +55,51 @@ def determine_mesh_size(pts, pts_on_boundary=None, lines=None, **kwargs):
     dist = np.linalg.norm(pts[:, pts_id[0, :]] - pts[:, pts_id[1, :]], axis=0)
     dist_pts = np.tile(np.inf, pts.shape[1])
 
-    # Loop on all the points and consider the minimum between the pairs of
-    # points lengths associated to the single point and the value input by the
-    # user
-    for i, pt_id in enumerate(pts_id.T):
-        distances = np.array([dist_pts[pt_id], [dist[i]] * 2, vals[pt_id]])
-        dist_pts[pt_id] = np.amin(distances, axis=0)
+    # For each point, take the minimum between the lengths of the lines of the
+    # point and the value input by the user
+    np.minimum.at(dist_pts, pts_id[0], dist)
+    np.minimum.at(dist_pts, pts_id[1], dist)
+    on_line = np.unique(pts_id)
+    dist_pts[on_line] = np.minimum(dist_pts[on_line], vals[on_line])
 
-    num_pts = pts.shape[1]
-    pts_extra = np.empty((pts.shape[0], 0))
-    dist_extra = np.empty(0)
-    pts_id_extra = np.empty(0, dtype=np.int)
-    vals_extra = np.empty(0)
-    # For each point we compute the distance between the point and the other
-    # pairs of points. We keep the minimum distance between the previously
-    # computed point distance and the distance among the other pairs of points.
-    # If the latter happens, we introduce a new point (useful to determine the
-    # grid size) on the corresponding pair of points with a corresponding
-    # distance.
-
-    # Loop over all lines
-    for line in lines.T:
-        # Find start and endpoint of this line
-        start, end = pts[:, line[0]], pts[:, line[1]]
-        # Compute the distacne between this line and all points in the domain
-        # This will also include the start and endpoint of this line, but we
-        # deal with that later
-        dist, cp = pp.distances.points_segments(pts, start, end)
-
-        # We know there is a single segment, thus the distance vector can be reduced
-        dist = dist[:, 0]
-        # Find points that are closer than the target distance
-        hit = np.where(
-            np.logical_and(dist < vals, np.logical_not(np.isclose(dist, 0.0)))
-        )[0]
-        # Update the minimum distance found for these points
-        dist_pts[hit] = np.minimum(dist_pts[hit], dist[hit])
-
-        # cp[hit, 0] now contains points on the main line that are closest to
-        # another point, and that sufficiently close to warrant attention.
-        # Compute the distance from cp to the start and endpoint of this
-        # line
-        # Transposes are needed here because that is how numpy works
-        dist_start = pp.distances.point_pointset(start, cp[hit, 0].T)
-        dist_end = pp.distances.point_pointset(end, cp[hit, 0].T)
-
-        # Now, the cp points are added if they are closer to another point than
-        # to the start and end point of its line, and if the distance from the
-        # start and end is not smaller than the minimum point. The latter removes
-        # lines having their own end points added, and also avoids arbitrarily
-        # small segments along the line.
-        to_add = np.logical_and.reduce((dist[hit] < dist_start, dist[hit] < dist_end))
-        if np.any(to_add):
-            dist_extra = np.r_[
-                dist_extra, np.minimum(dist[hit[to_add]], vals[hit[to_add]])
-            ]
-            pts_extra = np.c_[pts_extra, cp[hit[to_add], 0].T]
-            pts_id_extra = np.r_[
-                pts_id_extra, line[3] * np.ones(to_add.sum(), dtype=np.int)
-            ]
-            vals_extra = np.r_[vals_extra, vals[hit[to_add]]]
+    # For each point we compute the distance between the point and the lines.
+    # We keep the minimum distance between the previously computed point
+    # distance and the distance to the lines. If the latter happens, we
+    # introduce a new point (useful to determine the grid size) on the
+    # corresponding line with a corresponding distance.
+
+    # Only points closer to a line than their value are of interest, find these
+    # among the points in the bounding box of the line
+    pt_ind, line_ind = _close_points_segments(
+        pts, vals, pts[:, lines[0]], pts[:, lines[1]]
+    )
+    start, end = pts[:, lines[0, line_ind]], pts[:, lines[1, line_ind]]
+    dist, cp = pp.distances.points_segments_pairwise(pts[:, pt_ind], start, end)
+
+    # Find points that are closer than the target distance. This will also
+    # include the start and endpoint of the lines, but we deal with that here
+    hit = np.logical_and(dist < vals[pt_ind], np.logical_not(np.isclose(dist, 0.0)))
+    pt_ind, line_ind, dist = pt_ind[hit], line_ind[hit], dist[hit]
+    start, end, cp = start[:, hit], end[:, hit], cp[:, hit]
+    # Update the minimum distance found for these points
+    np.minimum.at(dist_pts, pt_ind, dist)
+
+    # cp now contains points on the lines that are closest to another point,
+    # and that sufficiently close to warrant attention. Compute the distance
+    # from cp to the start and endpoint of the line
+    dist_start = np.power(np.sum(np.power(np.abs(start - cp), 2), axis=0), 1 / 2)
+    dist_end = np.power(np.sum(np.power(np.abs(end - cp), 2), axis=0), 1 / 2)
+
+    # Now, the cp points are added if they are closer to another point than
+    # to the start and end point of its line, and if the distance from the
+    # start and end is not smaller than the minimum point. The latter removes
+    # lines having their own end points added, and also avoids arbitrarily
+    # small segments along the line.
+    to_add = np.logical_and(dist < dist_start, dist < dist_end)
+    dist_extra = np.minimum(dist[to_add], vals[pt_ind[to_add]])
+    pts_extra = cp[:, to_add]
+    pts_id_extra = lines[3, line_ind[to_add]]
+    vals_extra = vals[pt_ind[to_add]]
 
     old_lines = lines
     old_pts = pts
@@ -120,30 +107,7 @@ def determine_mesh_size(pts, pts_on_boundary=None, lines=None, **kwargs):
     # Since the computation was done point by point with the lines, we need to
     # consider all the new points together and remove (from the new points) the
     # useless ones.
-    extra_ids, inv_index = np.unique(pts_id_extra, return_inverse=True)
-    to_remove = np.empty(0, dtype=np.int)
-    for idx, i in enumerate(extra_ids):
-        mask = np.flatnonzero(inv_index == idx)
-        if mask.size > 1:
-            mesh_matrix = np.tile(dist_extra[mask], (mask.size, 1))
-            dist_matrix = np.ones((mask.size, mask.size)) * np.inf
-
-            for pt1_id_loc in np.arange(mask.size):
-                for pt2_id_loc in np.arange(pt1_id_loc + 1, mask.size):
-                    pt1_id = mask[pt1_id_loc]
-                    pt2_id = mask[pt2_id_loc]
-                    pt1 = pts_extra[:, pt1_id]
-                    pt2 = pts_extra[:, pt2_id]
-                    pts_id = np.array([pt1_id, pt2_id])
-                    pts_id_loc = np.array([pt1_id_loc, pt2_id_loc])
-                    pos_min = np.argmin(dist_extra[pts_id])
-                    pos_max = np.argmax(dist_extra[pts_id])
-                    dist_matrix[
-                        pts_id_loc[pos_min], pts_id_loc[pos_max]
-                    ] = np.linalg.norm(pt1 - pt2)
-
-            to_remove_loc = np.any(dist_matrix < mesh_matrix, axis=0)
-            to_remove = np.r_[to_remove, mask[to_remove_loc]]
+    to_remove = _redundant_extra_points(pts_extra, dist_extra, pts_id_extra)
 
     # Remove the useless new points
     pts_extra = np.delete(pts_extra, to_remove, axis=1)
@@ -154,80 +118,201 @@ def determine_mesh_size(pts, pts_on_boundary=None, lines=None, **kwargs):
     pts = np.c_[pts, pts_extra]
     dist_pts = np.r_[dist_pts, dist_extra]
     vals = np.r_[vals, vals_extra]
-    # Re-create the lines, considering the new introduced points
-    seg_ids = np.unique(lines[3, :])
-    new_lines = np.empty((4, 0), dtype=np.int)
-    for seg_id in seg_ids:
-        mask_bool = lines[3, :] == seg_id
-        extra_mask_bool = pts_id_extra == seg_id
-        if not np.any(extra_mask_bool):
-            # No extra points are considered for the current line
-            new_lines = np.c_[new_lines, lines[:, mask_bool]]
-        else:
-            # New extra point are considered for the current line, they need to
-            # be sorted along the line.
-            pts_frac_id = np.hstack(
-                (
-                    lines[0:2, mask_bool].ravel(),
-                    np.flatnonzero(extra_mask_bool) + num_pts,
-                )
-            )
-            pts_frac_id = np.unique(pts_frac_id)
-            pts_frac = pts[:, pts_frac_id]
-
-            # We will sort points on the line below, but this function requires
-            # 3D points
-            pts_frac_aug = np.vstack((pts_frac, np.zeros(pts_frac.shape[1])))
-            pts_frac_id = pts_frac_id[
-                pp.map_geometry.sort_points_on_line(pts_frac_aug, tol)
-            ]
-            pts_frac_id = np.vstack((pts_frac_id[:-1], pts_frac_id[1:]))
-            other_info = np.tile(
-                lines[2:, mask_bool][:, 0], (pts_frac_id.shape[1], 1)
-            ).T
-            new_lines = np.c_[new_lines, np.vstack((pts_frac_id, other_info))]
+
+    # Re-create the lines, considering the new introduced points. Lines
+    # without extra points are kept as they are, the lines with extra points
+    # are replaced by segments between the points sorted along the line. The
+    # lines are ordered by their tag.
+    seg_ids = np.unique(pts_id_extra)
+    has_extra = np.in1d(lines[3], seg_ids)
+    new_lines = [lines[:, np.logical_not(has_extra)]]
+
+    line_order = np.argsort(lines[3], kind="mergesort")
+    line_lo = np.searchsorted(lines[3, line_order], seg_ids, side="left")
+    line_hi = np.searchsorted(lines[3, line_order], seg_ids, side="right")
+    extra_order = np.argsort(pts_id_extra, kind="mergesort")
+    extra_lo = np.searchsorted(pts_id_extra[extra_order], seg_ids, side="left")
+    extra_hi = np.searchsorted(pts_id_extra[extra_order], seg_ids, side="right")
+    for si in range(seg_ids.size):
+        mask = line_order[line_lo[si] : line_hi[si]]
+        extra_ind = extra_order[extra_lo[si] : extra_hi[si]]
+        # New extra point are considered for the current line, they need to
+        # be sorted along the line.
+        pts_frac_id = np.hstack((lines[0:2, mask].ravel(), extra_ind + num_pts))
+        pts_frac_id = np.unique(pts_frac_id)
+        pts_frac = pts[:, pts_frac_id]
+
+        # Sort the points along the line, in the direction of the tangent used
+        # by pp.map_geometry.sort_points_on_line. The points on a line are
+        # known to be co-linear.
+        pts_frac_aug = np.vstack((pts_frac, np.zeros(pts_frac.shape[1])))
+        tangent = pp.map_geometry.compute_tangent(pts_frac_aug)
+        pts_frac_id = pts_frac_id[np.argsort(tangent.dot(pts_frac_aug))]
+        pts_frac_id = np.vstack((pts_frac_id[:-1], pts_frac_id[1:]))
+        other_info = np.tile(lines[2:, mask][:, 0], (pts_frac_id.shape[1], 1)).T
+        new_lines.append(np.vstack((pts_frac_id, other_info)))
+
+    new_lines = np.hstack(new_lines).astype(np.int)
+    new_lines = new_lines[:, np.argsort(new_lines[3], kind="mergesort")]
 
     # Consider extra points related to the input value, if the fracture is long
     # and, beacuse of val, needs additional points we increase the number of
     # lines.
     relax = kwargs.get("relaxation", 0.8)
-    lines = np.empty((4, 0), dtype=np.int)
-    for seg in new_lines.T:
-        mesh_size_pt1 = dist_pts[seg[0]]
-        mesh_size_pt2 = dist_pts[seg[1]]
-        dist = np.linalg.norm(pts[:, seg[0]] - pts[:, seg[1]])
-        if (
-            mesh_size_pt1 >= relax * vals[seg[0]]
-            and mesh_size_pt2 >= relax * vals[seg[1]]
-        ) or (relax * dist <= 2 * mesh_size_pt1 and relax * dist <= 2 * mesh_size_pt2):
-            lines = np.c_[lines, seg]
-        else:
-            pt_id = pts.shape[1]
-            new_pt = 0.5 * (pts[:, seg[0]] + pts[:, seg[1]])
-            pts = np.c_[pts, new_pt]
+    mesh_size_pt1 = dist_pts[new_lines[0]]
+    mesh_size_pt2 = dist_pts[new_lines[1]]
+    dist = np.linalg.norm(pts[:, new_lines[0]] - pts[:, new_lines[1]], axis=0)
+    keep = np.logical_or(
+        np.logical_and(
+            mesh_size_pt1 >= relax * vals[new_lines[0]],
+            mesh_size_pt2 >= relax * vals[new_lines[1]],
+        ),
+        np.logical_and(
+            relax * dist <= 2 * mesh_size_pt1, relax * dist <= 2 * mesh_size_pt2
+        ),
+    )
 
-            mesh_size = np.amin(np.r_[vals[seg[:2]], dist / 2.0])
+    # The other lines are split in two by their midpoint
+    split = np.flatnonzero(np.logical_not(keep))
+    seg = new_lines[:, split]
+    new_pt = 0.5 * (pts[:, seg[0]] + pts[:, seg[1]])
+    mesh_size = np.minimum(np.minimum(vals[seg[0]], vals[seg[1]]), dist[split] / 2.0)
 
-            start_old = old_pts[:, old_lines[0]]
-            end_old = old_pts[:, old_lines[1]]
+    # Update the minimum mesh size if the distance between the new point and
+    # any old line is less than the current value. Disregard points that lie
+    # on the old segment.
+    start_old = old_pts[:, old_lines[0]]
+    end_old = old_pts[:, old_lines[1]]
+    pt_ind, line_ind = _close_points_segments(new_pt, mesh_size, start_old, end_old)
+    dist1, _ = pp.distances.points_segments_pairwise(
+        new_pt[:, pt_ind], start_old[:, line_ind], end_old[:, line_ind]
+    )
+    not_on = np.logical_not(np.isclose(dist1, 0.0))
+    np.minimum.at(mesh_size, pt_ind[not_on], dist1[not_on])
 
-            # Compute the ditsacne between the current point and all old lines
-            dist1, cp = pp.distances.points_segments(new_pt, start_old, end_old)
-            # Disregard points that lie on the old segment by assigning a value so high
-            # that it will not be picked up by the minimum.
-            dist1[np.isclose(dist1, 0.0)] = mesh_size * 10
-            # Update the minimum mesh size if any dist1 is less than the current value
-            mesh_size = np.minimum(mesh_size, dist1.min())
+    pt_id = pts.shape[1] + np.arange(split.size)
+    pts = np.c_[pts, new_pt]
+    dist_pts = np.r_[dist_pts, mesh_size]
+    vals = np.r_[vals, mesh_size]
 
-            dist_pts = np.r_[dist_pts, mesh_size]
-            vals = np.r_[vals, mesh_size]
-            lines = np.c_[
-                lines, [seg[0], pt_id, seg[2], seg[3]], [pt_id, seg[1], seg[2], seg[3]]
-            ]
+    # Kept lines are used as they are, split lines are replaced by two lines
+    num_new = np.ones(new_lines.shape[1], dtype=np.int)
+    num_new[split] = 2
+    first = np.cumsum(num_new) - num_new
+    lines = np.empty((4, num_new.sum()), dtype=np.int)
+    lines[:, first] = new_lines
+    lines[1, first[split]] = pt_id
+    lines[:, first[split] + 1] = new_lines[:, split]
+    lines[0, first[split] + 1] = pt_id
 
     return dist_pts, pts, lines
 
 
+def _close_points_segments(p, radius, start, end):
+    """ Find pairs of points and segments that may be closer than a distance.
+
+    The segments are split into pieces no longer than the largest radius, and
+    the points close to each piece are found with a KD-tree. Points closer to
+    a segment than their radius are thus always found, but the distance
+    should be checked by the caller.
+
+    Parameters:
+        p (np.ndarray, nd x n_pt): Points.
+        radius (np.ndarray, n_pt): Distance of interest for each point.
+        start (np.ndarray, nd x n_seg): Start points of segments.
+        end (np.ndarray, nd x n_seg): End points of segments.
+
+    Returns:
+        np.ndarray (int): Point of each pair.
+        np.ndarray (int): Segment of each pair. The pairs are sorted by the
+            segment, and then by the point.
+
+    """
+    num_pts = p.shape[1]
+    if num_pts == 0 or start.shape[1] == 0:
+        return np.zeros(0, dtype=np.int), np.zeros(0, dtype=np.int)
+    r_max = radius.max()
+
+    # Centers of the pieces of the segments
+    line = end - start
+    length = np.sqrt(np.sum(line ** 2, axis=0))
+    num_pieces = np.maximum(np.ceil(length / r_max), 1).astype(np.int)
+    seg = np.repeat(np.arange(length.size), num_pieces)
+    first = np.cumsum(num_pieces) - num_pieces
+    frac = (np.arange(seg.size) - first[seg] + 0.5) / num_pieces[seg]
+    centers = start[:, seg] + frac * line[:, seg]
+
+    # A point within r_max of a segment is within r_max and half the piece
+    # length of the center of some piece. Use a small margin to be safe with
+    # round-off.
+    tree = scipy.spatial.cKDTree(p.T)
+    close = tree.query_ball_point(centers.T, 1.5 * r_max * (1 + 1e-8))
+    num_close = np.array([len(c) for c in close], dtype=np.int)
+    pt_ind = np.fromiter(itertools.chain.from_iterable(close), np.int, num_close.sum())
+    seg_ind = np.repeat(seg, num_close)
+
+    # Remove duplicates from neighboring pieces
+    pairs = np.unique(seg_ind * num_pts + pt_ind)
+    return pairs % num_pts, pairs // num_pts
+
+
+def _redundant_extra_points(pts, dist, pts_id):
+    """ Find extra points that are too close to other extra points on the same
+    line.
+
+    An extra point is redundant if another point on the same line (same
+    pts_id) has a smaller distance, and is closer to the point than its
+    distance. A point is also redundant if it is close to the last of the
+    later points on the same line with exactly the same distance.
+
+    Parameters:
+        pts (np.ndarray, nd x n): Extra points.
+        dist (np.ndarray, n): Mesh size distance of the points.
+        pts_id (np.ndarray, n): Line tag of the points.
+
+    Returns:
+        np.ndarray (int): Indices of the redundant points.
+
+    """
+    num_pts = dist.size
+    if num_pts < 2:
+        return np.zeros(0, dtype=np.int)
+    remove = np.zeros(num_pts, dtype=np.bool)
+
+    def close(a, b):
+        # Check if points a are closer to points b than the distance of a
+        return np.sqrt(np.sum((pts[:, a] - pts[:, b]) ** 2, axis=0)) < dist[a]
+
+    # Pairs of points on the same line, closer than the largest distance
+    tree = scipy.spatial.cKDTree(pts.T)
+    pairs = np.array(list(tree.query_pairs(dist.max() * (1 + 1e-8))), dtype=np.int)
+    pairs = pairs.reshape((-1, 2)).T
+    pairs = pairs[:, pts_id[pairs[0]] == pts_id[pairs[1]]]
+
+    # The point with the larger distance is removed if the other point is
+    # closer than this distance
+    d = dist[pairs]
+    larger = np.where(d[0] > d[1], pairs[0], pairs[1])[d[0] != d[1]]
+    smaller = np.where(d[0] > d[1], pairs[1], pairs[0])[d[0] != d[1]]
+    remove[larger[close(larger, smaller)]] = True
+
+    # Among points on the same line with the same distance, the first point is
+    # compared to the last
+    order = np.lexsort((np.arange(num_pts), dist, pts_id))
+    last = np.r_[
+        np.logical_or(
+            pts_id[order[1:]] != pts_id[order[:-1]], dist[order[1:]] != dist[order[:-1]]
+        ),
+        True,
+    ]
+    run = np.r_[0, np.cumsum(last[:-1])]
+    tied = order[np.logical_not(last)]
+    last_tied = order[np.flatnonzero(last)[run]][np.logical_not(last)]
+    remove[tied[close(tied, last_tied)]] = True
+
+    return np.flatnonzero(remove)
+
+
 def obtain_interdim_mappings(
     lg, fn, n_per_face, ensure_matching_face_cell=True, **kwargs
 ):
@@ -3,6 +3,8 @@
 """
 import numpy as np
 import logging
+import scipy.sparse as sps
+from scipy.sparse import csgraph
 
 import porepy as pp
 
@@ -67,7 +69,9 @@ def uniquify_points(pts, edges, tol):
     return p_unique, e_unique, point_edge
 
 
-def snap_fracture_set_2d(pts, edges, snap_tol, termination_tol=1e-2, max_iter=100):
+def snap_fracture_set_2d(
+    pts, edges, snap_tol, termination_tol=1e-2, max_iter=100, return_num_snaps=False
+):
     """ Snap vertexes of a set of fracture lines embedded in 2D, so that small
     distances between lines and vertexes are removed.
 
@@ -99,31 +103,122 @@ def snap_fracture_set_2d(pts, edges, snap_tol, termination_tol=1e-2, max_iter=10
             iterations to continue.
         max_iter (int, optional): Maximum number of iterations. Defaults to
             100.
+        return_num_snaps (boolean, optional): If True, also return the number
+            of snaps in each iteration. Defaults to False.
 
     Returns:
         np.array (2 x n_pts): Copy of the point array, with modified point
             coordinates.
         boolean: True if the iterations converged within allowed number of
             iterations.
+        np.array (int): Number of snaps that moved a point, for each
+            iteration. Only returned if return_num_snaps is True.
 
     """
     pts_orig = pts.copy()
     counter = 0
     pn = 0 * pts
+    num_snaps = []
     while counter < max_iter:
-        pn = pp.constrain_geometry.snap_points_to_segments(pts, edges, tol=snap_tol)
+        pn, n = pp.constrain_geometry.snap_points_to_segments(
+            pts, edges, tol=snap_tol, return_num_snaps=True
+        )
+        num_snaps.append(n)
         diff = np.max(np.abs(pn - pts))
-        logger.debug("Iteration " + str(counter) + ", max difference" + str(diff))
+        logger.debug(
+            "Iteration "
+            + str(counter)
+            + ", "
+            + str(n)
+            + " snaps, max difference "
+            + str(diff)
+        )
         pts = pn
-        if diff < termination_tol:
+        # Without snaps, the next iteration will not change anything either
+        if n == 0 or diff < termination_tol:
             break
         counter += 1
 
-    if counter < max_iter:
+    converged = counter < max_iter
+    if converged:
         logger.info("Fracture snapping converged after " + str(counter) + " iterations")
         logger.info("Maximum modification " + str(np.max(np.abs(pts - pts_orig))))
-        return pts, True
     else:
         logger.warning("Fracture snapping failed to converge")
         logger.warning("Residual: " + str(diff))
-        return pts, False
+
+    if return_num_snaps:
+        return pts, converged, np.array(num_snaps, dtype=np.int)
+    else:
+        return pts, converged
+
+
+def fracture_clusters(num_frac, pairs, box_min, box_max, domain, sides, tol):
+    """ Find connected clusters of fractures, and the sides of a box domain
+    that the clusters touch.
+
+    A fracture touches a side of the domain if its bounding box reaches the
+    side, within the tolerance. This also includes fractures that extend
+    outside the domain.
+
+    Parameters:
+        num_frac (int): Number of fractures.
+        pairs (np.ndarray, 2 x n_pairs): Indices of pairs of intersecting
+            fractures.
+        box_min (np.ndarray, n_dim x n_fracs): Minimum coordinates of the
+            fractures.
+        box_max (np.ndarray, n_dim x n_fracs): Maximum coordinates of the
+            fractures.
+        domain (dictionary): Box domain, with fields 'xmin', 'xmax' etc.
+        sides (list of str): Sides of the domain to consider, named as the
+            fields of domain.
+        tol (double): Geometric tolerance.
+
+    Returns:
+        np.ndarray (int, n_fracs): Cluster of each fracture. The clusters are
+            numbered in the order of their first fracture.
+        dictionary: For each side, a boolean array with one element per
+            cluster, True if the cluster touches the side.
+        dictionary: For each pair of sides (a tuple in the order of sides),
+            True if a cluster touches both sides, that is, if the fractures
+            percolate between the sides.
+
+    Raises:
+        ValueError if a side is not a field of the domain.
+
+    """
+    if not isinstance(domain, dict):
+        raise ValueError("Cluster analysis requires a box domain")
+    for side in sides:
+        if side not in domain:
+            raise ValueError("Unknown side of the domain: " + str(side))
+
+    pairs = np.asarray(pairs, dtype=np.int).reshape((2, -1))
+    graph = sps.coo_matrix(
+        (np.ones(pairs.shape[1]), (pairs[0], pairs[1])), shape=(num_frac, num_frac)
+    )
+    _, labels = csgraph.connected_components(graph, directed=False)
+    # Number the clusters by their first fracture
+    _, first, labels = np.unique(labels, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    num_clusters = first.size
+    renumber = np.empty(num_clusters, dtype=np.int)
+    renumber[order] = np.arange(num_clusters)
+    labels = renumber[labels]
+
+    touches = {}
+    for side in sides:
+        dim = "xyz".index(side[0])
+        if side[1:] == "min":
+            hit = box_min[dim] <= domain[side] + tol
+        else:
+            hit = box_max[dim] >= domain[side] - tol
+        touches[side] = np.bincount(labels[hit], minlength=num_clusters) > 0
+
+    percolation = {}
+    for i, first_side in enumerate(sides):
+        for second_side in sides[i + 1 :]:
+            percolation[(first_side, second_side)] = bool(
+                np.any(np.logical_and(touches[first_side], touches[second_side]))
+            )
+    return labels, touches, percolation
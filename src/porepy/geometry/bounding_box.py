@@ -1,6 +1,8 @@
 """
-Compute bounding boxes of geometric objects.
+Compute bounding boxes of geometric objects, and identify overlapping
+bounding boxes.
 """
+import numpy as np
 
 
 def from_points(pts, overlap=0):
@@ -31,3 +33,260 @@ def from_points(pts, overlap=0):
         domain["zmin"] = min_coord[2] - dx[2] * overlap
         domain["zmax"] = max_coord[2] + dx[2] * overlap
     return domain
+
+
+def overlapping_intervals(left, right):
+    """ Identify all pairs of overlapping intervals.
+
+    The intervals are sorted by their start points, and for each interval,
+    the overlapping intervals that start later are found by a binary search
+    for its end point. The cost is O(n log n + k), for n intervals and k
+    overlapping pairs.
+
+    Intervals are closed, thus intervals that only touch in an end point are
+    considered overlapping.
+
+    Parameters:
+        left (np.array): Minimum coordinates of the intervals.
+        right (np.array): Maximum coordinates of the intervals. For all
+            intervals, left <= right (but equality is allowed).
+
+    Returns:
+        np.array of int, 2 x num_overlaps: Each column contains the indices of
+            a pair of overlapping intervals. The smallest index is in the
+            first row, and the columns are sorted lexicographically.
+
+    """
+    left = np.asarray(left).ravel()
+    right = np.asarray(right).ravel()
+    order = np.argsort(left, kind="mergesort")
+    first, second = _sweep(left[order], right[order])
+    return _sort_pairs(order[first], order[second])
+
+
+def overlapping_boxes(box_min, box_max, method="sweep", cell_size=None):
+    """ Identify all pairs of overlapping axis-aligned boxes.
+
+    Two methods are available:
+        sweep: Sweep and prune. Candidate pairs are found as overlapping
+            intervals along one axis (see overlapping_intervals()), chosen as
+            the axis with the fewest candidates, and are then checked for
+            overlap along the other axes.
+        grid: Uniform grid hashing. The boxes are registered in the cells of a
+            Cartesian grid that they overlap, and only boxes that share a cell
+            are checked for overlap. This is efficient if the boxes are of
+            similar size, and are overlapping along all axes, for instance
+            isotropic fracture sets, where the sweep may produce many
+            candidates.
+
+    Boxes are closed, thus boxes that only touch are considered overlapping.
+
+    Parameters:
+        box_min (np.array, nd x num_boxes): Minimum coordinates of the boxes.
+        box_max (np.array, nd x num_boxes): Maximum coordinates of the boxes.
+        method (str, optional): "sweep" (default) or "grid".
+        cell_size (double, optional): Size of the cells used by the grid
+            method. Defaults to the mean extension of the boxes along the
+            coordinate axes.
+
+    Returns:
+        np.array of int, 2 x num_overlaps: Each column contains the indices of
+            a pair of overlapping boxes. The smallest index is in the first
+            row, and the columns are sorted lexicographically.
+
+    Raises:
+        ValueError if the method is unknown.
+
+    """
+    box_min = np.atleast_2d(np.asarray(box_min, dtype=np.float))
+    box_max = np.atleast_2d(np.asarray(box_max, dtype=np.float))
+
+    if method == "sweep":
+        first, second = _sweep_boxes(box_min, box_max)
+    elif method == "grid":
+        first, second = _grid_boxes(box_min, box_max, cell_size)
+    else:
+        raise ValueError("Unknown method " + str(method))
+    return _sort_pairs(first, second)
+
+
+def overlapping_query_boxes(box_min, box_max, query_min, query_max, chunk_size=None):
+    """ Identify all pairs of a box and a query box that overlap.
+
+    The query boxes are compared to all boxes, thus the cost is proportional
+    to the product of the number of boxes and query boxes. This is intended
+    for a few query boxes, for instance new objects to be compared to a large
+    set of existing ones; overlaps among the query boxes themselves are not
+    considered (use overlapping_boxes() for this).
+
+    Boxes are closed, thus boxes that only touch are considered overlapping.
+
+    Parameters:
+        box_min (np.array, nd x num_boxes): Minimum coordinates of the boxes.
+        box_max (np.array, nd x num_boxes): Maximum coordinates of the boxes.
+        query_min (np.array, nd x num_query): Minimum coordinates of the query
+            boxes.
+        query_max (np.array, nd x num_query): Maximum coordinates of the query
+            boxes.
+        chunk_size (int, optional): Number of query boxes processed at a
+            time. Defaults to a value that limits the number of compared pairs
+            to about 10^7.
+
+    Returns:
+        np.array of int, 2 x num_overlaps: Each column contains the index of a
+            box (first row) and a query box (second row) that overlap. The
+            columns are sorted lexicographically.
+
+    """
+    box_min = np.atleast_2d(np.asarray(box_min, dtype=np.float))
+    box_max = np.atleast_2d(np.asarray(box_max, dtype=np.float))
+    query_min = np.atleast_2d(np.asarray(query_min, dtype=np.float))
+    query_max = np.atleast_2d(np.asarray(query_max, dtype=np.float))
+
+    num_boxes = box_min.shape[1]
+    num_query = query_min.shape[1]
+    if chunk_size is None:
+        chunk_size = max(10 ** 7 // max(num_boxes, 1), 1)
+
+    first, second = [np.zeros(0, dtype=np.int)], [np.zeros(0, dtype=np.int)]
+    for lo in range(0, num_query, chunk_size):
+        hi = min(lo + chunk_size, num_query)
+        hit = np.all(
+            np.logical_and(
+                box_min[:, :, np.newaxis] <= query_max[:, np.newaxis, lo:hi],
+                query_min[:, np.newaxis, lo:hi] <= box_max[:, :, np.newaxis],
+            ),
+            axis=0,
+        )
+        b, q = np.nonzero(hit)
+        first.append(b)
+        second.append(q + lo)
+    first, second = np.hstack(first), np.hstack(second)
+    order = np.lexsort((second, first))
+    return np.vstack((first[order], second[order]))
+
+
+def _sweep(left, right, lo=0, hi=None):
+    """ Overlapping pairs of intervals sorted by their start points. Only the
+    pairs with the first interval in [lo, hi) are identified.
+
+    Returns:
+        np.array: Index of the first interval of the pairs.
+        np.array: Index of the second interval, which starts after the first.
+
+    """
+    if hi is None:
+        hi = left.size
+    first = np.arange(lo, hi)
+    # The intervals that start after the start, but before the end, of an
+    # interval are overlapping with it
+    last = np.searchsorted(left, right[lo:hi], side="right")
+    num = np.maximum(last - first - 1, 0)
+    first = np.repeat(first, num)
+    second = np.arange(num.sum()) - np.repeat(np.cumsum(num) - num, num) + first + 1
+    return first, second
+
+
+def _sweep_boxes(box_min, box_max, chunk_size=100000):
+    nd, num_boxes = box_min.shape
+    if num_boxes < 2:
+        return np.zeros(0, dtype=np.int), np.zeros(0, dtype=np.int)
+
+    # Sweep along the axis with the fewest overlapping intervals.
+    orders = [np.argsort(box_min[d], kind="mergesort") for d in range(nd)]
+    num_candidates = [
+        np.sum(
+            np.searchsorted(box_min[d, o], box_max[d, o], side="right")
+            - np.arange(1, num_boxes + 1)
+        )
+        for d, o in enumerate(orders)
+    ]
+    axis = np.argmin(num_candidates)
+    order = orders[axis]
+    left = box_min[axis, order]
+    right = box_max[axis, order]
+    box_min = box_min[:, order]
+    box_max = box_max[:, order]
+
+    # Check the candidates for overlap along the other axes. The intervals
+    # are processed in chunks to limit the memory consumption for dense
+    # sets of boxes.
+    first, second = [], []
+    for lo in range(0, num_boxes, chunk_size):
+        f, s = _sweep(left, right, lo, min(lo + chunk_size, num_boxes))
+        hit = np.all(
+            np.logical_and(
+                box_min[:, f] <= box_max[:, s], box_min[:, s] <= box_max[:, f]
+            ),
+            axis=0,
+        )
+        first.append(order[f[hit]])
+        second.append(order[s[hit]])
+    return np.hstack(first), np.hstack(second)
+
+
+def _grid_boxes(box_min, box_max, cell_size):
+    nd, num_boxes = box_min.shape
+    if num_boxes < 2:
+        return np.zeros(0, dtype=np.int), np.zeros(0, dtype=np.int)
+
+    if cell_size is None:
+        cell_size = np.mean(box_max - box_min)
+    origin = box_min.min(axis=1)
+    extent = box_max.max(axis=1) - origin
+    if cell_size <= 0:
+        # All boxes are points. Any positive cell size will do.
+        cell_size = max(extent.max(), 1)
+
+    # Range of cells covered by the boxes, along each axis. The cells are
+    # enlarged if needed, so that the linear cell indices fit in an integer.
+    while np.prod(extent // cell_size + 1) > 2 ** 62:
+        cell_size *= 2
+    num_cells = (extent // cell_size).astype(np.int) + 1
+    lo = ((box_min - origin.reshape((-1, 1))) // cell_size).astype(np.int)
+    hi = ((box_max - origin.reshape((-1, 1))) // cell_size).astype(np.int)
+    lo = np.minimum(lo, num_cells.reshape((-1, 1)) - 1)
+    hi = np.minimum(hi, num_cells.reshape((-1, 1)) - 1)
+
+    # Register the boxes in all the cells they cover. The cells are
+    # identified by their linear index.
+    box = np.arange(num_boxes)
+    cell = np.zeros(num_boxes, dtype=np.int)
+    for d in range(nd):
+        num = hi[d, box] - lo[d, box] + 1
+        offset = np.arange(num.sum()) - np.repeat(np.cumsum(num) - num, num)
+        box = np.repeat(box, num)
+        cell = np.repeat(cell, num) * num_cells[d] + lo[d, box] + offset
+
+    # Pairs of boxes registered in the same cell
+    order = np.lexsort((box, cell))
+    box, cell = box[order], cell[order]
+    group_end = np.searchsorted(cell, cell, side="right")
+    first = np.arange(box.size)
+    num = group_end - first - 1
+    first = np.repeat(first, num)
+    second = np.arange(num.sum()) - np.repeat(np.cumsum(num) - num, num) + first + 1
+    cell = cell[first]
+    first, second = box[first], box[second]
+
+    # Keep the overlapping pairs, each in one cell only: The cell containing
+    # the minimum corner of the intersection of the boxes.
+    isect_min = np.maximum(box_min[:, first], box_min[:, second])
+    hit = np.all(
+        np.logical_and(
+            box_min[:, first] <= box_max[:, second],
+            box_min[:, second] <= box_max[:, first],
+        ),
+        axis=0,
+    )
+    ref = np.zeros(first.size, dtype=np.int)
+    for d in range(nd):
+        ind = ((isect_min[d] - origin[d]) // cell_size).astype(np.int)
+        ref = ref * num_cells[d] + np.minimum(ind, num_cells[d] - 1)
+    hit = np.logical_and(hit, ref == cell)
+    return first[hit], second[hit]
+
+
+def _sort_pairs(first, second):
+    pairs = np.sort(np.vstack((first, second)).astype(np.int), axis=0)
+    return pairs[:, np.lexsort((pairs[1], pairs[0]))]
@@ -2,13 +2,18 @@
 
 Examples are to cut objects to lie within other objects, etc.
 """
+import heapq
+import itertools
 import numpy as np
 import networkx as nx
+import scipy.sparse as sps
+import scipy.spatial
 
 import shapely.geometry as shapely_geometry
 import shapely.speedups as shapely_speedups
 
 import porepy as pp
+from porepy.utils.mcolon import mcolon
 
 
 try:
@@ -23,6 +28,10 @@ def lines_by_polygon(poly_pts, pts, edges):
     The computation is done line by line to avoid the splitting of edges caused by other
     edges. The implementation assume that the polygon and lines are on the plane (x, y).
 
+    Lines that do not touch the boundary of the polygon are identified for all
+    lines at once, and are either kept as they are, or dropped. Only the lines
+    that may cross the boundary are intersected with the polygon one by one.
+
     Parameters:
     poly_pts (np.ndarray, 3xn or 2xn): the points that define the polygon
     pts (np.ndarray, 3xn or 2xn): the points associated to the lines
@@ -35,43 +44,63 @@ def lines_by_polygon(poly_pts, pts, edges):
         preserved.
 
     """
-    # it stores the points after the intersection
-    int_pts = np.empty((2, 0))
     # define the polygon
     poly = shapely_geometry.Polygon(poly_pts[:2, :].T)
 
-    # Kept edges
-    edges_kept = []
-
-    # we do the computation for each edge once at time, to avoid the splitting
-    # caused by other edges.
-    for ei, e in enumerate(edges.T):
+    num_edges = edges.shape[1]
+    start = pts[:2, edges[0]]
+    end = pts[:2, edges[1]]
+
+    # Lines that are clear of the boundary of the polygon are either inside or
+    # outside, decided by their start point.
+    clear = np.logical_not(_segments_touch_polygon(poly_pts[:2], start, end))
+    inside = np.zeros(num_edges, dtype=np.bool)
+    inside[clear] = _points_in_polygon(poly_pts[:2], start[:, clear])
+
+    # Number of pieces of each line, and the number of points of the pieces
+    num_pieces = inside.astype(np.int)
+    num_int_pts = 2 * num_pieces
+    int_lines_pts = {}
+
+    # we do the computation for each of the remaining edges once at time, to
+    # avoid the splitting caused by other edges.
+    for ei in np.flatnonzero(np.logical_not(clear)):
+        e = edges[:, ei]
         # define the line
         line = shapely_geometry.LineString([pts[:2, e[0]], pts[:2, e[1]]])
         # compute the intersections between the poligon and the current line
         int_lines = poly.intersection(line)
         # only line or multilines are considered, no points
         if type(int_lines) is shapely_geometry.LineString:
-            # consider the case of single intersection by avoiding to consider
-            # lines on the boundary of the polygon
-            if not int_lines.touches(poly):
-                int_pts = np.c_[int_pts, np.array(int_lines.xy)]
-                edges_kept.append(ei)
-        elif type(int_lines) is shapely_geometry.MultiLineString:
-            # consider the case of multiple intersections by avoiding to consider
-            # lines on the boundary of the polygon
-            for int_line in int_lines:
-                if not int_line.touches(poly):
-                    int_pts = np.c_[int_pts, np.array(int_line.xy)]
-                    edges_kept.append(ei)
+            int_lines = [int_lines]
+        elif type(int_lines) is not shapely_geometry.MultiLineString:
+            continue
+        # consider the case of single or multiple intersections by avoiding to
+        # consider lines on the boundary of the polygon
+        xy = [
+            np.array(int_line.xy)
+            for int_line in int_lines
+            if not int_line.is_empty and not int_line.touches(poly)
+        ]
+        if len(xy) > 0:
+            int_lines_pts[ei] = np.hstack(xy)
+            num_pieces[ei] = len(xy)
+            num_int_pts[ei] = int_lines_pts[ei].shape[1]
+
+    # it stores the points after the intersection, line by line
+    int_pts = np.empty((2, num_int_pts.sum()))
+    offset = np.cumsum(num_int_pts) - num_int_pts
+    int_pts[:, offset[inside]] = start[:, inside]
+    int_pts[:, offset[inside] + 1] = end[:, inside]
+    for ei, xy in int_lines_pts.items():
+        int_pts[:, offset[ei] : offset[ei] + xy.shape[1]] = xy
 
     # define the list of edges
     int_edges = np.arange(int_pts.shape[1]).reshape((2, -1), order="F")
 
     # Also preserve tags, if any
-    if len(edges_kept) > 0:
-        edges_kept = np.array(edges_kept)
-        edges_kept.sort()
+    edges_kept = np.repeat(np.arange(num_edges), num_pieces)
+    if edges_kept.size > 0:
         int_edges = np.vstack((int_edges, edges[2:, edges_kept]))
     else:
         # If no edges are kept, return an empty array with the right dimensions
@@ -80,6 +109,90 @@ def lines_by_polygon(poly_pts, pts, edges):
     return int_pts, int_edges
 
 
+def _side_of_lines(start, end, p):
+    """ Find the side of lines on which points lie.
+
+    Points that are close to a line, relative to the distance between the
+    point and the start of the line, are considered to lie on it.
+
+    Parameters:
+        start (np.ndarray, 2 x n): Start points of the lines.
+        end (np.ndarray, 2 x n): End points of the lines.
+        p (np.ndarray, 2 x n): Points, one for each line.
+
+    Returns:
+        np.ndarray, int: 1 for points to the left of the lines, -1 for points
+            to the right, and 0 for points on the lines.
+
+    """
+    line = end - start
+    v = p - start
+    cross = line[0] * v[1] - line[1] * v[0]
+    scale = np.sqrt(np.sum(line ** 2, axis=0) * np.sum(v ** 2, axis=0))
+    return np.sign(cross) * (np.abs(cross) > 1e-10 * scale)
+
+
+def _segments_touch_polygon(poly, start, end):
+    """ Find segments that may cross or touch the boundary of a polygon.
+
+    A segment is reported as clear of the boundary only if it is strictly
+    separated from all edges of the polygon. Nearly touching and degenerate
+    segments are thus reported as touching.
+
+    Parameters:
+        poly (np.ndarray, 2 x n_vert): Vertexes of the polygon.
+        start (np.ndarray, 2 x n): Start points of the segments.
+        end (np.ndarray, 2 x n): End points of the segments.
+
+    Returns:
+        np.ndarray, boolean: True for segments that may touch the boundary.
+
+    """
+    num_vert = poly.shape[1]
+    touch = np.all(start == end, axis=0)
+    for vi in range(num_vert):
+        a = np.tile(poly[:, vi].reshape((-1, 1)), (1, start.shape[1]))
+        b = np.tile(poly[:, (vi + 1) % num_vert].reshape((-1, 1)), (1, start.shape[1]))
+        # The segment and the polygon edge are separated if the endpoints of
+        # one of them are strictly on the same side of the other.
+        separated = np.logical_or(
+            _side_of_lines(a, b, start) * _side_of_lines(a, b, end) > 0,
+            _side_of_lines(start, end, a) * _side_of_lines(start, end, b) > 0,
+        )
+        touch = np.logical_or(touch, np.logical_not(separated))
+    return touch
+
+
+def _points_in_polygon(poly, p):
+    """ Check if points are inside a, possibly non-convex, polygon.
+
+    The check uses the parity of the number of polygon edges crossed by a ray
+    from the points, and should only be used for points that are not close to
+    the boundary of the polygon.
+
+    Parameters:
+        poly (np.ndarray, 2 x n_vert): Vertexes of the polygon.
+        p (np.ndarray, 2 x n): Points to be tested.
+
+    Returns:
+        np.ndarray, boolean: True for the points inside the polygon.
+
+    """
+    num_vert = poly.shape[1]
+    inside = np.zeros(p.shape[1], dtype=np.bool)
+    for vi in range(num_vert):
+        a = poly[:, vi]
+        b = poly[:, (vi + 1) % num_vert]
+        # Edges that cross the horizontal line through the points, and are to
+        # the right of the points
+        crosses = (a[1] > p[1]) != (b[1] > p[1])
+        if a[1] != b[1]:
+            x = a[0] + (p[1] - a[1]) * (b[0] - a[0]) / (b[1] - a[1])
+            crosses = np.logical_and(crosses, p[0] < x)
+        inside = np.logical_xor(inside, crosses)
+    return inside
+
+
 def polygons_by_polyhedron(polygons, polyhedron, tol=1e-8):
     """ Constrain a seort of polygons in 3d to lie inside a, generally non-convex, polyhedron.
 
@@ -394,7 +507,9 @@ def polygons_by_polyhedron(polygons, polyhedron, tol=1e-8):
     return constrained_polygons, np.array(orig_poly_ind)
 
 
-def snap_points_to_segments(p_edges, edges, tol, p_to_snap=None):
+def snap_points_to_segments(
+    p_edges, edges, tol, p_to_snap=None, return_num_snaps=False
+):
     """
     Snap points in the proximity of lines to the lines.
 
@@ -402,6 +517,11 @@ def snap_points_to_segments(p_edges, edges, tol, p_to_snap=None):
     be co-located by the snapping. Thus, the modified point set may have
     duplicate coordinates.
 
+    The segments are processed one by one, and points are snapped to the
+    segments as they are processed. Points that may be close to a segment are
+    found with a KD-tree, so that only segments with points to snap are
+    visited.
+
     Parameters:
         p_edges (np.ndarray, nd x npt): Points defining endpoints of segments
         edges (np.ndarray, 2 x nedges): Connection between lines in p_edges.
@@ -411,10 +531,14 @@ def snap_points_to_segments(p_edges, edges, tol, p_to_snap=None):
         p_to_snap (np.ndarray, nd x npt_snap, optional): The points to snap. If
             not provided, p_edges will be snapped, that is, the lines will be
             modified.
+        return_num_snaps (boolean, optional): If True, also return the number
+            of snaps that moved a point. Defaults to False.
 
     Returns:
         np.ndarray (nd x n_pt_snap): A copy of p_to_snap (or p_edges) with
             modified coordinates.
+        int: Number of snaps that moved a point. Only returned if
+            return_num_snaps is True.
 
     """
 
@@ -425,24 +549,184 @@ def snap_points_to_segments(p_edges, edges, tol, p_to_snap=None):
         mod_edges = False
 
     pn = p_to_snap.copy()
+    # If we modify the edges themselves (mod_edges==True), we should use the
+    # updated point coordinates for the segments. If not, we risk trouble for
+    # almost coinciding vertexes.
+    if mod_edges:
+        p_edges = pn
 
+    num_pts = pn.shape[1]
     nl = edges.shape[1]
-    for ei in range(nl):
-
-        # Find start and endpoint of this segment.
-        # If we modify the edges themselves (mod_edges==True), we should use
-        # the updated point coordinates. If not, we risk trouble for almost
-        # coinciding vertexes.
-        if mod_edges:
-            p_start = pn[:, edges[0, ei]].reshape((-1, 1))
-            p_end = pn[:, edges[1, ei]].reshape((-1, 1))
+    num_snaps = 0
+    if nl == 0 or num_pts == 0 or not tol > 0:
+        return (pn, num_snaps) if return_num_snaps else pn
+
+    # Split the segments in pieces no longer than h. A point closer than tol
+    # to a segment is within the search radius of the center of a piece. Use
+    # a small margin to be safe with round-off.
+    start = p_edges[:, edges[0]]
+    end = p_edges[:, edges[1]]
+    length = np.sqrt(np.sum((end - start) ** 2, axis=0))
+    h = max(np.median(length), tol)
+    radius = (0.5 * h + tol) * (1 + 1e-8)
+    piece_seg, centers = _segment_pieces(start, end, h)
+
+    # Pairs of points and segments closer than tol before any snapping. The
+    # points of a segment are not snapped to the segment itself. The distances
+    # are checked again when the segments are visited, thus use a margin here.
+    tree = scipy.spatial.cKDTree(pn.T)
+    close = tree.query_ball_point(centers.T, radius)
+    num_close = np.array([len(c) for c in close], dtype=np.int)
+    pt_ind = np.fromiter(itertools.chain.from_iterable(close), np.int, num_close.sum())
+    pairs = np.unique(np.repeat(piece_seg, num_close) * num_pts + pt_ind)
+    pt_ind, seg_ind = pairs % num_pts, pairs // num_pts
+    if mod_edges:
+        not_own = np.logical_and(
+            pt_ind != edges[0, seg_ind], pt_ind != edges[1, seg_ind]
+        )
+        pt_ind, seg_ind = pt_ind[not_own], seg_ind[not_own]
+    d, _ = pp.distances.points_segments_pairwise(
+        pn[:, pt_ind], start[:, seg_ind], end[:, seg_ind]
+    )
+    near = d < tol * (1 + 1e-8)
+    near_pt = pt_ind[near]
+    near_ptr = np.hstack((0, np.cumsum(np.bincount(seg_ind[near], minlength=nl))))
+
+    # Segments to visit, in order. Snapping may bring points close to later
+    # segments, and, if the edges are modified, move later segments. These
+    # are added to the queue as the points are moved.
+    queue = np.unique(seg_ind[near]).tolist()
+    queued = np.zeros(nl, dtype=np.bool)
+    queued[queue] = True
+    # Points that have moved close to segments not yet visited
+    moved_close = {}
+    # Segments that have moved. For these, the points close to the segment
+    # are found with the KD-tree when the segment is visited.
+    seg_moved = np.zeros(nl, dtype=np.bool)
+    if mod_edges:
+        # Map from points to the segments they define
+        point_segments = sps.csr_matrix(
+            (np.ones(2 * nl), (edges[:2].ravel(), np.tile(np.arange(nl), 2))),
+            shape=(num_pts, nl),
+        )
+    # Segment pieces before snapping. Segments that have moved are already in
+    # the queue, so the positions of the pieces are only needed for the others.
+    segment_tree = scipy.spatial.cKDTree(centers.T)
+
+    # The KD-tree of the points is not updated when points are moved. Instead,
+    # the search radius is increased by the maximum distance moved since the
+    # tree was built.
+    moved_dist = np.zeros(num_pts)
+    max_moved_dist = 0
+
+    while len(queue) > 0:
+        ei = heapq.heappop(queue)
+
+        # Find start and endpoint of this segment, and the points close to it.
+        p_start = p_edges[:, edges[0, ei]].reshape((-1, 1))
+        p_end = p_edges[:, edges[1, ei]].reshape((-1, 1))
+        if seg_moved[ei]:
+            line = p_end - p_start
+            num_pieces = max(np.ceil(np.sqrt(np.sum(line ** 2)) / h), 1)
+            seg_centers = p_start + (np.arange(num_pieces) + 0.5) / num_pieces * line
+            close = tree.query_ball_point(seg_centers.T, radius + max_moved_dist)
+            cand = np.fromiter(itertools.chain.from_iterable(close), np.int)
         else:
-            p_start = p_edges[:, edges[0, ei]].reshape((-1, 1))
-            p_end = p_edges[:, edges[1, ei]].reshape((-1, 1))
-        d_segment, cp = pp.distances.points_segments(pn, p_start, p_end)
-        hit = np.argwhere(d_segment[:, 0] < tol)
-        for i in hit:
-            if mod_edges and (i == edges[0, ei] or i == edges[1, ei]):
-                continue
-            pn[:, i] = cp[i, 0, :].reshape((-1, 1))
-    return pn
+            cand = near_pt[near_ptr[ei] : near_ptr[ei + 1]]
+        if ei in moved_close:
+            cand = np.hstack([cand] + moved_close.pop(ei))
+        cand = np.unique(cand)
+        if mod_edges:
+            cand = cand[np.logical_and(cand != edges[0, ei], cand != edges[1, ei])]
+
+        # Use the pairwise distances to filter the points, then compute the
+        # distances and closest points in the same way as for all points.
+        d, _ = pp.distances.points_segments_pairwise(
+            pn[:, cand],
+            np.tile(p_start, (1, cand.size)),
+            np.tile(p_end, (1, cand.size)),
+        )
+        cand = cand[d < tol * (1 + 1e-8)]
+        if cand.size == 0:
+            continue
+        d_segment, cp = pp.distances.points_segments(pn[:, cand], p_start, p_end)
+        hit = d_segment[:, 0] < tol
+        if not np.any(hit):
+            continue
+        snapped = cand[hit]
+        p_old = pn[:, snapped]
+        pn[:, snapped] = cp[hit, 0, :].T
+
+        # Only points that actually moved are of interest
+        moved = np.any(pn[:, snapped] != p_old, axis=0)
+        if not np.any(moved):
+            continue
+        snapped = snapped[moved]
+        num_snaps += snapped.size
+        moved_dist[snapped] += np.sqrt(
+            np.sum((pn[:, snapped] - p_old[:, moved]) ** 2, axis=0)
+        )
+        max_moved_dist = max(max_moved_dist, moved_dist[snapped].max())
+
+        # Later segments that may now have points to snap. Segments that have
+        # not moved are compared to the moved points here, segments that have
+        # moved will search for close points when they are visited.
+        close = segment_tree.query_ball_point(pn[:, snapped].T, radius)
+        num_close = np.array([len(c) for c in close], dtype=np.int)
+        later_pt = np.repeat(snapped, num_close)
+        later = piece_seg[np.fromiter(itertools.chain.from_iterable(close), np.int)]
+        is_later = later > ei
+        later_pt, later = later_pt[is_later], later[is_later]
+        d, _ = pp.distances.points_segments_pairwise(
+            pn[:, later_pt], start[:, later], end[:, later]
+        )
+        is_close = d < tol * (1 + 1e-8)
+        later_pt, later = later_pt[is_close], later[is_close]
+        for pi, ej in zip(later_pt, later):
+            moved_close.setdefault(ej, []).append([pi])
+        if mod_edges:
+            moved_seg = point_segments.indices[
+                mcolon(
+                    point_segments.indptr[snapped], point_segments.indptr[snapped + 1]
+                )
+            ]
+            seg_moved[moved_seg] = True
+            later = np.hstack((later, moved_seg[moved_seg > ei]))
+        later = np.unique(later)
+        later = later[np.logical_not(queued[later])]
+        queued[later] = True
+        for ej in later:
+            heapq.heappush(queue, ej)
+
+        # Rebuild the tree when the search radius has grown too large
+        if max_moved_dist > 0.5 * h:
+            tree = scipy.spatial.cKDTree(pn.T)
+            moved_dist[:] = 0
+            max_moved_dist = 0
+
+    if return_num_snaps:
+        return pn, num_snaps
+    else:
+        return pn
+
+
+def _segment_pieces(start, end, h):
+    """ Split segments into pieces of equal length, no longer than h.
+
+    Parameters:
+        start (np.ndarray, nd x n): Start points of the segments.
+        end (np.ndarray, nd x n): End points of the segments.
+        h (double): Maximum length of the pieces.
+
+    Returns:
+        np.ndarray (int): Segment of each piece.
+        np.ndarray (nd x n_pieces): Center of each piece.
+
+    """
+    line = end - start
+    length = np.sqrt(np.sum(line ** 2, axis=0))
+    num_pieces = np.maximum(np.ceil(length / h), 1).astype(np.int)
+    seg = np.repeat(np.arange(length.size), num_pieces)
+    first = np.cumsum(num_pieces) - num_pieces
+    frac = (np.arange(seg.size) - first[seg] + 0.5) / num_pieces[seg]
+    return seg, start[:, seg] + frac * line[:, seg]
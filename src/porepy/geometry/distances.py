@@ -288,6 +288,41 @@ def points_segments(p, start, end):
     return d, cp
 
 
+def points_segments_pairwise(p, start, end):
+    """ Compute distances between points and line segments, pairwise.
+
+    Point i is only compared to segment i. The distances and closest points
+    are computed in the same way as in points_segments(), but without forming
+    the full set of point-segment combinations.
+
+    Parameters:
+        p (np.array, nd x n): Individual points
+        start (np.ndarray, nd x n): Start points of segments.
+        end (np.ndarray, nd x n): End point of segments
+
+    Returns:
+        np.array, n: Distances.
+        np.array, nd x n: Points on the segments closest to the points.
+
+    """
+    line = end - start
+    lengths = np.sqrt(np.sum(line * line, axis=0))
+    # Project the vectors from start to point onto the line, and compute
+    # relative length
+    proj = np.sum((p - start) * line, axis=0) / lengths ** 2
+
+    # Projections with length less than zero have the closest point at start,
+    # above one signifies closest to end
+    cp = start + proj * line
+    less = proj <= 0
+    cp[:, less] = start[:, less]
+    above = proj >= 1
+    cp[:, above] = end[:, above]
+
+    d = np.power(np.sum(np.power(np.abs(p - cp), 2), axis=0), 1 / 2)
+    return d, cp
+
+
 def point_pointset(p, pset, exponent=2):
     """
     Compute distance between a point and a set of points.
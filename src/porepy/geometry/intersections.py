@@ -352,7 +352,7 @@ def segments_3d(start_1, end_1, start_2, end_2, tol=1e-8):
             return None
 
 
-def polygons_3d(polys, tol=1e-8):
+def polygons_3d(polys, tol=1e-8, pairs=None):
     """ Compute the intersection between polygons embedded in 3d.
 
     In addition to intersection points, the function also decides:
@@ -379,6 +379,10 @@ def polygons_3d(polys, tol=1e-8):
             by its vertexses as a numpy array, of dimension 3 x num_pts. There
             should be at least three vertexes in the polygon.
         tol (double, optional): Geometric tolerance for the computations.
+        pairs (np.array of int, 2 x num_pairs, optional): Candidate pairs of
+            polygons, with the smallest index in the first row. Only these
+            pairs are checked for intersections. Defaults to all pairs of
+            polygons with overlapping bounding boxes.
 
     Returns:
         np.array: 3 x num_pt, intersection coordinates.
@@ -398,23 +402,36 @@ def polygons_3d(polys, tol=1e-8):
             the tuple is replaced by an empty list.
 
     """
-    # Obtain bounding boxes for the polygons
-    x_min, x_max, y_min, y_max, z_min, z_max = _axis_aligned_bounding_box_3d(polys)
+    if pairs is None:
+        # Obtain bounding boxes for the polygons
+        x_min, x_max, y_min, y_max, z_min, z_max = _axis_aligned_bounding_box_3d(polys)
 
-    # Identify overlapping bounding boxes: First, use a fast method to find
-    # overlapping rectangles in the xy-plane.
-    pairs_xy = _identify_overlapping_rectangles(x_min, x_max, y_min, y_max)
-    # Next, find overlapping intervals in the z-directien
-    pairs_z = _identify_overlapping_intervals(z_min, z_max)
+        # Identify pairs of polygons with overlapping bounding boxes
+        pairs = pp.bounding_box.overlapping_boxes(
+            np.vstack((x_min, y_min, z_min)), np.vstack((x_max, y_max, z_max))
+        )
+    else:
+        pairs = np.asarray(pairs, dtype=np.int).reshape((2, -1))
 
-    # Finally, do the intersection
-    pairs = _intersect_pairs(pairs_xy, pairs_z)
+    # Center points and normal vectors of the polygons that are part of a
+    # candidate pair.
+    num_polys = len(polys)
+    centers, normals = _polygon_centers_and_normals(polys, np.unique(pairs))
+
+    # Analyze all pairs at once, using array operations. Pairs of polygons
+    # that clearly do not intersect are discarded. For pairs in a generic
+    # configuration, the intersection points and their classification are
+    # computed; only the remaining pairs are analyzed one by one below.
+    keep, resolved, isect_resolved, seg_main, seg_other = _classify_polygon_pairs(
+        polys, centers, normals, pairs
+    )
+    pairs = pairs[:, keep]
+    resolved = resolved[keep]
+    isect_resolved = isect_resolved[:, keep]
+    seg_main = seg_main[keep]
+    seg_other = seg_other[keep]
 
     # Various utility functions
-    def center(p):
-        # Compute the mean coordinate of a set of points
-        return p.mean(axis=1).reshape((-1, 1))
-
     def normalize(v):
         # Normalize a vector
         nrm = np.sqrt(np.sum(v ** 2, axis=0))
@@ -467,8 +484,6 @@ def polygons_3d(polys, tol=1e-8):
 
         return b - a[:, found].reshape((-1, 1))
 
-    num_polys = len(polys)
-
     # Storage array for storing the index of the intersection points for each polygon
     isect_pt = np.empty(num_polys, dtype=np.object)
     # Storage for whehter an intersection is on the boundary of a polygon
@@ -486,48 +501,55 @@ def polygons_3d(polys, tol=1e-8):
     new_pt = []
     new_pt_ind = 0
 
-    # Index of the main fractures, to which the other ones will be compared.
-    start_inds = np.unique(pairs[0])
-
     # Store index of pairs of intersecting polygons
     polygon_pairs = []
 
-    # Loop over all fracture pairs (taking more than one simultaneously if an index
-    # occurs several times in pairs[0]), and look for intersections
-    for di, line_ind in enumerate(start_inds):
-        # The algorithm first does a coarse filtering, to check if the candidate
-        # pairs both crosses each others plane. For those pairs that passes
-        # this test, we next compute the intersection points, and check if
-        # they are contained within the fractures.
-
-        # The main fracture, from the first row in pairs
-        main = line_ind
-
-        # Find the other fracture of all pairs starting with the main one
-        hit = np.where(pairs[0] == main)
-        other = pairs[1, hit][0]
-
-        # Center point and normal vector of the main fracture
-        main_center = center(polys[main])
-        main_normal = pp.map_geometry.compute_normal(polys[main]).reshape((-1, 1))
-
-        # Create an expanded version of the main points, so that the start
-        # and end points are the same. Thus the segments can be formed by
-        # merging main_p_expanded[:-1] with main_p_expanded[1:]
-        num_main = polys[main].shape[1]
-        ind_main_cyclic = np.arange(num_main + 1) % num_main
-        main_p_expanded = polys[main][:, ind_main_cyclic]
-
-        # Loop over the other polygon in the pairs, look for intersections
-        for o in other:
+    # Loop over all fracture pairs, and look for intersections. The pairs are
+    # sorted according to the first polygon, which we refer to as the main one.
+    for pi in range(pairs.shape[1]):
+        main, o = pairs[0, pi], pairs[1, pi]
+
+        if resolved[pi]:
+            # The intersection was computed for all pairs at once, see
+            # _classify_polygon_pairs(). Neither of the polygons has a vertex
+            # in the plane of the other, thus the intersection points are on
+            # segments of the polygons, or in their interior, as signified by
+            # negative segment indices.
+            isect_pt_loc = [isect_resolved[:, pi, 0], isect_resolved[:, pi, 1]]
+            for poly, seg_ind in ((main, seg_main[pi]), (o, seg_other[pi])):
+                for ind in seg_ind:
+                    if ind < 0:
+                        segment_vertex_intersection[poly].append([])
+                    else:
+                        segment_vertex_intersection[poly].append((ind, True))
+            isect_on_boundary_main = False
+            isect_on_boundary_other = False
+
+        else:
+            # The algorithm first does a coarse filtering, to check if the
+            # candidate pairs both crosses each others plane. For those pairs
+            # that passes this test, we next compute the intersection points,
+            # and check if they are contained within the fractures.
+
+            # Center point and normal vector of the main fracture
+            main_center = centers[:, main].reshape((-1, 1))
+            main_normal = normals[:, main].reshape((-1, 1))
+
+            # Create an expanded version of the main points, so that the start
+            # and end points are the same. Thus the segments can be formed by
+            # merging main_p_expanded[:-1] with main_p_expanded[1:]
+            num_main = polys[main].shape[1]
+            ind_main_cyclic = np.arange(num_main + 1) % num_main
+            main_p_expanded = polys[main][:, ind_main_cyclic]
+
             # Expanded version of the other polygon
             num_other = polys[o].shape[1]
             ind_other_cyclic = np.arange(num_other + 1) % num_other
             other_p_expanded = polys[o][:, ind_other_cyclic]
 
             # Normal vector and cetner of the other polygon
-            other_normal = pp.map_geometry.compute_normal(polys[o]).reshape((-1, 1))
-            other_center = center(polys[o])
+            other_normal = normals[:, o].reshape((-1, 1))
+            other_center = centers[:, o].reshape((-1, 1))
 
             # Point a vector from the main center to the vertexes of the
             # other polygon. Then take the dot product with the normal vector
@@ -1023,15 +1045,15 @@ def polygons_3d(polys, tol=1e-8):
                 # This should never happen
                 assert False
 
-            # Append data for this combination of polygons.
-            new_pt.append(np.array(isect_pt_loc).T)
-            num_new = len(isect_pt_loc)
-            isect_pt[main].append(new_pt_ind + np.arange(num_new))
-            isect_pt[o].append(new_pt_ind + np.arange(num_new))
-            new_pt_ind += num_new
-            is_bound_isect[main].append(isect_on_boundary_main)
-            is_bound_isect[o].append(isect_on_boundary_other)
-            polygon_pairs.append((main, o))
+        # Append data for this combination of polygons.
+        new_pt.append(np.array(isect_pt_loc).T)
+        num_new = len(isect_pt_loc)
+        isect_pt[main].append(new_pt_ind + np.arange(num_new))
+        isect_pt[o].append(new_pt_ind + np.arange(num_new))
+        new_pt_ind += num_new
+        is_bound_isect[main].append(isect_on_boundary_main)
+        is_bound_isect[o].append(isect_on_boundary_other)
+        polygon_pairs.append((main, o))
 
     # Cleanup and return. Puh!
     if len(new_pt) > 0:
@@ -1050,6 +1072,256 @@ def polygons_3d(polys, tol=1e-8):
     return new_pt, isect_pt, is_bound_isect, polygon_pairs, segment_vertex_intersection
 
 
+def _polygon_centers_and_normals(polys, ind):
+    """ Compute the center points and normal vectors of a set of polygons.
+
+    The normal vectors are computed as in pp.map_geometry.compute_normal(),
+    but for all polygons at once.
+
+    Parameters:
+        polys (list of np.array): Polygons, each represented by its vertexes in
+            a 3 x num_pts array.
+        ind (np.array): Index of the polygons for which the centers and normals
+            should be computed.
+
+    Returns:
+        np.array, 3 x num_polys: Center points, that is, the mean of the
+            vertexes. Zero for polygons not in ind.
+        np.array, 3 x num_polys: Unit normal vectors. Zero for polygons not in
+            ind.
+
+    """
+    centers = np.zeros((3, len(polys)))
+    normals = np.zeros((3, len(polys)))
+    if ind.size == 0:
+        return centers, normals
+
+    num_vert = np.array([polys[i].shape[1] for i in ind])
+    offset = np.hstack((0, np.cumsum(num_vert)))[:-1]
+    vert = np.hstack([polys[i] for i in ind])
+    poly_of_vert = np.repeat(np.arange(ind.size), num_vert)
+
+    center = np.add.reduceat(vert, offset, axis=1) / num_vert
+    # Tangent vector from the center to the vertex furthest away from it
+    dist = np.sum((vert - center[:, poly_of_vert]) ** 2, axis=0)
+    max_dist = np.maximum.reduceat(dist, offset)
+    furthest = np.flatnonzero(dist == max_dist[poly_of_vert])
+    _, first = np.unique(poly_of_vert[furthest], return_index=True)
+    tangent = vert[:, furthest[first]] - center
+    tangent /= np.sqrt(np.sum(tangent ** 2, axis=0))
+
+    normal = np.cross(vert[:, offset] - vert[:, offset + 1], tangent, axis=0)
+    nrm = np.sqrt(np.sum(normal ** 2, axis=0))
+    # The first three vertexes may be aligned with the tangent. Use the more
+    # careful treatment in map_geometry for these polygons.
+    degenerate = np.all(np.isclose(normal, 0), axis=0)
+    nrm[degenerate] = 1
+    normal /= nrm
+    for i in np.flatnonzero(degenerate):
+        normal[:, i] = pp.map_geometry.compute_normal(polys[ind[i]])
+
+    centers[:, ind] = center
+    normals[:, ind] = normal
+    return centers, normals
+
+
+def _classify_polygon_pairs(polys, centers, normals, pairs, tol=1e-8, chunk_size=50000):
+    """ Analyze the intersection of candidate pairs of polygons, using array
+    operations on all pairs at once.
+
+    The function mirrors the analysis of a pair of polygons in polygons_3d,
+    for configurations that allow for a vectorized treatment: First, pairs
+    where one polygon lies strictly on one side of the plane of the other are
+    discarded. Second, for pairs where no vertex is close to the plane of the
+    other polygon, the intersection points between the polygon boundaries and
+    the planes are computed. Pairs where these points are separated along
+    the intersection line are discarded, while for pairs where the points
+    clearly overlap, the intersection points and the segments they lie on are
+    identified.
+
+    The tests are conservative, using safety margins that account for rounding
+    errors and polygons that are not completely planar. Pairs in degenerate
+    configurations, such as vertexes in the plane of the other polygon, or
+    intersection points that (almost) coincide, are left for polygons_3d.
+
+    Parameters:
+        polys (list of np.array): Polygons, each represented by its vertexes in
+            a 3 x num_pts array.
+        centers (np.array, 3 x num_polys): Center of the polygons.
+        normals (np.array, 3 x num_polys): Unit normal vectors of the polygons.
+        pairs (np.array, 2 x num_pairs): Indices of candidate pairs.
+        tol (double, optional): Tolerance used by polygons_3d to decide the
+            sign of dot products.
+        chunk_size (int, optional): Number of pairs processed simultaneously.
+            Limits the size of temporary arrays.
+
+    Returns:
+        np.array of bool, num_pairs: False for pairs that do not intersect.
+        np.array of bool, num_pairs: True for intersecting pairs where the
+            intersection has been computed.
+        np.array, 3 x num_pairs x 2: For the computed intersections, the two
+            intersection points, ordered as in polygons_3d.
+        np.array of int, num_pairs x 2: For the computed intersections, the
+            index of the segment of the first polygon in the pair which
+            contains the intersection points. -1 if the point is in the
+            interior of the polygon.
+        np.array of int, num_pairs x 2: Same information for the second polygon
+            in the pair.
+
+    """
+    num_pairs = pairs.shape[1]
+    keep = np.ones(num_pairs, dtype=np.bool)
+    resolved = np.zeros(num_pairs, dtype=np.bool)
+    isect = np.zeros((3, num_pairs, 2))
+    seg_main = -np.ones((num_pairs, 2), dtype=np.int)
+    seg_other = -np.ones((num_pairs, 2), dtype=np.int)
+    if num_pairs == 0:
+        return keep, resolved, isect, seg_main, seg_other
+
+    # Flat storage of the vertexes of all polygons
+    num_vert = np.array([p.shape[1] for p in polys])
+    offset = np.hstack((0, np.cumsum(num_vert)))
+    vert = np.hstack(polys)
+    poly_of_vert = np.repeat(np.arange(len(polys)), num_vert)
+
+    # Bounding boxes and deviation from planarity of the polygons
+    box_min = np.minimum.reduceat(vert, offset[:-1], axis=1)
+    box_max = np.maximum.reduceat(vert, offset[:-1], axis=1)
+    dist_own_plane = np.abs(
+        np.sum(normals[:, poly_of_vert] * (vert - centers[:, poly_of_vert]), axis=0)
+    )
+    planarity = np.maximum.reduceat(dist_own_plane, offset[:-1])
+
+    def plane_crossings(plane, poly, margin):
+        # Intersection of the boundary of the polygons poly with the planes of
+        # the polygons plane. Returns boolean arrays for pairs with poly on one
+        # side of the plane, and for pairs where poly has exactly two
+        # segments crossing the plane, away from the vertexes. For the latter
+        # pairs, the intersection points and the index of the crossing
+        # segments are also returned.
+        num = num_vert[poly]
+        start = np.hstack((0, np.cumsum(num)))
+        pair_of_vert = np.repeat(np.arange(poly.size), num)
+        ind = pp.utils.mcolon.mcolon(offset[poly], offset[poly + 1])
+        # Local index of the next vertex along the polygon boundary
+        next_vert = np.arange(1, ind.size + 1)
+        next_vert[start[1:] - 1] = start[:-1]
+
+        n = normals[:, plane[pair_of_vert]]
+        dist = np.sum(n * (vert[:, ind] - centers[:, plane[pair_of_vert]]), axis=0)
+
+        one_side = np.logical_or(
+            np.minimum.reduceat(dist, start[:-1]) > margin,
+            np.maximum.reduceat(dist, start[:-1]) < -margin,
+        )
+
+        # Segments crossing the plane, and the number of crossings for each
+        # pair. Vertexes close to the plane are handled by polygons_3d.
+        crossing = np.sign(dist) != np.sign(dist[next_vert])
+        generic = np.logical_and(
+            np.minimum.reduceat(np.abs(dist) - margin[pair_of_vert], start[:-1]) > 0,
+            np.add.reduceat(crossing, start[:-1]) == 2,
+        )
+        seg = np.flatnonzero(np.logical_and(crossing, generic[pair_of_vert]))
+        t = dist[seg] / (dist[seg] - dist[next_vert[seg]])
+        x0 = vert[:, ind[seg]]
+        x1 = vert[:, ind[next_vert[seg]]]
+        points = (x0 + t * (x1 - x0)).reshape((3, -1, 2))
+        seg_ind = (seg - start[pair_of_vert[seg]]).reshape((-1, 2))
+        return one_side, generic, points[:, :, 0], points[:, :, 1], seg_ind
+
+    for lo in range(0, num_pairs, chunk_size):
+        hi = min(lo + chunk_size, num_pairs)
+        main, other = pairs[0, lo:hi], pairs[1, lo:hi]
+
+        # Size of the pairs, used to scale the safety margins
+        diam = np.sqrt(
+            np.sum(
+                (
+                    np.maximum(box_max[:, main], box_max[:, other])
+                    - np.minimum(box_min[:, main], box_min[:, other])
+                )
+                ** 2,
+                axis=0,
+            )
+        )
+
+        # Intersection of other with the plane of main, and vice versa
+        side_o, gen_o, o_0, o_1, seg_o = plane_crossings(
+            main, other, 10 * tol * diam + planarity[main]
+        )
+        side_m, gen_m, m_0, m_1, seg_m = plane_crossings(
+            other, main, 10 * tol * diam + planarity[other]
+        )
+        keep_loc = np.logical_not(np.logical_or(side_o, side_m))
+
+        # Pairs where both polygons cross the plane of the other on segments
+        generic = np.flatnonzero(np.logical_and(gen_o, gen_m))
+        o_0, o_1, seg_o = (
+            o_0[:, gen_m[gen_o]],
+            o_1[:, gen_m[gen_o]],
+            seg_o[gen_m[gen_o]],
+        )
+        m_0, m_1, seg_m = (
+            m_0[:, gen_o[gen_m]],
+            m_1[:, gen_o[gen_m]],
+            seg_m[gen_o[gen_m]],
+        )
+
+        # Relative position of the intersection points, see polygons_3d. Only
+        # pairs where none of the dot products are close to zero are treated.
+        e = np.vstack(
+            (
+                np.sum((o_0 - m_0) * (o_1 - m_0), axis=0),
+                np.sum((o_0 - m_1) * (o_1 - m_1), axis=0),
+                np.sum((m_0 - o_0) * (m_1 - o_0), axis=0),
+                np.sum((m_0 - o_1) * (m_1 - o_1), axis=0),
+            )
+        )
+        e_margin = tol + tol ** 2 * diam[generic] ** 2
+        clear = np.all(np.abs(e) > e_margin, axis=0)
+        e_1, e_2, e_3, e_4 = e > 0
+
+        # The intersection points of the two polygons are separated
+        separated = np.logical_and(clear, np.all(e > 0, axis=0))
+        keep_loc[generic[separated]] = False
+        keep[lo:hi] = keep_loc
+
+        # The possible cases for intersecting polygons, with intersection
+        # points and segment indices of main and other. Index -1 signifies
+        # intersection points in the interior of a polygon.
+        none = -np.ones(generic.size, dtype=np.int)
+        cases = [
+            (e_1 & e_2, (o_0, o_1), (none, none), (seg_o[:, 0], seg_o[:, 1])),
+            (e_1 & ~e_2 & ~e_3, (m_1, o_0), (seg_m[:, 1], none), (none, seg_o[:, 0])),
+            (
+                e_1 & ~e_2 & e_3 & ~e_4,
+                (m_1, o_1),
+                (seg_m[:, 1], none),
+                (none, seg_o[:, 1]),
+            ),
+            (~e_1 & e_2 & ~e_3, (m_0, o_0), (seg_m[:, 0], none), (none, seg_o[:, 0])),
+            (
+                ~e_1 & e_2 & e_3 & ~e_4,
+                (m_0, o_1),
+                (seg_m[:, 0], none),
+                (none, seg_o[:, 1]),
+            ),
+            (~e_1 & ~e_2, (m_0, m_1), (seg_m[:, 0], seg_m[:, 1]), (none, none)),
+        ]
+        intersecting = np.logical_and(clear, np.logical_not(separated))
+        for hit, points, sm, so in cases:
+            hit = np.logical_and(hit, intersecting)
+            ind = lo + generic[hit]
+            resolved[ind] = True
+            for k in range(2):
+                isect[:, ind, k] = points[k][:, hit]
+                seg_main[ind, k] = sm[k][hit]
+                seg_other[ind, k] = so[k][hit]
+
+    return keep, resolved, isect, seg_main, seg_other
+
+
 def triangulations(p_1, p_2, t_1, t_2):
     """ Compute intersection of two triangle tessalation of a surface.
 
@@ -1181,7 +1453,7 @@ def line_tesselation(p1, p2, l1, l2):
     return intersections
 
 
-def split_intersecting_segments_2d(p, e, tol=1e-4):
+def split_intersecting_segments_2d(p, e, tol=1e-4, chunk_size=50000):
     """ Process a set of points and connections between them so that the result
     is an extended point set and new connections that do not intersect.
 
@@ -1193,14 +1465,22 @@ def split_intersecting_segments_2d(p, e, tol=1e-4):
 
     IMPLEMENTATION NOTE: This is a re-implementation of the old function
     remove_edge_crossings, based on a much faster algorithm. The two functions
-    will coexist for a while.
+    will coexist for a while. Candidate pairs of segments are identified by
+    their bounding boxes, and all candidate pairs are analyzed simultaneously
+    by array operations, see _segments_2d_pairs(). Intersection points are
+    merged with the existing points by the spatial hash in unique_columns_tol(),
+    and the segments are split without a loop over the segments. The work is
+    thus essentially linear in the number of segments and candidate pairs.
 
     Parameters:
         p (np.ndarray, 2 x n_pt): Coordinates of points to be processed
         e (np.ndarray, n x n_con): Connections between lines. n >= 2, row
             0 and 1 are index of start and endpoints, additional rows are tags
-        tol (double, optional, default=1e-8): Tolerance used for comparing
+        tol (double, optional, default=1e-4): Tolerance used for comparing
             equal points.
+        chunk_size (int, optional): Number of candidate pairs analyzed
+            simultaneously. Limits the size of temporary arrays for large
+            networks. Defaults to 50000.
 
     Returns:
         np.ndarray, (2 x n_pt), array of points, possibly expanded.
@@ -1209,193 +1489,235 @@ def split_intersecting_segments_2d(p, e, tol=1e-4):
     """
     # Find the bounding box
     x_min, x_max, y_min, y_max = _axis_aligned_bounding_box_2d(p, e)
-    # Identify fractures with overlapping bounding boxes
-    pairs = _identify_overlapping_rectangles(x_min, x_max, y_min, y_max)
-
-    # Identify all fractures that are the first (by index) of a potentially
-    # crossing pair. A better way to group the fractures may be feasible,
-    # but this has not been investigated.
-    start_inds = np.unique(pairs[0])
+    # Identify fractures with overlapping bounding boxes. The pairs are sorted,
+    # with the lowest index, referred to as the main fracture, first. The boxes
+    # are hashed in a uniform grid, which for typical fracture networks gives
+    # far fewer candidates than a sweep along one of the axes.
+    pairs = pp.bounding_box.overlapping_boxes(
+        np.vstack((x_min, y_min)), np.vstack((x_max, y_max)), method="grid"
+    )
 
     num_lines = e.shape[1]
 
-    # Data structure for storage of intersection points. For each fracture,
-    # we have an array that will contain the index of the intersections.
-    isect_pt = np.empty(num_lines, dtype=np.object)
-    for i in range(isect_pt.size):
-        isect_pt[i] = np.empty(0, dtype=np.int)
-
-    # Array of new points, found in the intersection of old ones.
-    new_pts = []
-    # The new points will be appended to the old ones, thus their index
-    # must be adjusted.
-    new_ind = p.shape[1]
-
-    # Loop through all candidate pairs of intersecting fractures, check if
-    # they do intersect. If so, store the point, and for each crossing fracture
-    # take note of the index of the cross point.
-    for _, line_ind in enumerate(start_inds):
-        # First fracture in the candidate pair
-        main = line_ind
-        # Find all other fractures that is in a pair with the main as the first one.
-        hit = np.where(pairs[0] == main)
-        # Sort the other points; this makes debugging simpler if nothing else.
-        other = np.sort(pairs[1, hit][0])
-
-        # We will first do a coarse sorting, to rule out fractures that are clearly
-        # not intersecting, and then do a finer search for an intersection below.
-
-        # Utility function to pull out one or several points from an array based
-        # on index
-        def pt(p, ind):
-            a = p[:, ind]
-            if ind.size == 1:
-                return a.reshape((-1, 1))
-            else:
-                return a
-
-        # Obtain start and endpoint of the main and other fractures
-        start_main = pt(p, e[0, main])
-        end_main = pt(p, e[1, main])
-        start_other = pt(p, e[0, other])
-        end_other = pt(p, e[1, other])
-
-        # Utility function to normalize the fracture length
-        def normalize(v):
-            nrm = np.sqrt(np.sum(v ** 2, axis=0))
-
-            # If the norm of the vector is essentially zero, do not normalize the vector
-            hit = nrm < tol
-            nrm[hit] = 1
-            return v / nrm
-
-        def dist(a, b):
-            return np.sqrt(np.sum((a - b) ** 2))
-
-        # Vectors along the main fracture, and from the start of the main
-        # to the start and end of the other fractures. All normalized.
-        # If the other edges share start or endpoint with the main one, normalization
-        # of the distance vector will make the vector nans. In this case, we
-        # use another point along the other line, this works equally well for the
-        # coarse identification (based on cross products).
-        # If the segments are overlapping, there will still be issues with nans,
-        # but these are dealt with below.
-        main_vec = normalize(end_main - start_main)
-        if dist(start_other, start_main) > 1e-4:
-            main_other_start = normalize(start_other - start_main)
-        else:
-            main_other_start = normalize(0.5 * (start_other + end_other) - start_main)
-        if dist(end_other, start_main) > 1e-4:
-            main_other_end = normalize(end_other - start_main)
-        else:
-            # Values 0.3 and 0.7 are quite random here.
-            main_other_end = normalize(0.3 * start_other + 0.7 * end_other - start_main)
-
-        # Modified signum function: The value is 0 if it is very close to zero.
-        def mod_sign(v, tol):
-            sgn = np.sign(v)
-            sgn[np.abs(v) < tol] = 0
-            return sgn
-
-        # Take the cross product between the vector along the main line, and the
-        # vectors to the start and end of the other lines, respectively.
-        start_cross = mod_sign(
-            main_vec[0] * main_other_start[1] - main_vec[1] * main_other_start[0], tol
+    # Find the intersection points of all candidate pairs. Overlapping edges
+    # give two intersection points.
+    num_isect = np.zeros(pairs.shape[1], dtype=np.int)
+    isect = np.zeros((2, pairs.shape[1], 2))
+    for lo in range(0, pairs.shape[1], chunk_size):
+        hi = min(lo + chunk_size, pairs.shape[1])
+        num_isect[lo:hi], isect[:, lo:hi] = _segments_2d_pairs(
+            p, e, pairs[:, lo:hi], tol
         )
-        end_cross = mod_sign(
-            main_vec[0] * main_other_end[1] - main_vec[1] * main_other_end[0], tol
-        )
-
-        # If the start and endpoint of the other fracture are clearly on the
-        # same side of the main one, these are not crossing.
-        # For completely ovrelapping edges, the normalization will leave the
-        # vectors nan. There may be better ways of dealing with this, but we simply
-        # run the intersection finder in this case.
-        relevant = np.where(
-            np.logical_or(
-                (start_cross * end_cross < 1),
-                np.any(np.isnan(main_other_start + main_other_end), axis=0),
-            )
-        )[0]
-
-        # Loop over all relevant (possibly crossing) fractures, look closer
-        # for an intersection.
-        for ri in relevant:
-            ipt = segments_2d(
-                start_main, end_main, pt(start_other, ri), pt(end_other, ri), tol
-            )
-            # Add the intersection point, if any.
-            # If two intersection points are found, that is the edges are overlapping
-            # both points are added.
-            if ipt is not None:
-                num_isect = ipt.shape[1]
-                # Add indices of the new points to the main and other edge
-                isect_pt[main] = np.append(
-                    isect_pt[main], new_ind + np.arange(num_isect)
-                )
-                isect_pt[other[ri]] = np.append(
-                    isect_pt[other[ri]], new_ind + np.arange(num_isect)
-                )
-                new_ind += num_isect
-
-                # Add the one or two intertion points
-                if num_isect == 1:
-                    new_pts.append(ipt.squeeze())
-                else:
-                    # It turned out the transport was needed to get the code to work
-                    new_pts.append(ipt.squeeze().T)
 
     # If we have found no intersection points, we can safely return the incoming
     # points and edges.
-    if len(new_pts) == 0:
+    if num_isect.sum() == 0:
         return p, e
+
     # If intersection points are found, the intersecting lines must be split into
     # shorter segments.
-    else:
-        # The full set of points, both original and newly found intersection points
-        all_pt = np.hstack((p, np.vstack([i for i in new_pts]).T))
-        # Remove duplicates in the point set.
-        # NOTE: The tolerance used here is a bit sensitive, if set too loose, this
-        # may merge non-intersecting fractures.
-        unique_all_pt, _, ib = pp.utils.setmembership.unique_columns_tol(all_pt, tol)
-        # Data structure for storing the split edges.
-        new_edge = np.empty((e.shape[0], 0))
-
-        # Loop over all lines, split it into non-overlapping segments.
-        for ei in range(num_lines):
-            # Find indices of all points involved in this fracture.
-            # Map them to the unique point set, and uniquify
-            inds = np.unique(ib[np.hstack((e[:2, ei], isect_pt[ei]))])
-            num_branches = inds.size - 1
-            # Get the coordinates themselves.
-            loc_pts = pt(unique_all_pt, inds)
-            # Specifically get the start point: Pick one of the points of the
-            # original edge, e[0, ei], which is known to be at an end of the edge.
-            # map to the unique indices
-            loc_start = pt(unique_all_pt, ib[e[0, ei]])
-            # Measure the distance of the points from the start. This can be used
-            # to sort the points along the line
-            dist = np.sum((loc_pts - loc_start) ** 2, axis=0)
-            order = np.argsort(dist)
-            new_inds = inds[order]
-            # All new segments share the tags of the old one.
-            loc_tags = e[2:, ei].reshape((-1, 1)) * np.ones(num_branches)
-            # Define the new segments, in terms of the unique points
-            loc_edge = np.vstack((new_inds[:-1], new_inds[1:], loc_tags))
-
-            # Add to the global list of segments
-            new_edge = np.hstack((new_edge, loc_edge))
-
-        # Finally, uniquify edges. This operation is necessary for overlapping edges.
-        # Operate on sorted point indices per edge
-        new_edge[:2] = np.sort(new_edge[:2], axis=0)
-        # Uniquify.
-        _, edge_map, _ = pp.utils.setmembership.unique_columns_tol(
-            new_edge[:2].astype(np.int), tol
+    # The new points are appended to the old ones, pair by pair.
+    pair_of_pt = np.repeat(np.arange(pairs.shape[1]), num_isect)
+    pt_in_pair = np.arange(pair_of_pt.size) - np.repeat(
+        np.cumsum(num_isect) - num_isect, num_isect
+    )
+    new_pts = isect[:, pair_of_pt, pt_in_pair]
+    new_ind = p.shape[1] + np.arange(pair_of_pt.size)
+
+    # The full set of points, both original and newly found intersection points
+    all_pt = np.hstack((p, new_pts))
+    # Remove duplicates in the point set.
+    # NOTE: The tolerance used here is a bit sensitive, if set too loose, this
+    # may merge non-intersecting fractures.
+    unique_all_pt, _, ib = pp.utils.setmembership.unique_columns_tol(all_pt, tol)
+
+    # All points on each line: The start and endpoints, and the intersection
+    # points of all pairs the line is part of. Map them to the unique point set,
+    # and uniquify.
+    num_unique = unique_all_pt.shape[1]
+    line_of_pt = np.hstack(
+        (
+            np.arange(num_lines),
+            np.arange(num_lines),
+            pairs[0, pair_of_pt],
+            pairs[1, pair_of_pt],
+        )
+    ).astype(np.int64)
+    pt_of_line = ib[np.hstack((e[0], e[1], new_ind, new_ind))]
+    key = np.unique(line_of_pt * num_unique + pt_of_line)
+    line_of_pt = key // num_unique
+    pt_of_line = key % num_unique
+
+    # Sort the points along each line, by their distance from the start point.
+    # Pick one of the points of the original edge, e[0, ei], which is known to
+    # be at an end of the edge.
+    loc_start = unique_all_pt[:, ib[e[0, line_of_pt]]]
+    dist = np.sum((unique_all_pt[:, pt_of_line] - loc_start) ** 2, axis=0)
+    order = np.lexsort((dist, line_of_pt))
+    line_of_pt = line_of_pt[order]
+    pt_of_line = pt_of_line[order]
+
+    # Consecutive points on the same line define the new segments, which share
+    # the tags of the old one.
+    branch = np.flatnonzero(line_of_pt[:-1] == line_of_pt[1:])
+    new_edge = np.vstack(
+        (pt_of_line[branch], pt_of_line[branch + 1], e[2:, line_of_pt[branch]])
+    )
+
+    # Finally, uniquify edges. This operation is necessary for overlapping edges.
+    # Operate on sorted point indices per edge
+    new_edge[:2] = np.sort(new_edge[:2], axis=0)
+    # Uniquify.
+    _, edge_map, _ = pp.utils.setmembership.unique_columns_tol(
+        new_edge[:2].astype(np.int), tol
+    )
+    new_edge = new_edge[:, edge_map]
+
+    return unique_all_pt, new_edge.astype(np.int)
+
+
+def _segments_2d_pairs(p, e, pairs, tol):
+    """ Find the intersections of pairs of segments in 2d, using array
+    operations on all pairs at once.
+
+    For each pair, the analysis is the same as in segments_2d(). First however,
+    pairs where the other segment lies clearly on one side of the line through
+    the main segment (the first in the pair) are discarded.
+
+    Parameters:
+        p (np.ndarray, 2 x n_pt): Coordinates of points.
+        e (np.ndarray, n x n_con): Connections between points. Row 0 and 1
+            are index of start and endpoints.
+        pairs (np.array, 2 x num_pairs): Indices of the segments in each pair.
+        tol (double): Tolerance, with the same meaning as in segments_2d().
+
+    Returns:
+        np.array of int, num_pairs: Number of intersection points for each
+            pair. 0 if the segments do not intersect, 2 if they overlap.
+        np.array, 2 x num_pairs x 2: Coordinates of the intersection points.
+            For overlapping segments, the first point is closest to the start
+            of the main segment.
+
+    Raises:
+        ValueError if the start and endpoints of a segment are the same.
+
+    """
+    p = p.astype(np.float)
+    main, other = pairs[0], pairs[1]
+    start_1, end_1 = p[:, e[0, main]], p[:, e[1, main]]
+    start_2, end_2 = p[:, e[0, other]], p[:, e[1, other]]
+
+    num_isect = np.zeros(main.size, dtype=np.int)
+    isect = np.zeros((2, main.size, 2))
+
+    # Coarse sorting, to rule out segments that are clearly not intersecting.
+    def normalize(v):
+        nrm = np.sqrt(np.sum(v ** 2, axis=0))
+        # If the norm of the vector is essentially zero, do not normalize it
+        nrm[nrm < tol] = 1
+        return v / nrm
+
+    def cross_sign(a, b):
+        cross = a[0] * b[1] - a[1] * b[0]
+        sgn = np.sign(cross)
+        sgn[np.abs(cross) < tol] = 0
+        return sgn
+
+    # Vectors along the main segment, and from the start of the main to the
+    # start and end of the other segments. If the other segment shares start or
+    # endpoint with the main one, another point along the other segment is
+    # used instead, this works equally well for the coarse identification.
+    def other_vec(pt, alternative):
+        close = np.sqrt(np.sum((pt - start_1) ** 2, axis=0)) <= 1e-4
+        return normalize(np.where(close, alternative, pt) - start_1)
+
+    main_vec = normalize(end_1 - start_1)
+    # Values 0.3 and 0.7 are quite random here.
+    main_other_start = other_vec(start_2, 0.5 * (start_2 + end_2))
+    main_other_end = other_vec(end_2, 0.3 * start_2 + 0.7 * end_2)
+
+    # If the start and endpoint of the other segment are clearly on the same
+    # side of the main one, these are not crossing.
+    relevant = np.flatnonzero(
+        np.logical_or(
+            cross_sign(main_vec, main_other_start)
+            * cross_sign(main_vec, main_other_end)
+            < 1,
+            np.any(np.isnan(main_other_start + main_other_end), axis=0),
         )
-        new_edge = new_edge[:, edge_map]
+    )
 
-        return unique_all_pt, new_edge.astype(np.int)
+    start_1, end_1 = start_1[:, relevant], end_1[:, relevant]
+    start_2, end_2 = start_2[:, relevant], end_2[:, relevant]
+
+    # Vectors along first and second line, and between the start points
+    d_1 = end_1 - start_1
+    d_2 = end_2 - start_2
+    d_s = start_2 - start_1
+    length_1 = np.sqrt(np.sum(d_1 * d_1, axis=0))
+    length_2 = np.sqrt(np.sum(d_2 * d_2, axis=0))
+
+    discr = d_1[0] * (-d_2[1]) - d_1[1] * (-d_2[0])
+    parallel = np.abs(discr) < tol * length_1 * length_2
+
+    # Non-parallel lines: Solve the linear system using Cramer's rule. The
+    # intersection lies on both segments if both parameters are on the unit
+    # interval, up to the tolerance.
+    ind = np.flatnonzero(np.logical_not(parallel))
+    t_1 = (d_s[0, ind] * (-d_2[1, ind]) - d_s[1, ind] * (-d_2[0, ind])) / discr[ind]
+    t_2 = (d_1[0, ind] * d_s[1, ind] - d_1[1, ind] * d_s[0, ind]) / discr[ind]
+    hit = np.all(np.vstack((t_1, t_2)) >= -tol, axis=0) & np.all(
+        np.vstack((t_1, t_2)) <= 1 + tol, axis=0
+    )
+    ind, t_1 = ind[hit], t_1[hit]
+    num_isect[relevant[ind]] = 1
+    isect[:, relevant[ind], 0] = start_1[:, ind] + t_1 * d_1[:, ind]
+
+    # Parallel lines will only cross if they are also colinear.
+    start_cross_line = d_s[0] * d_1[1] - d_s[1] * d_1[0]
+    ind = np.flatnonzero(
+        np.logical_and(
+            parallel, np.abs(start_cross_line) < tol * np.maximum(length_1, length_2)
+        )
+    )
+    if ind.size == 0:
+        return num_isect, isect
+
+    # Write the first line on the form start_1 + t * d_1, find the parameter
+    # values for start_2 and end_2, using the dominating component of d_1.
+    use_x = np.abs(d_1[0, ind]) > tol * length_1[ind]
+    use_y = np.abs(d_1[1, ind]) > tol * length_2[ind]
+    if np.any(np.logical_not(np.logical_or(use_x, use_y))):
+        logger.error("Found what must be a point-edge")
+        raise ValueError("Start and endpoint of line should be different")
+    dim = np.where(use_x, 0, 1)
+    cols = np.arange(ind.size)
+    s = start_1[dim, ind]
+    d = d_1[dim, ind]
+    t_start_2 = (start_2[dim, ind] - s) / d
+    t_end_2 = (end_2[dim, ind] - s) / d
+
+    # Find the overlap of the parameter intervals, if any
+    t_min = np.maximum(np.minimum(t_start_2, t_end_2), 0)
+    t_max = np.minimum(np.maximum(t_start_2, t_end_2), 1)
+    overlap = np.logical_not(
+        np.logical_or(
+            np.logical_and(t_start_2 < 0, t_end_2 < 0),
+            np.logical_and(t_start_2 > 1, t_end_2 > 1),
+        )
+    )
+    ind, cols, t_min, t_max = (
+        ind[overlap],
+        cols[overlap],
+        t_min[overlap],
+        t_max[overlap],
+    )
+    # If the parameter interval is very short, the lines share a single point
+    num_isect[relevant[ind]] = np.where(t_max - t_min < tol, 1, 2)
+    isect[:, relevant[ind], 0] = start_1[:, ind] + d_1[:, ind] * t_min
+    isect[:, relevant[ind], 1] = start_1[:, ind] + d_1[:, ind] * t_max
+
+    return num_isect, isect
 
 
 def _axis_aligned_bounding_box_2d(p, e):
@@ -1452,23 +1774,14 @@ def _axis_aligned_bounding_box_3d(polys):
     """
 
     polys = list(polys)
+    if len(polys) == 0:
+        return tuple(np.empty(0) for _ in range(6))
 
-    num_poly = len(polys)
-
-    x_min = np.empty(num_poly)
-    x_max = np.empty_like(x_min)
-    y_min = np.empty_like(x_min)
-    y_max = np.empty_like(x_min)
-    z_min = np.empty_like(x_min)
-    z_max = np.empty_like(x_min)
-
-    for ind, p in enumerate(polys):
-        x_min[ind] = np.min(p[0])
-        x_max[ind] = np.max(p[0])
-        y_min[ind] = np.min(p[1])
-        y_max[ind] = np.max(p[1])
-        z_min[ind] = np.min(p[2])
-        z_max[ind] = np.max(p[2])
+    # Reduce over the vertexes of all polygons at once
+    offset = np.hstack((0, np.cumsum([p.shape[1] for p in polys])))[:-1]
+    pts = np.hstack(polys)
+    x_min, y_min, z_min = np.minimum.reduceat(pts, offset, axis=1)
+    x_max, y_max, z_max = np.maximum.reduceat(pts, offset, axis=1)
 
     return x_min, x_max, y_min, y_max, z_min, z_max
 
@@ -1477,6 +1790,8 @@ def _identify_overlapping_intervals(left, right):
     """ Based on a set of start and end coordinates for intervals, identify pairs of
     overlapping intervals.
 
+    See pp.bounding_box.overlapping_intervals() for details.
+
     Parameters:
         left (np.array): Minimum coordinates of the intervals.
         right (np.array): Maximum coordinates of the intervals.
@@ -1489,62 +1804,7 @@ def _identify_overlapping_intervals(left, right):
             are sorted so that the lowest index is in the first column.
 
     """
-    # There can be no overlaps if there is less than two intervals
-    if left.size < 2:
-        return np.empty((2, 0))
-
-    # Sort the coordinates
-    sort_ind_left = np.argsort(left)
-    sort_ind_right = np.argsort(right)
-
-    # pointers to the next start and end point of an interval
-    next_right = 0
-    next_left = 0
-
-    # List of pairs we have found
-    pairs = []
-    # List of intervals we are currently in. All intervals will join and leave this set.
-    active = []
-
-    num_lines = left.size
-
-    # Loop through the line, add and remove intervals as we come across them.
-    while True:
-        # Check if the next start (left) point is before the next endpoint,
-        # But only if there are more left points available.
-        # Less or equal is critical here, or else cases where a point interval
-        # is combined with the start of another interval may not be discovered.
-        if (
-            next_left < num_lines
-            and left[sort_ind_left[next_left]] <= right[sort_ind_right[next_right]]
-        ):
-            # We have started a new interval. This will be paired with
-            # all active intervals
-            for a in active:
-                pairs.append([a, sort_ind_left[next_left]])
-            # Also join the new intervals to the active set.
-            active.append(sort_ind_left[next_left])
-            # Increase the index
-            next_left += 1
-        else:
-            # We have reached the end of the interval - remove it from the
-            # active ones.
-            active.remove(sort_ind_right[next_right])
-            next_right += 1
-            # Check if we have come to the end
-            if next_right == num_lines:
-                break
-
-    if len(pairs) == 0:
-        return np.empty((2, 0))
-    else:
-        pairs = np.asarray(pairs).T
-        # First sort the pairs themselves
-        pairs.sort(axis=0)
-        # Next, sort the columns so that the first row is non-decreasing
-        sort_ind = np.argsort(pairs[0])
-        pairs = pairs[:, sort_ind]
-        return pairs
+    return pp.bounding_box.overlapping_intervals(left, right)
 
 
 def _identify_overlapping_rectangles(xmin, xmax, ymin, ymax, tol=1e-8):
@@ -1553,6 +1813,7 @@ def _identify_overlapping_rectangles(xmin, xmax, ymin, ymax, tol=1e-8):
 
     The algorithm was found in 'A fast method for fracture intersection detection
     in discrete fracture networks' by Dong et al, omputers and Geotechniques 2018.
+    See pp.bounding_box.overlapping_boxes() for the implementation.
 
     Parameters:
         xmin (np.array): Minimum coordinates of the rectangle on the first axis.
@@ -1569,95 +1830,6 @@ def _identify_overlapping_rectangles(xmin, xmax, ymin, ymax, tol=1e-8):
             are sorted so that the lowest index is in the first column.
 
     """
-    # There can be no overlaps if there is less than two rectangles
-    if xmin.size < 2:
-        return np.empty((2, 0))
-
-    # Sort the coordinates
-    sort_ind_min = np.argsort(xmin)
-    sort_ind_max = np.argsort(xmax)
-
-    # pointers to the next start and end point of an interval
-    next_min = 0
-    next_max = 0
-
-    # List of pairs we have found
-    pairs = []
-    # List of intervals we are currently in. All intervals will join and leave this set.
-    active = []
-
-    num_lines = xmax.size
-
-    # Pass along the x-axis, identify the start and end of rectangles as we go.
-    # The idea is then for each new interval to check which of the active intervals
-    # also have overlap along the y-axis. These will be identified as pairs.
-    while True:
-        # Check if the next start (xmin) point is before the next endpoint,
-        # but only if there are more left points available.
-        # Less or equal is critical here, or else cases where a point interval
-        # is combined with the start of another interval may not be discovered.
-        if (
-            next_min < num_lines
-            and xmin[sort_ind_min[next_min]] <= xmax[sort_ind_max[next_max]]
-        ):
-            # Find active rectangles where the y-interval is also overlapping
-            between = np.where(
-                np.logical_and(
-                    ymax[sort_ind_min[next_min]] >= ymin[active],
-                    ymin[sort_ind_min[next_min]] <= ymax[active],
-                )
-            )[0]
-            # For all identified overlaps, add the new pairs
-            for a in between:
-                pairs.append([active[a], sort_ind_min[next_min]])
-            # Add this to the active rectangles, and increase the index
-            active.append(sort_ind_min[next_min])
-            next_min += 1
-        else:
-            # We are leaving a rectangle.
-            active.remove(sort_ind_max[next_max])
-            next_max += 1
-            # Check if we have come to the end
-            if next_max == num_lines:
-                break
-
-    if len(pairs) == 0:
-        return np.empty((2, 0))
-    else:
-        pairs = np.asarray(pairs).T
-        # First sort the pairs themselves
-        pairs.sort(axis=0)
-        # Next, sort the columns so that the first row is non-decreasing
-        sort_ind = np.argsort(pairs[0])
-        pairs = pairs[:, sort_ind]
-        return pairs
-
-
-def _intersect_pairs(p1, p2):
-    """ For two lists containing pair of indices, find the intersection.
-
-    Parameters:
-        p1 (np.array, 2 x n): Each column contains a pair of indices.
-        p2 (np.array, 2 x m): Each column contains a pair of indices.
-
-    Returns:
-        np.array, (2 x k, k <= min(n, m)): Each column contains a pair of
-            indices that are found in both p1 and p2. The array is sorted so
-            that items in the first row is less or equal to the second row.
-            The columns are sorted according to the numbers in the first row.
-
-    """
-    # Special treatment of empty lists
-    if p1.size == 0 or p2.size == 0:
-        return np.empty((2, 0))
-    else:
-        # Do the intersection
-        _, ind = pp.utils.setmembership.ismember_rows(p1, p2)
-        pairs = p2[:, ind]
-
-        # First sort the pairs themselves
-        pairs.sort(axis=0)
-        # Next, sort the columns so that the first row is non-decreasing
-        sort_ind = np.argsort(pairs[0])
-        pairs = pairs[:, sort_ind]
-        return pairs
+    return pp.bounding_box.overlapping_boxes(
+        np.vstack((xmin, ymin)), np.vstack((xmax, ymax))
+    )
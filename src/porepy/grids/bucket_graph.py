@@ -0,0 +1,304 @@
+"""
+Graph structure used to represent the grid hierarchy of a GridBucket.
+
+See documentation of BucketGraph for further details.
+
+"""
+
+
+class BucketGraph(object):
+    """
+    Undirected graph with grids as nodes, and data dictionaries associated
+    with all nodes and edges.
+
+    Nodes and edges are numbered consecutively as they are added to the
+    graph, and the numbers are kept fixed as long as the node or edge
+    exists. Nodes and edges are stored in lists indexed by these numbers,
+    together with an index from grids to node numbers, an index from node
+    pairs to edge numbers, the edges of each node, and the nodes of each
+    dimension. Thus lookup of nodes, edges, their data, and the grids of a
+    given dimension do not require traversal of the graph.
+
+    The iteration orders are the same as for a networkx.Graph, which was
+    previously used to represent the bucket: Nodes are visited in the order
+    they were added. Edges are visited by looping over the nodes, and for each
+    node, its edges to later nodes, in the order the edges were added. The
+    nodes of an edge are given with the earliest node first.
+
+    """
+
+    def __init__(self):
+        # Grid, data and edge numbers of each node. Removed nodes are
+        # represented by None.
+        self._grids = []
+        self._node_data = []
+        self._node_edges = []
+        # Node numbers of the grids
+        self._node_number = {}
+        # Node numbers of the grids of each dimension
+        self._nodes_of_dim = {}
+
+        # Node numbers and data of each edge. Removed edges are represented
+        # by None.
+        self._edges = []
+        self._edge_data = []
+        # Edge numbers of node pairs, with the smallest node number first
+        self._edge_number = {}
+
+    def __iter__(self):
+        """ Iterator over the grids of the graph."""
+        for g in self._grids:
+            if g is not None:
+                yield g
+
+    def __contains__(self, g):
+        return g in self._node_number
+
+    def __len__(self):
+        return len(self._node_number)
+
+    def number_of_nodes(self):
+        return len(self._node_number)
+
+    def number_of_edges(self):
+        return len(self._edge_number)
+
+    # ------------ Nodes
+
+    def add_node(self, g, data=None):
+        """ Add a grid to the graph.
+
+        Parameters:
+            g (pp.Grid): Grid to be added. Should not be present in the graph.
+            data (dict, optional): Data of the node. Defaults to an empty
+                dictionary.
+
+        Returns:
+            int: Number of the new node.
+
+        """
+        number = len(self._grids)
+        self._grids.append(g)
+        self._node_data.append({} if data is None else data)
+        self._node_edges.append([])
+        self._node_number[g] = number
+        self._nodes_of_dim.setdefault(g.dim, []).append(number)
+        return number
+
+    def node_number(self, g):
+        """ Number of the node of a grid.
+
+        Raises:
+            KeyError if the grid is not in the graph.
+
+        """
+        return self._node_number[g]
+
+    def node_data(self, g):
+        """ Data dictionary of the node of a grid.
+
+        Raises:
+            KeyError if the grid is not in the graph.
+
+        """
+        return self._node_data[self._node_number[g]]
+
+    def nodes(self):
+        """ Iterator over the nodes of the graph.
+
+        Yields:
+            pp.Grid: Grid of the node.
+            dict: Data of the node.
+
+        """
+        for g, data in zip(self._grids, self._node_data):
+            if g is not None:
+                yield g, data
+
+    def grids_of_dimension(self, dim):
+        """
+        Returns:
+            list of pp.Grid: The grids of the given dimension, in the order
+                they were added.
+
+        """
+        return [self._grids[n] for n in self._nodes_of_dim.get(dim, [])]
+
+    def dimensions(self):
+        """
+        Returns:
+            list of int: Dimensions of the grids in the graph, sorted.
+
+        """
+        return sorted(dim for dim, nodes in self._nodes_of_dim.items() if nodes)
+
+    def neighbors(self, g):
+        """
+        Returns:
+            list of pp.Grid: Neighbors of a grid, in the order the edges were
+                added.
+
+        """
+        number = self._node_number[g]
+        return [self._grids[self._other(e, number)] for e in self._node_edges[number]]
+
+    def remove_node(self, g):
+        """ Remove the node of a grid, and all its edges.
+
+        Raises:
+            KeyError if the grid is not in the graph.
+
+        """
+        number = self._node_number.pop(g)
+        for e in list(self._node_edges[number]):
+            self._remove_edge(e)
+        self._nodes_of_dim[g.dim].remove(number)
+        self._grids[number] = None
+        self._node_data[number] = None
+        self._node_edges[number] = None
+
+    def relabel(self, mapping):
+        """ Replace grids in the graph. The new grids take over the node
+        numbers, data and edges of the old ones.
+
+        Parameters:
+            mapping (dict): Old grids as keys, new grids as values. Grids
+                not in the mapping are kept.
+
+        """
+        for g_old, g_new in mapping.items():
+            if g_old is g_new:
+                continue
+            number = self._node_number.pop(g_old)
+            self._nodes_of_dim[g_old.dim].remove(number)
+            self._grids[number] = g_new
+            self._node_number[g_new] = number
+            dim_nodes = self._nodes_of_dim.setdefault(g_new.dim, [])
+            dim_nodes.append(number)
+            dim_nodes.sort()
+
+    # ------------ Edges
+
+    def add_edge(self, g0, g1, data=None):
+        """ Add an edge between two grids. Grids not present in the graph
+        are added. The grids may be equal, e.g. to represent periodic
+        boundary conditions.
+
+        Parameters:
+            g0, g1 (pp.Grid): Grids of the edge.
+            data (dict, optional): Data of the edge. Defaults to an empty
+                dictionary.
+
+        Returns:
+            int: Number of the new edge.
+
+        Raises:
+            ValueError if the edge already exists.
+
+        """
+        nodes = []
+        for g in (g0, g1):
+            if g not in self._node_number:
+                self.add_node(g)
+            nodes.append(self._node_number[g])
+        key = (min(nodes), max(nodes))
+        if key in self._edge_number:
+            raise ValueError("Cannot add existing edge")
+
+        number = len(self._edges)
+        self._edges.append(key)
+        self._edge_data.append({} if data is None else data)
+        self._edge_number[key] = number
+        self._node_edges[nodes[0]].append(number)
+        if nodes[1] != nodes[0]:
+            self._node_edges[nodes[1]].append(number)
+        return number
+
+    def edge_number(self, g0, g1):
+        """ Number of the edge between two grids, irrespective of the order
+        of the grids.
+
+        Raises:
+            KeyError if the grids do not form an edge.
+
+        """
+        try:
+            n0 = self._node_number[g0]
+            n1 = self._node_number[g1]
+            return self._edge_number[(min(n0, n1), max(n0, n1))]
+        except KeyError:
+            raise KeyError("Unknown edge")
+
+    def has_edge(self, g0, g1):
+        try:
+            self.edge_number(g0, g1)
+            return True
+        except KeyError:
+            return False
+
+    def edge_data(self, g0, g1):
+        """ Data dictionary of the edge between two grids.
+
+        Raises:
+            KeyError if the grids do not form an edge.
+
+        """
+        return self._edge_data[self.edge_number(g0, g1)]
+
+    def edges(self):
+        """ Iterator over the edges of the graph.
+
+        Yields:
+            tuple of pp.Grid: The grids of the edge.
+            dict: Data of the edge.
+
+        """
+        for number, edges in enumerate(self._node_edges):
+            if edges is None:
+                continue
+            for e in edges:
+                other = self._other(e, number)
+                if other >= number:
+                    yield (self._grids[number], self._grids[other]), self._edge_data[e]
+
+    def edges_of_node(self, g):
+        """ Iterator over the edges of a grid.
+
+        Yields:
+            tuple of pp.Grid: The grids of the edge, with g first.
+            dict: Data of the edge.
+
+        """
+        number = self._node_number[g]
+        for e in self._node_edges[number]:
+            yield (g, self._grids[self._other(e, number)]), self._edge_data[e]
+
+    def _other(self, edge, node):
+        n0, n1 = self._edges[edge]
+        return n1 if n0 == node else n0
+
+    def _remove_edge(self, edge):
+        key = self._edges[edge]
+        del self._edge_number[key]
+        for node in set(key):
+            self._node_edges[node].remove(edge)
+        self._edges[edge] = None
+        self._edge_data[edge] = None
+
+    # ------------ Copy
+
+    def copy(self):
+        """ Copy the graph. The grids are shared, while the data dictionaries
+        are shallow copies. Nodes and edges are renumbered consecutively,
+        keeping the order.
+
+        Returns:
+            BucketGraph: The copy.
+
+        """
+        new = BucketGraph()
+        for g, data in self.nodes():
+            new.add_node(g, data.copy())
+        for (g0, g1), data in self.edges():
+            new.add_edge(g0, g1, data.copy())
+        return new
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import heapq
 import numpy as np
 import scipy.sparse as sps
 import scipy.stats as stats
@@ -8,7 +9,7 @@ import porepy as pp
 from porepy.grids import grid, grid_bucket
 
 
-from porepy.utils import matrix_compression, mcolon, accumarray, setmembership
+from porepy.utils import matrix_compression, mcolon
 from porepy.utils import half_space, tags
 
 
@@ -336,7 +337,7 @@ def generate_seeds(gb):
         cells = np.unique(cells[index])
 
         # recover the mapping between the slave and the master grid
-        mg = gb.graph.adj[g][g_h]["mortar_grid"]
+        mg = gb.edge_props((g, g_h), "mortar_grid")
         m2m = mg.master_to_mortar_int()
         l2m = mg.slave_to_mortar_int()
         # this is the old face_cells mapping
@@ -514,68 +515,76 @@ def create_partition(A, seeds=None, **kwargs):
         return np.zeros(1)
     Nc = A.shape[0]
 
-    # For each node, which other nodes are strongly connected to it
-    ST = sps.lil_matrix((Nc, Nc), dtype=np.bool)
-
-    # In the first instance, all cells are strongly connected to each other
+    # For each node, which other nodes are strongly connected to it. The
+    # connections are found from the negative off-diagonal entries of each
+    # row, compared to the largest negative entry of the row.
     At = A.T
+    node = np.repeat(np.arange(Nc), np.diff(At.indptr))
+    neg = At.data < 0.0
+    max_neg = np.zeros(Nc)
+    np.maximum.at(max_neg, node[neg], -At.data[neg])
+    strong = np.logical_and(neg, -At.data >= epsilon * max_neg[node])
+    ST = sps.csr_matrix(
+        (np.ones(np.sum(strong), dtype=np.bool), (At.indices[strong], node[strong])),
+        shape=(Nc, Nc),
+    )
 
-    for i in np.arange(Nc):
-        loc = slice(At.indptr[i], At.indptr[i + 1])
-        ci, vals = At.indices[loc], At.data[loc]
-        neg = vals < 0.0
-        nvals = vals[neg]
-        nci = ci[neg]
-        minId = np.argmin(nvals)
-        ind = -nvals >= epsilon * np.abs(nvals[minId])
-        ST[nci[ind], i] = True
-
-    # Temporary field, will store connections of depth 1
+    # Expand the connections: Each pass adds the connections of the connected
+    # nodes, as given by the square of the connection matrix.
     for _ in np.arange(2, cdepth + 1):
-        STold = ST.copy()
-        for j in np.arange(Nc):
-            rowj = np.array(STold.rows[j])
-            if rowj.size == 0:
-                continue
-            row = np.hstack([STold.rows[r] for r in rowj])
-            ST[j, np.concatenate((rowj, row))] = True
+        ST = ST + ST * ST
 
-    del STold
-
-    ST.setdiag(False)
-    lmbda = np.array([len(s) for s in ST.rows])
+    # Remove the diagonal
+    ST = ST.tocoo()
+    not_diag = ST.row != ST.col
+    ST = sps.csr_matrix(
+        (ST.data[not_diag], (ST.row[not_diag], ST.col[not_diag])), shape=(Nc, Nc)
+    )
+    lmbda = np.diff(ST.indptr)
 
-    # Define coarse nodes
-    candidate = np.ones(Nc, dtype=np.bool)
-    is_fine = np.zeros(Nc, dtype=np.bool)
+    # Define coarse nodes. Cells that are not important for any other cells
+    # are on the fine scale.
+    candidate = lmbda > 0
+    is_fine = np.logical_not(candidate)
     is_coarse = np.zeros(Nc, dtype=np.bool)
 
-    # cells that are not important for any other cells are on the fine scale.
-    for row_id, row in enumerate(ST.rows):
-        if not row:
-            is_fine[row_id] = True
-            candidate[row_id] = False
-
-    ST = ST.tocsr()
+    # The candidate with the highest importance, the first one in case of
+    # ties, is the next coarse node. The candidates are kept in a heap
+    # ordered by importance and index; entries that are outdated, since the
+    # importance of the node is updated or the node is no longer a
+    # candidate, are skipped.
+    heap = list(zip((-lmbda[candidate]).tolist(), np.where(candidate)[0].tolist()))
+    heapq.heapify(heap)
     it = 0
-    while np.any(candidate):
-        i = np.argmax(lmbda)
+    while heap:
+        neg_lmbda, i = heapq.heappop(heap)
+        if not candidate[i] or lmbda[i] != -neg_lmbda:
+            continue
+
         is_coarse[i] = True
         j = ST.indices[ST.indptr[i] : ST.indptr[i + 1]]
         jf = j[candidate[j]]
         is_fine[jf] = True
         candidate[np.r_[i, jf]] = False
-        loop = ST.indices[mcolon.mcolon(ST.indptr[jf], ST.indptr[jf + 1])]
-        for row in np.unique(loop):
-            s = ST.indices[ST.indptr[row] : ST.indptr[row + 1]]
-            lmbda[row] = s[candidate[s]].size + 2 * s[is_fine[s]].size
-        lmbda[np.logical_not(candidate)] = -1
+
+        # Update the importance of the candidates connected to the new fine
+        # nodes
+        rows = np.unique(ST.indices[mcolon.mcolon(ST.indptr[jf], ST.indptr[jf + 1])])
+        rows = rows[candidate[rows]]
+        num = ST.indptr[rows + 1] - ST.indptr[rows]
+        s = ST.indices[mcolon.mcolon(ST.indptr[rows], ST.indptr[rows + 1])]
+        weight = candidate[s].astype(np.int) + 2 * is_fine[s]
+        lmbda[rows] = np.bincount(
+            np.repeat(np.arange(rows.size), num), weights=weight, minlength=rows.size
+        ).astype(np.int)
+        for r, lr in zip(rows.tolist(), lmbda[rows].tolist()):
+            heapq.heappush(heap, (-lr, r))
         it = it + 1
 
         # Something went wrong during aggregation
         assert it <= Nc
 
-    del lmbda, ST
+    del lmbda, ST, heap
 
     if seeds is not None:
         is_coarse[seeds] = True
@@ -585,99 +594,119 @@ def create_partition(A, seeds=None, **kwargs):
     # seeds
     c2c = np.abs(A) > 0
     c2c_rows, _, _ = sps.find(c2c)
+    c2c_cols = np.repeat(np.arange(Nc), np.diff(c2c.indptr))
 
-    pairs = np.empty((0, 2), dtype=np.int)
-    for idx, it in enumerate(np.where(is_coarse)[0]):
-        loc = slice(c2c.indptr[it], c2c.indptr[it + 1])
-        ind = np.setdiff1d(c2c_rows[loc], it)
-        cind = ind[is_coarse[ind]]
-        new_pair = np.stack((np.repeat(it, cind.size), cind), axis=-1)
-        pairs = np.append(pairs, new_pair, axis=0)
+    coarse = np.where(is_coarse)[0]
+    pairs = np.vstack(
+        (
+            c2c_cols[mcolon.mcolon(c2c.indptr[coarse], c2c.indptr[coarse + 1])],
+            c2c_rows[mcolon.mcolon(c2c.indptr[coarse], c2c.indptr[coarse + 1])],
+        )
+    )
+    pairs = pairs[:, np.logical_and(pairs[0] != pairs[1], is_coarse[pairs[1]])]
 
-    # Remove one of the neighbors cells
+    # Remove one of the neighbors cells, the one with the smallest diagonal
+    # value, or the other one if this is a seed
     if pairs.size:
-        pairs = setmembership.unique_rows(np.sort(pairs, axis=1))[0]
-        for ij in pairs:
-            A_val = np.array(A[ij, ij]).ravel()
-            ids = ij[np.argsort(A_val)]
-            ids = np.setdiff1d(ids, seeds, assume_unique=True)
-            if ids.size:
-                is_coarse[ids[0]] = False
-                is_fine[ids[0]] = True
+        is_seed = np.zeros(Nc, dtype=np.bool)
+        if seeds is not None:
+            is_seed[seeds] = True
+        pairs = np.sort(pairs, axis=0)
+        A_val = A.diagonal()
+        swap = A_val[pairs[1]] < A_val[pairs[0]]
+        pairs[:, swap] = pairs[::-1, swap]
+        ids = np.where(is_seed[pairs[0]], pairs[1], pairs[0])
+        ids = ids[np.logical_not(is_seed[ids])]
+        is_coarse[ids] = False
+        is_fine[ids] = True
 
     coarse = np.where(is_coarse)[0]
 
     # Primal grid
     NC = coarse.size
-    primal = sps.lil_matrix((NC, Nc), dtype=np.bool)
-    primal[np.arange(NC), coarse[np.arange(NC)]] = True
-
-    connection = sps.lil_matrix((Nc, Nc), dtype=np.double)
-    for it in np.arange(Nc):
-        n = np.setdiff1d(c2c_rows[c2c.indptr[it] : c2c.indptr[it + 1]], it)
-        loc = slice(A.indptr[it], A.indptr[it + 1])
-        A_idx, A_row = A.indices[loc], A.data[loc]
-        mask = A_idx != it
-        connection[it, n] = np.abs(A_row[mask] / A_row[np.logical_not(mask)])
-
-    connection = connection.tocsr()
-
-    candidates_rep = np.ediff1d(connection.indptr)
-    candidates_idx = np.repeat(is_coarse, candidates_rep)
-    candidates = np.stack(
-        (
-            connection.indices[candidates_idx],
-            np.repeat(np.arange(NC), candidates_rep[is_coarse]),
-        ),
-        axis=-1,
-    )
 
-    connection_idx = mcolon.mcolon(
-        connection.indptr[coarse], connection.indptr[coarse + 1]
+    # Strength of the connections between neighboring cells, relative to the
+    # diagonal
+    n_rows, n_cols = c2c_cols, c2c_rows
+    mask = n_rows != n_cols
+    n_rows, n_cols = n_rows[mask], n_cols[mask]
+    order = np.lexsort((n_cols, n_rows))
+    n_rows, n_cols = n_rows[order], n_cols[order]
+    unique = np.ones(n_rows.size, dtype=np.bool)
+    unique[1:] = np.logical_or(n_rows[1:] != n_rows[:-1], n_cols[1:] != n_cols[:-1])
+    n_rows, n_cols = n_rows[unique], n_cols[unique]
+
+    A_rows = np.repeat(np.arange(Nc), np.diff(A.indptr))
+    mask = A.indices != A_rows
+    A_diag = np.zeros(Nc)
+    A_diag[A_rows[np.logical_not(mask)]] = A.data[np.logical_not(mask)]
+    assert np.array_equal(
+        np.bincount(n_rows, minlength=Nc), np.bincount(A_rows[mask], minlength=Nc)
     )
-    vals = sps.csr_matrix(
-        accumarray.accum(candidates, connection.data[connection_idx], size=[Nc, NC])
+    connection = sps.csr_matrix(
+        (np.abs(A.data[mask] / A_diag[A_rows[mask]]), (n_rows, n_cols)), shape=(Nc, Nc),
     )
-    del candidates_rep, candidates_idx, connection_idx
+
+    # Grow the coarse cells by processing the strongest connection globally:
+    # The fine cell with the strongest connection to a coarse cell is added to
+    # it, and its connections to its neighbors, weighted by its own strength,
+    # are added to the strength of the connections between the neighbors and
+    # the coarse cell. The strongest connection, the first coarse cell and
+    # cell in case of ties, is found with a heap of the connections, where
+    # outdated entries are skipped.
+    strength = {}
+    heap = []
+    for c, ci in enumerate(coarse):
+        loc = slice(connection.indptr[ci], connection.indptr[ci + 1])
+        for r, v in zip(
+            connection.indices[loc].tolist(), connection.data[loc].tolist()
+        ):
+            strength[(r, c)] = v
+            heap.append((-v, c, r))
+    heapq.heapify(heap)
+
+    primal_coarse = list(range(NC))
+    primal_fine = coarse.tolist()
 
     it = NC
     not_found = np.logical_not(is_coarse)
-    # Process the strongest connection globally
-    while np.any(not_found):
-
-        np.argmax(vals.data)
-        vals.argmax(axis=0)
-        mcind = np.atleast_1d(np.squeeze(np.asarray(vals.argmax(axis=0))))
-        mcval = -np.inf * np.ones(mcind.size)
-        for c, r in enumerate(mcind):
-            loc = slice(vals.indptr[r], vals.indptr[r + 1])
-            vals_idx, vals_data = vals.indices[loc], vals.data[loc]
-            mask = vals_idx == c
-            if vals_idx.size == 0 or not np.any(mask):
-                continue
-            mcval[c] = vals_data[mask]
-
-        mi = np.argmax(mcval)
-        nadd = mcind[mi]
+    is_added = np.zeros(Nc, dtype=np.bool)
+    num_not_found = np.sum(not_found)
+    while num_not_found > 0:
+        # The strongest valid connection. If no connections are left, the
+        # remaining cells cannot be reached from any coarse cell.
+        while heap:
+            neg_val, mi, nadd = heapq.heappop(heap)
+            if not is_added[nadd] and strength[(nadd, mi)] == -neg_val:
+                break
+        else:
+            break
 
-        primal[mi, nadd] = True
+        primal_coarse.append(mi)
+        primal_fine.append(nadd)
         it = it + 1
         if it > Nc + 5:
             break
 
-        not_found[nadd] = False
-        vals.data[vals.indptr[nadd] : vals.indptr[nadd + 1]] = 0
+        if not_found[nadd]:
+            not_found[nadd] = False
+            num_not_found -= 1
+        is_added[nadd] = True
 
         loc = slice(connection.indptr[nadd], connection.indptr[nadd + 1])
         nc = connection.indices[loc]
         af = not_found[nc]
-        nc = nc[af]
-        nv = mcval[mi] * connection[nadd, :]
-        nv = nv.data[af]
-        if len(nc) > 0:
-            vals += sps.csr_matrix((nv, (nc, np.repeat(mi, len(nc)))), shape=(Nc, NC))
-
-    coarse, fine = primal.tocsr().nonzero()
+        nv = -neg_val * connection.data[loc][af]
+        for r, v in zip(nc[af].tolist(), nv.tolist()):
+            val = strength.get((r, mi), 0) + v
+            strength[(r, mi)] = val
+            heapq.heappush(heap, (-val, mi, r))
+
+    primal = sps.csr_matrix(
+        (np.ones(len(primal_fine), dtype=np.bool), (primal_coarse, primal_fine)),
+        shape=(NC, Nc),
+    )
+    coarse, fine = primal.nonzero()
     return coarse[np.argsort(fine)]
 
 
@@ -2,18 +2,23 @@
 
 import numpy as np
 import os
+import logging
 
-# meshio has changed the name of the module taking care of gmsh import.
-# Ensure compatibility with both versions with a try-except
+# The gmsh Python API is used to run gmsh in-process, if it is installed.
+# Otherwise, the gmsh executable is run, and the mesh is read from file. The
+# import raises an OSError if the gmsh package is installed, but the gmsh
+# library cannot be loaded.
 try:
-    # This will work for meshio.__version__ < 2.3.5
-    from meshio import gmsh_io
-except:
-    from meshio import msh_io as gmsh_io
+    import gmsh
+except (ImportError, OSError):
+    gmsh = None
 
 from porepy.utils import sort_points, read_config
+from porepy.grids.gmsh import msh_reader
 import porepy.grids.constants as gridding_constants
 
+logger = logging.getLogger(__name__)
+
 
 class GmshWriter(object):
     """
@@ -619,3 +624,182 @@ def run_gmsh(in_file, out_file, dims, **kwargs):
     status = os.system(cmd)
 
     return status
+
+
+def generate_mesh(in_file, out_file, dims, num_threads=None, use_api=None, **kwargs):
+    """
+    Run gmsh on a .geo file, and return the mesh as arrays.
+
+    If the gmsh Python API is available, gmsh is run in-process, and the mesh
+    is taken directly from gmsh as arrays, without writing the .msh file.
+    Otherwise, the gmsh executable is run by run_gmsh(), and the .msh file is
+    read by read_mesh_file().
+
+    Parameters:
+        in_file (str): Name of gmsh configuration file (.geo)
+        out_file (str): Name of output file for gmsh (.msh). Only used if
+            the gmsh executable is run.
+        dims (int): Number of dimensions gmsh should grid, see run_gmsh().
+        num_threads (int, optional): Number of threads used by gmsh. Defaults
+            to None, in which case the gmsh default is used.
+        use_api (boolean, optional): Whether to use the gmsh Python API.
+            Defaults to None, in which case the API is used if it is
+            available, and the options in kwargs can be translated.
+        **kwargs: Command line options passed on to gmsh. See gmsh
+            documentation for possible values.
+
+    Returns:
+        np.ndarray (num_pts x 3): Coordinates of the mesh nodes.
+        dict: For each cell type (e.g. 'triangle'), the cell-node relation,
+            as an array with one row per cell.
+        dict: For each cell type, a dictionary with the physical
+            ('gmsh:physical') and elementary ('gmsh:geometrical') tags of the
+            cells.
+        dict: Map from physical tags to physical names.
+
+    Raises:
+        RuntimeError if gmsh fails.
+        ImportError if use_api is True, and the gmsh Python API is not
+            available.
+
+    """
+    use_api = use_gmsh_api(use_api, **kwargs)
+    if use_api:
+        if gmsh is None:
+            raise ImportError("The gmsh Python API is not available")
+        return _generate_mesh_api(in_file, dims, num_threads, **kwargs)
+
+    if num_threads is not None:
+        kwargs["-nt"] = num_threads
+    status = run_gmsh(in_file, out_file, dims, **kwargs)
+    if status != 0:
+        raise RuntimeError("Gmsh failed with status " + str(status))
+    return read_mesh_file(out_file)
+
+
+def read_mesh_file(file_name):
+    """
+    Read a gmsh .msh file, see msh_reader.read().
+
+    Parameters:
+        file_name (str): Name of the file.
+
+    Returns:
+        The mesh in the same format as generate_mesh().
+
+    """
+    return msh_reader.read(file_name)
+
+
+def use_gmsh_api(use_api=None, **kwargs):
+    """ Decide whether generate_mesh() runs gmsh through the Python API.
+
+    Parameters:
+        use_api (boolean, optional): Whether to use the gmsh Python API. If
+            None (default), the API is used if it is available, and the
+            options in kwargs can be translated.
+        **kwargs: Command line options passed on to gmsh.
+
+    Returns:
+        boolean: True if the Python API is used, False if the gmsh executable
+            is run.
+
+    """
+    if use_api is None:
+        return gmsh is not None and all(
+            key.lstrip("-") in _API_OPTIONS for key in kwargs
+        )
+    return bool(use_api)
+
+
+# Gmsh options corresponding to the supported command line options
+_API_OPTIONS = {
+    "v": "General.Verbosity",
+    "nt": "General.NumThreads",
+    "clmin": "Mesh.CharacteristicLengthMin",
+    "clmax": "Mesh.CharacteristicLengthMax",
+    "clscale": "Mesh.CharacteristicLengthFactor",
+    "order": "Mesh.ElementOrder",
+}
+
+
+def _generate_mesh_api(in_file, dims, num_threads=None, **kwargs):
+    """ Run gmsh through the Python API, see generate_mesh().
+
+    As in the .msh files written by gmsh, only elements that belong to a
+    physical group are returned, and elements that belong to several groups
+    are repeated.
+    """
+    if not os.path.isfile(in_file):
+        raise FileNotFoundError("file " + in_file + " not found")
+
+    options = {}
+    for key, val in kwargs.items():
+        if key.lstrip("-") not in _API_OPTIONS:
+            raise ValueError("Gmsh option " + key + " is not supported by the API")
+        options[_API_OPTIONS[key.lstrip("-")]] = float(val)
+    if num_threads is not None:
+        options["General.NumThreads"] = num_threads
+        for d in range(1, 4):
+            options["Mesh.MaxNumThreads" + str(d)] = num_threads
+
+    # Do not disturb a gmsh session of the caller
+    initialized = getattr(gmsh, "isInitialized", lambda: False)()
+    if not initialized:
+        gmsh.initialize()
+    try:
+        for name, val in options.items():
+            gmsh.option.setNumber(name, val)
+        gmsh.open(in_file)
+        gmsh.model.mesh.generate(dims)
+
+        # Order the nodes by their tags, as in .msh files
+        node_tags, coord, _ = gmsh.model.mesh.getNodes()
+        node_tags = np.asarray(node_tags, dtype=np.int)
+        node_order = np.argsort(node_tags)
+        node_tags = node_tags[node_order]
+        pts = np.asarray(coord, dtype=np.float).reshape((-1, 3))[node_order]
+
+        phys_names = {}
+        elements = {}
+        for dim, phys_tag in gmsh.model.getPhysicalGroups():
+            phys_names[phys_tag] = gmsh.model.getPhysicalName(dim, phys_tag)
+            for entity in gmsh.model.getEntitiesForPhysicalGroup(dim, phys_tag):
+                types, elem_tags, elem_nodes = gmsh.model.mesh.getElements(dim, entity)
+                for t, et, en in zip(types, elem_tags, elem_nodes):
+                    if t not in msh_reader.ELEMENT_TYPES:
+                        continue
+                    name, num_nodes = msh_reader.ELEMENT_TYPES[t]
+                    en = np.asarray(en, dtype=np.int)
+                    # Map node tags to indices in pts
+                    ind = np.searchsorted(node_tags, en)
+                    elements.setdefault(name, []).append(
+                        (
+                            np.asarray(et, dtype=np.int),
+                            ind.reshape((-1, num_nodes)),
+                            phys_tag * np.ones(len(et), dtype=np.int),
+                            entity * np.ones(len(et), dtype=np.int),
+                        )
+                    )
+    except Exception as exc:
+        # The API signals errors by plain exceptions
+        raise RuntimeError("Gmsh failed: " + str(exc)) from exc
+    finally:
+        if initialized:
+            gmsh.model.remove()
+        else:
+            gmsh.finalize()
+
+    # Order the cells of each type by their element number, as in .msh files
+    cells = {}
+    cell_info = {}
+    for name, blocks in elements.items():
+        elem_tags, conn, phys, geom = (np.concatenate(b) for b in zip(*blocks))
+        order = np.argsort(elem_tags, kind="mergesort")
+        cells[name] = conn[order]
+        cell_info[name] = {
+            "gmsh:physical": phys[order],
+            "gmsh:geometrical": geom[order],
+        }
+    logger.info("Gmsh API created mesh with " + str(pts.shape[0]) + " nodes")
+    return pts, cells, cell_info, phys_names
@@ -2,11 +2,14 @@
 Module for converting gmsh output file to our grid structure.
 Maybe we will add the reverse mapping.
 """
+import concurrent.futures
+
 import numpy as np
 
 import porepy as pp
 from porepy.grids import simplex, structured, point_grid
 from porepy.grids import constants
+from porepy.utils.mcolon import mcolon
 
 
 def create_3d_grids(pts, cells):
@@ -47,13 +50,18 @@ def create_2d_grids(pts, cells, **kwargs):
 
         # Recover cells on fracture surfaces, and create grids
         tri_cells = cells["triangle"]
+        tri_tags = cell_info["triangle"]["gmsh:physical"]
+
+        # Group the triangles by their physical tag. The stable sort keeps the
+        # ordering of the triangles within each group.
+        tri_order = np.argsort(tri_tags, kind="mergesort")
+        phys_name_ind_tri, tag_start = np.unique(tri_tags[tri_order], return_index=True)
+        tag_end = np.append(tag_start[1:], tri_tags.size)
 
         # Map from split polygons and fractures, as defined by the network
         # decomposition
         poly_2_frac = network.decomposition["polygon_frac"]
 
-        phys_name_ind_tri = np.unique(cell_info["triangle"]["gmsh:physical"])
-
         # Index of the physical name tag assigned by gmsh to each fracture
         gmsh_num = np.zeros(phys_name_ind_tri.size, dtype="int")
         # Index of the corresponding name used in the input to gmsh (on the
@@ -66,6 +74,16 @@ def create_2d_grids(pts, cells, **kwargs):
             frac_num[i] = poly_2_frac[int(pn[offset + 1 :])]
             gmsh_num[i] = pn_ind
 
+        # Group the physical tags by fracture
+        frac_order = np.argsort(frac_num, kind="mergesort")
+        sorted_frac_num = frac_num[frac_order]
+
+        # Nodes and triangles of the fracture grids, and their fracture ids
+        grid_nodes = []
+        grid_tri = []
+        grid_pind = []
+        grid_frac = []
+
         # Counter for boundary and auxiliary planes
         count_bound_and_aux = 0
         for fi in np.unique(frac_num):
@@ -83,32 +101,35 @@ def create_2d_grids(pts, cells, **kwargs):
                 count_bound_and_aux += 1
                 continue
 
-            loc_num = np.where(frac_num == fi - count_bound_and_aux)[0]
-            loc_gmsh_num = gmsh_num[loc_num]
-
-            loc_tri_glob_ind = np.empty((0, 3))
-            for ti in loc_gmsh_num:
-                # It seems the gmsh numbering corresponding to the physical tags
-                # (as found in physnames) is stored in the first column of info
-                gmsh_ind = np.where(cell_info["triangle"]["gmsh:physical"] == ti)[0]
-                loc_tri_glob_ind = np.vstack((loc_tri_glob_ind, tri_cells[gmsh_ind, :]))
+            lo, hi = np.searchsorted(
+                sorted_frac_num,
+                [fi - count_bound_and_aux, fi - count_bound_and_aux + 1],
+            )
+            loc_num = frac_order[lo:hi]
 
-            loc_tri_glob_ind = loc_tri_glob_ind.astype("int")
+            # The triangles of all physical tags of this fracture, found as
+            # contiguous slices of the grouped triangles.
+            loc_tri_glob_ind = tri_cells[
+                tri_order[mcolon(tag_start[loc_num], tag_end[loc_num])]
+            ].astype("int")
             pind_loc, p_map = np.unique(loc_tri_glob_ind, return_inverse=True)
             loc_tri_ind = p_map.reshape((-1, 3))
-            g = simplex.TriangleGrid(
-                pts[pind_loc, :].transpose(), loc_tri_ind.transpose()
-            )
-            # Add mapping to global point numbers
-            g.global_point_ind = pind_loc
 
+            grid_nodes.append(pts[pind_loc, :].transpose())
+            grid_tri.append(loc_tri_ind.transpose())
+            grid_pind.append(pind_loc)
             # Associate a fracture id (corresponding to the ordering of the
             # frature planes in the original fracture list provided by the
             # user)
-            g.frac_num = fi - count_bound_and_aux
+            grid_frac.append(fi - count_bound_and_aux)
 
-            # Append to list of 2d grids
-            g_2d.append(g)
+        g_2d = _map(
+            simplex.TriangleGrid, grid_nodes, grid_tri, kwargs.get("num_workers")
+        )
+        for g, pind_loc, fi in zip(g_2d, grid_pind, grid_frac):
+            # Add mapping to global point numbers
+            g.global_point_ind = pind_loc
+            g.frac_num = fi
 
     else:
 
@@ -127,43 +148,16 @@ def create_2d_grids(pts, cells, **kwargs):
             g_2d.tags[tag_name] = np.zeros(g_2d.num_faces, dtype=np.bool)
 
         # since there is not a cell-face relation from gmsh but only a cell-node
-        # relation we need to recover the corresponding face.
-        for tag_id, tag in enumerate(cell_info["line"]["gmsh:physical"]):
+        # relation we need to recover the corresponding face. This is done by
+        # matching the nodes of the lines with the nodes of all faces at once.
+        line_tags = cell_info["line"]["gmsh:physical"]
+        face_nodes = g_2d.face_nodes.indices.reshape((-1, 2)).T
+        is_face, face = pp.utils.setmembership.ismember_rows(
+            cells["line"].T.astype(np.int), face_nodes
+        )
+        for tag in np.unique(line_tags):
             tag_name = phys_names[tag].lower() + "_faces"
-            # check where is the first node indipendent on the position
-            # in the triangle, being first, second or third node
-            first = (triangles == cells["line"][tag_id, 0]).any(axis=0)
-            # check where is the second node, same approach as before
-            second = (triangles == cells["line"][tag_id, 1]).any(axis=0)
-            # select which are the cells that have this edge
-            tria = np.logical_and(first, second).astype(np.int)
-            # with the cell_faces map we get the faces associated to
-            # the selected triangles
-            face = np.abs(g_2d.cell_faces).dot(tria)
-            # we have two case, the face is internal or is at the boundary
-            # we consider them separately
-            if np.any(face > 1):
-                # select the face if it is internal
-                g_2d.tags[tag_name][face > 1] = True
-            else:
-                # the face is on a boundary
-                face = np.logical_and(face, g_2d.tags["domain_boundary_faces"])
-                if np.sum(face) == 2:
-                    # the triangle has two faces at the boundary, check if it
-                    # is the first otherwise it is the other.
-                    face_id = np.where(face)[0]
-
-                    first_face = np.zeros(face.size, dtype=np.bool)
-                    first_face[face_id[0]] = True
-
-                    nodes = g_2d.face_nodes.dot(first_face)
-                    # check if the nodes of the first face are the same
-                    if np.all(nodes[cells["line"][tag_id, :]]):
-                        face[face_id[1]] = False
-                    else:
-                        face[face_id[0]] = False
-
-                g_2d.tags[tag_name][face] = True
+            g_2d.tags[tag_name][face[line_tags[is_face] == tag]] = True
 
         # Create mapping to global numbering (will be a unit mapping, but is
         # crucial for consistency with lower dimensions)
@@ -204,15 +198,24 @@ def create_1d_grids(
     line_cells = cells["line"]
 
     gmsh_tip_num = []
-    tip_pts = np.empty(0)
+    tip_pts = []
+
+    # Group the lines by their physical tag
+    line_order = np.argsort(line_tags, kind="mergesort")
+    unique_tags, tag_start = np.unique(line_tags[line_order], return_index=True)
+    tag_end = np.append(tag_start[1:], line_tags.size)
+
+    # Coordinates and points of the line grids, and their fracture ids
+    grid_coord = []
+    grid_pts = []
+    grid_frac = []
 
-    for i, pn_ind in enumerate(np.unique(line_tags)):
+    for i, pn_ind in enumerate(unique_tags):
         # Index of the final underscore in the physical name. Chars before this
         # will identify the line type, the one after will give index
         pn = phys_names[pn_ind]
         offset_index = pn.rfind("_")
-        loc_line_cell_num = np.where(line_tags == pn_ind)[0]
-        loc_line_pts = line_cells[loc_line_cell_num, :]
+        loc_line_pts = line_cells[line_order[tag_start[i] : tag_end[i]], :]
 
         assert loc_line_pts.size > 1
 
@@ -223,18 +226,28 @@ def create_1d_grids(
 
             # We need not know which fracture the line is on the tip of (do
             # we?)
-            tip_pts = np.append(tip_pts, np.unique(loc_line_pts))
+            tip_pts.append(np.unique(loc_line_pts))
 
         elif line_type == line_tag[:-1]:
             loc_pts_1d = np.unique(loc_line_pts)  # .flatten()
-            loc_coord = pts[loc_pts_1d, :].transpose()
-            g = create_embedded_line_grid(loc_coord, loc_pts_1d, tol=tol)
-            frac_num = pn[offset_index + 1 :]
-            g.frac_num = int(frac_num)
-            g_1d.append(g)
+            grid_coord.append(pts[loc_pts_1d, :].transpose())
+            grid_pts.append(loc_pts_1d)
+            grid_frac.append(int(pn[offset_index + 1 :]))
 
         else:  # Auxiliary line
             pass
+
+    g_1d = _map(
+        create_embedded_line_grid,
+        grid_coord,
+        grid_pts,
+        kwargs.get("num_workers"),
+        tol=tol,
+    )
+    for g, frac_num in zip(g_1d, grid_frac):
+        g.frac_num = frac_num
+
+    tip_pts = np.hstack(tip_pts).astype(np.float) if tip_pts else np.empty(0)
     return g_1d, tip_pts
 
 
@@ -256,9 +269,12 @@ def create_0d_grids(pts, cells):
 
 def create_embedded_line_grid(loc_coord, glob_id, tol=1e-4):
     loc_center = np.mean(loc_coord, axis=1).reshape((-1, 1))
-    sorted_coord, rot, active_dimension, sort_ind = pp.map_geometry.project_points_to_line(
-        loc_coord, tol
-    )
+    (
+        sorted_coord,
+        rot,
+        active_dimension,
+        sort_ind,
+    ) = pp.map_geometry.project_points_to_line(loc_coord, tol)
     g = structured.TensorGrid(sorted_coord)
 
     # Project back to active dimension
@@ -275,3 +291,39 @@ def create_embedded_line_grid(loc_coord, glob_id, tol=1e-4):
     # Add mapping to global point numbers
     g.global_point_ind = glob_id[sort_ind]
     return g
+
+
+def _map(func, first, second, num_workers=None, **kwargs):
+    """ Apply a grid constructor to pairs of arguments, optionally in a pool of
+    worker processes.
+
+    Parameters:
+        func: Function to be called as func(first[i], second[i], **kwargs).
+            Must be defined at module level, so that it can be used by the
+            worker processes.
+        first, second (list): Arguments to func.
+        num_workers (int, optional): Number of worker processes. If None
+            (default) or 1, the grids are constructed in this process.
+
+    Returns:
+        list: Return values of func, in the order of the arguments.
+
+    """
+    if num_workers is None or num_workers < 2 or len(first) < 2:
+        return [func(a, b, **kwargs) for a, b in zip(first, second)]
+
+    # Send the arguments in batches, to limit the communication overhead for
+    # many small grids.
+    chunksize = max(1, len(first) // (4 * num_workers))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as pool:
+        futures = [
+            pool.submit(
+                _map,
+                func,
+                first[i : i + chunksize],
+                second[i : i + chunksize],
+                **kwargs
+            )
+            for i in range(0, len(first), chunksize)
+        ]
+        return [g for fut in futures for g in fut.result()]
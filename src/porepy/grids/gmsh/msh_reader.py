@@ -0,0 +1,428 @@
+"""
+Reader for mesh files in the gmsh .msh format, versions 2.2, 4.0 and 4.1, in
+ASCII and binary mode.
+
+The nodes, elements and physical tags are parsed directly into numpy arrays.
+Binary data is read into preallocated arrays, while ASCII data is parsed in
+chunks of lines, so that the memory needed is not much larger than that of
+the final mesh. The mesh is returned in the format used by mesh_2_grid, see
+read().
+
+Only the information needed to construct grids is read: Nodes, elements,
+physical names, and the physical tags of the entities. Other sections (node
+and element data, periodicity etc.) are skipped.
+
+The file format is documented in
+    http://gmsh.info/doc/texinfo/gmsh.html#File-formats
+
+"""
+import itertools
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Names and number of nodes of the gmsh element types. The names are the same
+# as those used by meshio.
+ELEMENT_TYPES = {
+    1: ("line", 2),
+    2: ("triangle", 3),
+    3: ("quad", 4),
+    4: ("tetra", 4),
+    5: ("hexahedron", 8),
+    6: ("wedge", 6),
+    7: ("pyramid", 5),
+    8: ("line3", 3),
+    9: ("triangle6", 6),
+    10: ("quad9", 9),
+    11: ("tetra10", 10),
+    12: ("hexahedron27", 27),
+    13: ("wedge18", 18),
+    14: ("pyramid14", 14),
+    15: ("vertex", 1),
+    16: ("quad8", 8),
+    17: ("hexahedron20", 20),
+    21: ("triangle10", 10),
+    26: ("line4", 4),
+    29: ("tetra20", 20),
+    36: ("quad16", 16),
+}
+
+# Number of lines parsed at a time in ASCII files
+CHUNK_SIZE = 2 ** 18
+
+
+def read(file_name, chunk_size=CHUNK_SIZE):
+    """
+    Read a gmsh .msh file.
+
+    Elements that belong to several physical groups are repeated, once for
+    each group, as in the files written by gmsh in the 2.2 format. Elements
+    without a physical group are given the physical tag 0.
+
+    Parameters:
+        file_name (str): Name of the file.
+        chunk_size (int, optional): Number of lines parsed at a time in ASCII
+            files.
+
+    Returns:
+        np.ndarray (num_pts x 3): Coordinates of the mesh nodes, in the order
+            of the file.
+        dict: For each cell type (e.g. 'triangle'), the cell-node relation,
+            as an array with one row per cell. The nodes are given as indices
+            in the array of coordinates.
+        dict: For each cell type, a dictionary with the physical
+            ('gmsh:physical') and elementary ('gmsh:geometrical') tags of the
+            cells.
+        dict: Map from physical tags to physical names.
+
+    Raises:
+        ValueError if the file is not a valid .msh file, or if the format
+            version or an element type is not supported.
+
+    """
+    with open(file_name, "rb") as f:
+        reader = _MshReader(f, chunk_size)
+        reader.read()
+
+    cells = {}
+    cell_info = {}
+    for name, blocks in reader.elements.items():
+        conn, phys, geom = (np.concatenate(b) for b in zip(*blocks))
+        cells[name] = conn
+        cell_info[name] = {"gmsh:physical": phys, "gmsh:geometrical": geom}
+
+    logger.info(
+        "Read mesh with " + str(reader.pts.shape[0]) + " nodes from " + file_name
+    )
+    return reader.pts, cells, cell_info, reader.phys_names
+
+
+class _MshReader(object):
+    """ Parser of the sections of a .msh file.
+
+    After read(), the mesh is available in the attributes pts, elements (for
+    each element type, a list of blocks of cell-node relations, physical and
+    geometrical tags), and phys_names.
+
+    """
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+
+        self.version = None
+        self.binary = False
+        # Byte order of binary data
+        self.endian = "<"
+        # Size of the size_t type used in binary files of version 4
+        self.size_t = np.uint64
+
+        self.pts = np.zeros((0, 3))
+        # Node numbers of the nodes, in the order of pts
+        self.node_tags = np.zeros(0, dtype=np.int)
+        # Map from node numbers to indices in pts, see _node_index()
+        self.node_map = None
+        self.elements = {}
+        self.phys_names = {}
+        # Physical tags of the entities, for each dimension
+        self.entity_phys = [{} for _ in range(4)]
+
+    def read(self):
+        readers = {
+            "MeshFormat": self._read_format,
+            "PhysicalNames": self._read_physical_names,
+            "Entities": self._read_entities,
+            "Nodes": self._read_nodes,
+            "Elements": self._read_elements,
+        }
+        while True:
+            line = self.f.readline()
+            if not line:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            if not line.startswith(b"$"):
+                raise ValueError("Expected section header, found " + str(line))
+            section = line[1:].decode()
+            if self.version is None and section != "MeshFormat":
+                raise ValueError("The file does not start with $MeshFormat")
+
+            if section in readers:
+                readers[section]()
+            self._skip_to_end(section)
+
+    def _skip_to_end(self, section):
+        # Read until the end of a section
+        end = b"$End" + section.encode()
+        while True:
+            line = self.f.readline()
+            if not line:
+                raise ValueError("Section " + section + " is not terminated")
+            if line.strip() == end:
+                return
+
+    def _read_format(self):
+        version, file_type, data_size = self.f.readline().split()
+        self.version = version.decode()
+        if self.version not in ("2.2", "4", "4.0", "4.1"):
+            raise ValueError("Unsupported .msh format version " + self.version)
+        if self.version == "4":
+            self.version = "4.0"
+        self.binary = int(file_type) == 1
+        self.size_t = {4: np.uint32, 8: np.uint64}[int(data_size)]
+        if self.binary:
+            # The integer 1, written in the byte order of the file
+            one = self.f.read(4)
+            self.endian = "<" if np.frombuffer(one, "<i4")[0] == 1 else ">"
+
+    def _read_physical_names(self):
+        # This section is written in ASCII also in binary files
+        num_names = int(self.f.readline())
+        for _ in range(num_names):
+            _, tag, name = self.f.readline().decode().split(maxsplit=2)
+            self.phys_names[int(tag)] = name.strip().strip('"')
+
+    def _read_entities(self):
+        if self.binary:
+            num_entities = self._read_array(self.size_t, 4)
+        else:
+            num_entities = [int(n) for n in self.f.readline().split()]
+
+        for dim, num in enumerate(num_entities):
+            # Points have a bounding box in version 4.0, and coordinates in
+            # version 4.1
+            num_coord = 3 if dim == 0 and self.version == "4.1" else 6
+            for _ in range(int(num)):
+                if self.binary:
+                    tag = self._read_array(np.int32, 1)[0]
+                    self._read_array(np.float64, num_coord)
+                    num_phys = self._read_array(self.size_t, 1)[0]
+                    phys = self._read_array(np.int32, num_phys)
+                    if dim > 0:
+                        num_bound = self._read_array(self.size_t, 1)[0]
+                        self._read_array(np.int32, num_bound)
+                else:
+                    data = self.f.readline().split()
+                    tag = int(data[0])
+                    num_phys = int(data[num_coord + 1])
+                    phys = data[num_coord + 2 : num_coord + 2 + num_phys]
+                self.entity_phys[dim][int(tag)] = [int(p) for p in phys]
+
+    def _read_nodes(self):
+        if self.version == "2.2":
+            num_nodes = int(self.f.readline())
+            if self.binary:
+                dtype = np.dtype(
+                    [("tag", self.endian + "i4"), ("x", self.endian + "f8", 3)]
+                )
+                data = self._read_array(dtype, num_nodes)
+                self.node_tags = data["tag"].astype(np.int)
+                self.pts = data["x"].astype(np.float)
+            else:
+                data = self._read_ascii(np.float64, num_nodes, 4)
+                self.node_tags = data[:, 0].astype(np.int)
+                self.pts = data[:, 1:]
+            return
+
+        if self.binary:
+            header = self._read_array(self.size_t, 2 if self.version == "4.0" else 4)
+        else:
+            header = self.f.readline().split()
+        num_blocks, num_nodes = int(header[0]), int(header[1])
+
+        self.pts = np.empty((num_nodes, 3))
+        self.node_tags = np.empty(num_nodes, dtype=np.int)
+        start = 0
+        for _ in range(num_blocks):
+            if self.binary:
+                block = self._read_array(np.int32, 3)
+                num = int(self._read_array(self.size_t, 1)[0])
+            else:
+                data = self.f.readline().split()
+                block, num = [int(d) for d in data[:3]], int(data[3])
+            # The entity dimension comes first in version 4.1, and second in
+            # version 4.0
+            dim = block[0] if self.version == "4.1" else block[1]
+            parametric = block[2]
+            num_coord = 3 + (dim if parametric else 0)
+            end = start + num
+
+            if self.version == "4.1":
+                if self.binary:
+                    self.node_tags[start:end] = self._read_array(self.size_t, num)
+                    coord = self._read_array(np.float64, num * num_coord)
+                else:
+                    self.node_tags[start:end] = self._read_ascii(np.int64, num, 1)[:, 0]
+                    coord = self._read_ascii(np.float64, num, num_coord)
+                self.pts[start:end] = coord.reshape((num, num_coord))[:, :3]
+            else:
+                if self.binary:
+                    dtype = np.dtype(
+                        [
+                            ("tag", self.endian + "i4"),
+                            ("x", self.endian + "f8", num_coord),
+                        ]
+                    )
+                    data = self._read_array(dtype, num)
+                    self.node_tags[start:end] = data["tag"]
+                    self.pts[start:end] = data["x"][:, :3]
+                else:
+                    data = self._read_ascii(np.float64, num, 1 + num_coord)
+                    self.node_tags[start:end] = data[:, 0]
+                    self.pts[start:end] = data[:, 1:4]
+            start = end
+
+    def _node_index(self, tags):
+        # Map from node numbers to indices in pts
+        if self.node_map is None:
+            self.node_map = -np.ones(self.node_tags.max() + 1, dtype=np.int)
+            self.node_map[self.node_tags] = np.arange(self.node_tags.size)
+        return self.node_map[tags]
+
+    def _add_elements(self, elem_type, conn, phys, geom):
+        if elem_type not in ELEMENT_TYPES:
+            raise ValueError("Unsupported element type " + str(elem_type))
+        name = ELEMENT_TYPES[elem_type][0]
+        self.elements.setdefault(name, []).append(
+            (self._node_index(conn), phys.astype(np.int), geom.astype(np.int))
+        )
+
+    def _num_nodes(self, elem_type):
+        if elem_type not in ELEMENT_TYPES:
+            raise ValueError("Unsupported element type " + str(elem_type))
+        return ELEMENT_TYPES[elem_type][1]
+
+    def _read_elements(self):
+        if self.version == "2.2":
+            if self.binary:
+                self._read_elements_2_binary()
+            else:
+                self._read_elements_2_ascii()
+            return
+
+        if self.binary:
+            header = self._read_array(self.size_t, 2 if self.version == "4.0" else 4)
+        else:
+            header = self.f.readline().split()
+        num_blocks = int(header[0])
+
+        for _ in range(num_blocks):
+            if self.binary:
+                block = self._read_array(np.int32, 3)
+                num = int(self._read_array(self.size_t, 1)[0])
+            else:
+                data = self.f.readline().split()
+                block, num = [int(d) for d in data[:3]], int(data[3])
+            if self.version == "4.1":
+                dim, entity, elem_type = block
+            else:
+                entity, dim, elem_type = block
+            num_nodes = self._num_nodes(elem_type)
+
+            if self.binary:
+                dtype = self.size_t if self.version == "4.1" else np.int32
+                data = self._read_array(dtype, num * (1 + num_nodes))
+                data = data.reshape((num, 1 + num_nodes))
+            else:
+                data = self._read_ascii(np.int64, num, 1 + num_nodes)
+            conn = data[:, 1:]
+
+            geom = entity * np.ones(num, dtype=np.int)
+            # Repeat the elements for each physical group of the entity
+            for phys in self.entity_phys[dim].get(int(entity), [0]) or [0]:
+                self._add_elements(elem_type, conn, phys * np.ones(num), geom)
+
+    def _read_elements_2_binary(self):
+        num_elements = int(self.f.readline())
+        num_read = 0
+        while num_read < num_elements:
+            elem_type, num, num_tags = self._read_array(np.int32, 3)
+            num_nodes = self._num_nodes(elem_type)
+            data = self._read_array(np.int32, num * (1 + num_tags + num_nodes))
+            self._add_elements_2(elem_type, data.reshape((num, -1)), num_tags)
+            num_read += num
+
+    def _read_elements_2_ascii(self):
+        # Each line holds the element number, type, number of tags, the tags
+        # and the nodes. The length of the lines varies with the element type
+        # and the number of tags, but is in practice the same for long runs of
+        # lines.
+        num_elements = int(self.f.readline())
+        num_read = 0
+        while num_read < num_elements:
+            num = min(self.chunk_size, num_elements - num_read)
+            data = np.fromstring(self._read_lines(num), dtype=np.int64, sep=" ")
+            pos = 0
+            while pos < data.size:
+                if pos + 3 > data.size:
+                    raise ValueError("Unexpected number of values in .msh file")
+                elem_type, num_tags = data[pos + 1], data[pos + 2]
+                length = 3 + num_tags + self._num_nodes(elem_type)
+                if pos + length > data.size:
+                    raise ValueError("Unexpected number of values in .msh file")
+                # Find the end of the run of lines with this length, by
+                # checking windows of increasing size.
+                num_rows = 0
+                window = 64
+                while pos + num_rows * length < data.size:
+                    rows = data[pos + num_rows * length :]
+                    num_win = min(window, rows.size // length)
+                    if num_win == 0:
+                        # The next line is shorter
+                        break
+                    rows = rows[: num_win * length].reshape((num_win, length))
+                    same = np.logical_and(
+                        rows[:, 1] == elem_type, rows[:, 2] == num_tags
+                    )
+                    if same.all():
+                        num_rows += num_win
+                        window *= 2
+                    else:
+                        num_rows += np.argmin(same)
+                        break
+                rows = data[pos : pos + num_rows * length].reshape((num_rows, length))
+                self._add_elements_2(elem_type, rows, num_tags)
+                pos += num_rows * length
+            num_read += num
+
+    def _add_elements_2(self, elem_type, rows, num_tags):
+        # Elements in the 2.2 format, one row per element. The rows start with
+        # the element number, and in ASCII files also the element type and
+        # the number of tags. The first tag is the physical tag, the second is
+        # the elementary (geometrical) tag.
+        offset = 1 if self.binary else 3
+        zeros = np.zeros(rows.shape[0], dtype=np.int)
+        phys = rows[:, offset] if num_tags > 0 else zeros
+        geom = rows[:, offset + 1] if num_tags > 1 else zeros
+        self._add_elements(elem_type, rows[:, offset + num_tags :], phys, geom)
+
+    def _read_array(self, dtype, count):
+        # Read binary data directly into an array
+        dtype = np.dtype(dtype)
+        if dtype.fields is None:
+            dtype = dtype.newbyteorder(self.endian)
+        data = np.empty(int(count), dtype=dtype)
+        if self.f.readinto(data) != data.nbytes:
+            raise ValueError("Unexpected end of file")
+        return data
+
+    def _read_ascii(self, dtype, num_lines, num_columns):
+        # Read lines with a fixed number of values, in chunks of lines
+        data = np.empty((num_lines, num_columns), dtype=dtype)
+        for start in range(0, num_lines, self.chunk_size):
+            num = min(self.chunk_size, num_lines - start)
+            values = np.fromstring(self._read_lines(num), dtype=dtype, sep=" ")
+            if values.size != num * num_columns:
+                raise ValueError("Unexpected number of values in .msh file")
+            data[start : start + num] = values.reshape((num, num_columns))
+        return data
+
+    def _read_lines(self, num_lines):
+        # Read a number of lines, as bytes
+        lines = b"".join(itertools.islice(self.f, num_lines))
+        if lines.count(b"\n") < num_lines - 1:
+            raise ValueError("Unexpected end of file")
+        return lines
@@ -12,11 +12,11 @@ Acknowledgements:
 """
 from __future__ import division
 import numpy as np
-import itertools
 from scipy import sparse as sps
 
 import porepy as pp
-from porepy.utils import matrix_compression, mcolon, tags
+from porepy.utils import matrix_compression, mcolon, memory, tags
+from porepy.grids import spatial_index
 
 
 class Grid(object):
@@ -541,23 +541,29 @@ class Grid(object):
         """
         Obtain mapping between cells and nodes.
 
+        The map is cached, see _cached() for details. The returned matrix
+        should not be modified in place.
+
         Returns:
             sps.csc_matrix, size num_nodes x num_cells: Value 1 indicates a
                 connection between cell and node.
 
         """
-        # Local version of cell-face map, using absolute value to avoid
-        # artifacts from +- in the original version.
-        cf_loc = sps.csc_matrix(
-            (
-                np.abs(self.cell_faces.data),
-                self.cell_faces.indices,
-                self.cell_faces.indptr,
+
+        def compute():
+            # Local version of cell-face map, using absolute value to avoid
+            # artifacts from +- in the original version.
+            cf_loc = sps.csc_matrix(
+                (
+                    np.abs(self.cell_faces.data),
+                    self.cell_faces.indices,
+                    self.cell_faces.indptr,
+                ),
+                shape=self.cell_faces.shape,
             )
-        )
+            return (self.face_nodes * cf_loc) > 0
 
-        mat = (self.face_nodes * cf_loc) > 0
-        return mat
+        return self._cached("cell_nodes", compute)
 
     def num_cell_nodes(self):
         """ Number of nodes per cell.
@@ -566,7 +572,7 @@ class Grid(object):
             np.ndarray, size num_cells: Number of nodes per cell.
 
         """
-        return self.cell_nodes().sum(axis=0).A.ravel("F")
+        return self._cached("num_cell_nodes", lambda: np.diff(self.cell_nodes().indptr))
 
     def get_internal_nodes(self):
         """
@@ -576,30 +582,52 @@ class Grid(object):
             np.ndarray (1D), index of internal nodes.
 
         """
-        internal_nodes = np.setdiff1d(
-            np.arange(self.num_nodes), self.get_boundary_nodes(), assume_unique=True
+
+        def compute():
+            return np.setdiff1d(
+                np.arange(self.num_nodes),
+                self.get_boundary_nodes(),
+                assume_unique=True,
+            )
+
+        return self._cached(
+            "internal_nodes", compute, (), tag_keys=["domain_boundary_nodes"]
         )
-        return internal_nodes
 
     def get_all_boundary_faces(self):
         """
         Get indices of all faces tagged as either fractures, domain boundary or
         tip.
         """
-        return self.__indices(tags.all_face_tags(self.tags))
+        return self._cached(
+            "all_boundary_faces",
+            lambda: self.__indices(tags.all_face_tags(self.tags)),
+            (),
+            tag_keys=tags.standard_face_tags(),
+        )
 
     def get_all_boundary_nodes(self):
         """
         Get indices of all nodes tagged as either fractures, domain boundary or
         tip.
         """
-        return self.__indices(tags.all_node_tags(self.tags))
+        return self._cached(
+            "all_boundary_nodes",
+            lambda: self.__indices(tags.all_node_tags(self.tags)),
+            (),
+            tag_keys=tags.standard_node_tags(),
+        )
 
     def get_boundary_faces(self):
         """
         Get indices of all faces tagged as domain boundary.
         """
-        return self.__indices(self.tags["domain_boundary_faces"])
+        return self._cached(
+            "boundary_faces",
+            lambda: self.__indices(self.tags["domain_boundary_faces"]),
+            (),
+            tag_keys=["domain_boundary_faces"],
+        )
 
     def get_internal_faces(self):
         """
@@ -609,8 +637,16 @@ class Grid(object):
             np.ndarray (1d), index of internal faces.
 
         """
-        return np.setdiff1d(
-            np.arange(self.num_faces), self.get_all_boundary_faces(), assume_unique=True
+
+        def compute():
+            return np.setdiff1d(
+                np.arange(self.num_faces),
+                self.get_all_boundary_faces(),
+                assume_unique=True,
+            )
+
+        return self._cached(
+            "internal_faces", compute, (), tag_keys=tags.standard_face_tags()
         )
 
     def get_boundary_nodes(self):
@@ -621,7 +657,12 @@ class Grid(object):
             np.ndarray (1d), index of nodes on the boundary
 
         """
-        return self.__indices(self.tags["domain_boundary_nodes"])
+        return self._cached(
+            "boundary_nodes",
+            lambda: self.__indices(self.tags["domain_boundary_nodes"]),
+            (),
+            tag_keys=["domain_boundary_nodes"],
+        )
 
     def update_boundary_face_tag(self):
         """ Tag faces on the boundary of the grid with boundary tag.
@@ -656,13 +697,19 @@ class Grid(object):
                 nodes = self.face_nodes.indices[mcolon.mcolon(first, second)]
                 self.tags[node_tag][nodes] = True
 
-    def cell_diameters(self, cn=None):
+    def cell_diameters(self, cn=None, chunk_size=100000):
         """
         Compute the cell diameters. If self.dim == 0, return 0
 
+        The diameter is computed as the maximum distance between two nodes of
+        the cell. The computation is vectorized over cells with the same number
+        of nodes, and processed in chunks to limit the memory consumption.
+
         Parameters:
             cn (optional): cell nodes map, previously already computed.
-            Otherwise a call to self.cell_nodes is provided.
+                Otherwise a call to self.cell_nodes is provided.
+            chunk_size (int, optional): Maximum number of node pairs treated
+                at the same time. Defaults to 1e5.
 
         Returns:
             np.array, num_cells: values of the cell diameter for each cell
@@ -671,26 +718,32 @@ class Grid(object):
         if self.dim == 0:
             return np.zeros(1)
 
-        def comb(n):
-            return np.fromiter(
-                itertools.chain.from_iterable(itertools.combinations(n, 2)), n.dtype
-            ).reshape((2, -1), order="F")
-
-        def diam(n):
-            return np.amax(
-                np.linalg.norm(self.nodes[:, n[0, :]] - self.nodes[:, n[1, :]], axis=0)
-            )
-
         if cn is None:
             cn = self.cell_nodes()
-        return np.array(
-            [
-                diam(comb(cn.indices[cn.indptr[c] : cn.indptr[c + 1]]))
-                for c in np.arange(self.num_cells)
-            ]
-        )
-
-    def cell_face_as_dense(self):
+        cn = cn.tocsc()
+
+        num_nodes = np.diff(cn.indptr)
+        diams = np.zeros(self.num_cells)
+
+        # Treat cells with the same number of nodes together
+        for n in np.unique(num_nodes):
+            cells = np.where(num_nodes == n)[0]
+            first, second = np.triu_indices(n, 1)
+            cells_per_chunk = max(chunk_size // max(first.size, 1), 1)
+
+            for start in range(0, cells.size, cells_per_chunk):
+                loc_cells = cells[start : start + cells_per_chunk]
+                nodes = cn.indices[cn.indptr[loc_cells].reshape((-1, 1)) + np.arange(n)]
+                # Squared distance between all pairs of nodes in all cells
+                dist = np.zeros((loc_cells.size, first.size))
+                for dim in range(self.nodes.shape[0]):
+                    x = self.nodes[dim, nodes]
+                    dist += (x[:, first] - x[:, second]) ** 2
+                diams[loc_cells] = np.sqrt(np.max(dist, axis=1, initial=0))
+
+        return diams
+
+    def cell_face_as_dense(self, chunk_size=100000):
         """
         Obtain the cell-face relation in the from of two rows, rather than a
         sparse matrix. This alterative format can be useful in some cases.
@@ -699,24 +752,23 @@ class Grid(object):
         that column refers to cell indices. The value -1 signifies a boundary.
         The normal vector of the face points from the first to the second row.
 
+        Parameters:
+            chunk_size (int, optional): Maximum number of cell-face relations
+                treated at the same time. Defaults to 1e5.
+
         Returns:
             np.ndarray, 2 x num_faces: Array representation of face-cell
                 relations
         """
-        n = self.cell_faces.tocsr()
-        d = np.diff(n.indptr)
-        rows = matrix_compression.rldecode(np.arange(d.size), d)
-        # Increase the data by one to distinguish cell indices from boundary
-        # cells
-        data = n.indices + 1
-        cols = ((n.data + 1) / 2).astype("i")
-        neighs = sps.coo_matrix((data, (rows, cols))).todense()
-        # Subtract 1 to get back to real cell indices
-        neighs -= 1
-        neighs = neighs.transpose().A.astype("int")
-        # Finally, we need to switch order of rows to get normal vectors
-        # pointing from first to second row.
-        return neighs[::-1]
+        cf = self.cell_faces.tocsc()
+        neighs = -np.ones((2, self.num_faces), dtype=np.int)
+        for start in range(0, cf.indptr[-1], chunk_size):
+            ind = np.arange(start, min(start + chunk_size, cf.indptr[-1]))
+            cells = np.searchsorted(cf.indptr, ind, side="right") - 1
+            # Cells with outwards pointing normal vector go in the first row,
+            # cells with inwards pointing normals in the second.
+            neighs[(cf.data[ind] < 0).astype(np.int), cf.indices[ind]] = cells
+        return neighs
 
     def cell_connection_map(self):
         """
@@ -726,22 +778,25 @@ class Grid(object):
         Returns:
             scipy.sparse.csr_matrix, size num_cells * num_cells: Boolean
                 matrix, element (i,j) is true if cells i and j share a face.
-                The matrix is thus symmetric.
+                The matrix is thus symmetric. The matrix is cached, and
+                should not be modified in place.
         """
 
-        # Create a copy of the cell-face relation, so that we can modify it at
-        # will
-        cell_faces = self.cell_faces.copy()
+        def compute():
+            # Create a copy of the cell-face relation, so that we can modify it
+            # at will
+            cell_faces = self.cell_faces.copy()
 
-        # Direction of normal vector does not matter here, only 0s and 1s
-        cell_faces.data = np.abs(cell_faces.data)
+            # Direction of normal vector does not matter here, only 0s and 1s
+            cell_faces.data = np.abs(cell_faces.data)
 
-        # Find connection between cells via the cell-face map
-        c2c = cell_faces.transpose() * cell_faces
-        # Only care about absolute values
-        c2c.data = np.clip(c2c.data, 0, 1).astype("bool")
+            # Find connection between cells via the cell-face map
+            c2c = cell_faces.transpose() * cell_faces
+            # Only care about absolute values
+            c2c.data = np.clip(c2c.data, 0, 1).astype("bool")
+            return c2c
 
-        return c2c
+        return self._cached("cell_connection_map", compute, ("cell_faces",))
 
     def sign_of_faces(self, faces):
         """ Get the direction of the normal vector (inward or outwards from a cell)
@@ -791,35 +846,58 @@ class Grid(object):
         For dim < 3, no checks are made if the point is in the plane / line
         of the grid.
 
+        The search is based on a KD-tree of the cell centers, which is built
+        on the first call and cached.
+
         Parameters:
             p (np.ndarray, 3xn): Point coordinates. If p.shape[0] < 3,
                 additional points will be treated as zeros.
+            return_distance (boolean, optional): If True, also the distance
+                to the closest cell center is returned. Defaults to False.
 
         Returns:
             np.ndarray of ints: For each point, index of the cell with center
                 closest to the point.
+            np.ndarray of doubles: Distance to the closest cell center. Only
+                returned if return_distance is True.
         """
-        p = np.atleast_2d(p)
-        if p.shape[0] < 3:
-            z = np.zeros((3 - p.shape[0], p.shape[1]))
-            p = np.vstack((p, z))
-
-        def min_dist(pts):
-            c = self.cell_centers
-            d = np.sum(np.power(c - pts, 2), axis=0)
-            min_id = np.argmin(d)
-            return min_id, np.sqrt(d[min_id])
-
-        ci = np.empty(p.shape[1], dtype=np.int)
-        di = np.empty(p.shape[1])
-        for i in range(p.shape[1]):
-            ci[i], di[i] = min_dist(p[:, i].reshape((3, -1)))
+        p = spatial_index.pad_points(p)
+        tree = self._cached(
+            "cell_center_tree",
+            lambda: spatial_index.CellCenterTree([self]),
+            ("cell_centers",),
+        )
+        ci, di = tree.query(p)
 
         if return_distance:
             return ci, di
         else:
             return ci
 
+    def locate_points(self, p, tol=1e-10):
+        """ For a set of points, find the cells containing the points.
+
+        The search is based on a binning of the cell bounding boxes, which is
+        built on the first call and cached. The point-in-cell test is exact
+        for convex cells, see spatial_index.CellLocator for details.
+
+        Parameters:
+            p (np.ndarray, 3xn): Point coordinates. If p.shape[0] < 3,
+                additional points will be treated as zeros.
+            tol (double, optional): Geometric tolerance. Defaults to 1e-10.
+
+        Returns:
+            np.ndarray of ints: For each point, index of a cell containing the
+                point, -1 if the point is outside the grid.
+        """
+        p = spatial_index.pad_points(p)
+        locator = self._cached(
+            "cell_locator_" + str(tol),
+            lambda: spatial_index.CellLocator([self], tol=tol),
+            ("nodes", "face_nodes", "cell_faces", "face_normals", "face_centers"),
+        )
+        return locator.locate(p)
+
     def initiate_face_tags(self):
         keys = tags.standard_face_tags()
         values = [np.zeros(self.num_faces, dtype=bool) for _ in keys]
@@ -830,8 +908,171 @@ class Grid(object):
         values = [np.zeros(self.num_nodes, dtype=bool) for _ in keys]
         tags.add_tags(self, dict(zip(keys, values)))
 
+    def compact(self, geometry_dtype=None):
+        """ Reduce the memory footprint of the grid.
+
+        The index arrays of face_nodes and cell_faces are stored as 32 bit
+        integers, and boolean tags are bit-packed (see tags.PackedTags). These
+        changes do not affect the results of computations on the grid.
+
+        Optionally, the geometric quantities can be converted to a lower
+        precision type. This is intended for grids used for visualization
+        only; the reduced precision is in general not sufficient for
+        discretization. The conversion is therefore usually applied to a
+        copy of the grid:
+
+            g_vis = g.copy().compact(geometry_dtype=np.float32)
+
+        Parameters:
+            geometry_dtype (np.dtype, optional): If provided, nodes and the
+                computed geometry are converted to this type.
+
+        Returns:
+            Grid: The grid itself, modified in place.
+
+        """
+        memory.compact_sparse(self.face_nodes)
+        memory.compact_sparse(self.cell_faces)
+
+        if isinstance(self.tags, tags.PackedTags):
+            self.tags.pack()
+        else:
+            self.tags = tags.PackedTags(self.tags)
+
+        if geometry_dtype is not None:
+            for attr in (
+                "nodes",
+                "cell_volumes",
+                "cell_centers",
+                "face_centers",
+                "face_normals",
+                "face_areas",
+            ):
+                if hasattr(self, attr):
+                    setattr(self, attr, getattr(self, attr).astype(geometry_dtype))
+        return self
+
+    def memory_report(self):
+        """ Memory consumption of the grid, broken down by attribute.
+
+        Only numerical data (arrays and sparse matrices, also when stored in
+        dictionaries) is counted, see memory.nbytes(). Cached connectivity
+        information is reported under the key "cache".
+
+        Returns:
+            dict: For each attribute that holds numerical data, the number of
+                bytes used.
+
+        """
+        report = {}
+        for key, value in self.__dict__.items():
+            if key == "_connectivity_cache":
+                continue
+            size = memory.nbytes(value)
+            if size > 0:
+                report[key] = size
+
+        # The signatures of the cached values refer to the grid attributes and
+        # tags, and are not counted
+        cache = self.__dict__.get("_connectivity_cache", {})
+        size = 0
+        for _, value in cache.values():
+            size += memory.nbytes(getattr(value, "__dict__", value))
+        if size > 0:
+            report["cache"] = size
+        return report
+
+    def clear_cache(self):
+        """ Remove all cached connectivity information from the grid.
+
+        Cached quantities are recomputed automatically when the attributes
+        and tags they are derived from are reassigned, see _cached(). This
+        method is only needed if the contents of nodes, face_nodes, cell_faces
+        or the tag arrays are modified in place, without reassigning the
+        arrays.
+
+        """
+        self.__dict__.pop("_connectivity_cache", None)
+
+    def _cached(
+        self, name, compute, attributes=("face_nodes", "cell_faces"), tag_keys=None
+    ):
+        """ Memoize a quantity derived from the grid topology.
+
+        The cached value is recomputed if any of the attributes or tags it
+        depends on has been reassigned since the value was computed. For sparse
+        matrices, reassignment of the underlying index and data arrays (as is
+        done when faces or nodes are added or split) also triggers a
+        recomputation. The check is by identity, thus its cost does not depend
+        on the size of the grid. In-place modifications are not detected, see
+        clear_cache().
+
+        The arrays of the cached value are set to read only, to avoid that
+        modifications by the caller corrupt the cache.
+
+        Parameters:
+            name (str): Identifier of the quantity.
+            compute (callable): Function without arguments that computes
+                the quantity.
+            attributes (tuple of str, optional): Attributes of the grid the
+                quantity depends on. Defaults to face_nodes and cell_faces.
+            tag_keys (list of str, optional): Keys in self.tags the quantity
+                depends on.
+
+        Returns:
+            The (possibly cached) value of the quantity.
+
+        """
+        cache = self.__dict__.setdefault("_connectivity_cache", {})
+        signature = []
+        for attr in attributes:
+            obj = getattr(self, attr)
+            signature.append(obj)
+            if sps.issparse(obj):
+                for field in ("indptr", "indices", "data", "row", "col", "_shape"):
+                    signature.append(getattr(obj, field, None))
+        if tag_keys is not None:
+            # Packed tags are identified by the stored array, which is kept
+            # when the tag is read
+            packed = isinstance(self.tags, tags.PackedTags)
+            for key in tag_keys:
+                signature.append(self.tags.stored(key) if packed else self.tags[key])
+
+        if name in cache:
+            old_signature, value = cache[name]
+            if len(old_signature) == len(signature) and all(
+                a is b for a, b in zip(old_signature, signature)
+            ):
+                return value
+
+        value = compute()
+        _set_read_only(value)
+        cache[name] = (signature, value)
+        return value
+
+    def __getstate__(self):
+        # The cache is not stored, it is recomputed on demand.
+        state = self.__dict__.copy()
+        state.pop("_connectivity_cache", None)
+        return state
+
     @staticmethod
     def __indices(true_false):
         """ Shorthand for np.argwhere.
         """
         return np.argwhere(true_false).ravel("F")
+
+
+def _set_read_only(value):
+    """ Set the arrays of a numpy array or sparse matrix to read only."""
+    if sps.issparse(value):
+        arrays = [
+            getattr(value, field)
+            for field in ("indptr", "indices", "data", "row", "col")
+            if hasattr(value, field)
+        ]
+    else:
+        arrays = [value]
+    for arr in arrays:
+        if isinstance(arr, np.ndarray):
+            arr.flags.writeable = False
@@ -7,9 +7,10 @@ intersections in the form of a GridBucket.
 import warnings
 from scipy import sparse as sps
 import numpy as np
-import networkx
 
-from porepy.utils import setmembership
+from porepy.grids import spatial_index
+from porepy.grids.bucket_graph import BucketGraph
+from porepy.utils import memory, setmembership
 
 
 class GridBucket(object):
@@ -17,23 +18,22 @@ class GridBucket(object):
     Container for the hiererchy of grids formed by fractures and their
     intersection.
 
-    The information is stored in a graph borrowed from networkx, and the
-    GridBucket is to a large degree a wrapper around the graph. Each grid
-    defines a node in the graph, while edges are defined by grid pairs that
-    have a connection.
+    The information is stored in a graph, and the GridBucket is to a large
+    degree a wrapper around the graph. Each grid defines a node in the graph,
+    while edges are defined by grid pairs that have a connection.
 
-    To all nodes and vertexes, there is associated a dictionary (courtesy
-    networkx) that can store any type of data. Thus the GridBucket can double
-    as a data storage and management tool.
+    To all nodes and vertexes, there is associated a dictionary that can store
+    any type of data. Thus the GridBucket can double as a data storage and
+    management tool.
 
     Attributes:
-        graph (networkx.Graph): The of the grid. See above for further
+        graph (BucketGraph): The graph of the grids. See above for further
             description.
 
     """
 
     def __init__(self):
-        self.graph = networkx.Graph(directed=False)
+        self.graph = BucketGraph()
         self.name = "grid bucket"
 
     # --------- Iterators -------------------------
@@ -47,9 +47,7 @@ class GridBucket(object):
             data: The dictionary storing all information in this node.
 
         """
-        for g in self.graph:
-            data = self.graph.node[g]
-            yield g, data
+        return self.graph.nodes()
 
     def nodes(self):
         """ Iterator over the nodes in the GridBucket.
@@ -62,9 +60,7 @@ class GridBucket(object):
             data: The dictionary storing all information in this node.
 
         """
-        for g in self.graph:
-            data = self.graph.node[g]
-            yield g, data
+        return self.graph.nodes()
 
     def edges(self):
         """
@@ -75,8 +71,7 @@ class GridBucket(object):
             data: The dictionary storing all information in this edge..
 
         """
-        for e in self.graph.edges():
-            yield e, self.edge_props(e)
+        return self.graph.edges()
 
     # ---------- Navigate within the graph --------
 
@@ -99,14 +94,11 @@ class GridBucket(object):
         """
 
         if e[0].dim == e[1].dim:
-            if not (
-                "node_number" in self.graph.node[e[0]]
-                and "node_number" in self.graph.node[e[1]]
-            ):
+            data = [self.graph.node_data(g) for g in e]
+            if not ("node_number" in data[0] and "node_number" in data[1]):
                 self.assign_node_ordering()
 
-            node_indexes = [self.node_props(g, "node_number") for g in e]
-            if node_indexes[0] < node_indexes[1]:
+            if data[0]["node_number"] < data[1]["node_number"]:
                 return e[0], e[1]
             else:
                 return e[1], e[0]
@@ -129,8 +121,7 @@ class GridBucket(object):
             object: A dictionary with keys and properties.
 
         """
-        for e in self.graph.edges([n]):
-            yield e, self.edge_props(e)
+        return self.graph.edges_of_node(n)
 
     def node_neighbors(self, node, only_higher=False, only_lower=False):
         """
@@ -147,27 +138,24 @@ class GridBucket(object):
                 neighbors. Defaults to False.
 
         Return:
-            list of networkx.node: Neighbors of node 'node'
+            np.ndarray of grids: Neighbors of node 'node'
 
         Raises:
             ValueError if both only_higher and only_lower is True.
 
         """
 
-        neigh = np.array([n for n in self.graph.neighbors(node)])
-
-        if not only_higher and not only_lower:
-            return neigh
-        elif only_higher and only_lower:
+        if only_higher and only_lower:
             raise ValueError("Cannot return both only higher and only lower")
-        elif only_higher:
-            # Find the neighbours that are higher dimensional
-            is_high = np.array([w.dim > node.dim for w in neigh])
-            return neigh[is_high]
-        else:
+
+        neigh = self.graph.neighbors(node)
+        if only_higher:
             # Find the neighbours that are higher dimensional
-            is_low = np.array([w.dim < node.dim for w in neigh])
-            return neigh[is_low]
+            neigh = [w for w in neigh if w.dim > node.dim]
+        elif only_lower:
+            # Find the neighbours that are lower dimensional
+            neigh = [w for w in neigh if w.dim < node.dim]
+        return self._object_array(neigh)
 
     # ------------ Getters for grids
 
@@ -187,9 +175,8 @@ class GridBucket(object):
 
         """
         if cond is None:
-            cond = lambda g: True
-
-        return np.array([g for g, _ in self if cond(g)])
+            return self._object_array(list(self.graph))
+        return self._object_array([g for g in self.graph if cond(g)])
 
     def grids_of_dimension(self, dim):
         """
@@ -198,8 +185,7 @@ class GridBucket(object):
             list: Of grids of the specified dimension
 
         """
-
-        return self.get_grids(lambda g: g.dim == dim)
+        return self._object_array(self.graph.grids_of_dimension(dim))
 
     def get_mortar_grids(self, cond=None, name="mortar_grid"):
         """
@@ -218,7 +204,7 @@ class GridBucket(object):
         """
         if cond is None:
             cond = lambda g: True
-        return np.array([d[name] for _, d in self.edges() if cond(d[name])])
+        return self._object_array([d[name] for _, d in self.edges() if cond(d[name])])
 
     # ----------- Adders for node and edge properties (introduce keywords)
 
@@ -257,7 +243,8 @@ class GridBucket(object):
 
         for key in np.atleast_1d(keys):
             if g is None:
-                networkx.set_node_attributes(self.graph, name=key, values=None)
+                for _, n in self:
+                    n[key] = None
             else:
                 for h, n in self:
                     if h in g:
@@ -286,18 +273,13 @@ class GridBucket(object):
         """
         for key in np.atleast_1d(keys):
             if grid_pairs is None:
-                networkx.set_edge_attributes(self.graph, name=key, values=None)
+                for _, d in self.edges():
+                    d[key] = None
             else:
                 for gp in grid_pairs:
-                    if tuple(gp) in self.graph.edges():
-                        self.graph.adj[gp[0]][gp[1]][key] = None
-                    elif tuple(gp[::-1]) in self.graph.edges():
-                        self.graph.adj[gp[1]][gp[0]][key] = None
-                    else:
-                        raise KeyError(
-                            "Cannot assign property to undefined\
-                                         edge"
-                        )
+                    if not self.graph.has_edge(gp[0], gp[1]):
+                        raise KeyError("Cannot assign property to undefined edge")
+                    self.graph.edge_data(gp[0], gp[1])[key] = None
 
     # ------------ Getters for node and edge properties
 
@@ -315,7 +297,7 @@ class GridBucket(object):
             object: The tested property.
 
         """
-        return tuple([key in self.graph.node[g] for g in grids])
+        return tuple([key in self.graph.node_data(g) for g in grids])
 
     def node_props(self, g, key=None):
         """
@@ -332,9 +314,9 @@ class GridBucket(object):
 
         """
         if key is None:
-            return self.graph.node[g]
+            return self.graph.node_data(g)
         else:
-            return self.graph.node[g][key]
+            return self.graph.node_data(g)[key]
 
     def edge_props(self, gp, key=None):
         """
@@ -354,18 +336,11 @@ class GridBucket(object):
             KeyError if the two grids do not form an edge.
 
         """
-        if tuple(gp) in self.graph.edges():
-            if key is None:
-                return self.graph.adj[gp[0]][gp[1]]
-            else:
-                return self.graph.adj[gp[0]][gp[1]][key]
-        elif tuple(gp[::-1]) in self.graph.edges():
-            if key is None:
-                return self.graph.adj[gp[1]][gp[0]]
-            else:
-                return self.graph.adj[gp[1]][gp[0]][key]
+        data = self.graph.edge_data(gp[0], gp[1])
+        if key is None:
+            return data
         else:
-            raise KeyError("Unknown edge")
+            return data[key]
 
     # ------------- Setters for edge and grid properties
 
@@ -385,7 +360,7 @@ class GridBucket(object):
             val: Value to be added.
 
         """
-        self.graph.node[g][key] = val
+        self.graph.node_data(g)[key] = val
 
     def set_edge_prop(self, gp, key, val):
         """ Set the value of a property of a given edge.
@@ -406,12 +381,7 @@ class GridBucket(object):
             KeyError if the two grids do not form an edge.
 
         """
-        if tuple(gp) in self.graph.edges():
-            self.graph.adj[gp[0]][gp[1]][key] = val
-        elif tuple(gp[::-1]) in self.graph.edges():
-            self.graph.adj[gp[1]][gp[0]][key] = val
-        else:
-            raise KeyError("Unknown edge")
+        self.graph.edge_data(gp[0], gp[1])[key] = val
 
     # ------------ Removers for nodes properties ----------
 
@@ -510,7 +480,7 @@ class GridBucket(object):
 
         """
         new_grids = np.atleast_1d(new_grids)
-        if np.any([i is j for i in new_grids for j in self.graph]):
+        if any(g in self.graph for g in new_grids):
             raise ValueError("Grid already defined in bucket")
         [self.graph.add_node(g) for g in new_grids]
 
@@ -537,19 +507,16 @@ class GridBucket(object):
         """
         assert np.asarray(grids).size == 2
 
-        if (
-            tuple(grids) in self.graph.edges()
-            or tuple(grids[::-1]) in self.graph.edges()
-        ):
+        if self.graph.has_edge(grids[0], grids[1]):
             raise ValueError("Cannot add existing edge")
 
         # The higher-dimensional grid is the first node of the edge.
         if grids[0].dim - 1 == grids[1].dim:
-            self.graph.add_edge(*grids, face_cells=face_cells)
+            self.graph.add_edge(grids[0], grids[1], {"face_cells": face_cells})
         elif grids[0].dim == grids[1].dim - 1:
-            self.graph.add_edge(*grids[::-1], face_cells=face_cells)
+            self.graph.add_edge(grids[1], grids[0], {"face_cells": face_cells})
         elif grids[0].dim == grids[1].dim:
-            self.graph.add_edge(*grids, face_cells=face_cells)
+            self.graph.add_edge(grids[0], grids[1], {"face_cells": face_cells})
         else:
             raise ValueError("Grid dimension mismatch")
 
@@ -578,7 +545,8 @@ class GridBucket(object):
         if cond is None:
             cond = lambda g: True
 
-        self.graph.remove_nodes_from([g for g in self.graph if cond(g)])
+        for g in [g for g in self.graph if cond(g)]:
+            self.graph.remove_node(g)
 
     def update_nodes(self, mapping):
         """
@@ -590,7 +558,7 @@ class GridBucket(object):
             grid as values. A partial mapping is allowed.
 
         """
-        self.graph = networkx.relabel_nodes(self.graph, mapping)
+        self.graph.relabel(mapping)
 
     def eliminate_node(self, node):
         """
@@ -689,8 +657,8 @@ class GridBucket(object):
         counter = 0
         # Loop over grids in decreasing dimensions
         for dim in range(self.dim_max(), self.dim_min() - 1, -1):
-            for g in self.grids_of_dimension(dim):
-                n = self.graph.node[g]
+            for g in self.graph.grids_of_dimension(dim):
+                n = self.graph.node_data(g)
                 # Get old value, issue warning if not equal to the new one.
                 num = n.get("node_number", -1)
                 if ordering_exists and num != counter:
@@ -720,7 +688,7 @@ class GridBucket(object):
 
         # Loop over grids in decreasing dimensions
         for dim in range(self.dim_max(), self.dim_min() - 1, -1):
-            for g in self.grids_of_dimension(dim):
+            for g in self.graph.grids_of_dimension(dim):
                 if not self.has_nodes_prop([g], "node_number"):
                     # It is not clear how severe this case is. For the moment,
                     # we give a warning, and hope the user knows what to do
@@ -729,7 +697,7 @@ class GridBucket(object):
                     continue
 
                 # Obtain the old node number
-                n = self.graph.node[g]
+                n = self.graph.node_data(g)
                 old_number = n.get("node_number", -1)
                 # And replace it if it is higher than the removed one
                 if old_number > removed_number:
@@ -769,6 +737,58 @@ class GridBucket(object):
         )
         return trg_2_src_nodes
 
+    def cell_slices(self):
+        """
+        Global numbering of the cells of all grids in the bucket.
+
+        The cells are numbered consecutively, grid by grid, with the grids
+        ordered by their 'node_number' (see assign_node_ordering()). The cells
+        of a grid are thus represented by a slice of a global cell vector, and
+        restriction to and prolongation from a grid are simple indexing:
+
+            slices = gb.cell_slices()
+            x_loc = x[slices[g]]
+            x[slices[g]] = x_loc
+
+        where the restriction x[slices[g]] is a view of x.
+
+        Returns:
+            dict: For each grid, the slice of its cells in the global
+                numbering.
+
+        """
+        num_cells = np.zeros(self.num_graph_nodes(), dtype=np.int)
+        for g, d in self:
+            num_cells[d["node_number"]] = g.num_cells
+        offsets = np.hstack((0, np.cumsum(num_cells))).tolist()
+        return {
+            g: slice(offsets[d["node_number"]], offsets[d["node_number"] + 1])
+            for g, d in self
+        }
+
+    def mortar_cell_slices(self):
+        """
+        Global numbering of the cells of all mortar grids in the bucket.
+
+        The mortar cells are numbered consecutively, with the edges ordered by
+        their 'edge_number' (see assign_node_ordering()). Edges without a
+        mortar grid have no cells. See cell_slices() for usage.
+
+        Returns:
+            dict: For each edge, as given by self.edges(), the slice of its
+                mortar cells in the global numbering.
+
+        """
+        num_cells = np.zeros(self.num_graph_edges(), dtype=np.int)
+        for _, d in self.edges():
+            if d.get("mortar_grid") is not None:
+                num_cells[d["edge_number"]] = d["mortar_grid"].num_cells
+        offsets = np.hstack((0, np.cumsum(num_cells))).tolist()
+        return {
+            e: slice(offsets[d["edge_number"]], offsets[d["edge_number"] + 1])
+            for e, d in self.edges()
+        }
+
     def cell_global2loc(self):
         """
         Create a global to local cell-mapping.
@@ -792,39 +812,32 @@ class GridBucket(object):
         If the GridBucket has mortar grids on the edges, a corresponding
         restriction from global mortar cells to local mortar cells will be
         made.
+
+        The global numbering is given by cell_slices() and
+        mortar_cell_slices(). Restriction by the slices is cheaper than by the
+        matrices, which should only be constructed if they are needed.
         """
 
+        def restriction(cells, size):
+            num = cells.stop - cells.start
+            return sps.csr_matrix(
+                (np.ones(num), np.arange(cells.start, cells.stop), np.arange(num + 1)),
+                shape=(num, size),
+            )
+
         # Create node restriction
-        self.add_node_props("cell_global2loc")
+        slices = self.cell_slices()
+        num_cells = sum(s.stop - s.start for s in slices.values())
         for g, d in self:
-            pos_i = d["node_number"]
-            mat = np.empty(self.num_graph_nodes(), dtype=np.object)
-            # first initial empty matrix
-            for g_j, d_j in self:
-                pos_j = d_j["node_number"]
-                mat[pos_j] = sps.coo_matrix((g.num_cells, g_j.num_cells))
-
-            # overwrite the local matrix for grid g
-            mat[pos_i] = sps.eye(g.num_cells)
-            d["cell_global2loc"] = sps.hstack(mat, "csr")
+            d["cell_global2loc"] = restriction(slices[g], num_cells)
 
         # create mortar restriction
-        for _, d in self.edges():
-            if not d.get("mortar_grid"):
+        slices = self.mortar_cell_slices()
+        num_cells = sum(s.stop - s.start for s in slices.values())
+        for e, d in self.edges():
+            if d.get("mortar_grid") is None:
                 continue
-            gm = d["mortar_grid"]
-            pos_i = d["edge_number"]
-            mat = np.empty(self.num_graph_edges(), dtype=np.object)
-            # first initial empty matrix
-            for _, d_j in self.edges():
-                gm_j = d_j["mortar_grid"]
-                pos_j = d_j["edge_number"]
-                mat[pos_j] = sps.coo_matrix((gm.num_cells, gm_j.num_cells))
-
-            # overwrite the local matrix for grid g
-            mat[pos_i] = sps.eye(gm.num_cells)
-
-            d["cell_global2loc"] = sps.hstack(mat, "csr")
+            d["cell_global2loc"] = restriction(slices[e], num_cells)
 
     def compute_geometry(self):
         """Compute geometric quantities for the grids.
@@ -837,9 +850,70 @@ class GridBucket(object):
             if d.get("mortar_grid")
         ]
 
+    def compact(self, geometry_dtype=None):
+        """ Reduce the memory footprint of all grids and mortar grids in the
+        bucket. See Grid.compact() for details.
+
+        Parameters:
+            geometry_dtype (np.dtype, optional): If provided, the geometry of
+                all grids is converted to this type. Intended for buckets used
+                for visualization only.
+
+        Returns:
+            GridBucket: The bucket itself, modified in place.
+
+        """
+        for g, _ in self:
+            g.compact(geometry_dtype)
+        for _, d in self.edges():
+            if d.get("mortar_grid") is not None:
+                d["mortar_grid"].compact(geometry_dtype)
+        return self
+
+    def memory_report(self):
+        """ Memory consumption of the grid bucket, broken down by attribute.
+
+        The memory of the grids and mortar grids is summed over all nodes and
+        edges, for each attribute, see Grid.memory_report(). Data stored in
+        the node and edge dictionaries is reported in total.
+
+        Returns:
+            dict: With keys "grids" and "mortar_grids", each a dictionary with
+                the number of bytes used by each attribute, and keys
+                "node_data", "edge_data" and "cache" (spatial indices), with
+                the number of bytes used by these.
+
+        """
+        report = {
+            "grids": {},
+            "mortar_grids": {},
+            "node_data": 0,
+            "edge_data": 0,
+            "cache": sum(
+                memory.nbytes(index.__dict__)
+                for _, index in self.__dict__.get("_spatial_index_cache", {}).values()
+            ),
+        }
+
+        def add(target, source):
+            for key, size in source.items():
+                target[key] = target.get(key, 0) + size
+
+        for g, d in self:
+            add(report["grids"], g.memory_report())
+            report["node_data"] += memory.nbytes(d)
+        for _, d in self.edges():
+            mg = d.get("mortar_grid")
+            if mg is not None:
+                add(report["mortar_grids"], mg.memory_report())
+            report["edge_data"] += memory.nbytes(
+                {key: val for key, val in d.items() if val is not mg}
+            )
+        return report
+
     def copy(self):
-        """Make a copy of the grid bucket utilizing the built-in copy function
-        of networkx.
+        """Make a copy of the grid bucket. The grids are shared with the copy,
+        while the data dictionaries of the nodes and edges are shallow copies.
 
         """
         gb_copy = GridBucket()
@@ -933,7 +1007,7 @@ class GridBucket(object):
                 relative 'node_number'.
 
         """
-        i = np.zeros(self.graph.number_of_edges(), dtype=int)
+        i = np.zeros(self.num_graph_edges(), dtype=int)
         j = np.zeros(i.size, dtype=int)
         values = np.zeros(i.size)
 
@@ -1027,6 +1101,120 @@ class GridBucket(object):
         else:
             return min_vals, max_vals
 
+    def closest_cell(self, p, cond=None, return_distance=False):
+        """
+        For a set of points, find the closest cell, by cell center, among all
+        grids in the bucket. It is possible to specify a condition based on the
+        grid to select some of them.
+
+        The search is based on a KD-tree of the cell centers of all the grids,
+        which is built on the first call and cached.
+
+        Parameters:
+            p (np.ndarray, 3xn): Point coordinates. If p.shape[0] < 3,
+                additional points will be treated as zeros.
+            cond: optional, predicate with a grid as input.
+            return_distance (boolean, optional): If True, also the distance
+                to the closest cell center is returned. Defaults to False.
+
+        Returns:
+            np.ndarray of grids: For each point, the grid of the closest cell.
+            np.ndarray of ints: For each point, index of the closest cell in
+                its grid.
+            np.ndarray of doubles: Distance to the closest cell center. Only
+                returned if return_distance is True.
+
+        """
+        grids = self._grid_list(cond)
+        tree = self._spatial_index(
+            "tree", grids, ("cell_centers",), spatial_index.CellCenterTree
+        )
+        ci, di = tree.query(spatial_index.pad_points(p))
+        grid_ind = np.searchsorted(tree.offsets, ci, side="right") - 1
+        grid_arr = np.empty(len(grids), dtype=object)
+        grid_arr[:] = grids
+        out = (grid_arr[grid_ind], ci - tree.offsets[grid_ind])
+        if return_distance:
+            return out + (di,)
+        return out
+
+    def locate_points(self, p, cond=None, tol=1e-10):
+        """
+        For a set of points, find the cells containing the points among all
+        grids in the bucket. It is possible to specify a condition based on the
+        grid to select some of them.
+
+        The search is based on a binning of the bounding boxes of the cells of
+        all the grids, which is built on the first call and cached. See
+        spatial_index.CellLocator for details. If a point is contained in
+        several grids, e.g. a point on a fracture, one of them is returned.
+
+        Parameters:
+            p (np.ndarray, 3xn): Point coordinates. If p.shape[0] < 3,
+                additional points will be treated as zeros.
+            cond: optional, predicate with a grid as input.
+            tol (double, optional): Geometric tolerance. Defaults to 1e-10.
+
+        Returns:
+            np.ndarray of grids: For each point, the grid of the cell
+                containing the point, None if the point is not located.
+            np.ndarray of ints: For each point, index of the cell in its grid,
+                -1 if the point is not located.
+
+        """
+        grids = self._grid_list(cond)
+        locator = self._spatial_index(
+            "locator_" + str(tol),
+            grids,
+            ("nodes", "face_nodes", "cell_faces", "face_normals", "face_centers"),
+            lambda grids: spatial_index.CellLocator(grids, tol=tol),
+        )
+        ci = locator.locate(spatial_index.pad_points(p))
+        found = ci >= 0
+        grid_ind = np.searchsorted(locator.offsets, ci[found], side="right") - 1
+
+        grid_arr = np.empty(len(grids), dtype=object)
+        grid_arr[:] = grids
+        point_grids = np.empty(ci.size, dtype=object)
+        point_grids[found] = grid_arr[grid_ind]
+        ci[found] -= locator.offsets[grid_ind]
+        return point_grids, ci
+
+    @staticmethod
+    def _object_array(objects):
+        """ Numpy array of grids or mortar grids. This is much faster than
+        np.array(), which inspects the objects for nested sequences.
+        """
+        arr = np.empty(len(objects), dtype=np.object)
+        arr[:] = objects
+        return arr
+
+    def _grid_list(self, cond):
+        if cond is None:
+            cond = lambda g: True
+        return [g for g in self.graph if cond(g)]
+
+    def _spatial_index(self, name, grids, attributes, constructor):
+        """ Get a cached spatial index over a set of grids, or construct it if
+        the grids, or the attributes of the grids the index depends on, have
+        changed.
+        """
+        signature = []
+        for g in grids:
+            signature.append(g)
+            signature += [getattr(g, attr) for attr in attributes]
+
+        cache = self.__dict__.setdefault("_spatial_index_cache", {})
+        if name in cache:
+            old_signature, index = cache[name]
+            if len(old_signature) == len(signature) and all(
+                a is b for a, b in zip(old_signature, signature)
+            ):
+                return index
+        index = constructor(grids)
+        cache[name] = (signature, index)
+        return index
+
     def size(self):
         """
         Returns:
@@ -1041,7 +1229,7 @@ class GridBucket(object):
             int: Minimum dimension of the grids present in the hierarchy.
 
         """
-        return np.amin([g.dim for g, _ in self])
+        return np.amin(self.graph.dimensions())
 
     def dim_max(self):
         """
@@ -1049,7 +1237,7 @@ class GridBucket(object):
             int: Maximum dimension of the grids present in the hierarchy.
 
         """
-        return np.amax([g.dim for g, _ in self])
+        return np.amax(self.graph.dimensions())
 
     def all_dims(self):
         """
@@ -1057,7 +1245,7 @@ class GridBucket(object):
             int: Active dimensions of the grids present in the hierarchy.
 
         """
-        return np.unique([g.dim for g, _ in self])
+        return np.array(self.graph.dimensions())
 
     def cell_volumes(self, cond=None):
         """
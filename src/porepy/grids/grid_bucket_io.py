@@ -0,0 +1,357 @@
+"""
+Storage of GridBucket objects in a binary format.
+
+A bucket is stored in a folder with two files: A binary file (arrays.bin)
+that contains the raw data of all numerical arrays, and a JSON manifest
+(manifest.json) that describes how the grids, mortar grids, the bucket graph
+and the data of the nodes and edges are assembled from the arrays. Compared to
+pickling, the format does not depend on the version of the graph library, and
+the data file can be memory mapped on loading, so that opening a large bucket
+is fast, and only the arrays that are actually used are read from disk.
+
+Example:
+    pp.grid_bucket_io.save(gb, "my_bucket")
+    gb = pp.grid_bucket_io.load("my_bucket")
+
+The following types of values can be stored, as attributes of grids and mortar
+grids, and as node and edge data: Numpy arrays, scipy sparse matrices,
+numbers, strings, None, grids and mortar grids, and lists, tuples and
+dictionaries of these. Other values are not stored, and a warning is issued.
+
+Grids are reconstructed by setting their attributes directly, without calling
+the constructor. Cached connectivity information and projection matrices
+are not stored.
+
+"""
+import importlib
+import json
+import os
+import warnings
+
+import numpy as np
+import scipy.sparse as sps
+
+from porepy.grids.grid import Grid
+from porepy.grids.grid_bucket import GridBucket
+from porepy.grids.mortar_grid import MortarGrid
+from porepy.utils import tags
+
+FORMAT_NAME = "porepy-grid-bucket"
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+DATA = "arrays.bin"
+
+# Alignment of the arrays in the data file, in bytes
+_ALIGNMENT = 64
+
+
+def save(gb, folder):
+    """ Save a grid bucket to a folder.
+
+    The folder is created if it does not exist. A bucket previously stored in
+    the folder is overwritten.
+
+    Parameters:
+        gb (pp.GridBucket): The bucket to be saved.
+        folder (str): Name of the folder.
+
+    """
+    os.makedirs(folder, exist_ok=True)
+    # The files are written to temporary names, and renamed when complete.
+    # This also keeps buckets that are loaded from the folder, with memory
+    # mapped arrays, intact.
+    data_path = os.path.join(folder, DATA)
+    manifest_path = os.path.join(folder, MANIFEST)
+    tmp_suffix = ".tmp" + str(os.getpid())
+    with open(data_path + tmp_suffix, "wb") as data_file:
+        encoder = _Encoder(data_file)
+
+        nodes = []
+        for g, d in gb:
+            nodes.append(
+                {
+                    "grid": encoder.object_index(g),
+                    "data": encoder.encode(d, "node_" + str(len(nodes))),
+                }
+            )
+        edges = []
+        for e, d in gb.edges():
+            name = "edge_" + str(len(edges))
+            edges.append(
+                {
+                    "grids": [encoder.object_index(e[0]), encoder.object_index(e[1])],
+                    "data": encoder.encode(d, name),
+                }
+            )
+
+    if len(encoder.skipped) > 0:
+        warnings.warn(
+            "The following values could not be stored: " + ", ".join(encoder.skipped)
+        )
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "name": gb.name,
+        "objects": encoder.objects,
+        "nodes": nodes,
+        "edges": edges,
+    }
+    with open(manifest_path + tmp_suffix, "w") as f:
+        json.dump(manifest, f)
+
+    # A previously stored manifest is removed before the data file is
+    # replaced, and the new manifest is put in place last, so that an
+    # interrupted save never leaves a manifest next to a data file it does not
+    # describe.
+    try:
+        os.remove(manifest_path)
+    except FileNotFoundError:
+        pass
+    os.replace(data_path + tmp_suffix, data_path)
+    os.replace(manifest_path + tmp_suffix, manifest_path)
+
+
+def load(folder, mmap_mode="r"):
+    """ Load a grid bucket stored by save().
+
+    Parameters:
+        folder (str): Name of the folder.
+        mmap_mode (str, optional): Memory mapping mode of the data file, see
+            np.memmap. Defaults to "r", which maps the arrays read only, thus
+            in-place modification of the arrays of the loaded bucket will
+            raise an error. Use "c" (copy on write) to allow in-place
+            modification without changing the file, or None to read all
+            arrays into memory.
+
+    Returns:
+        pp.GridBucket: The loaded bucket.
+
+    Raises:
+        ValueError if the folder does not contain a bucket in a known format.
+
+    """
+    with open(os.path.join(folder, MANIFEST), "r") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_NAME:
+        raise ValueError("Folder does not contain a stored grid bucket")
+    if manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            "Unsupported version " + str(manifest.get("version")) + " of bucket format"
+        )
+
+    decoder = _Decoder(os.path.join(folder, DATA), manifest["objects"], mmap_mode)
+
+    gb = GridBucket()
+    gb.name = manifest["name"]
+    gb.add_nodes([decoder.object(n["grid"]) for n in manifest["nodes"]])
+    for n in manifest["nodes"]:
+        gb.node_props(decoder.object(n["grid"])).update(decoder.decode(n["data"]))
+    for e in manifest["edges"]:
+        grids = [decoder.object(i) for i in e["grids"]]
+        data = decoder.decode(e["data"])
+        gb.add_edge(grids, data.get("face_cells"))
+        gb.edge_props(grids).update(data)
+    return gb
+
+
+# Classes that can be reconstructed from their attributes
+_OBJECT_TYPES = (Grid, MortarGrid)
+
+# Attributes holding cached data, which are not stored
+_CACHE_ATTRIBUTES = ("_connectivity_cache", "_projection_cache")
+
+# Sparse formats that are stored directly. Other formats are converted to csr.
+_SPARSE_FIELDS = {
+    "csc": ("data", "indices", "indptr"),
+    "csr": ("data", "indices", "indptr"),
+    "coo": ("data", "row", "col"),
+}
+
+
+class _Encoder(object):
+    """ Translate values to a JSON compatible description, writing the data of
+    arrays to a binary file.
+    """
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        # Descriptions of grids and mortar grids
+        self.objects = []
+        self._object_ids = {}
+        # Names of values that could not be encoded
+        self.skipped = []
+
+    def object_index(self, obj):
+        """ Index of a grid or mortar grid in the object table. The object is
+        encoded the first time it is encountered.
+        """
+        key = id(obj)
+        if key not in self._object_ids:
+            ind = len(self.objects)
+            self._object_ids[key] = ind
+            self.objects.append(None)
+            cls = type(obj)
+            name = "object_" + str(ind)
+            attributes = {
+                k: v for k, v in obj.__dict__.items() if k not in _CACHE_ATTRIBUTES
+            }
+            self.objects[ind] = {
+                "class": cls.__module__ + "." + cls.__name__,
+                "attributes": self.encode(attributes, name),
+            }
+        return self._object_ids[key]
+
+    def encode(self, value, name):
+        """ Description of a value. Returns None if the value cannot be
+        encoded.
+        """
+        if isinstance(value, _OBJECT_TYPES):
+            return {"type": "object", "index": self.object_index(value)}
+        if isinstance(value, np.ndarray):
+            return self._encode_array(value, name)
+        if sps.issparse(value):
+            return self._encode_sparse(value, name)
+        if isinstance(value, tags.PackedTags):
+            # Store the packed arrays as they are
+            return {
+                "type": "packed_tags",
+                "tags": self.encode(value._tags, name),
+                "sizes": self.encode(value._sizes, name + "_sizes"),
+            }
+        if isinstance(value, np.generic):
+            return {"type": "scalar", "dtype": value.dtype.str, "value": value.item()}
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return {"type": "value", "value": value}
+        if isinstance(value, (list, tuple)):
+            items = []
+            for i, v in enumerate(value):
+                items.append(self.encode(v, name + "_" + str(i)))
+                if items[-1] is None:
+                    return None
+            kind = "list" if isinstance(value, list) else "tuple"
+            return {"type": kind, "items": items}
+        if type(value) is dict:
+            items = []
+            for k, v in value.items():
+                enc_key = self.encode(k, name)
+                enc_value = self.encode(v, name + "." + str(k))
+                if enc_key is None or enc_value is None:
+                    self.skipped.append(name + "[" + str(k) + "]")
+                    continue
+                items.append([enc_key, enc_value])
+            return {"type": "dict", "items": items}
+        return None
+
+    def _encode_array(self, arr, name):
+        if arr.dtype == np.object:
+            items = []
+            for v in arr.ravel():
+                items.append(self.encode(v, name))
+                if items[-1] is None:
+                    return None
+            return {"type": "object_array", "shape": arr.shape, "items": items}
+        offset = self.data_file.tell()
+        padding = -offset % _ALIGNMENT
+        self.data_file.write(b"\0" * padding)
+        self.data_file.write(np.ascontiguousarray(arr).data)
+        return {
+            "type": "array",
+            "offset": offset + padding,
+            "dtype": arr.dtype.str,
+            "shape": arr.shape,
+        }
+
+    def _encode_sparse(self, mat, name):
+        fmt = mat.format
+        if fmt not in _SPARSE_FIELDS:
+            fmt = "csr"
+            mat = mat.tocsr()
+        arrays = {
+            field: self._encode_array(getattr(mat, field), name + "." + field)
+            for field in _SPARSE_FIELDS[fmt]
+        }
+        return {
+            "type": "sparse",
+            "format": fmt,
+            "shape": mat.shape,
+            "dtype": mat.dtype.str,
+            "arrays": arrays,
+        }
+
+
+class _Decoder(object):
+    """ Reconstruct values from the descriptions made by _Encoder."""
+
+    def __init__(self, data_path, objects, mmap_mode):
+        if os.path.getsize(data_path) == 0:
+            # Empty files cannot be memory mapped
+            self._data = np.zeros(0, dtype=np.uint8)
+        elif mmap_mode is None:
+            self._data = np.fromfile(data_path, dtype=np.uint8)
+        else:
+            # Use a plain array view of the mapped memory, to avoid that the
+            # memmap subclass propagates to arrays derived from the data.
+            data = np.memmap(data_path, dtype=np.uint8, mode=mmap_mode)
+            self._data = data.view(np.ndarray)
+        self._descriptions = objects
+        self._objects = {}
+
+    def object(self, ind):
+        """ Grid or mortar grid with the given index in the object table."""
+        if ind not in self._objects:
+            description = self._descriptions[ind]
+            module_name, cls_name = description["class"].rsplit(".", 1)
+            cls = getattr(importlib.import_module(module_name), cls_name)
+            if not (isinstance(cls, type) and issubclass(cls, _OBJECT_TYPES)):
+                raise ValueError("Cannot reconstruct object of type " + cls_name)
+            # Register the object before its attributes are decoded, in case
+            # the attributes refer back to the object.
+            obj = cls.__new__(cls)
+            self._objects[ind] = obj
+            obj.__dict__.update(self.decode(description["attributes"]))
+        return self._objects[ind]
+
+    def decode(self, description):
+        kind = description["type"]
+        if kind == "object":
+            return self.object(description["index"])
+        if kind == "array":
+            dtype = np.dtype(description["dtype"])
+            shape = tuple(description["shape"])
+            start = description["offset"]
+            end = start + dtype.itemsize * int(np.prod(shape))
+            return self._data[start:end].view(dtype).reshape(shape)
+        if kind == "object_array":
+            arr = np.empty(len(description["items"]), dtype=np.object)
+            arr[:] = [self.decode(v) for v in description["items"]]
+            return arr.reshape(description["shape"])
+        if kind == "sparse":
+            return self._decode_sparse(description)
+        if kind == "packed_tags":
+            value = tags.PackedTags()
+            value._tags = self.decode(description["tags"])
+            value._sizes = self.decode(description["sizes"])
+            return value
+        if kind == "scalar":
+            return np.dtype(description["dtype"]).type(description["value"])
+        if kind == "value":
+            return description["value"]
+        if kind == "list":
+            return [self.decode(v) for v in description["items"]]
+        if kind == "tuple":
+            return tuple(self.decode(v) for v in description["items"])
+        if kind == "dict":
+            return {self.decode(k): self.decode(v) for k, v in description["items"]}
+        raise ValueError("Unknown type " + kind + " in stored bucket")
+
+    def _decode_sparse(self, description):
+        fmt = description["format"]
+        shape = tuple(description["shape"])
+        arrays = {k: self.decode(v) for k, v in description["arrays"].items()}
+        # Assign the arrays directly, rather than passing them to the
+        # constructor, since the latter may scan or copy the arrays.
+        mat = getattr(sps, fmt + "_matrix")(shape, dtype=np.dtype(description["dtype"]))
+        for field in _SPARSE_FIELDS[fmt]:
+            setattr(mat, field, arrays[field])
+        return mat
@@ -5,6 +5,8 @@ import warnings
 import numpy as np
 from scipy import sparse as sps
 
+from porepy.utils import memory, sparse_mat
+
 
 # Module level constants, used to define sides of a mortar grid.
 # This is in essence an Enum, but that led to trouble in pickling a GridBucket.
@@ -71,7 +73,7 @@ class MortarGrid(object):
 
         self.dim = dim
         self.side_grids = side_grids.copy()
-        self.sides = np.array(self.side_grids.keys)
+        self.sides = np.array(list(self.side_grids.keys()))
 
         if not (self.num_sides() == 1 or self.num_sides() == 2):
             raise ValueError("The number of sides have to be 1 or 2")
@@ -229,6 +231,7 @@ class MortarGrid(object):
         matrix = sps.bmat(matrix)
         self._slave_to_mortar_int = matrix * self._slave_to_mortar_int
         self._master_to_mortar_int = matrix * self._master_to_mortar_int
+        self.clear_cache()
 
         # Update the side grids
         for side, g in side_grids.items():
@@ -260,11 +263,13 @@ class MortarGrid(object):
 
         # Update the low_to_mortar_int map. No need to update the high_to_mortar_int.
         self._slave_to_mortar_int = sps.bmat(matrix, format="csc")
+        self.clear_cache()
         self._check_mappings()
 
     def update_master(self, matrix):
         # Make a comment here
         self._master_to_mortar_int = self._master_to_mortar_int * matrix
+        self.clear_cache()
         self._check_mappings()
 
     def num_sides(self):
@@ -323,7 +328,9 @@ class MortarGrid(object):
                 Size: g_master.num_faces x mortar_grid.num_cells.
 
         """
-        return self._convert_to_vector_variable(self._master_to_mortar_int, nd)
+        return self._projection(
+            "master_to_mortar_int", nd, lambda: self._master_to_mortar_int
+        )
 
     def slave_to_mortar_int(self, nd=1):
         """ Project values from cells on the slave side to the mortar, by
@@ -344,7 +351,9 @@ class MortarGrid(object):
                 Size: g_slave.num_cells x mortar_grid.num_cells.
 
         """
-        return self._convert_to_vector_variable(self._slave_to_mortar_int, nd)
+        return self._projection(
+            "slave_to_mortar_int", nd, lambda: self._slave_to_mortar_int
+        )
 
     def master_to_mortar_avg(self, nd=1):
         """ Project values from faces of master to the mortar, by averaging quantities
@@ -366,10 +375,12 @@ class MortarGrid(object):
                 Size: g_master.num_faces x mortar_grid.num_cells.
 
         """
-        row_sum = self._master_to_mortar_int.sum(axis=1).A.ravel()
-        return self._convert_to_vector_variable(
-            sps.diags(1.0 / row_sum) * self._master_to_mortar_int, nd
-        )
+
+        def compute():
+            row_sum = self._master_to_mortar_int.sum(axis=1).A.ravel()
+            return sps.diags(1.0 / row_sum) * self._master_to_mortar_int
+
+        return self._projection("master_to_mortar_avg", nd, compute)
 
     def slave_to_mortar_avg(self, nd=1):
         """ Project values from cells at the slave to the mortar, by averaging
@@ -391,10 +402,12 @@ class MortarGrid(object):
                 Size: g_slave.num_cells x mortar_grid.num_cells.
 
         """
-        row_sum = self._slave_to_mortar_int.sum(axis=1).A.ravel()
-        return self._convert_to_vector_variable(
-            sps.diags(1.0 / row_sum) * self._slave_to_mortar_int, nd
-        )
+
+        def compute():
+            row_sum = self._slave_to_mortar_int.sum(axis=1).A.ravel()
+            return sps.diags(1.0 / row_sum) * self._slave_to_mortar_int
+
+        return self._projection("slave_to_mortar_avg", nd, compute)
 
     # IMPLEMENTATION NOTE: The reverse projections, from mortar to master/slave are
     # found by taking transposes, and switching average and integration (since we are
@@ -419,7 +432,9 @@ class MortarGrid(object):
                 Size: mortar_grid.num_cells x g_master.num_faces.
 
         """
-        return self._convert_to_vector_variable(self.master_to_mortar_avg().T, nd)
+        return self._projection(
+            "mortar_to_master_int", nd, lambda: self.master_to_mortar_avg().T
+        )
 
     def mortar_to_slave_int(self, nd=1):
         """ Project values from the mortar to cells at the slave, by summing quantities
@@ -440,7 +455,9 @@ class MortarGrid(object):
                 Size: mortar_grid.num_cells x g_slave_num_faces.
 
         """
-        return self._convert_to_vector_variable(self.slave_to_mortar_avg().T, nd)
+        return self._projection(
+            "mortar_to_slave_int", nd, lambda: self.slave_to_mortar_avg().T
+        )
 
     def mortar_to_master_avg(self, nd=1):
         """ Project values from the mortar to faces of master, by averaging
@@ -462,7 +479,9 @@ class MortarGrid(object):
                 Size: mortar_grid.num_cells x g_master.num_faces.
 
         """
-        return self._convert_to_vector_variable(self.master_to_mortar_int().T, nd)
+        return self._projection(
+            "mortar_to_master_avg", nd, lambda: self.master_to_mortar_int().T
+        )
 
     def mortar_to_slave_avg(self, nd=1):
         """ Project values from the mortar to slave, by averaging quantities from the
@@ -484,14 +503,59 @@ class MortarGrid(object):
                 Size: mortar_grid.num_cells x g_slave.num_faces.
 
         """
-        return self._convert_to_vector_variable(self.slave_to_mortar_int().T, nd)
+        return self._projection(
+            "mortar_to_slave_avg", nd, lambda: self.slave_to_mortar_int().T
+        )
+
+    def clear_cache(self):
+        """ Remove the cached projection matrices from the mortar grid.
+
+        The projections are recomputed automatically when the mappings are
+        changed by update_mortar(), update_slave() or update_master(), or when
+        the mappings are reassigned. This method is only needed if the
+        mappings are modified in place.
 
-    def _convert_to_vector_variable(self, matrix, nd):
-        """ Convert the scalar projection to a vector quantity. If the prescribed
-        dimension is 1 (default for all the above methods), the projection matrix
-        will in effect not be altered.
         """
-        return sps.kron(matrix, sps.eye(nd)).tocsc()
+        self.__dict__.pop("_projection_cache", None)
+
+    def _projection(self, kind, nd, compute):
+        """ Memoize a projection matrix.
+
+        The projection for scalar quantities is computed by compute(), and
+        expanded to vector quantities by sparse_mat.kron_eye(). Projections
+        are cached for each combination of kind and nd, and recomputed if
+        the mappings _master_to_mortar_int or _slave_to_mortar_int have been
+        reassigned since the projection was computed.
+
+        The arrays of the cached matrices are set to read only, to avoid that
+        modifications by the caller corrupt the cache.
+
+        Parameters:
+            kind (str): Identifier of the projection.
+            nd (int): Spatial dimension of the projected quantity.
+            compute (callable): Function without arguments that computes the
+                projection for scalar quantities.
+
+        Returns:
+            sps.csc_matrix: The projection matrix.
+
+        """
+        cache = self.__dict__.setdefault("_projection_cache", {})
+        master, slave = self._master_to_mortar_int, self._slave_to_mortar_int
+        if (kind, nd) in cache:
+            old_master, old_slave, value = cache[(kind, nd)]
+            if old_master is master and old_slave is slave:
+                return value
+
+        if nd == 1:
+            value = sparse_mat.kron_eye(compute(), 1)
+        else:
+            value = sparse_mat.kron_eye(self._projection(kind, 1, compute), nd)
+        value.sum_duplicates()
+        for arr in (value.data, value.indices, value.indptr):
+            arr.flags.writeable = False
+        cache[(kind, nd)] = (master, slave, value)
+        return value
 
     def sign_of_mortar_sides(self, nd=1):
         """ Assign positive or negative weight to the two sides of a mortar grid.
@@ -548,6 +612,59 @@ class MortarGrid(object):
             diams[pos] = g.cell_diameters()
         return np.concatenate(diams).ravel()
 
+    def compact(self, geometry_dtype=None):
+        """ Reduce the memory footprint of the mortar grid.
+
+        The side grids are compacted by Grid.compact(), and the index arrays
+        of the projection matrices are stored as 32 bit integers.
+
+        Parameters:
+            geometry_dtype (np.dtype, optional): If provided, the geometry of
+                the mortar grid and its side grids is converted to this type.
+                See Grid.compact() for limitations.
+
+        Returns:
+            MortarGrid: The mortar grid itself, modified in place.
+
+        """
+        for g in self.side_grids.values():
+            g.compact(geometry_dtype)
+        for value in self.__dict__.values():
+            if sps.issparse(value):
+                memory.compact_sparse(value)
+        if geometry_dtype is not None:
+            for attr in ("cell_volumes", "cell_centers"):
+                if hasattr(self, attr):
+                    setattr(self, attr, getattr(self, attr).astype(geometry_dtype))
+        return self
+
+    def memory_report(self):
+        """ Memory consumption of the mortar grid, broken down by attribute.
+
+        The side grids are reported in total, under the key "side_grids",
+        and cached projection matrices under the key "cache". See
+        Grid.memory_report() for details.
+
+        Returns:
+            dict: For each attribute that holds numerical data, the number of
+                bytes used.
+
+        """
+        report = {}
+        for key, value in self.__dict__.items():
+            if key == "_projection_cache":
+                continue
+            size = memory.nbytes(value)
+            if size > 0:
+                report[key] = size
+
+        # The mappings in the cache signatures are not counted
+        cache = self.__dict__.get("_projection_cache", {})
+        size = sum(memory.nbytes(value) for _, _, value in cache.values())
+        if size > 0:
+            report["cache"] = size
+        return report
+
     def _check_mappings(self, tol=1e-4):
         row_sum = self._master_to_mortar_int.sum(axis=1)
         if not (row_sum.min() > tol):
@@ -612,7 +729,7 @@ class BoundaryMortar(MortarGrid):
 
         self.dim = dim
         self.side_grids = {0: mortar_grid}
-        self.sides = np.array(self.side_grids.keys)
+        self.sides = np.array(list(self.side_grids.keys()))
 
         if not (self.num_sides() == 1 or self.num_sides() == 2):
             raise ValueError("The number of sides have to be 1 or 2")
@@ -262,6 +262,8 @@ def remesh_1d(g_old, num_nodes, tol=1e-6):
             for tag in pp.utils.tags.standard_face_tags():
                 g.tags[tag][f_new] = g_old.tags[tag][f_old]
 
+    # The face tags are modified in place
+    g.clear_cache()
     g.update_boundary_node_tag()
 
     return g
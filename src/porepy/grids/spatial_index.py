@@ -0,0 +1,272 @@
+""" Spatial indices for point location and closest cell queries on grids.
+
+The module contains a locator for exact point-in-cell queries, based on a
+uniform binning of the bounding boxes of the cells, and a wrapper around a
+KD-tree of cell centers for closest cell queries. Both work on a list of
+grids, so that the same functionality can be used for single grids and for
+all grids in a GridBucket. All queries are vectorized over the points.
+
+The structures are usually accessed through Grid.closest_cell(),
+Grid.locate_points() and the corresponding methods in GridBucket, which build
+and cache the indices on demand.
+
+"""
+import numpy as np
+import scipy.spatial
+
+from porepy.utils.mcolon import mcolon
+
+
+def pad_points(p):
+    """ Represent a set of points as a 3 x n array.
+
+    Parameters:
+        p (np.ndarray, nd x n): Point coordinates, with nd <= 3. Missing
+            coordinates are treated as zeros.
+
+    Returns:
+        np.ndarray, 3 x n: The points.
+
+    """
+    p = np.atleast_2d(p)
+    if p.shape[0] < 3:
+        z = np.zeros((3 - p.shape[0], p.shape[1]))
+        p = np.vstack((p, z))
+    return p
+
+
+class CellCenterTree(object):
+    """ KD-tree over the cell centers of a set of grids.
+
+    Attributes:
+        offsets (np.ndarray): Global index of the first cell of each grid.
+            The last element is the total number of cells.
+        tree (scipy.spatial.cKDTree): Tree over all cell centers.
+
+    """
+
+    def __init__(self, grids):
+        """
+        Parameters:
+            grids (list of pp.Grid): Grids to be indexed. The geometry
+                should have been computed.
+
+        """
+        self.offsets = np.hstack((0, np.cumsum([g.num_cells for g in grids])))
+        centers = np.hstack([g.cell_centers for g in grids])
+        self.tree = scipy.spatial.cKDTree(centers.T)
+
+    def query(self, p):
+        """ Find the closest cell center for a set of points.
+
+        If several centers have the same distance, one of them is returned.
+
+        Parameters:
+            p (np.ndarray, 3 x n): Point coordinates.
+
+        Returns:
+            np.ndarray, int: Global index of the closest cell for each point.
+            np.ndarray, double: Distance to the closest cell center.
+
+        """
+        dist, ind = self.tree.query(p.T)
+        return np.atleast_1d(ind).astype(np.int), np.atleast_1d(dist)
+
+
+class CellLocator(object):
+    """ Spatial index for exact point-in-cell location on a set of grids.
+
+    The bounding boxes of the cells are registered in a uniform Cartesian
+    binning of the domain. For a query point, the candidate cells are those
+    registered in the bin of the point, and whose bounding box contains the
+    point. The candidates are then tested by checking that the point is on
+    the inner side of all the faces of the cell. This test is exact for
+    convex cells, which covers all simplex and Cartesian grids. For
+    non-convex cells, points close to a reflex corner may not be located.
+
+    For grids of dimension less than 3, the point should lie in the plane
+    (line) of the cell; the bounding box test only allows deviations up to
+    the tilt of the cell relative to the coordinate axes.
+
+    Attributes:
+        offsets (np.ndarray): Global index of the first cell of each grid.
+            The last element is the total number of cells.
+        tol (double): Geometric tolerance.
+
+    """
+
+    def __init__(self, grids, tol=1e-10):
+        """
+        Parameters:
+            grids (list of pp.Grid): Grids to be indexed. The geometry
+                should have been computed.
+            tol (double, optional): Geometric tolerance, used both for the
+                bounding boxes and the face tests. Defaults to 1e-10.
+
+        """
+        self.tol = tol
+        self.offsets = np.hstack((0, np.cumsum([g.num_cells for g in grids])))
+        num_cells = self.offsets[-1]
+
+        # Bounding boxes, and the signed unit normals and centers of the faces
+        # of all cells
+        bb_min, bb_max = [], []
+        face_ptr, normals, centers = [np.zeros(1, dtype=np.int)], [], []
+        for g in grids:
+            cn = g.cell_nodes().tocsc()
+            x = g.nodes[:, cn.indices]
+            start = cn.indptr[:-1]
+            bb_min.append(np.minimum.reduceat(x, start, axis=1))
+            bb_max.append(np.maximum.reduceat(x, start, axis=1))
+
+            cf = g.cell_faces.tocsc()
+            faces = cf.indices
+            n = g.face_normals[:, faces] * cf.data
+            length = np.linalg.norm(n, axis=0)
+            n[:, length > 0] /= length[length > 0]
+            normals.append(n)
+            centers.append(g.face_centers[:, faces])
+            face_ptr.append(cf.indptr[1:] + face_ptr[-1][-1])
+
+        bb_min = np.hstack(bb_min)
+        bb_max = np.hstack(bb_max)
+        self._bb_min = bb_min - tol
+        self._bb_max = bb_max + tol
+        self._face_ptr = np.hstack(face_ptr)
+        self._normals = np.hstack(normals)
+        self._face_centers = np.hstack(centers)
+
+        # Set up the binning. The bin size is chosen as the mean extension of
+        # the cells, subject to an upper limit on the number of bins
+        self._x_min = bb_min.min(axis=1)
+        extent = bb_max.max(axis=1) - self._x_min
+        size = np.mean(np.max(bb_max - bb_min, axis=0))
+        size = max(size, np.max(extent) / max(num_cells, 1) ** (1 / 3), tol)
+        while True:
+            num_bins = np.maximum(np.ceil(extent / size), 1).astype(np.int)
+            if np.prod(num_bins) <= 8 * num_cells + 1:
+                break
+            size *= 2
+        self._bin_size = size
+        self._num_bins = num_bins
+
+        # Register each cell in all bins overlapped by its bounding box. To
+        # avoid registering cells in bins they merely touch (this is the
+        # common case for structured grids), the bounding boxes are shrunk
+        # slightly. The queries compensate by also searching bins within the
+        # margin of the query points.
+        eps = 1e-8
+        self._margin = max(tol, eps * size)
+        upper = self._num_bins.reshape((-1, 1)) - 1
+        x_min = self._x_min.reshape((-1, 1))
+        lo = np.floor((bb_min - x_min) / size + eps).astype(np.int)
+        lo = np.clip(lo, 0, upper)
+        hi = np.ceil((bb_max - x_min) / size - eps).astype(np.int) - 1
+        hi = np.clip(hi, lo, upper)
+        cells, lin = self._expand_bins(lo, hi)
+
+        order = np.argsort(lin, kind="stable")
+        self._bin_cells = cells[order]
+        self._bin_ptr = np.hstack(
+            (0, np.cumsum(np.bincount(lin, minlength=np.prod(num_bins))))
+        )
+
+    def _bin_index(self, x):
+        ind = np.floor((x - self._x_min.reshape((-1, 1))) / self._bin_size)
+        return np.clip(ind.astype(np.int), 0, self._num_bins.reshape((-1, 1)) - 1)
+
+    def _expand_bins(self, lo, hi):
+        """ Linear indices of all bins in the boxes spanned by the bin indices
+        lo and hi, together with the index of the box each bin belongs to.
+        """
+        ind = np.arange(lo.shape[1])
+        lin = np.zeros(lo.shape[1], dtype=np.int)
+        for d in range(3):
+            counts = hi[d, ind] - lo[d, ind] + 1
+            offset = mcolon(lo[d, ind], hi[d, ind] + 1)
+            lin = np.repeat(lin, counts) * self._num_bins[d] + offset
+            ind = np.repeat(ind, counts)
+        return ind, lin
+
+    def locate(self, p, chunk_size=100000):
+        """ Find the cells containing a set of points.
+
+        If a point is on the boundary between cells, one of the cells is
+        returned.
+
+        Parameters:
+            p (np.ndarray, 3 x n): Point coordinates.
+            chunk_size (int, optional): Number of points processed at the same
+                time. Limits the memory consumption. Defaults to 1e5.
+
+        Returns:
+            np.ndarray, int: Global index of the cell containing each point,
+                -1 if the point is not located in any cell.
+
+        """
+        num_pts = p.shape[1]
+        cell_ind = -np.ones(num_pts, dtype=np.int)
+        for start in range(0, num_pts, chunk_size):
+            end = min(start + chunk_size, num_pts)
+            cell_ind[start:end] = self._locate_chunk(p[:, start:end])
+        return cell_ind
+
+    def _locate_chunk(self, p):
+        num_pts = p.shape[1]
+        result = -np.ones(num_pts, dtype=np.int)
+
+        # Points outside the binned domain have no candidates
+        inside = np.all(
+            np.logical_and(
+                p >= self._bb_min.min(axis=1).reshape((-1, 1)),
+                p <= self._bb_max.max(axis=1).reshape((-1, 1)),
+            ),
+            axis=0,
+        )
+        pts = np.where(inside)[0]
+        if pts.size == 0:
+            return result
+        # Points closer than the tolerance to a bin boundary are also
+        # searched in the neighboring bins
+        bin_pt, lin = self._expand_bins(
+            self._bin_index(p[:, pts] - self._margin),
+            self._bin_index(p[:, pts] + self._margin),
+        )
+
+        # Candidate (point, cell) pairs
+        counts = self._bin_ptr[lin + 1] - self._bin_ptr[lin]
+        pair_pt = np.repeat(pts[bin_pt], counts)
+        pair_cell = self._bin_cells[mcolon(self._bin_ptr[lin], self._bin_ptr[lin + 1])]
+
+        # Filter on bounding boxes
+        x = p[:, pair_pt]
+        in_box = np.all(
+            np.logical_and(
+                x >= self._bb_min[:, pair_cell], x <= self._bb_max[:, pair_cell]
+            ),
+            axis=0,
+        )
+        pair_pt = pair_pt[in_box]
+        pair_cell = pair_cell[in_box]
+        if pair_pt.size == 0:
+            return result
+
+        # Test the points against all faces of the candidate cells
+        start = self._face_ptr[pair_cell]
+        end = self._face_ptr[pair_cell + 1]
+        num_faces = end - start
+        face_ind = mcolon(start, end)
+        pair_of_face = np.repeat(np.arange(pair_pt.size), num_faces)
+        dist = np.sum(
+            self._normals[:, face_ind]
+            * (p[:, pair_pt[pair_of_face]] - self._face_centers[:, face_ind]),
+            axis=0,
+        )
+        num_violated = np.bincount(
+            pair_of_face, weights=dist > self.tol, minlength=pair_pt.size
+        )
+        hit = num_violated == 0
+
+        # Assign one of the containing cells to each point
+        result[pair_pt[hit][::-1]] = pair_cell[hit][::-1]
+        return result
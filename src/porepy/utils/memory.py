@@ -0,0 +1,75 @@
+"""
+Utility functions for memory accounting and compact storage of grid data.
+
+The functions are used by the memory_report() and compact() methods of Grid,
+MortarGrid and GridBucket.
+"""
+import numpy as np
+import scipy.sparse as sps
+
+from porepy.utils import tags
+
+
+def nbytes(obj):
+    """ Estimate the memory consumed by the numerical data of an object.
+
+    Numpy arrays and sparse matrices are counted by the size of their data
+    buffers. Dictionaries, lists and tuples are traversed recursively, and
+    objects with a method memory_report() (grids, mortar grids) are counted by
+    the total of their report. All other objects are counted as zero, thus the
+    estimate is a lower bound on the actual memory consumption.
+
+    Arrays that are views of other arrays are counted in full; the estimate
+    may therefore be too large if views are stored in several places.
+
+    Parameters:
+        obj: The object to be measured.
+
+    Returns:
+        int: Number of bytes.
+
+    """
+    if isinstance(obj, np.ndarray):
+        if obj.dtype == np.object:
+            return obj.nbytes + sum(nbytes(o) for o in obj.ravel())
+        return obj.nbytes
+    if sps.issparse(obj):
+        return sum(
+            getattr(obj, field).nbytes
+            for field in ("data", "indices", "indptr", "row", "col", "offsets")
+            if isinstance(getattr(obj, field, None), np.ndarray)
+        )
+    if isinstance(obj, tags.PackedTags):
+        return obj.nbytes()
+    if isinstance(obj, dict):
+        return sum(nbytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(nbytes(v) for v in obj)
+    if hasattr(obj, "memory_report"):
+        return sum(obj.memory_report().values())
+    return 0
+
+
+def compact_sparse(mat):
+    """ Represent the index arrays of a compressed sparse matrix by 32 bit
+    integers, if the size of the matrix allows it.
+
+    The matrix is modified in place. Matrices in other formats than csc and
+    csr are left untouched.
+
+    Parameters:
+        mat (sps.spmatrix): Matrix to be compacted.
+
+    Returns:
+        sps.spmatrix: The same matrix.
+
+    """
+    if not sps.isspmatrix_csc(mat) and not sps.isspmatrix_csr(mat):
+        return mat
+    max_int = np.iinfo(np.int32).max
+    if mat.nnz <= max_int and max(mat.shape) <= max_int:
+        if mat.indices.dtype != np.int32:
+            mat.indices = mat.indices.astype(np.int32)
+        if mat.indptr.dtype != np.int32:
+            mat.indptr = mat.indptr.astype(np.int32)
+    return mat
@@ -143,6 +143,10 @@ def unique_columns_tol(mat, tol=1e-8, exponent=2):
     Resembles Matlab's uniquetol function, as applied to columns. To rather
     work at rows, use a transpose.
 
+    The columns are visited in order, and a column is merged with the first
+    preserved column within the tolerance, if any. Close columns are found by
+    sorting the columns into a Cartesian grid (spatial hashing), thus the
+    cost is essentially linear in the number of columns.
 
     Parameters:
         mat (np.ndarray, nd x n_pts): Columns to be uniquified
@@ -177,9 +181,7 @@ def unique_columns_tol(mat, tol=1e-8, exponent=2):
 
     # If the matrix is integers, and the tolerance less than 1/2, we can use
     # the new unique function that ships with numpy 1.13. This comes with a
-    # significant speedup, in particular for large arrays (runtime has gone
-    # from hours to split-seconds - that is, the alternative implementation
-    # below is ineffecient).
+    # significant speedup, in particular for large arrays.
     # If the current numpy version is older, an ugly hack is possible: Download
     # the file from the numpy repositories, and place it somewhere in
     # $PYHTONPATH, with the name 'numpy_113_unique'.
@@ -203,42 +205,103 @@ def unique_columns_tol(mat, tol=1e-8, exponent=2):
             except:
                 pass
 
-    def dist(p, pset):
-        " Helper function to compute distance "
-        if p.ndim == 1:
-            pt = p.reshape((-1, 1))
-        else:
-            pt = p
-
-        return np.power(
-            np.sum(np.power(np.abs(pt - pset), exponent), axis=0), 1 / exponent
-        )
-
+    # Find all pairs of points closer than the tolerance. The points are
+    # visited in order, and a point is merged with the first kept point that
+    # is close to it, if any.
     (nd, l) = mat.shape
+    later, earlier = _close_pairs(mat, tol * np.sqrt(nd), exponent)
+
+    # By default, all columns are kept, and points map to themselves
+    keep = np.ones(l, dtype=np.bool)
+    rep = np.arange(l)
+
+    # Points with no earlier close point are kept. A point whose earlier close
+    # points are all of this kind is merged with the first of them.
+    has_earlier = np.bincount(later, minlength=l) > 0
+    unresolved = np.zeros(l, dtype=np.bool)
+    unresolved[later[has_earlier[earlier]]] = True
+    simple = np.logical_not(unresolved[later])
+    first_earlier = np.full(l, l)
+    np.minimum.at(first_earlier, later[simple], earlier[simple])
+    merged = first_earlier < l
+    keep[merged] = False
+    rep[merged] = first_earlier[merged]
+
+    # The remaining points depend on chains of close points, and are treated
+    # in order.
+    ind = np.flatnonzero(unresolved[later])
+    ind = ind[np.lexsort((earlier[ind], later[ind]))]
+    for i, j in zip(later[ind], earlier[ind]):
+        if keep[j] and rep[i] == i:
+            keep[i] = False
+            rep[i] = j
+
+    # Finally find which elements we kept, and map the old points to the
+    # unique subspace.
+    new_2_old = np.argwhere(keep).ravel()
+    old_2_new = (np.cumsum(keep) - 1)[rep]
 
-    # By default, no columns are kept
-    keep = np.zeros(l, dtype=np.bool)
+    return mat[:, keep], new_2_old, old_2_new
 
-    # We will however keep the first point
-    keep[0] = True
-    keep_counter = 1
 
-    # Map from old points to the unique subspace. Defaults to map to itself.
-    old_2_new = np.arange(l)
+def _close_pairs(mat, radius, exponent=2):
+    """ Find all pairs of columns with distance less than a given radius.
 
-    # Loop over all points, check if it is already represented in the kept list
-    for i in range(1, l):
-        proximate = np.argwhere(dist(mat[:, i], mat[:, keep]) < tol * np.sqrt(nd))
+    The points are sorted into a Cartesian grid of cells that are at least as
+    large as the radius, so that only points in the same or neighboring cells
+    need to be compared. The cost is linear in the number of points, unless
+    many points are clustered within the radius.
 
-        if proximate.size > 0:
-            # We will not keep this point
-            old_2_new[i] = proximate[0]
-        else:
-            # We have found a new point
-            keep[i] = True
-            old_2_new[i] = keep_counter
-            keep_counter += 1
-    # Finally find which elements we kept
-    new_2_old = np.argwhere(keep).ravel()
+    Parameters:
+        mat (np.ndarray, nd x n_pts): Coordinates of the points.
+        radius (double): Distance for which points are considered close.
+        exponent (double, optional): Exponent in norm used in distance
+            calculation. Defaults to 2.
 
-    return mat[:, keep], new_2_old, old_2_new
+    Returns:
+        np.array: Index of the last point of the close pairs.
+        np.array: Index of the first point of the close pairs.
+
+    """
+    nd, num_pts = mat.shape
+    pts = mat.astype(np.float)
+
+    # Size of the cells. The number of cells in each direction is limited so
+    # that the linear cell index cannot overflow.
+    low = pts.min(axis=1).reshape((-1, 1))
+    extent = np.max(pts.max(axis=1) - low.ravel())
+    cell_size = max(radius, extent / (2 ** (60 // nd) - 3))
+    if cell_size == 0:
+        cell_size = 1
+    cell = np.floor((pts - low) / cell_size).astype(np.int64) + 1
+    num_cells = cell.max(axis=1) + 2
+    stride = np.hstack((1, np.cumprod(num_cells[:-1]))).astype(np.int64)
+    key = stride.dot(cell)
+
+    order = np.argsort(key, kind="mergesort")
+    sorted_key = key[order]
+
+    # Search the neighboring cells of each point. Each pair of neighboring
+    # cells need only be considered once, thus only offsets with a
+    # non-negative linear index are used. The search is done in the sorted
+    # order, which is much faster for large point sets.
+    offsets = stride.dot(np.array(np.meshgrid(*([[-1, 0, 1]] * nd))).reshape((nd, -1)))
+    later, earlier = [], []
+    for offset in offsets[offsets >= 0]:
+        nb_key = sorted_key + offset
+        lo = np.searchsorted(sorted_key, nb_key, side="left")
+        num = np.searchsorted(sorted_key, nb_key, side="right") - lo
+        first = np.repeat(order, num)
+        second = order[np.arange(num.sum()) - np.repeat(np.cumsum(num) - num - lo, num)]
+        if offset == 0:
+            # Points in the same cell: Consider each pair once
+            cand = np.flatnonzero(second < first)
+            first, second = first[cand], second[cand]
+        dist = np.power(
+            np.sum(np.power(np.abs(pts[:, first] - pts[:, second]), exponent), axis=0),
+            1 / exponent,
+        )
+        close = dist < radius
+        later.append(np.maximum(first[close], second[close]))
+        earlier.append(np.minimum(first[close], second[close]))
+    return np.hstack(later), np.hstack(earlier)
@@ -18,7 +18,12 @@ Methods for tag handling. The following primary applications are intended:
     list entry for each fracture:
         network.tags['fracture_id'] = [1,2]
     --
+
+Boolean grid tags can be stored in a bit-packed format by the class
+PackedTags, see Grid.compact().
 """
+from collections.abc import MutableMapping
+
 import numpy as np
 
 
@@ -92,7 +97,83 @@ def add_tags(parent, new_tags):
     dictionaries (parent.tags and new_tags) will be decided by those in
     new_tags.
     """
-    old_tags = getattr(parent, "tags", {}).copy()
-    nt = dict(old_tags)
+    nt = getattr(parent, "tags", {}).copy()
     nt.update(new_tags)
     parent.tags = nt
+
+
+class PackedTags(MutableMapping):
+    """
+    Dictionary of tags, where boolean arrays are stored bit-packed, using one
+    bit per entry rather than one byte.
+
+    Accessing a packed tag returns an unpacked, read only copy, while the
+    packed array is kept. To modify a packed tag, assign a new array, which
+    is stored unpacked until pack() is called. Tags that are not boolean
+    arrays are stored as they are.
+    """
+
+    def __init__(self, tags=None):
+        self._tags = {}
+        # Length of the packed arrays, keyed by tag
+        self._sizes = {}
+        if tags is not None:
+            self.update(tags)
+            self.pack()
+
+    def __getitem__(self, key):
+        value = self._tags[key]
+        if key in self._sizes:
+            value = np.unpackbits(value)[: self._sizes[key]].astype(bool)
+            # In-place modifications of the copy would be lost
+            value.flags.writeable = False
+        return value
+
+    def stored(self, key):
+        """ The stored value of a tag, packed or not, without unpacking it.
+
+        The stored value is replaced when the tag is assigned or packed, see
+        Grid._cached().
+        """
+        return self._tags[key]
+
+    def __setitem__(self, key, value):
+        self._sizes.pop(key, None)
+        self._tags[key] = value
+
+    def __delitem__(self, key):
+        self._sizes.pop(key, None)
+        del self._tags[key]
+
+    def __iter__(self):
+        return iter(self._tags)
+
+    def __len__(self):
+        return len(self._tags)
+
+    def __repr__(self):
+        return "PackedTags(" + repr(dict(self)) + ")"
+
+    def pack(self):
+        """ Pack all boolean one-dimensional arrays."""
+        for key, value in self._tags.items():
+            if (
+                key not in self._sizes
+                and isinstance(value, np.ndarray)
+                and value.dtype == bool
+                and value.ndim == 1
+            ):
+                self._sizes[key] = value.size
+                self._tags[key] = np.packbits(value)
+
+    def copy(self):
+        """ Copy the tags. Arrays are copied, and the packing is preserved."""
+        new = PackedTags()
+        for key, value in self._tags.items():
+            new._tags[key] = value.copy() if hasattr(value, "copy") else value
+        new._sizes = self._sizes.copy()
+        return new
+
+    def nbytes(self):
+        """ Memory consumption of the stored arrays, in bytes."""
+        return sum(v.nbytes for v in self._tags.values() if hasattr(v, "nbytes"))
@@ -545,6 +545,18 @@ class BasicsTest(unittest.TestCase):
 
     # ------------------------------------------------------------------------------#
 
+    def test_create_partition_2d_cart_cdepth1(self):
+        g = pp.CartGrid([5, 5])
+        g.compute_geometry()
+        part = co.create_partition(co.tpfa_matrix(g), cdepth=1)
+        known = np.array(
+            [0, 0, 1, 2, 2, 0, 3, 1, 4, 2, 5, 5, 6, 7, 7, 10, 8, 11, 9, 12, 10, 10, 11]
+            + [12, 12]
+        )
+        self.assertTrue(np.array_equal(part, known))
+
+    # ------------------------------------------------------------------------------#
+
     def test_create_partition_2d_tri(self):
         g = pp.StructuredTriangleGrid([3, 2])
         g.compute_geometry()
@@ -0,0 +1,115 @@
+import numpy as np
+import scipy.sparse as sps
+import unittest
+
+import porepy as pp
+from porepy import ad
+from porepy.ad.forward_mode import initAdArrays
+
+
+class AdGraphTest(unittest.TestCase):
+    def compare(self, f, variables, parameters=None, num_evaluations=3):
+        """ Compare traced evaluation with eager Ad_array evaluation."""
+        compiled = ad.trace(f, variables, parameters)
+        if parameters is None:
+            parameters = []
+        np.random.seed(0)
+        for _ in range(num_evaluations):
+            new_vars = [np.random.rand(v.size) + 0.5 for v in variables]
+            new_pars = [np.random.rand(v.size) + 0.5 for v in parameters]
+            ad_vars = initAdArrays(new_vars)
+            if not isinstance(ad_vars, list):
+                ad_vars = [ad_vars]
+            known = f(*(ad_vars + new_pars))
+            traced = compiled.evaluate(new_vars, new_pars)
+            self.assertTrue(np.allclose(traced.val, known.val))
+            self.assertTrue(np.allclose(traced.jac.A, sps.csr_matrix(known.jac).A))
+
+    def test_arithmetic(self):
+        def f(x, y):
+            return (
+                1 * x
+                + 2 * y
+                + 3 * x * y
+                + 4 * x * x
+                - 5 * y ** -1
+                + x / y
+                + x ** 2
+                + 2 ** y
+            )
+
+        self.compare(f, [np.ones(3), np.ones(3)])
+
+    def test_functions(self):
+        def f(x, y):
+            return ad.exp(x) * ad.log(y) + ad.abs(x - y) + y ** x
+
+        self.compare(f, [np.ones(4), np.ones(4)])
+
+    def test_sign_has_no_derivative(self):
+        def f(x):
+            return ad.sign(x - 1) * x
+
+        compiled = ad.trace(f, np.ones(2))
+        res = compiled.evaluate(np.array([0.5, 2]))
+        self.assertTrue(np.allclose(res.val, [-0.5, 2]))
+        self.assertTrue(np.allclose(res.jac.A, np.diag([-1, 1])))
+
+    def test_matrix_products(self):
+        A = sps.csc_matrix(np.array([[1, 2, 0], [0, 3, 4]]))
+        B = sps.csr_matrix(np.array([[1, 0], [0, 0], [2, 1]]))
+
+        def f(x, y):
+            return y * (A * x) + A * (B * (y * y))
+
+        self.compare(f, [np.ones(3), np.ones(2)])
+
+    def test_concatenate(self):
+        def f(x, y):
+            return ad.concatenate([ad.exp(x) + y, ad.exp(y) + x])
+
+        self.compare(f, [np.ones(2), np.ones(2)])
+
+    def test_parameters_and_constant_subexpressions(self):
+        g = pp.CartGrid([4, 3])
+        g.compute_geometry()
+        div = g.cell_faces.T
+        avg = 0.5 * np.abs(g.cell_faces)
+        flux = sps.csr_matrix(np.random.rand(g.num_faces, g.num_cells))
+
+        def f(p, p0):
+            rho = ad.exp(0.1 * (p - 1))
+            rho0 = ad.exp(0.1 * (p0 - 1))
+            time = 0.2 * (rho - rho0) / 0.2 * g.cell_volumes
+            return time + div * (avg * rho * (flux * p))
+
+        self.compare(f, [np.zeros(g.num_cells)], [np.zeros(g.num_cells)])
+
+    def test_unchanged_parameters_are_not_recomputed(self):
+        def f(x, y):
+            return x * ad.exp(y)
+
+        compiled = ad.trace(f, np.ones(2), parameters=np.ones(2))
+        compiled.evaluate(np.ones(2), np.zeros(2))
+        exp_node = [n for n in compiled.nodes if n.op == "exp"][0]
+        exp_node.val[:] = 2
+        res = compiled.evaluate(np.array([1, 3]), np.zeros(2))
+        # The exponential depends only on the unchanged parameter
+        self.assertTrue(np.allclose(exp_node.val, 2))
+        self.assertTrue(np.allclose(res.val, [2, 6]))
+
+        res = compiled.evaluate(np.array([1, 3]), np.ones(2))
+        self.assertTrue(np.allclose(res.val, np.exp(1) * np.array([1, 3])))
+
+    def test_no_copy_shares_buffers(self):
+        def f(x):
+            return 2 * x
+
+        compiled = ad.trace(f, np.ones(2))
+        first = compiled.evaluate(np.ones(2), copy=False)
+        compiled.evaluate(2 * np.ones(2), copy=False)
+        self.assertTrue(np.allclose(first.val, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import numpy as np
+import unittest
+
+import porepy as pp
+
+
+def brute_force_pairs(box_min, box_max):
+    pairs = []
+    num_boxes = box_min.shape[1]
+    for i in range(num_boxes):
+        for j in range(i + 1, num_boxes):
+            if np.all(box_min[:, i] <= box_max[:, j]) and np.all(
+                box_min[:, j] <= box_max[:, i]
+            ):
+                pairs.append([i, j])
+    return np.array(pairs, dtype=np.int).reshape((-1, 2)).T
+
+
+class TestOverlappingBoxes(unittest.TestCase):
+    def test_intervals(self):
+        left = np.array([1, 0, 3, 2, 0])
+        right = np.array([2, 2, 4, 2, 0])
+        pairs = pp.bounding_box.overlapping_intervals(left, right)
+        known = np.array([[0, 0, 1, 1], [1, 3, 3, 4]])
+        self.assertTrue(np.array_equal(pairs, known))
+
+    def test_no_boxes(self):
+        for method in ("sweep", "grid"):
+            pairs = pp.bounding_box.overlapping_boxes(
+                np.zeros((3, 0)), np.zeros((3, 0)), method=method
+            )
+            self.assertTrue(pairs.shape == (2, 0))
+
+    def test_touching_boxes(self):
+        box_min = np.array([[0, 1, 2], [0, 1, 0]])
+        box_max = np.array([[1, 2, 3], [1, 2, 0.5]])
+        # Box 0 and 1 touch in a corner, box 2 is separated from both
+        for method in ("sweep", "grid"):
+            pairs = pp.bounding_box.overlapping_boxes(box_min, box_max, method=method)
+            self.assertTrue(np.array_equal(pairs, np.array([[0], [1]])))
+
+    def test_random_boxes(self):
+        rng = np.random.RandomState(0)
+        for nd in (1, 2, 3):
+            # Integer coordinates give many boxes that touch
+            box_min = rng.randint(0, 10, (nd, 80)).astype(np.float)
+            box_max = box_min + rng.randint(0, 4, (nd, 80))
+            known = brute_force_pairs(box_min, box_max)
+            for method in ("sweep", "grid"):
+                for cell_size in (None, 0.1, 5):
+                    pairs = pp.bounding_box.overlapping_boxes(
+                        box_min, box_max, method=method, cell_size=cell_size
+                    )
+                    self.assertTrue(np.array_equal(pairs, known))
+
+    def test_unknown_method(self):
+        self.assertRaises(
+            ValueError,
+            pp.bounding_box.overlapping_boxes,
+            np.zeros((2, 2)),
+            np.ones((2, 2)),
+            "octree",
+        )
+
+    def test_query_boxes(self):
+        rng = np.random.RandomState(1)
+        box_min = rng.randint(0, 10, (3, 60)).astype(np.float)
+        box_max = box_min + rng.randint(0, 4, (3, 60))
+        # Query with the last boxes, and compare with the pairs of all boxes
+        all_pairs = brute_force_pairs(box_min, box_max)
+        known = all_pairs[:, np.logical_and(all_pairs[0] < 40, all_pairs[1] >= 40)]
+        known[1] -= 40
+        for chunk_size in (None, 1, 7):
+            pairs = pp.bounding_box.overlapping_query_boxes(
+                box_min[:, :40],
+                box_max[:, :40],
+                box_min[:, 40:],
+                box_max[:, 40:],
+                chunk_size=chunk_size,
+            )
+            self.assertTrue(np.array_equal(pairs, known))
+
+        pairs = pp.bounding_box.overlapping_query_boxes(
+            box_min, box_max, np.zeros((3, 0)), np.zeros((3, 0))
+        )
+        self.assertTrue(pairs.shape == (2, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import numpy as np
+import unittest
+
+import porepy as pp
+from porepy.grids.bucket_graph import BucketGraph
+
+
+class TestBucketGraph(unittest.TestCase):
+    def setUp(self):
+        self.g2 = pp.CartGrid([2, 2])
+        self.g1a = pp.CartGrid(2)
+        self.g1b = pp.CartGrid(2)
+        self.g0 = pp.PointGrid(np.zeros(3))
+        self.graph = BucketGraph()
+        for g in (self.g2, self.g1a, self.g1b, self.g0):
+            self.graph.add_node(g)
+        self.graph.add_edge(self.g1a, self.g0, {"name": "a0"})
+        self.graph.add_edge(self.g2, self.g1a, {"name": "2a"})
+        self.graph.add_edge(self.g2, self.g1b, {"name": "2b"})
+        self.graph.add_edge(self.g0, self.g1b, {"name": "b0"})
+
+    def test_iteration_order(self):
+        # Edges are listed by their first node, and the first node of an
+        # edge is the one that was added first.
+        edges = list(self.graph.edges())
+        self.assertTrue([d["name"] for _, d in edges] == ["2a", "2b", "a0", "b0"])
+        self.assertTrue(edges[3][0] == (self.g1b, self.g0))
+
+        names = [d["name"] for _, d in self.graph.edges_of_node(self.g0)]
+        self.assertTrue(names == ["a0", "b0"])
+        self.assertTrue(self.graph.neighbors(self.g1a) == [self.g0, self.g2])
+        self.assertTrue(self.graph.grids_of_dimension(1) == [self.g1a, self.g1b])
+        self.assertTrue(self.graph.dimensions() == [0, 1, 2])
+
+    def test_edge_lookup(self):
+        self.assertTrue(self.graph.edge_data(self.g0, self.g1a)["name"] == "a0")
+        self.assertTrue(self.graph.edge_data(self.g1a, self.g0)["name"] == "a0")
+        self.assertFalse(self.graph.has_edge(self.g1a, self.g1b))
+        self.assertRaises(KeyError, self.graph.edge_data, self.g1a, self.g1b)
+        self.assertRaises(ValueError, self.graph.add_edge, self.g0, self.g1a)
+
+    def test_remove_node(self):
+        self.graph.remove_node(self.g1a)
+        self.assertTrue(self.graph.number_of_nodes() == 3)
+        self.assertTrue(self.graph.number_of_edges() == 2)
+        self.assertTrue(self.g1a not in self.graph)
+        self.assertTrue(self.graph.grids_of_dimension(1) == [self.g1b])
+        # Numbers of the remaining nodes are kept
+        self.assertTrue(self.graph.node_number(self.g0) == 3)
+        self.assertTrue(self.graph.neighbors(self.g0) == [self.g1b])
+
+    def test_relabel_and_copy(self):
+        g_new = pp.CartGrid(3)
+        self.graph.node_data(self.g1a)["key"] = 1
+        self.graph.relabel({self.g1a: g_new})
+        self.assertTrue(self.graph.node_data(g_new)["key"] == 1)
+        self.assertTrue(self.graph.grids_of_dimension(1) == [g_new, self.g1b])
+        self.assertTrue(self.graph.edge_data(g_new, self.g0)["name"] == "a0")
+
+        copy = self.graph.copy()
+        self.assertTrue(list(copy) == list(self.graph))
+        self.assertTrue(
+            [e for e, _ in copy.edges()] == [e for e, _ in self.graph.edges()]
+        )
+        copy.node_data(g_new)["key"] = 2
+        self.assertTrue(self.graph.node_data(g_new)["key"] == 1)
+
+    def test_self_loop(self):
+        self.graph.add_edge(self.g2, self.g2, {"name": "22"})
+        names = [d["name"] for _, d in self.graph.edges()]
+        self.assertTrue(names == ["2a", "2b", "22", "a0", "b0"])
+        self.assertTrue(len(list(self.graph.edges_of_node(self.g2))) == 3)
+        self.graph.remove_node(self.g2)
+        self.assertTrue(self.graph.number_of_edges() == 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -199,6 +199,20 @@ class TestDistancePointSegments(unittest.TestCase):
         known_cp = np.array([[[1, 0], [1, 0]]])
         self.assertTrue(np.allclose(cp, known_cp))
 
+    def test_pairwise(self):
+        # Points before, on and after the segments, compared pairwise
+        rand = np.random.RandomState(0)
+        p = rand.rand(2, 20) * 3 - 1
+        start = rand.rand(2, 20)
+        end = rand.rand(2, 20)
+        d, cp = pp.distances.points_segments_pairwise(p, start, end)
+        for i in range(20):
+            d_known, cp_known = pp.distances.points_segments(
+                p[:, i], start[:, i], end[:, i]
+            )
+            self.assertTrue(d[i] == d_known[0, 0])
+            self.assertTrue(np.array_equal(cp[:, i], cp_known[0, 0]))
+
 
 class TestDistancePointPolygon(unittest.TestCase):
     def test_norot_poly(self):
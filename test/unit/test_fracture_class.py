@@ -153,5 +153,100 @@ class TestReprStr(unittest.TestCase):
         f.__repr__()
 
 
+class TestCreateEllipticFractures(unittest.TestCase):
+    def test_same_as_elliptic_fracture(self):
+        rand = np.random.RandomState(0)
+        num_frac = 20
+        center = rand.rand(3, num_frac)
+        major_axis = rand.rand(num_frac) + 0.5
+        minor_axis = rand.rand(num_frac) * 0.5
+        angles = rand.rand(3, num_frac) * np.pi
+        # Different number of vertexes
+        num_points = rand.randint(4, 8, num_frac)
+        fracs = pp.fracs.fractures.create_elliptic_fractures(
+            center, major_axis, minor_axis, *angles, num_points=num_points
+        )
+        self.assertTrue(len(fracs) == num_frac)
+        for i, f in enumerate(fracs):
+            known = pp.EllipticFracture(
+                center[:, i],
+                major_axis[i],
+                minor_axis[i],
+                *angles[:, i],
+                num_points=num_points[i]
+            )
+            self.assertTrue(isinstance(f, pp.EllipticFracture))
+            self.assertTrue(np.allclose(f.p, known.p))
+            self.assertTrue(np.allclose(f.center, known.center))
+            # The normal vectors are parallel
+            self.assertTrue(np.allclose(np.abs(f.normal.T.dot(known.normal)), 1))
+
+    def test_scalar_parameters(self):
+        center = np.array([[0, 1], [0, 0], [0, 0]])
+        fracs = pp.fracs.fractures.create_elliptic_fractures(
+            center, 2, 1, 0, 0, 0, num_points=4
+        )
+        p = np.array([[2, 0, -2, 0], [0, 1, 0, -1], [0, 0, 0, 0]])
+        self.assertTrue(np.allclose(fracs[0].p, p))
+        self.assertTrue(np.allclose(fracs[1].p, p + center[:, 1:]))
+        network = pp.FractureNetwork3d(fracs)
+        self.assertTrue(network[1].index == 1)
+
+
+class TestCreateFractures(unittest.TestCase):
+    def test_same_as_fracture(self):
+        # A square and a triangle, both given with the vertexes in a non-ccw
+        # order, and a rotated square
+        pts = np.array(
+            [
+                [0, 1, 0, 1, 0, 1, 0, 1, 2, 2, 1],
+                [0, 1, 1, 0, 0, 0, 1, 0, 1, 1, 0],
+                [0, 0, 0, 0, 0, 1, 0, 0, 0, 1, 1],
+            ]
+        )
+        num_points = [4, 3, 4]
+        fracs = pp.fracs.fractures.create_fractures(pts, num_points)
+        self.assertTrue(len(fracs) == 3)
+        for f, p in zip(fracs, np.split(pts, np.cumsum(num_points)[:-1], axis=1)):
+            known = pp.Fracture(p)
+            self.assertTrue(np.allclose(f.p, known.p))
+            self.assertTrue(np.allclose(f.center, known.center))
+            self.assertTrue(np.allclose(f.normal, known.normal))
+
+    def test_non_convex(self):
+        pts = np.array([[0, 2, 1, 2, 0], [0, 0, 1, 2, 2], [0, 0, 0, 0, 0]])
+        self.assertRaises(ValueError, pp.fracs.fractures.create_fractures, pts, 5)
+        fracs = pp.fracs.fractures.create_fractures(pts, 5, check_convexity=False)
+        self.assertTrue(len(fracs) == 1)
+
+    def test_non_planar(self):
+        pts = np.array([[0, 1, 1, 0], [0, 0, 1, 1], [0, 0, 0, 1]])
+        self.assertRaises(ValueError, pp.fracs.fractures.create_fractures, pts, 4)
+
+    def test_planarity_tolerance(self):
+        # Fracture checks the planarity both relative to the size of the
+        # fracture, and absolutely. A small fracture with a relatively large
+        # deviation from a plane, and a large fracture with a small relative,
+        # but large absolute, deviation are rejected. A small deviation is
+        # accepted.
+        square = np.array([[0, 1, 1, 0], [0, 0, 1, 1], [0, 0, 0, 0]], dtype=np.float)
+        for scale, dz, planar in [
+            (1e-3, 1e-5, False),
+            (1e3, 1e-3, False),
+            (1, 1e-7, True),
+        ]:
+            pts = scale * square
+            pts[2, 2] = dz
+            if planar:
+                known = pp.Fracture(pts)
+                f = pp.fracs.fractures.create_fractures(pts, 4)[0]
+                self.assertTrue(np.allclose(f.p, known.p))
+            else:
+                self.assertRaises(AssertionError, pp.Fracture, pts)
+                self.assertRaises(
+                    ValueError, pp.fracs.fractures.create_fractures, pts, 4
+                )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,113 @@
+import numpy as np
+import unittest
+
+import porepy as pp
+
+
+class TestClusters2d(unittest.TestCase):
+    def network(self):
+        # Fractures 0 and 1 cross and connect the left and right sides, fracture
+        # 2 is isolated, fracture 3 touches the bottom only.
+        p = np.array(
+            [
+                [0, 1, 0.5, 0.5, 0.2, 0.3, 0.8, 0.8],
+                [0.5, 0.5, 0.3, 0.7, 0.8, 0.9, 0, 0.2],
+            ]
+        )
+        e = np.array([[0, 2, 4, 6], [1, 3, 5, 7]])
+        domain = {"xmin": 0, "xmax": 1, "ymin": 0, "ymax": 1}
+        return pp.FractureNetwork2d(p, e, domain)
+
+    def test_cluster_analysis(self):
+        network = self.network()
+        labels, touches, percolation = network.cluster_analysis()
+        self.assertTrue(np.array_equal(labels, [0, 0, 1, 2]))
+        self.assertTrue(np.array_equal(touches["xmin"], [True, False, False]))
+        self.assertTrue(np.array_equal(touches["ymin"], [False, False, True]))
+        self.assertTrue(percolation[("xmin", "xmax")])
+        self.assertFalse(percolation[("ymin", "ymax")])
+        self.assertFalse(percolation[("xmin", "ymin")])
+
+    def test_prune_clusters(self):
+        network = self.network()
+        pruned = network.prune_clusters()
+        self.assertTrue(pruned.num_frac == 2)
+        self.assertTrue(np.allclose(pruned.pts, network.pts[:, :4]))
+        self.assertTrue(np.array_equal(pruned.edges, network.edges[:, :2]))
+
+        # Keep clusters that touch one of the given sides
+        pruned = network.prune_clusters(sides=["ymin"], min_sides=1)
+        self.assertTrue(pruned.num_frac == 1)
+        self.assertTrue(np.allclose(pruned.pts, network.pts[:, 6:]))
+
+    def test_unknown_side(self):
+        network = self.network()
+        self.assertRaises(ValueError, network.cluster_analysis, ["left"])
+
+
+class TestClusters3d(unittest.TestCase):
+    def network(self):
+        # Fractures 0 and 1 intersect and connect the sides x = 0 and x = 1, while
+        # fracture 2 is isolated.
+        f_0 = pp.Fracture(
+            np.array([[0, 1, 1, 0], [0.5, 0.5, 0.5, 0.5], [0.2, 0.2, 0.8, 0.8]])
+        )
+        f_1 = pp.Fracture(
+            np.array([[0.5, 0.5, 0.5, 0.5], [0.2, 0.8, 0.8, 0.2], [0.1, 0.1, 0.9, 0.9]])
+        )
+        f_2 = pp.Fracture(
+            np.array([[0.1, 0.3, 0.3, 0.1], [0.1, 0.1, 0.1, 0.1], [0.1, 0.1, 0.3, 0.3]])
+        )
+        domain = {"xmin": 0, "xmax": 1, "ymin": 0, "ymax": 1, "zmin": 0, "zmax": 1}
+        return pp.FractureNetwork3d([f_0, f_1, f_2], domain)
+
+    def test_cluster_analysis(self):
+        labels, touches, percolation = self.network().cluster_analysis()
+        self.assertTrue(np.array_equal(labels, [0, 0, 1]))
+        self.assertTrue(np.array_equal(touches["xmax"], [True, False]))
+        self.assertTrue(np.array_equal(touches["zmin"], [False, False]))
+        self.assertTrue(percolation[("xmin", "xmax")])
+        self.assertFalse(percolation[("zmin", "zmax")])
+
+    def subdomain(self):
+        # A subdomain boundary at z = 0.5, which cuts fractures 0 and 1
+        return [np.array([[0, 1, 1, 0], [0, 0, 1, 1], [0.5, 0.5, 0.5, 0.5]])]
+
+    def test_subdomain(self):
+        network = self.network()
+        network.add_subdomain_boundaries(self.subdomain())
+        for find_intersections in (False, True):
+            if find_intersections:
+                network.find_intersections()
+            labels, _, percolation = network.cluster_analysis()
+            # The subdomain boundary is not part of any cluster
+            self.assertTrue(np.array_equal(labels, [0, 0, 1, -1]))
+            self.assertTrue(percolation[("xmin", "xmax")])
+
+    def test_prune_clusters(self):
+        network = self.network()
+        network.add_subdomain_boundaries(self.subdomain())
+        pruned = network.prune_clusters()
+        # The subdomain boundary is kept
+        self.assertTrue(len(pruned._fractures) == 3)
+        for f_new, fi in zip(pruned._fractures, [0, 1, 3]):
+            # The vertexes may be reordered by the copy
+            f_old = network._fractures[fi]
+            self.assertTrue(np.allclose(f_new.center, f_old.center))
+            self.assertTrue(f_new.p.shape == f_old.p.shape)
+        self.assertTrue(pruned.tags["subdomain"] == [False, False, True])
+        self.assertTrue(pruned.domain == network.domain)
+
+    def test_prune_clusters_no_clusters(self):
+        domain = self.network().domain
+        network = pp.FractureNetwork3d(domain=domain)
+        self.assertTrue(len(network.prune_clusters()._fractures) == 0)
+        # Only a subdomain boundary, which is kept
+        network.add_subdomain_boundaries(self.subdomain())
+        pruned = network.prune_clusters()
+        self.assertTrue(len(pruned._fractures) == 1)
+        self.assertTrue(pruned.tags["subdomain"] == [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
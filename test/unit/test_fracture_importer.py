@@ -214,6 +214,26 @@ class TestImport3dCsv(unittest.TestCase):
         self.assertTrue(test_utils.compare_arrays(known_p, network._fractures[0].p))
         self.assertTrue(test_utils.compare_arrays(known_p, network._fractures[1].p))
 
+    def test_comments_and_varying_size(self):
+        # A triangle and a square, with comments and a blank line
+        file_name = "frac.csv"
+        with open(file_name, "w") as f:
+            f.write("0, 0, 0, 1, 1, 1\n")
+            f.write("# A comment\n")
+            f.write("0, 0, 0, 1, 1, 1, 1, 0, 1\n\n")
+            f.write("0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 1, 0  # A square\n")
+
+        network = pp.fracture_importer.network_3d_from_csv(file_name)
+        self.assertTrue(network.domain["xmax"] == 1)
+        self.assertTrue(len(network._fractures) == 2)
+        known_p = np.array([[0, 1, 1, 0], [0, 0, 1, 1], [0, 0, 0, 0]])
+        self.assertTrue(test_utils.compare_arrays(known_p, network._fractures[1].p))
+        self.assertTrue(
+            np.allclose(network._fractures[1].center.ravel(), [0.5, 0.5, 0])
+        )
+
+        test_utils.delete_file(file_name)
+
 
 class TestImport3dElliptic(unittest.TestCase):
     def test_domain_only(self):
@@ -250,6 +270,70 @@ class TestImport3dElliptic(unittest.TestCase):
         self.assertTrue(f.p[1].min() == -1)
         self.assertTrue(f.p[2].min() == 0)
 
+    def test_several_fractures(self):
+        p = np.array([[0, 0, 0, 2, 1, 0, 0, 0, 16], [1, 1, 1, 1, 1, 0, 0, 90, 4]])
+        file_name = "frac.csv"
+        np.savetxt(file_name, p, delimiter=",")
+
+        network = pp.fracture_importer.elliptic_network_3d_from_csv(
+            file_name, has_domain=False, degrees=True
+        )
+        self.assertTrue(len(network._fractures) == 2)
+        self.assertTrue(network._fractures[0].p.shape[1] == 16)
+        # The second fracture is rotated to the xz-plane
+        f = network._fractures[1]
+        known_p = np.array([[2, 1, 0, 1], [1, 1, 1, 1], [1, 2, 1, 0]])
+        self.assertTrue(test_utils.compare_arrays(f.p, known_p))
+
+        test_utils.delete_file(file_name)
+
+
+class TestImportFab(unittest.TestCase):
+    def write_file(self, file_name):
+        with open(file_name, "w") as f:
+            f.write("BEGIN FORMAT\n    Format = Ascii\n    No_Fractures = 2\n")
+            f.write("END FORMAT\n\nBEGIN FRACTURE\n")
+            # A square and a triangle
+            f.write("1 4 1\n1 0 0 -1\n2 0 1 -1\n3 0 1 1\n4 0 0 1\n0 -1 0 0\n")
+            f.write("2 3 1\n1 -1 0 0\n2 1 0 0\n3 0 1 0\n0 0 0 1\n")
+            f.write("END FRACTURE\n\nBEGIN TESSFRACTURE\n")
+            f.write("1 3\n1 0 0 0\n2 1 0 0\n3 0 1 0\n0 -1 0 0\n")
+            f.write("END TESSFRACTURE\n")
+
+    def check(self, network, tess_fracs, tess_sgn):
+        self.assertTrue(len(network._fractures) == 2)
+        known_p = np.array([[0, 0, 0, 0], [0, 1, 1, 0], [-1, -1, 1, 1]])
+        self.assertTrue(test_utils.compare_arrays(known_p, network._fractures[0].p))
+        known_p = np.array([[-1, 1, 0], [0, 0, 1], [0, 0, 0]])
+        self.assertTrue(test_utils.compare_arrays(known_p, network._fractures[1].p))
+
+        self.assertTrue(len(tess_fracs) == 1)
+        known_p = np.array([[0, 1, 0], [0, 0, 1], [0, 0, 0]])
+        self.assertTrue(np.allclose(tess_fracs[0], known_p))
+        self.assertTrue(np.array_equal(tess_sgn, [-1]))
+
+    def test_read_fab(self):
+        file_name = "frac.fab"
+        self.write_file(file_name)
+        self.check(
+            *pp.fracture_importer.network_3d_from_fab(file_name, return_all=True)
+        )
+        test_utils.delete_file(file_name)
+
+    def test_read_fab_in_chunks(self):
+        # The fractures are split between chunks of lines
+        file_name = "frac.fab"
+        self.write_file(file_name)
+        chunk_size = pp.fracture_importer.CHUNK_SIZE
+        pp.fracture_importer.CHUNK_SIZE = 4
+        try:
+            self.check(
+                *pp.fracture_importer.network_3d_from_fab(file_name, return_all=True)
+            )
+        finally:
+            pp.fracture_importer.CHUNK_SIZE = chunk_size
+        test_utils.delete_file(file_name)
+
 
 if __name__ == "__main__":
     unittest.main()
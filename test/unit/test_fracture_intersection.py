@@ -128,8 +128,6 @@ class TestSweepAndPrune(unittest.TestCase):
 
 
 class TestBoundingBoxIntersection(unittest.TestCase):
-    # For all cases, run both 1d search + intersection, and 2d search.
-    # They should be equivalent.
     # Note: The tests are only between the bounding boxes of the fractures,
     # not the fractures themselves
 
@@ -139,11 +137,6 @@ class TestBoundingBoxIntersection(unittest.TestCase):
         x_min = np.array([0, 2])
         x_max = np.array([1, 3])
 
-        x_pairs = pp.intersections._identify_overlapping_intervals(x_min, x_max)
-        y_pairs = pp.intersections._identify_overlapping_intervals(x_min, x_max)
-        pairs_1 = pp.intersections._intersect_pairs(x_pairs, y_pairs)
-        self.assertTrue(pairs_1.size == 0)
-
         combined_pairs = pp.intersections._identify_overlapping_rectangles(
             x_min, x_max, x_min, x_max
         )
@@ -157,11 +150,6 @@ class TestBoundingBoxIntersection(unittest.TestCase):
         y_min = np.array([0, 5])
         y_max = np.array([2, 7])
 
-        x_pairs = pp.intersections._identify_overlapping_intervals(x_min, x_max)
-        y_pairs = pp.intersections._identify_overlapping_intervals(y_min, y_max)
-        pairs_1 = pp.intersections._intersect_pairs(x_pairs, y_pairs)
-        self.assertTrue(pairs_1.size == 0)
-
         combined_pairs = pp.intersections._identify_overlapping_rectangles(
             x_min, x_max, y_min, y_max
         )
@@ -175,10 +163,7 @@ class TestBoundingBoxIntersection(unittest.TestCase):
         y_min = np.array([0, 1])
         y_max = np.array([2, 3])
 
-        x_pairs = pp.intersections._identify_overlapping_intervals(x_min, x_max)
-        y_pairs = pp.intersections._identify_overlapping_intervals(y_min, y_max)
-        pairs_1 = np.sort(pp.intersections._intersect_pairs(x_pairs, y_pairs), axis=0)
-        self.assertTrue(pairs_1.size == 2)
+        known = np.array([[0], [1]])
 
         combined_pairs = np.sort(
             pp.intersections._identify_overlapping_rectangles(
@@ -188,7 +173,7 @@ class TestBoundingBoxIntersection(unittest.TestCase):
         )
         self.assertTrue(combined_pairs.size == 2)
 
-        self.assertTrue(np.allclose(pairs_1, combined_pairs))
+        self.assertTrue(np.allclose(known, combined_pairs))
 
     def test_lines_in_square(self):
         # Lines in square, all should overlap
@@ -198,10 +183,7 @@ class TestBoundingBoxIntersection(unittest.TestCase):
         y_min = np.array([0, 0, 1, 0])
         y_max = np.array([0, 1, 1, 1])
 
-        x_pairs = pp.intersections._identify_overlapping_intervals(x_min, x_max)
-        y_pairs = pp.intersections._identify_overlapping_intervals(y_min, y_max)
-        pairs_1 = np.sort(pp.intersections._intersect_pairs(x_pairs, y_pairs), axis=0)
-        self.assertTrue(pairs_1.shape[1] == 4)
+        known = np.array([[0, 0, 1, 2], [1, 3, 2, 3]])
 
         combined_pairs = np.sort(
             pp.intersections._identify_overlapping_rectangles(
@@ -211,7 +193,7 @@ class TestBoundingBoxIntersection(unittest.TestCase):
         )
         self.assertTrue(combined_pairs.shape[1] == 4)
 
-        self.assertTrue(np.allclose(pairs_1, combined_pairs))
+        self.assertTrue(np.allclose(known, combined_pairs))
 
 
 class TestFractureIntersectionRemoval(unittest.TestCase):
@@ -275,6 +257,45 @@ class TestFractureIntersectionRemoval(unittest.TestCase):
         self.assertTrue(np.allclose(new_pts, p))
         self.assertTrue(test_utils.compare_arrays(new_lines, lines_known))
 
+    def test_chunked_pairs(self):
+        # Lines on a lattice, with crossings, T-junctions and overlaps. The
+        # result should not depend on the number of pairs treated at once.
+        rng = np.random.RandomState(0)
+        start = rng.randint(0, 6, (2, 20))
+        end = start.copy()
+        end[0, :10] += rng.randint(1, 3, 10)
+        end[1, 10:] += rng.randint(1, 3, 10)
+        p = np.hstack((start, end)) / 6
+        lines = np.vstack((np.arange(20), 20 + np.arange(20), np.arange(20)))
+
+        new_pts, new_lines = pp.intersections.split_intersecting_segments_2d(p, lines)
+        for chunk_size in (1, 7):
+            pts_chunk, lines_chunk = pp.intersections.split_intersecting_segments_2d(
+                p, lines, chunk_size=chunk_size
+            )
+            self.assertTrue(np.allclose(new_pts, pts_chunk))
+            self.assertTrue(np.array_equal(new_lines, lines_chunk))
+
+        # The new lines should have no intersections apart from common endpoints
+        x_min, x_max, y_min, y_max = pp.intersections._axis_aligned_bounding_box_2d(
+            new_pts, new_lines
+        )
+        pairs = pp.intersections._identify_overlapping_rectangles(
+            x_min, x_max, y_min, y_max
+        )
+        for i, j in pairs.T:
+            isect = pp.intersections.segments_2d(
+                new_pts[:, new_lines[0, i]],
+                new_pts[:, new_lines[1, i]],
+                new_pts[:, new_lines[0, j]],
+                new_pts[:, new_lines[1, j]],
+            )
+            if isect is not None:
+                self.assertTrue(isect.shape[1] == 1)
+                common = np.intersect1d(new_lines[:2, i], new_lines[:2, j])
+                self.assertTrue(common.size == 1)
+                self.assertTrue(np.allclose(isect.ravel(), new_pts[:, common[0]]))
+
 
 if __name__ == "__main__":
     unittest.main()
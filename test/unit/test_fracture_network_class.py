@@ -262,5 +262,76 @@ class TestFractureNetwork3dBoundingBox(unittest.TestCase):
         self.assertTrue(d["zmax"] == external_boundary["zmax"])
 
 
+class TestFractureNetwork3dIncremental(unittest.TestCase):
+    def fractures(self):
+        # Three fractures in the planes y = 0.5, x = 0.5 and z = 0.5, which
+        # intersect pairwise, and an isolated fracture.
+        f_0 = pp.Fracture(np.array([[0, 1, 1, 0], [0.5] * 4, [0, 0, 1, 1]]))
+        f_1 = pp.Fracture(np.array([[0.5] * 4, [0, 1, 1, 0], [0, 0, 1, 1]]))
+        f_2 = pp.Fracture(np.array([[0, 1, 1, 0], [0, 0, 1, 1], [0.5] * 4]))
+        f_3 = pp.Fracture(np.array([[2, 3, 3, 2], [0, 0, 1, 1], [0.5] * 4]))
+        return [f_0, f_1, f_2, f_3]
+
+    def edge_coordinates(self, network):
+        # The edges of the decomposition, as sorted pairs of point coordinates
+        p = network.decomposition["points"]
+        edges = set()
+        for e in network.decomposition["edges"].T:
+            edges.add(tuple(sorted([tuple(p[:, e[0]]), tuple(p[:, e[1]])])))
+        return edges
+
+    def test_add_fractures(self):
+        fracs = self.fractures()
+        network = pp.FractureNetwork3d(fracs[:2])
+        network.find_intersections()
+        network.split_intersections()
+        known = list(network.intersections)
+        self.assertTrue(len(known) == 1)
+
+        for f in fracs[2:]:
+            network.add(f)
+        network.find_intersections()
+        # The known intersection is kept, the new ones are added
+        self.assertTrue(len(network.intersections) == 3)
+        self.assertTrue(network.intersections[0] is known[0])
+        network.split_intersections()
+        edges = self.edge_coordinates(network)
+        num_points = network.decomposition["points"].shape[1]
+
+        # Compare with a full recomputation
+        network.find_intersections(recompute=True)
+        self.assertTrue(len(network.intersections) == 3)
+        self.assertTrue(network.intersections[0] is not known[0])
+        network.split_intersections(recompute=True)
+        self.assertTrue(edges == self.edge_coordinates(network))
+        self.assertTrue(network.decomposition["points"].shape[1] == num_points)
+        # The intersection lines meet in the center, and are split there
+        self.assertTrue(len(network.decomposition["line_in_frac"][0]) == 4)
+        self.assertTrue(len(network.decomposition["line_in_frac"][3]) == 0)
+
+    def test_no_new_fractures(self):
+        network = pp.FractureNetwork3d(self.fractures())
+        network.find_intersections()
+        network.split_intersections()
+        known = list(network.intersections)
+        decomposition = network.decomposition
+        network.find_intersections()
+        network.split_intersections()
+        self.assertTrue(len(network.intersections) == 3)
+        self.assertTrue(all(i is j for i, j in zip(known, network.intersections)))
+        self.assertTrue(network.decomposition is decomposition)
+
+    def test_modified_fracture(self):
+        # If a known fracture is modified, all intersections are recomputed
+        fracs = self.fractures()
+        network = pp.FractureNetwork3d(fracs[:3])
+        network.find_intersections()
+        known = list(network.intersections)
+        fracs[2].p = fracs[2].p + np.array([[0], [0], [2]])
+        network.find_intersections()
+        self.assertTrue(len(network.intersections) == 1)
+        self.assertTrue(network.intersections[0] is not known[0])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -152,6 +152,17 @@ class TestFractureSnapping(unittest.TestCase):
         self.assertTrue(np.allclose(p_known, pn))
         self.assertTrue(conv)
 
+    def test_num_snaps(self):
+        p = np.array([[0, 1, 0.5, 1], [0, 0, 1e-4, 1]])
+        e = np.array([[0, 2], [1, 3]])
+
+        pn, conv, num_snaps = pp.frac_utils.snap_fracture_set_2d(
+            p, e, snap_tol=1e-3, termination_tol=1e-5, return_num_snaps=True
+        )
+        # The second iteration makes no snaps
+        self.assertTrue(np.array_equal(num_snaps, [1, 0]))
+        self.assertTrue(conv)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,94 @@
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import porepy as pp
+from porepy.grids.gmsh import gmsh_interface
+from porepy.utils import read_config
+
+
+def gmsh_executable_available():
+    # The executable is given in the PorePy configuration file
+    try:
+        path = read_config.read()["gmsh_path"]
+    except (ImportError, KeyError):
+        return False
+    return shutil.which(path) is not None
+
+
+class TestGenerateMesh(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.in_file = os.path.join(self.folder, "mesh.geo")
+        self.out_file = os.path.join(self.folder, "mesh.msh")
+        with open(self.in_file, "w") as f:
+            f.write("\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_failure_raises_error(self):
+        with mock.patch.object(gmsh_interface, "run_gmsh", return_value=1):
+            self.assertRaises(
+                RuntimeError,
+                gmsh_interface.generate_mesh,
+                self.in_file,
+                self.out_file,
+                dims=2,
+                use_api=False,
+            )
+
+    def test_number_of_threads_executable(self):
+        with mock.patch.object(gmsh_interface, "run_gmsh", return_value=1) as run_gmsh:
+            with self.assertRaises(RuntimeError):
+                gmsh_interface.generate_mesh(
+                    self.in_file, self.out_file, 2, num_threads=4, use_api=False
+                )
+            self.assertTrue(run_gmsh.call_args[1]["-nt"] == 4)
+
+    def test_api_not_available(self):
+        with mock.patch.object(gmsh_interface, "gmsh", None):
+            self.assertRaises(
+                ImportError,
+                gmsh_interface.generate_mesh,
+                self.in_file,
+                self.out_file,
+                dims=2,
+                use_api=True,
+            )
+
+    @unittest.skipIf(
+        gmsh_interface.gmsh is None, "The gmsh Python API is not available"
+    )
+    @unittest.skipIf(
+        not gmsh_executable_available(), "The gmsh executable is not available"
+    )
+    def test_api_and_executable_give_same_mesh(self):
+        p = np.array([[0.2, 0.8, 0.5, 0.5], [0.5, 0.5, 0.2, 0.8]])
+        e = np.array([[0, 2], [1, 3]])
+        domain = {"xmin": 0, "xmax": 1, "ymin": 0, "ymax": 1}
+        network = pp.FractureNetwork2d(p, e, domain)
+        file_name = os.path.join(self.folder, "network")
+
+        gbs = []
+        for use_api in (True, False):
+            mesh_args = {
+                "mesh_size_frac": 0.2,
+                "mesh_size_bound": 0.3,
+                "file_name": file_name,
+                "use_gmsh_api": use_api,
+            }
+            gbs.append(network.mesh(mesh_args))
+        for dim in range(3):
+            grids = [gb.grids_of_dimension(dim) for gb in gbs]
+            self.assertTrue(len(grids[0]) == len(grids[1]))
+            for g_api, g_file in zip(*grids):
+                self.assertTrue(g_api.num_cells == g_file.num_cells)
+                self.assertTrue(np.allclose(g_api.nodes, g_file.nodes))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,6 +22,13 @@ class TestDiameterComputation(unittest.TestCase):
         known = np.repeat(np.sqrt(3), g.num_cells)
         self.assertTrue(np.allclose(cell_diameters, known))
 
+    def test_cell_diameters_chunks(self):
+        # Tetrahedral grid, processed in several chunks
+        g = pp.StructuredTetrahedralGrid([2, 1, 1], [2, 1, 1])
+        cell_diameters = g.cell_diameters(chunk_size=12)
+        known = np.tile(np.sqrt([2, 3, 3, 3, 3, 2]), 2)
+        self.assertTrue(np.allclose(cell_diameters, known))
+
 
 class TestReprAndStr(unittest.TestCase):
     def test_repr(self):
@@ -56,6 +63,28 @@ class TestClosestCell(unittest.TestCase):
         self.assertTrue(ind.size == 1)
 
 
+class TestLocatePoints(unittest.TestCase):
+    def test_cart_grid_2d(self):
+        g = pp.CartGrid([3, 2], [3, 2])
+        g.compute_geometry()
+        p = np.array([[0.5, 2.5, 1.2, 4], [0.5, 1.5, 0.1, 0.5]])
+        ind = g.locate_points(p)
+        self.assertTrue(np.all(ind == [0, 5, 1, -1]))
+
+    def test_simplex_grid_3d(self):
+        g = pp.StructuredTetrahedralGrid([2, 2, 2], [1, 1, 1])
+        g.compute_geometry()
+        # The cell centers are located in their own cells
+        ind = g.locate_points(g.cell_centers)
+        self.assertTrue(np.all(ind == np.arange(g.num_cells)))
+
+    def test_outside_plane(self):
+        g = pp.CartGrid([2, 2])
+        g.compute_geometry()
+        p = np.array([[0.5], [0.5], [1]])
+        self.assertTrue(g.locate_points(p)[0] == -1)
+
+
 class TestCellFaceAsDense(unittest.TestCase):
     def test_cart_grid(self):
         g = pp.CartGrid([2, 1])
@@ -63,6 +92,57 @@ class TestCellFaceAsDense(unittest.TestCase):
         known = np.array([[-1, 0, 1, -1, -1, 0, 1], [0, 1, -1, 0, 1, -1, -1]])
         self.assertTrue(np.allclose(cf, known))
 
+    def test_simplex_grid_chunks(self):
+        g = pp.StructuredTriangleGrid([1, 1])
+        cf = g.cell_face_as_dense(chunk_size=2)
+        known = np.array([[0, 1, 0, 0, 1], [-1, -1, 1, -1, -1]])
+        self.assertTrue(np.allclose(cf, known))
+
+
+class TestCompactGrid(unittest.TestCase):
+    def test_tags_and_indices(self):
+        g = pp.StructuredTriangleGrid([3, 2])
+        known = g.tags["domain_boundary_faces"].copy()
+        g.compact()
+        self.assertTrue(isinstance(g.tags, pp.utils.tags.PackedTags))
+        self.assertTrue(g.face_nodes.indices.dtype == np.int32)
+        self.assertTrue(g.cell_faces.indptr.dtype == np.int32)
+        self.assertTrue(np.array_equal(g.tags["domain_boundary_faces"], known))
+        self.assertTrue(np.array_equal(g.get_boundary_faces(), np.where(known)[0]))
+
+    def test_modify_packed_tags(self):
+        g = pp.CartGrid([3, 2]).compact()
+        size = g.tags.nbytes()
+        # Packed tags are not unpacked by reading, and can not be modified in
+        # place
+        tag = g.tags["fracture_faces"]
+        self.assertTrue(g.tags.nbytes() == size)
+        with self.assertRaises(ValueError):
+            tag[[1, 4]] = True
+        tag = tag.copy()
+        tag[[1, 4]] = True
+        g.tags["fracture_faces"] = tag
+        self.assertTrue(g.tags.nbytes() > size)
+        g.tags.pack()
+        self.assertTrue(g.tags.nbytes() == size)
+        self.assertTrue(np.all(np.where(g.tags["fracture_faces"])[0] == [1, 4]))
+        h = g.copy()
+        self.assertTrue(isinstance(h.tags, pp.utils.tags.PackedTags))
+        self.assertTrue(np.all(np.where(h.tags["fracture_faces"])[0] == [1, 4]))
+
+    def test_memory_report(self):
+        g = pp.CartGrid([3, 2])
+        g.compute_geometry()
+        report = g.memory_report()
+        self.assertTrue(report["nodes"] == g.nodes.nbytes)
+        self.assertTrue(report["face_areas"] == g.face_areas.nbytes)
+
+        g.compact(geometry_dtype=np.float32)
+        self.assertTrue(g.face_centers.dtype == np.float32)
+        compact_report = g.memory_report()
+        self.assertTrue(compact_report["tags"] < report["tags"])
+        self.assertTrue(2 * compact_report["nodes"] == report["nodes"])
+
 
 class TestBoundaries(unittest.TestCase):
     def test_bounary_node_cart(self):
@@ -97,5 +177,57 @@ class TestBoundaries(unittest.TestCase):
         self.assertTrue(np.allclose(bmax, g.nodes.max(axis=1)))
 
 
+class TestConnectivityCache(unittest.TestCase):
+    def test_cell_nodes_cached(self):
+        g = pp.CartGrid([2, 2])
+        self.assertTrue(g.cell_nodes() is g.cell_nodes())
+        self.assertTrue(g.cell_connection_map() is g.cell_connection_map())
+
+    def test_invalidated_by_reassignment(self):
+        g = pp.CartGrid([2, 1])
+        cn = g.cell_nodes()
+        # Remove the second cell
+        g.cell_faces = g.cell_faces[:, :1]
+        g.num_cells = 1
+        cn_new = g.cell_nodes()
+        self.assertTrue(cn_new.shape == (g.num_nodes, 1))
+        self.assertTrue(np.allclose(cn_new.A.ravel(), cn[:, 0].A.ravel()))
+        self.assertTrue(np.all(g.num_cell_nodes() == [4]))
+
+    def test_invalidated_by_tag_assignment(self):
+        g = pp.CartGrid([2, 1])
+        self.assertTrue(g.get_internal_faces().size == 1)
+        tag = g.tags["fracture_faces"].copy()
+        tag[g.get_internal_faces()] = True
+        g.tags["fracture_faces"] = tag
+        self.assertTrue(g.get_internal_faces().size == 0)
+        self.assertTrue(g.get_all_boundary_faces().size == g.num_faces)
+
+    def test_inplace_tag_change_and_clear_cache(self):
+        g = pp.CartGrid([2, 1])
+        internal = g.get_internal_faces()
+        g.tags["fracture_faces"][internal] = True
+        # In-place modifications are not detected
+        self.assertTrue(g.get_internal_faces() is internal)
+        g.clear_cache()
+        self.assertTrue(g.get_internal_faces().size == 0)
+
+    def test_packed_tags(self):
+        g = pp.CartGrid([2, 1]).compact()
+        size = g.tags.nbytes()
+        bnd = g.get_boundary_faces()
+        # Reading the tags neither unpacks them, nor invalidates the cache
+        self.assertTrue(g.tags.nbytes() == size)
+        self.assertTrue(g.get_boundary_faces() is bnd)
+        g.tags["domain_boundary_faces"] = np.zeros(g.num_faces, dtype=np.bool)
+        self.assertTrue(g.get_boundary_faces().size == 0)
+
+    def test_cached_values_are_read_only(self):
+        g = pp.CartGrid([2, 1])
+        bnd = g.get_boundary_faces()
+        with self.assertRaises(ValueError):
+            bnd[0] = 1
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -71,6 +71,75 @@ class TestGridBucket(unittest.TestCase):
             R = d["cell_global2loc"]
             self.assertTrue(np.all(R * glob == loc))
 
+    def test_cell_slices(self):
+        f1 = np.array([[0, 2], [1, 1]])
+        f2 = np.array([[1, 1], [0, 2]])
+        gb = meshing.cart_grid([f1, f2], [2, 2])
+        gb.cell_global2loc()
+
+        slices = gb.cell_slices()
+        x = np.arange(gb.num_cells())
+        for g, d in gb:
+            R = d["cell_global2loc"]
+            self.assertTrue(np.all(x[slices[g]] == R * x))
+        # The slices cover the global cells
+        covered = np.hstack([x[s] for s in slices.values()])
+        self.assertTrue(np.array_equal(np.sort(covered), x))
+
+        slices = gb.mortar_cell_slices()
+        x = np.arange(gb.num_mortar_cells())
+        for e, d in gb.edges():
+            R = d["cell_global2loc"]
+            self.assertTrue(np.all(x[slices[e]] == R * x))
+
+    def test_mortar_cell_slices_no_mortar(self):
+        gb = GridBucket()
+        g1, g2 = pp.CartGrid([2, 2]), pp.CartGrid(2)
+        gb.add_nodes([g1, g2])
+        gb.add_edge([g1, g2], None)
+        gb.assign_node_ordering()
+        slices = gb.mortar_cell_slices()
+        self.assertTrue(slices[(g1, g2)] == slice(0, 0))
+
+    def test_closest_cell_and_locate_points(self):
+        f = np.array([[0, 2], [1, 1]])
+        gb = meshing.cart_grid([f], [2, 2])
+        g_2d = gb.grids_of_dimension(2)[0]
+        g_1d = gb.grids_of_dimension(1)[0]
+
+        p = np.array([[0.6, 1.4, 3], [0.4, 1.2, 3]])
+        grids, cells = gb.closest_cell(p, cond=lambda g: g.dim == 2)
+        self.assertTrue(np.all(grids == g_2d))
+        self.assertTrue(np.all(cells == [0, 3, 3]))
+
+        grids, cells = gb.locate_points(p)
+        self.assertTrue(grids[0] is g_2d and grids[1] is g_2d)
+        self.assertTrue(grids[2] is None)
+        self.assertTrue(np.all(cells == [0, 3, -1]))
+
+        grids, cells = gb.locate_points(
+            np.array([[1.4], [1]]), cond=lambda g: g.dim == 1
+        )
+        self.assertTrue(grids[0] is g_1d and cells[0] == 0)
+
+    def test_compact_and_memory_report(self):
+        f = np.array([[0, 2], [1, 1]])
+        gb = meshing.cart_grid([f], [2, 2])
+        before = gb.memory_report()
+        self.assertTrue(before["grids"]["nodes"] > 0)
+        self.assertTrue(before["mortar_grids"]["_master_to_mortar_int"] > 0)
+
+        gb.compact(geometry_dtype=np.float32)
+        after = gb.memory_report()
+        self.assertTrue(after["grids"]["tags"] < before["grids"]["tags"])
+        self.assertTrue(after["grids"]["nodes"] * 2 == before["grids"]["nodes"])
+        for g, _ in gb:
+            self.assertTrue(g.face_nodes.indices.dtype == np.int32)
+        for _, d in gb.edges():
+            mg = d["mortar_grid"]
+            self.assertTrue(mg.cell_volumes.dtype == np.float32)
+            self.assertTrue(mg.master_to_mortar_int().indices.dtype == np.int32)
+
 
 class MockGrid:
     def __init__(
@@ -0,0 +1,140 @@
+import numpy as np
+import scipy.sparse as sps
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+
+import porepy as pp
+
+
+class TestGridBucketIO(unittest.TestCase):
+    def setUp(self):
+        f_1 = np.array([[0, 2], [1, 1]])
+        f_2 = np.array([[1, 1], [0, 2]])
+        self.gb = pp.meshing.cart_grid([f_1, f_2], [4, 4], physdims=[2, 2])
+        self.gb.assign_node_ordering()
+
+    def compare_grids(self, g, h):
+        self.assertTrue(type(g) is type(h))
+        self.assertTrue(g.dim == h.dim and g.num_cells == h.num_cells)
+        for attr in ("nodes", "face_centers", "cell_volumes"):
+            self.assertTrue(np.array_equal(getattr(g, attr), getattr(h, attr)))
+        for attr in ("face_nodes", "cell_faces"):
+            self.assertTrue((getattr(g, attr) != getattr(h, attr)).nnz == 0)
+        for key in g.tags.keys():
+            self.assertTrue(np.array_equal(g.tags[key], h.tags[key]))
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as folder:
+            pp.grid_bucket_io.save(self.gb, folder)
+            gb = pp.grid_bucket_io.load(folder)
+
+            self.assertTrue(gb.num_graph_nodes() == self.gb.num_graph_nodes())
+            self.assertTrue(gb.num_graph_edges() == self.gb.num_graph_edges())
+            for (g, d), (h, e) in zip(self.gb, gb):
+                self.compare_grids(g, h)
+                self.assertTrue(np.array_equal(g.global_point_ind, h.global_point_ind))
+                self.assertTrue(d["node_number"] == e["node_number"])
+
+            for (e, d), (e_new, d_new) in zip(self.gb.edges(), gb.edges()):
+                self.assertTrue(e[0].dim == e_new[0].dim)
+                self.assertTrue((d["face_cells"] != d_new["face_cells"]).nnz == 0)
+                mg, mg_new = d["mortar_grid"], d_new["mortar_grid"]
+                self.assertTrue(
+                    (mg.master_to_mortar_int() != mg_new.master_to_mortar_int()).nnz
+                    == 0
+                )
+                self.assertTrue(
+                    (mg.slave_to_mortar_int() != mg_new.slave_to_mortar_int()).nnz == 0
+                )
+                for side, g in mg.side_grids.items():
+                    self.compare_grids(g, mg_new.side_grids[side])
+
+            # The loaded grids are fully functional
+            g = gb.grids_of_dimension(2)[0]
+            g_known = self.gb.grids_of_dimension(2)[0]
+            self.assertTrue(np.allclose(g.cell_diameters(), g_known.cell_diameters()))
+            # Memory mapped arrays are read only by default
+            self.assertFalse(g.nodes.flags.writeable)
+            del gb, g
+
+    def test_load_in_memory(self):
+        with tempfile.TemporaryDirectory() as folder:
+            pp.grid_bucket_io.save(self.gb, folder)
+            gb = pp.grid_bucket_io.load(folder, mmap_mode=None)
+        g = gb.grids_of_dimension(2)[0]
+        g.nodes[0, 0] = -1
+        g.compute_geometry()
+        self.compare_grids(g, g)
+
+    def test_data_and_packed_tags(self):
+        self.gb.compact()
+        g = self.gb.grids_of_dimension(1)[0]
+        mat = sps.coo_matrix(np.arange(6).reshape((2, 3)))
+        data = {
+            "array": np.arange(3),
+            "empty": np.zeros((0, 3)),
+            ("matrix", 1): [mat, None, "name", np.int32(2), 1.5],
+            "grid": g,
+            "unknown": object(),
+        }
+        self.gb.node_props(g).update(data)
+
+        with tempfile.TemporaryDirectory() as folder:
+            with warnings.catch_warnings(record=True) as w:
+                warnings.simplefilter("always")
+                pp.grid_bucket_io.save(self.gb, folder)
+                # Only consider warnings issued by save
+                w = [wi for wi in w if issubclass(wi.category, UserWarning)]
+                self.assertTrue(len(w) == 1 and "unknown" in str(w[0].message))
+            gb = pp.grid_bucket_io.load(folder, mmap_mode=None)
+
+        h = gb.grids_of_dimension(1)[0]
+        d = gb.node_props(h)
+        self.assertTrue(isinstance(h.tags, pp.utils.tags.PackedTags))
+        self.compare_grids(g, h)
+        self.assertTrue(np.array_equal(d["array"], data["array"]))
+        self.assertTrue(d["empty"].shape == (0, 3))
+        loaded = d[("matrix", 1)]
+        self.assertTrue(sps.isspmatrix_coo(loaded[0]))
+        self.assertTrue(np.array_equal(loaded[0].A, mat.A))
+        self.assertTrue(loaded[1:3] == [None, "name"])
+        self.assertTrue(loaded[3] == 2 and isinstance(loaded[3], np.int32))
+        self.assertTrue(loaded[4] == 1.5)
+        self.assertTrue(d["grid"] is h)
+        self.assertFalse("unknown" in d)
+
+    def test_interrupted_overwrite(self):
+        with tempfile.TemporaryDirectory() as folder:
+            pp.grid_bucket_io.save(self.gb, folder)
+            self.gb.node_props(self.gb.grids_of_dimension(2)[0])["a"] = np.ones(5)
+            # Fail while writing the manifest of the new bucket
+            with mock.patch.object(
+                pp.grid_bucket_io.json, "dump", side_effect=KeyboardInterrupt
+            ):
+                self.assertRaises(
+                    KeyboardInterrupt, pp.grid_bucket_io.save, self.gb, folder
+                )
+            # The old bucket is still complete
+            gb = pp.grid_bucket_io.load(folder, mmap_mode=None)
+            self.assertFalse("a" in gb.node_props(gb.grids_of_dimension(2)[0]))
+
+            # Fail after the data file is replaced
+            with mock.patch.object(
+                pp.grid_bucket_io.os, "replace", side_effect=[None, KeyboardInterrupt]
+            ):
+                self.assertRaises(
+                    KeyboardInterrupt, pp.grid_bucket_io.save, self.gb, folder
+                )
+            self.assertRaises(FileNotFoundError, pp.grid_bucket_io.load, folder)
+
+    def test_unknown_format(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with open(folder + "/manifest.json", "w") as f:
+                f.write('{"format": "other"}')
+            self.assertRaises(ValueError, pp.grid_bucket_io.load, folder)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import numpy as np
+import unittest
+
+import porepy as pp
+from porepy.grids.gmsh import mesh_2_grid
+
+
+def line_mesh(num_lines, num_segments=4):
+    # Parallel fracture lines in 3d, each split into segments. The segments of
+    # the lines are shuffled, as they may be in a mesh from gmsh.
+    x = np.linspace(0, 1, num_segments + 1)
+    pts = np.vstack(
+        [
+            np.vstack((x, i * np.ones_like(x), np.zeros_like(x))).T
+            for i in range(num_lines)
+        ]
+    )
+    lines = np.vstack(
+        [
+            np.vstack((np.arange(num_segments), np.arange(1, num_segments + 1))).T
+            + i * (num_segments + 1)
+            for i in range(num_lines)
+        ]
+    )
+    tags = np.repeat(np.arange(num_lines), num_segments)
+    order = np.random.RandomState(0).permutation(tags.size)
+    const = pp.grids.constants.GmshConstants()
+    phys_names = {
+        i: const.PHYSICAL_NAME_FRACTURE_LINE + str(i) for i in range(num_lines)
+    }
+    return (
+        pts,
+        {"line": lines[order]},
+        {"line": {"gmsh:physical": tags[order]}},
+        phys_names,
+    )
+
+
+class TestCreate1dGrids(unittest.TestCase):
+    def test_line_grids(self):
+        pts, cells, cell_info, phys_names = line_mesh(3)
+        g_1d, tip_pts = mesh_2_grid.create_1d_grids(pts, cells, phys_names, cell_info)
+        self.assertTrue(len(g_1d) == 3)
+        self.assertTrue(tip_pts.size == 0)
+        for i, g in enumerate(g_1d):
+            self.assertTrue(g.frac_num == i)
+            self.assertTrue(g.num_cells == 4)
+            self.assertTrue(np.allclose(g.nodes, pts[g.global_point_ind].T))
+            self.assertTrue(np.allclose(g.nodes[1], i))
+
+    def test_worker_pool(self):
+        pts, cells, cell_info, phys_names = line_mesh(10)
+        g_serial, _ = mesh_2_grid.create_1d_grids(pts, cells, phys_names, cell_info)
+        g_pool, _ = mesh_2_grid.create_1d_grids(
+            pts, cells, phys_names, cell_info, num_workers=2
+        )
+        self.assertTrue(len(g_serial) == len(g_pool))
+        for g_s, g_p in zip(g_serial, g_pool):
+            self.assertTrue(g_s.frac_num == g_p.frac_num)
+            self.assertTrue(np.array_equal(g_s.global_point_ind, g_p.global_point_ind))
+            self.assertTrue(np.allclose(g_s.nodes, g_p.nodes))
+            self.assertTrue((g_s.cell_faces != g_p.cell_faces).nnz == 0)
+
+
+class TestCreate2dGrids(unittest.TestCase):
+    def test_face_tags(self):
+        g = pp.StructuredTriangleGrid([2, 2], [1, 1])
+        triangles = g.cell_nodes().tocsc().indices.reshape((-1, 3))
+        # A fracture along y = 0.5, and a boundary line at x = 0. The nodes of
+        # the lines are given in arbitrary order.
+        lines = np.array([[3, 4], [5, 4], [0, 3], [6, 3]])
+        tags = np.array([1, 1, 2, 2])
+        phys_names = {1: "FRACTURE_0", 2: "DOMAIN_BOUNDARY_0"}
+        g_2d = mesh_2_grid.create_2d_grids(
+            g.nodes.T,
+            {"triangle": triangles, "line": lines},
+            phys_names=phys_names,
+            cell_info={"line": {"gmsh:physical": tags}},
+        )[0]
+        g_2d.compute_geometry()
+
+        fc = g_2d.face_centers
+        frac = np.isclose(fc[1], 0.5)
+        self.assertTrue(np.array_equal(g_2d.tags["fracture_0_faces"], frac))
+        self.assertTrue(
+            np.array_equal(g_2d.tags["domain_boundary_0_faces"], np.isclose(fc[0], 0))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import porepy as pp
+from porepy.fracs import mesh_cache
+from porepy.grids.gmsh import gmsh_interface
+
+
+def grid_list():
+    frac = np.array([[1, 3], [2, 2]])
+    return pp.fracs.structured.cart_grid_2d([frac], [4, 4], physdims=[4, 4])
+
+
+class TestMeshCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_put_and_get(self):
+        cache = pp.MeshCache(self.folder)
+        gb = pp.meshing.grid_list_to_grid_bucket(grid_list())
+        key = cache.key(np.arange(3), {"mesh_size": 0.1})
+
+        self.assertTrue(cache.get(key) is None)
+        cache.put(key, gb)
+        gb_cached = cache.get(key)
+        self.assertTrue(gb_cached.num_cells() == gb.num_cells())
+        self.assertTrue(gb_cached.num_mortar_cells() == gb.num_mortar_cells())
+        g = gb_cached.grids_of_dimension(2)[0]
+        self.assertTrue(np.allclose(g.nodes, gb.grids_of_dimension(2)[0].nodes))
+        self.assertTrue(cache.size() > 0)
+
+        cache.clear()
+        self.assertTrue(cache.get(key) is None)
+        self.assertTrue(cache.size() == 0)
+
+    def test_key(self):
+        cache = pp.MeshCache(self.folder)
+        key = cache.key(np.arange(3), {"a": 1, "b": [None, "c"]})
+        # Equal descriptions give equal keys, regardless of the dictionary order
+        self.assertTrue(key == cache.key(np.arange(3), {"b": [None, "c"], "a": 1}))
+        self.assertFalse(key == cache.key(np.arange(1, 4), {"a": 1, "b": [None, "c"]}))
+        self.assertFalse(key == cache.key(np.arange(3), {"a": 2, "b": [None, "c"]}))
+        self.assertFalse(key == cache.key(np.arange(3.0), {"a": 1, "b": [None, "c"]}))
+        self.assertRaises(ValueError, cache.key, object())
+
+    def test_gmsh_version(self):
+        cache = pp.MeshCache(self.folder)
+        gb = pp.meshing.grid_list_to_grid_bucket(grid_list())
+        api = mock.Mock(__version__="4.5.0")
+        with mock.patch.object(gmsh_interface, "gmsh", api):
+            key = cache.key(np.arange(3))
+            cache.put(key, gb)
+            self.assertTrue(cache.get(cache.key(np.arange(3))) is not None)
+            # A new version of the gmsh Python API gives a cache miss
+            api.__version__ = "4.6.0"
+            self.assertTrue(cache.get(cache.key(np.arange(3))) is None)
+            # The executable is used if the API is turned off
+            with mock.patch.object(mesh_cache, "_GMSH_VERSIONS", {}):
+                with mock.patch.object(
+                    mesh_cache.read_config, "read", return_value={"gmsh_path": "x"}
+                ):
+                    mesh_cache._GMSH_VERSIONS["x"] = "4.6.0"
+                    key_exe = cache.key(np.arange(3), gmsh_args={"use_gmsh_api": False})
+                    self.assertFalse(key_exe == cache.key(np.arange(3)))
+                    mesh_cache._GMSH_VERSIONS["x"] = "4.7.0"
+                    self.assertFalse(
+                        key_exe
+                        == cache.key(np.arange(3), gmsh_args={"use_gmsh_api": False})
+                    )
+
+    def test_least_recently_used_eviction(self):
+        cache = pp.MeshCache(self.folder)
+        gb = pp.meshing.grid_list_to_grid_bucket(grid_list())
+        cache.put("a", gb)
+        entry_size = cache.size()
+
+        # Room for two meshes
+        cache.max_size = 2.5 * entry_size
+        os.utime(os.path.join(self.folder, "a"), (1, 1))
+        cache.put("b", gb)
+        os.utime(os.path.join(self.folder, "b"), (2, 2))
+        # Use the oldest mesh, which makes b the least recently used one
+        self.assertTrue(cache.get("a") is not None)
+        cache.put("c", gb)
+
+        self.assertTrue(cache.get("b") is None)
+        self.assertTrue(cache.get("a") is not None)
+        self.assertTrue(cache.get("c") is not None)
+        self.assertTrue(cache.size() <= cache.max_size)
+
+    def test_network_2d(self):
+        cache = pp.MeshCache(self.folder)
+        p = np.array([[1, 3], [2, 2]])
+        e = np.array([[0], [1]])
+        domain = {"xmin": 0, "xmax": 4, "ymin": 0, "ymax": 4}
+        network = pp.FractureNetwork2d(p, e, domain)
+        mesh_args = {"mesh_size_frac": 1}
+
+        with mock.patch("porepy.fracs.simplex.triangle_grid", return_value=grid_list()):
+            gb = network.mesh(mesh_args, do_snap=False, cache=cache)
+        # The second time, the mesh should be taken from the cache
+        with mock.patch(
+            "porepy.fracs.simplex.triangle_grid", side_effect=RuntimeError
+        ) as triangle_grid:
+            gb_cached = network.mesh(mesh_args, do_snap=False, cache=cache)
+            self.assertTrue(gb_cached.num_cells() == gb.num_cells())
+            # Changed mesh arguments require a new mesh
+            self.assertRaises(
+                RuntimeError,
+                network.mesh,
+                {"mesh_size_frac": 0.5},
+                do_snap=False,
+                cache=cache,
+            )
+            self.assertTrue(triangle_grid.call_count == 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
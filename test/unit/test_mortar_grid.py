@@ -68,5 +68,59 @@ class TestGridMappings1d(unittest.TestCase):
         self.assertTrue(np.all(mg.slave_to_mortar_int().A == [0, 1]))
 
 
+class TestProjectionCache(unittest.TestCase):
+    def setUp(self):
+        f = np.array([[0, 2], [1, 1]])
+        gb = pp.meshing.cart_grid([f], [2, 2])
+        _, d = list(gb.edges())[0]
+        self.mg = d["mortar_grid"]
+
+    def test_projections_vector(self):
+        mg = self.mg
+        kinds = [
+            "master_to_mortar_int",
+            "master_to_mortar_avg",
+            "slave_to_mortar_int",
+            "slave_to_mortar_avg",
+            "mortar_to_master_int",
+            "mortar_to_master_avg",
+            "mortar_to_slave_int",
+            "mortar_to_slave_avg",
+        ]
+        for kind in kinds:
+            scalar = getattr(mg, kind)()
+            for nd in (1, 2, 3):
+                proj = getattr(mg, kind)(nd)
+                known = sps.kron(scalar, sps.eye(nd))
+                self.assertTrue(sps.isspmatrix_csc(proj))
+                self.assertTrue(np.sum(proj != known) == 0)
+                # The projection is computed only once
+                self.assertTrue(getattr(mg, kind)(nd) is proj)
+
+        self.assertTrue(np.allclose(mg.mortar_to_slave_int().sum(axis=0), 1))
+
+    def test_cache_is_read_only(self):
+        proj = self.mg.master_to_mortar_int(2)
+        with self.assertRaises(ValueError):
+            proj.data[0] = 2
+
+    def test_update_clears_cache(self):
+        mg = self.mg
+        proj = mg.slave_to_mortar_int(2)
+        old = mg.master_to_mortar_int()
+        mg.update_slave({1: 2 * sps.identity(2), 2: 2 * sps.identity(2)})
+        new = mg.slave_to_mortar_int(2)
+        self.assertFalse(new is proj)
+        self.assertTrue(np.allclose(new.A, 2 * proj.A))
+
+        # Reassignment of the mappings also invalidates the cache
+        mg._master_to_mortar_int = 3 * mg._master_to_mortar_int
+        self.assertTrue(np.allclose(mg.master_to_mortar_int().A, 3 * old.A))
+
+        self.assertTrue("cache" in mg.memory_report())
+        mg.clear_cache()
+        self.assertFalse("cache" in mg.memory_report())
+
+
 if __name__ == "__main__":
     unittest.main()
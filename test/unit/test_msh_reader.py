@@ -0,0 +1,217 @@
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+
+from porepy.grids.gmsh import msh_reader
+
+# A square split into four triangles, in the .msh 4.1 format. The nodes of the
+# surface are not given in the order of the node numbers, and the surface
+# belongs to two physical groups.
+MSH_4_1 = """$MeshFormat
+4.1 0 8
+$EndMeshFormat
+$PhysicalNames
+4
+0 5 "corner"
+1 2 "bottom"
+2 3 "domain"
+2 4 "again"
+$EndPhysicalNames
+$Entities
+4 1 1 0
+1 0 0 0 1 5
+2 1 0 0 0
+3 1 1 0 0
+4 0 1 0 0
+1 0 0 0 1 0 0 1 2 2 1 -2
+1 0 0 0 1 1 0 2 3 4 1 1
+$EndEntities
+$Nodes
+2 5 1 5
+0 1 0 1
+1
+0 0 0
+2 1 0 4
+5
+2
+3
+4
+0.5 0.5 0
+1 0 0
+1 1 0
+0 1 0
+$EndNodes
+$Elements
+3 6 1 6
+0 1 15 1
+1 1
+1 1 1 1
+2 1 2
+2 1 2 4
+3 1 2 5
+4 2 3 5
+5 3 4 5
+6 4 1 5
+$EndElements
+"""
+
+# Nodes and elements in the .msh 2.2 format. The element types are mixed, and
+# the number of tags varies.
+NODES_2_2 = np.array(
+    [[1, 0, 0, 0], [2, 1, 0, 0], [3, 1, 1, 0], [4, 0, 1, 0], [5, 0.5, 0.5, 0]]
+)
+ELEMENTS_2_2 = [
+    [1, 2, 2, 3, 1, 1, 2, 5],
+    [2, 1, 2, 2, 1, 1, 2],
+    [3, 2, 2, 3, 1, 2, 3, 5],
+    [4, 2, 2, 4, 1, 2, 3, 5],
+    [5, 15, 0, 1],
+    [6, 2, 3, 3, 1, 0, 3, 4, 5],
+]
+
+
+def msh_2_2_ascii():
+    s = "$MeshFormat\n2.2 0 8\n$EndMeshFormat\n"
+    s += '$PhysicalNames\n1\n2 3 "domain"\n$EndPhysicalNames\n'
+    s += "$Nodes\n5\n"
+    for row in NODES_2_2:
+        s += str(int(row[0])) + " " + " ".join(str(x) for x in row[1:]) + "\n"
+    s += "$EndNodes\n$Elements\n6\n"
+    for row in ELEMENTS_2_2:
+        s += " ".join(str(x) for x in row) + "\n"
+    s += "$EndElements\n"
+    return s.encode()
+
+
+def msh_2_2_binary():
+    s = b"$MeshFormat\n2.2 1 8\n" + np.int32(1).tobytes() + b"\n$EndMeshFormat\n"
+    s += b'$PhysicalNames\n1\n2 3 "domain"\n$EndPhysicalNames\n'
+    s += b"$Nodes\n5\n"
+    for row in NODES_2_2:
+        s += np.int32(row[0]).tobytes() + row[1:].astype(np.float64).tobytes()
+    s += b"\n$EndNodes\n$Elements\n6\n"
+    for row in ELEMENTS_2_2:
+        # Each element is written as a block with a header
+        s += np.array([row[1], 1, row[2]], dtype=np.int32).tobytes()
+        s += np.array([row[0]] + row[3:], dtype=np.int32).tobytes()
+    s += b"\n$EndElements\n"
+    return s
+
+
+def msh_4_1_binary():
+    def ints(*v):
+        return np.array(v, dtype=np.int32).tobytes()
+
+    def size_t(*v):
+        return np.array(v, dtype=np.uint64).tobytes()
+
+    def doubles(*v):
+        return np.array(v, dtype=np.float64).tobytes()
+
+    s = b"$MeshFormat\n4.1 1 8\n" + ints(1) + b"\n$EndMeshFormat\n"
+    s += MSH_4_1[MSH_4_1.index("$PhysicalNames") : MSH_4_1.index("$Entities")].encode()
+    s += b"$Entities\n" + size_t(4, 1, 1, 0)
+    s += ints(1) + doubles(0, 0, 0) + size_t(1) + ints(5)
+    for i, x in enumerate([[1, 0, 0], [1, 1, 0], [0, 1, 0]]):
+        s += ints(i + 2) + doubles(*x) + size_t(0)
+    s += ints(1) + doubles(0, 0, 0, 1, 0, 0) + size_t(1) + ints(2)
+    s += size_t(2) + ints(1, -2)
+    s += ints(1) + doubles(0, 0, 0, 1, 1, 0) + size_t(2) + ints(3, 4)
+    s += size_t(1) + ints(1)
+    s += b"\n$EndEntities\n$Nodes\n" + size_t(2, 5, 1, 5)
+    s += ints(0, 1, 0) + size_t(1) + size_t(1) + doubles(0, 0, 0)
+    s += ints(2, 1, 0) + size_t(4) + size_t(5, 2, 3, 4)
+    s += doubles(0.5, 0.5, 0, 1, 0, 0, 1, 1, 0, 0, 1, 0)
+    s += b"\n$EndNodes\n$Elements\n" + size_t(3, 6, 1, 6)
+    s += ints(0, 1, 15) + size_t(1) + size_t(1, 1)
+    s += ints(1, 1, 1) + size_t(1) + size_t(2, 1, 2)
+    s += ints(2, 1, 2) + size_t(4)
+    s += size_t(3, 1, 2, 5, 4, 2, 3, 5, 5, 3, 4, 5, 6, 4, 1, 5)
+    s += b"\n$EndElements\n"
+    return s
+
+
+class TestMshReader(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.folder, "mesh.msh")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def read(self, content, **kwargs):
+        with open(self.file_name, "wb") as f:
+            f.write(content)
+        return msh_reader.read(self.file_name, **kwargs)
+
+    def check_2_2(self, mesh):
+        pts, cells, cell_info, phys_names = mesh
+        self.assertTrue(np.allclose(pts, NODES_2_2[:, 1:]))
+        self.assertTrue(
+            np.array_equal(
+                cells["triangle"],
+                np.array([[0, 1, 4], [1, 2, 4], [1, 2, 4], [2, 3, 4]]),
+            )
+        )
+        self.assertTrue(np.array_equal(cells["line"], np.array([[0, 1]])))
+        self.assertTrue(np.array_equal(cells["vertex"], np.array([[0]])))
+        info = cell_info["triangle"]
+        self.assertTrue(np.array_equal(info["gmsh:physical"], [3, 3, 4, 3]))
+        self.assertTrue(np.array_equal(info["gmsh:geometrical"], [1, 1, 1, 1]))
+        self.assertTrue(np.array_equal(cell_info["line"]["gmsh:physical"], [2]))
+        self.assertTrue(np.array_equal(cell_info["vertex"]["gmsh:physical"], [0]))
+        self.assertTrue(phys_names == {3: "domain"})
+
+    def check_4_1(self, mesh):
+        pts, cells, cell_info, phys_names = mesh
+        known_pts = np.array(
+            [[0, 0, 0], [0.5, 0.5, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]]
+        )
+        self.assertTrue(np.allclose(pts, known_pts))
+        # The triangles are repeated for both physical groups of the surface
+        tri = np.array([[0, 2, 1], [2, 3, 1], [3, 4, 1], [4, 0, 1]])
+        self.assertTrue(np.array_equal(cells["triangle"], np.vstack((tri, tri))))
+        self.assertTrue(np.array_equal(cells["line"], np.array([[0, 2]])))
+        self.assertTrue(np.array_equal(cells["vertex"], np.array([[0]])))
+        info = cell_info["triangle"]
+        self.assertTrue(np.array_equal(info["gmsh:physical"], [3] * 4 + [4] * 4))
+        self.assertTrue(np.array_equal(info["gmsh:geometrical"], [1] * 8))
+        self.assertTrue(np.array_equal(cell_info["line"]["gmsh:physical"], [2]))
+        self.assertTrue(np.array_equal(cell_info["vertex"]["gmsh:physical"], [5]))
+        known_names = {5: "corner", 2: "bottom", 3: "domain", 4: "again"}
+        self.assertTrue(phys_names == known_names)
+
+    def test_2_2_ascii(self):
+        # Small chunks, to parse the elements in several parts
+        for chunk_size in (2, 3, 100):
+            self.check_2_2(self.read(msh_2_2_ascii(), chunk_size=chunk_size))
+
+    def test_2_2_binary(self):
+        self.check_2_2(self.read(msh_2_2_binary()))
+
+    def test_4_1_ascii(self):
+        for chunk_size in (1, 100):
+            self.check_4_1(self.read(MSH_4_1.encode(), chunk_size=chunk_size))
+
+    def test_4_1_binary(self):
+        self.check_4_1(self.read(msh_4_1_binary()))
+
+    def test_skip_unknown_section(self):
+        content = MSH_4_1.replace(
+            "$Nodes", "$Comments\n$Nodes is not a section here\n$EndComments\n$Nodes"
+        )
+        self.check_4_1(self.read(content.encode()))
+
+    def test_unsupported_version(self):
+        content = MSH_4_1.replace("4.1 0 8", "3.0 0 8").encode()
+        self.assertRaises(ValueError, self.read, content)
+
+    def test_truncated_file(self):
+        content = MSH_4_1[: MSH_4_1.index("4 2 3 5")].encode()
+        self.assertRaises(ValueError, self.read, content)
+
+
+if __name__ == "__main__":
+    unittest.main()
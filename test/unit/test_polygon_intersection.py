@@ -1,7 +1,9 @@
 import numpy as np
 import unittest
+from unittest import mock
 
 import porepy as pp
+from porepy.geometry import intersections
 from test import test_utils
 
 
@@ -60,6 +62,28 @@ class BasicTest(unittest.TestCase):
         self.assertTrue(np.allclose(new_pts, pts_known))
         self.assertTrue(np.allclose(new_lines, lines_known))
 
+    def test_tags_and_outside_lines(self):
+        # One line inside, one outside, and one crossing the boundary
+        polygon = np.array([[0.0, 1.0, 1.0, 0.0], [0.0, 0.0, 1.0, 1.0]])
+        pts = np.array([[0.2, 0.8, 1.5, 2.0, 0.5, 1.5], [0.2, 0.6, 1.5, 2.0, 0.5, 0.5]])
+        lines = np.array([[0, 2, 4], [1, 3, 5], [7, 8, 9]])
+
+        new_pts, new_lines = pp.constrain_geometry.lines_by_polygon(polygon, pts, lines)
+        pts_known = np.array([[0.2, 0.8, 0.5, 1.0], [0.2, 0.6, 0.5, 0.5]])
+        lines_known = np.array([[0, 2], [1, 3], [7, 9]])
+
+        self.assertTrue(np.allclose(new_pts, pts_known))
+        self.assertTrue(np.array_equal(new_lines, lines_known))
+
+    def test_all_lines_outside(self):
+        polygon = np.array([[0.0, 1.0, 1.0, 0.0], [0.0, 0.0, 1.0, 1.0]])
+        pts = np.array([[1.5, 2.0], [1.5, 2.0]])
+        lines = np.array([[0], [1], [3]])
+
+        new_pts, new_lines = pp.constrain_geometry.lines_by_polygon(polygon, pts, lines)
+        self.assertTrue(new_pts.shape == (2, 0))
+        self.assertTrue(new_lines.shape == (3, 0))
+
 
 class TestIntersectionPolygonsEmbeddedIn3d(unittest.TestCase):
     def test_single_fracture(self):
@@ -778,6 +802,79 @@ class TestIntersectionPolygonsEmbeddedIn3d(unittest.TestCase):
         self.assertTrue(test_utils.compare_arrays(new_pt, known_points))
 
 
+class TestClassifyPolygonPairs(unittest.TestCase):
+    """ Tests of the vectorized analysis of polygon pairs used in polygons_3d."""
+
+    def classify(self, polys):
+        centers, normals = intersections._polygon_centers_and_normals(
+            polys, np.arange(len(polys))
+        )
+        pairs = np.array([[0], [1]])
+        return intersections._classify_polygon_pairs(polys, centers, normals, pairs)
+
+    def test_planes_cross_polygons_separated(self):
+        f_1 = np.array([[-1, 1, 1, -1], [0, 0, 0, 0], [-1, -1, 1, 1]])
+        f_2 = np.array([[0, 0, 0, 0], [-1, 1, 1, -1], [2, 2, 3, 3]])
+        keep, resolved, *rest = self.classify([f_1, f_2])
+        self.assertFalse(keep[0])
+        self.assertFalse(resolved[0])
+
+    def test_generic_intersection(self):
+        f_1 = np.array([[-1, 1, 1, -1], [0, 0, 0, 0], [-1, -1, 1, 1]])
+        f_2 = np.array([[0, 0, 0, 0], [-1, 1, 1, -1], [-0.7, -0.7, 0.8, 0.8]])
+        keep, resolved, isect, seg_main, seg_other = self.classify([f_1, f_2])
+        self.assertTrue(keep[0] and resolved[0])
+        known = np.array([[0, 0, -0.7], [0, 0, 0.8]]).T
+        self.assertTrue(test_utils.compare_arrays(isect[:, 0], known))
+        # The points are in the interior of f_1, on segments 0 and 2 of f_2
+        self.assertTrue(np.all(seg_main[0] == -1))
+        self.assertTrue(np.all(np.sort(seg_other[0]) == [0, 2]))
+
+    def test_vertex_in_plane_not_resolved(self):
+        f_1 = np.array([[-1, 1, 1, -1], [0, 0, 0, 0], [-1, -1, 1, 1]])
+        f_2 = np.array([[0, 0, 0, 0], [0, 1, 1, 0], [-0.7, -0.7, 0.8, 0.8]])
+        keep, resolved, *rest = self.classify([f_1, f_2])
+        self.assertTrue(keep[0])
+        self.assertFalse(resolved[0])
+
+    def test_random_network(self):
+        # Compare with an analysis of the polygons pair by pair
+        rng = np.random.RandomState(0)
+        polys = []
+        for _ in range(60):
+            normal = rng.randn(3)
+            t_1 = np.cross(normal, rng.randn(3))
+            t_1 /= np.linalg.norm(t_1)
+            t_2 = np.cross(normal, t_1) / np.linalg.norm(normal)
+            angles = np.linspace(0, 2 * np.pi, 6, endpoint=False)
+            polys.append(
+                rng.rand(3, 1)
+                + 0.2 * (np.outer(t_1, np.cos(angles)) + np.outer(t_2, np.sin(angles)))
+            )
+
+        def pairwise(polys, centers, normals, pairs):
+            num_pairs = pairs.shape[1]
+            return (
+                np.ones(num_pairs, dtype=np.bool),
+                np.zeros(num_pairs, dtype=np.bool),
+                np.zeros((3, num_pairs, 2)),
+                -np.ones((num_pairs, 2), dtype=np.int),
+                -np.ones((num_pairs, 2), dtype=np.int),
+            )
+
+        result = pp.intersections.polygons_3d(polys)
+        with mock.patch.object(intersections, "_classify_polygon_pairs", pairwise):
+            known = pp.intersections.polygons_3d(polys)
+
+        self.assertTrue(len(result[3]) > 0)
+        self.assertTrue(result[3] == known[3])
+        self.assertTrue(np.allclose(result[0], known[0]))
+        for i in range(len(polys)):
+            self.assertTrue(np.array_equal(result[1][i], known[1][i]))
+            self.assertTrue(result[2][i] == known[2][i])
+            self.assertTrue(result[4][i] == known[4][i])
+
+
 class TestPolygonPolyhedronIntersection(unittest.TestCase):
     def setUp(self):
         west = np.array([[0, 0, 0, 0], [0, 1, 1, 0], [0, 0, 1, 1]])
@@ -10,6 +10,28 @@ import unittest
 from porepy.utils import setmembership
 
 
+def unique_columns_brute_force(mat, tol, exponent=2):
+    # Reference implementation, comparing each point with all kept points
+    nd, num_pts = mat.shape
+    keep = [0]
+    old_2_new = np.zeros(num_pts, dtype=np.int)
+    for i in range(1, num_pts):
+        dist = np.power(
+            np.sum(
+                np.power(np.abs(mat[:, keep] - mat[:, i].reshape((-1, 1))), exponent),
+                axis=0,
+            ),
+            1 / exponent,
+        )
+        proximate = np.flatnonzero(dist < tol * np.sqrt(nd))
+        if proximate.size > 0:
+            old_2_new[i] = proximate[0]
+        else:
+            old_2_new[i] = len(keep)
+            keep.append(i)
+    return mat[:, keep], np.array(keep), old_2_new
+
+
 class TestUniqueRows(unittest.TestCase):
     def test_unique_rows_1(self):
 
@@ -179,6 +201,37 @@ class TestUniqueColumns(unittest.TestCase):
                 np.min(np.sum(np.abs(p_known[:, i] - p_unique), axis=0)) == 0
             )
 
+    def test_chains_of_close_points(self):
+        # Each point is close to its neighbors only. The second point is
+        # merged with the first, which makes the third one preserved.
+        x = np.array([0, 0.6, 1.2, 1.8, 5, 5.5, 4.9, 0.1])
+        for nd in (2, 3):
+            p = np.vstack((x, np.zeros((nd - 1, x.size))))
+            p_unique, new_2_old, old_2_new = setmembership.unique_columns_tol(
+                p, tol=0.5
+            )
+            self.assertTrue(np.allclose(p_unique, p[:, [0, 2, 4]]))
+            self.assertTrue(np.array_equal(new_2_old, [0, 2, 4]))
+            self.assertTrue(np.array_equal(old_2_new, [0, 0, 1, 1, 2, 2, 2, 0]))
+
+    def test_random_points(self):
+        rng = np.random.RandomState(0)
+        for nd in (1, 2, 3):
+            # Clusters of points, of size comparable to the tolerance
+            p = np.round(rng.rand(nd, 300) * 10) / 10 + 0.03 * rng.rand(nd, 300)
+            for tol, exponent in ((0.01, 2), (0.02, 2), (0.02, 1)):
+                known = unique_columns_brute_force(p, tol, exponent)
+                computed = setmembership.unique_columns_tol(p, tol, exponent)
+                for a, b in zip(known, computed):
+                    self.assertTrue(np.array_equal(a, b))
+
+    def test_integers_large_tolerance(self):
+        p = np.array([[0, 1, 3, 4, 0], [0, 0, 0, 0, 1]])
+        known = unique_columns_brute_force(p, 0.8)
+        computed = setmembership.unique_columns_tol(p, 0.8)
+        for a, b in zip(known, computed):
+            self.assertTrue(np.array_equal(a, b))
+
 
 if __name__ == "__main__":
     unittest.main()
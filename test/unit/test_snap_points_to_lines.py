@@ -67,6 +67,45 @@ class TestPointSnapping(unittest.TestCase):
         p_known = np.array([[0, 1, 0.5, 0.5], [0, 0, 0, 1], [0, 1, 0.5, 1]])
         self.assertTrue(np.allclose(p_new, p_known))
 
+    def test_snap_to_later_segment(self):
+        # The point is first snapped to the horizontal segment, and then comes
+        # close to the vertical one.
+        p = np.array([[0, 1, 0.5009, 0.5009], [0, 0, -1, -1e-4]])
+        e = np.array([[0, 2], [1, 3]])
+        tol = 1e-3
+        p_snap = np.array([[0.5], [8e-4]])
+
+        p_new = pp.constrain_geometry.snap_points_to_segments(p, e, tol, p_snap)
+        p_known = np.array([[0.5009], [-1e-4]])
+        self.assertTrue(np.allclose(p_new, p_known))
+
+    def test_snap_to_moved_segment(self):
+        # Snapping the start of the second segment moves the segment close to
+        # the start of the third segment.
+        p = np.array([[0, 1, 0.5, 0.5, 0.5009, 0.9], [0, 0, 5e-4, 1, -4e-4, -0.5]])
+        e = np.array([[0, 2, 4], [1, 3, 5]])
+        tol = 1e-3
+
+        p_new, num_snaps = pp.constrain_geometry.snap_points_to_segments(
+            p, e, tol, return_num_snaps=True
+        )
+        p_known = np.array([[0, 1, 0.5, 0.5, 0.5, 0.9], [0, 0, 0, 1, 0, -0.5]])
+        self.assertTrue(np.allclose(p_new, p_known))
+        self.assertTrue(num_snaps == 3)
+
+    def test_num_snaps(self):
+        p = np.array([[0, 1, 0.5, 0.5], [0, 0, 1e-3, 1]])
+        e = np.array([[0, 2], [1, 3]])
+
+        _, num_snaps = pp.constrain_geometry.snap_points_to_segments(
+            p, e, 1e-2, return_num_snaps=True
+        )
+        self.assertTrue(num_snaps == 1)
+        _, num_snaps = pp.constrain_geometry.snap_points_to_segments(
+            p, e, 1e-4, return_num_snaps=True
+        )
+        self.assertTrue(num_snaps == 0)
+
 
 if __name__ == "__main__":
     unittest.main()
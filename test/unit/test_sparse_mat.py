@@ -303,5 +303,14 @@ class TestSparseMath(unittest.TestCase):
 
         self.assertTrue(np.sum(A != A_t) == 0)
 
+    def test_kron_eye(self):
+        A = sps.csr_matrix(np.array([[1, 0, 2], [0, 0, 3]]))
+        for nd in (1, 2, 3):
+            B = sparse_mat.kron_eye(A, nd)
+            B_t = sps.kron(A, sps.eye(nd))
+            self.assertTrue(B.getformat() == "csc")
+            self.assertTrue(B.shape == (2 * nd, 3 * nd))
+            self.assertTrue(np.sum(B != B_t) == 0)
+
     if __name__ == "__main__":
         unittest.main()
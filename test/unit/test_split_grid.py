@@ -0,0 +1,61 @@
+import numpy as np
+import unittest
+
+import porepy as pp
+
+
+def x_intersection(offset=0):
+    f_1 = np.array([[1, 3], [2, 2]])
+    f_2 = np.array([[2, 2], [1, 3]])
+    gb = pp.meshing.cart_grid([f_1, f_2], [4, 4], offset=offset)
+    return gb.grids_of_dimension(2)[0]
+
+
+class TestDuplicateNodes(unittest.TestCase):
+    def test_x_intersection(self):
+        g = x_intersection()
+        # The intersection node is split in four, the tips are not split
+        self.assertTrue(g.num_nodes == 28)
+        self.assertTrue(g.nodes.shape[1] == 28)
+        self.assertTrue(g.face_nodes.shape == (28, g.num_faces))
+
+        # The four cells around the intersection have different copies of
+        # the intersection node
+        cn = g.cell_nodes().tocsc()
+        at_center = np.flatnonzero(np.all(np.isclose(g.nodes[:2], 2), axis=0))
+        self.assertTrue(at_center.size == 4)
+        cells = np.unique(cn[at_center].indices)
+        self.assertTrue(cells.size == 4)
+        for n in at_center:
+            self.assertTrue(cn[n].nnz == 1)
+
+        # The tip nodes are shared by all their cells
+        at_tip = np.flatnonzero(np.all(np.isclose(g.nodes[:2], [[1], [2]]), axis=0))
+        self.assertTrue(at_tip.size == 1)
+        self.assertTrue(cn[at_tip[0]].nnz == 4)
+
+    def test_faces_of_copies(self):
+        g = x_intersection()
+        # All nodes of a cell are nodes of the faces of the cell
+        cf = np.abs(g.cell_faces).tocsc()
+        fn = g.face_nodes.tocsc()
+        for c in range(g.num_cells):
+            faces = cf.indices[cf.indptr[c] : cf.indptr[c + 1]]
+            nodes, count = np.unique(fn[:, faces].indices, return_counts=True)
+            # In 2d, each node of a cell is shared by two of its faces
+            self.assertTrue(np.all(count == 2))
+            self.assertTrue(nodes.size == 4)
+
+    def test_offset(self):
+        offset = 0.1
+        g = x_intersection(offset)
+        near_center = np.all(np.abs(g.nodes[:2] - 2) < 2 * offset, axis=0)
+        moved = g.nodes[:2, near_center] - 2
+        # The copies are moved diagonally into the cells
+        self.assertTrue(moved.shape[1] == 4)
+        self.assertTrue(np.allclose(np.abs(moved), offset / np.sqrt(2)))
+        self.assertTrue(np.unique(np.sign(moved), axis=1).shape[1] == 4)
+
+
+if __name__ == "__main__":
+    unittest.main()